@@ -1,7 +1,9 @@
 import logging
+from contextlib import suppress
 from multiprocessing import Manager, Queue, Value
 from queue import Empty
 from time import time
+from typing import List
 
 from helperFunctions.process import (
     ExceptionSafeProcess, check_worker_exceptions, start_single_worker, terminate_process_and_children
@@ -21,6 +23,11 @@ class AnalysisBasePlugin(BasePlugin):  # pylint: disable=too-many-instance-attri
     '''
     This is the base plugin. All plugins should be subclass of this.
     recursive flag: If True (default) recursively analyze included files
+
+    Plugins that override :meth:`process_objects` can analyze several files at once (e.g. in the warm containers of a
+    :class:`helperFunctions.docker.ContainerExecutor`): if ``batch_size`` is set in the plugin's section of the config,
+    a worker takes up to ``batch_size`` queued files at once. If the analysis of a batch fails, its files are analyzed
+    again one by one, so that one bad file does not fail the others.
     '''
     VERSION = 'not set'
     SYSTEM_VERSION = None
@@ -36,6 +43,7 @@ class AnalysisBasePlugin(BasePlugin):  # pylint: disable=too-many-instance-attri
         self.stop_condition = Value('i', 0)
         self.workers = []
         self.thread_count = int(self.config[self.NAME]['threads'])
+        self.batch_size = self.config.getint(self.NAME, 'batch_size', fallback=1)
         self.active = [Value('i', 0) for _ in range(self.thread_count)]
         if self.timeout is None:
             self.timeout = timeout
@@ -65,11 +73,20 @@ class AnalysisBasePlugin(BasePlugin):  # pylint: disable=too-many-instance-attri
         '''
         return file_object
 
+    def process_objects(self, file_objects: List[FileObject]) -> List[FileObject]:
+        '''
+        This function can be implemented by plugins that analyze several files at once (see ``batch_size``)
+        '''
+        return [self.process_object(file_object) for file_object in file_objects]
+
     def analyze_file(self, file_object):
         fo = self.process_object(file_object)
         fo = self._add_plugin_version_and_timestamp_to_analysis_result(fo)
         return fo
 
+    def analyze_files(self, file_objects: List[FileObject]) -> List[FileObject]:
+        return [self._add_plugin_version_and_timestamp_to_analysis_result(fo) for fo in self.process_objects(file_objects)]
+
     def _add_plugin_version_and_timestamp_to_analysis_result(self, fo):  # pylint: disable=invalid-name
         fo.processed_analysis[self.NAME].update(self.init_dict())
         return fo
@@ -123,6 +140,9 @@ class AnalysisBasePlugin(BasePlugin):  # pylint: disable=too-many-instance-attri
         finished_task = self.analyze_file(task)
         result.append(finished_task)
 
+    def process_next_objects(self, tasks, result):
+        result.extend(self.analyze_files(tasks))
+
     @staticmethod
     def timeout_happened(process):
         return process.is_alive()
@@ -141,6 +161,30 @@ class AnalysisBasePlugin(BasePlugin):  # pylint: disable=too-many-instance-attri
             self.out_queue.put(result.pop())
             logging.debug('Worker {}: Finished {} analysis on {}'.format(worker_id, self.NAME, next_task.uid))
 
+    def worker_processing_batch_with_timeout(self, worker_id, tasks):
+        manager = Manager()
+        result = manager.list()
+        process = ExceptionSafeProcess(target=self.process_next_objects, args=(tasks, result))
+        process.start()
+        process.join(timeout=self.timeout * len(tasks))
+        if self.timeout_happened(process) or process.exception:
+            cause = 'Timeout' if self.timeout_happened(process) else 'Exception'
+            terminate_process_and_children(process)
+            logging.warning('Worker {}: {} during {} analysis of a batch: analyzing the files one by one'.format(worker_id, cause, self.NAME))
+            for task in tasks:
+                self.worker_processing_with_timeout(worker_id, task)
+        else:
+            for finished_task in result:
+                self.out_queue.put(finished_task)
+            logging.debug('Worker {}: Finished {} analysis on {} files'.format(worker_id, self.NAME, len(tasks)))
+
+    def _get_queued_tasks(self, max_count: int) -> List[FileObject]:
+        tasks = []
+        with suppress(Empty):
+            while len(tasks) < max_count:
+                tasks.append(self.in_queue.get_nowait())
+        return tasks
+
     def _handle_failed_analysis(self, fw_object, process, worker_id, cause: str):
         terminate_process_and_children(process)
         fw_object.analysis_exception = (self.NAME, '{} occurred during analysis'.format(cause))
@@ -156,8 +200,14 @@ class AnalysisBasePlugin(BasePlugin):  # pylint: disable=too-many-instance-attri
                 self.active[worker_id].value = 0
             else:
                 self.active[worker_id].value = 1
-                next_task.processed_analysis.update({self.NAME: {}})
-                self.worker_processing_with_timeout(worker_id, next_task)
+                batch = [next_task, *self._get_queued_tasks(self.batch_size - 1)]
+                for task in batch:
+                    task.processed_analysis.update({self.NAME: {}})
+                if len(batch) > 1:
+                    logging.debug('Worker {}: Begin {} analysis on a batch of {} files'.format(worker_id, self.NAME, len(batch)))
+                    self.worker_processing_batch_with_timeout(worker_id, batch)
+                else:
+                    self.worker_processing_with_timeout(worker_id, next_task)
 
         logging.debug('worker {} stopped'.format(worker_id))
 
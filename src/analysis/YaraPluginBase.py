@@ -1,16 +1,32 @@
 import json
 import logging
-import re
-import subprocess
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import yara
 
 from analysis.PluginBase import AnalysisBasePlugin, PluginInitException
 from helperFunctions.fileSystem import get_src_dir
+from helperFunctions.yara_literals import get_hex_strings
+
+# the rules of all YARA plugins compiled into one file (one namespace per plugin, see compile_yara_signatures.py) and the
+# list of the namespaces it contains
+SHARED_SIGNATURE_FILE = 'shared_signatures.yc'
+SHARED_NAMESPACES_FILE = 'shared_signatures.json'
+# the identifiers of the hex strings of each rule of a plugin (see compile_yara_signatures.py)
+HEX_STRINGS_FILE_SUFFIX = '.hex_strings.json'
+# key in the temporary data of a file object: matches of the shared rules (per namespace) that were not used yet
+SHARED_MATCHES_KEY = 'shared_yara_matches'
 
 
 class YaraBasePlugin(AnalysisBasePlugin):
     '''
     This should be the base for all YARA based analysis plugins
+
+    If the shared signature file contains the rules of the plugin, the first YARA plugin that analyzes a file scans it
+    with the rules of all YARA plugins at once. The matches of the other scheduled YARA plugins are stored in the
+    temporary data of the file object, which is passed from plugin to plugin, so that the file is only read and
+    scanned once. If no other YARA plugin is scheduled, the file is scanned with the (smaller) rules of the plugin.
     '''
     NAME = 'Yara_Base_Plugin'
     DESCRIPTION = 'this is a Yara plugin'
@@ -26,32 +42,84 @@ class YaraBasePlugin(AnalysisBasePlugin):
         if self.signature_path and not Path(self.signature_path).exists():
             logging.error(f'Signature file {self.signature_path} not found. Did you run "compile_yara_signatures.py"?')
             raise PluginInitException(plugin=self)
+        # the rules are loaded only once: the worker processes inherit them
+        self.rules = self._load_rules(self.signature_path) if self.signature_path else None
+        self.namespace = Path(self.signature_path).stem if self.signature_path else None
+        self.shared_rules, self.shared_namespaces = self._load_shared_rules() if self.signature_path else (None, set())
+        self.hex_strings = {
+            namespace: self._load_hex_strings(namespace) for namespace in self.shared_namespaces | {self.namespace}
+        } if self.signature_path else {}
         self.SYSTEM_VERSION = self.get_yara_system_version()  # pylint: disable=invalid-name
         super().__init__(plugin_administrator, config=config, recursive=recursive, plugin_path=plugin_path)
 
     def get_yara_system_version(self):
-        with subprocess.Popen(['yara', '--version'], stdout=subprocess.PIPE) as process:
-            yara_version = process.stdout.readline().decode().strip()
-
         access_time = int(Path(self.signature_path).stat().st_mtime)
-        return f'{yara_version}_{access_time}'
+        return f'{yara.__version__}_{access_time}'
+
+    def _load_rules(self, signature_path: str) -> yara.Rules:
+        try:
+            return yara.load(signature_path) if _is_compiled(signature_path) else yara.compile(filepath=signature_path)
+        except yara.Error as error:
+            logging.error(f'Could not load signature file {signature_path}: {error}')
+            raise PluginInitException(plugin=self) from error
+
+    def _load_shared_rules(self) -> Tuple[Optional[yara.Rules], Set[str]]:
+        shared_signature_path = Path(self.signature_path).parent / SHARED_SIGNATURE_FILE
+        namespaces_path = Path(self.signature_path).parent / SHARED_NAMESPACES_FILE
+        if not shared_signature_path.is_file() or not namespaces_path.is_file():
+            return None, set()
+        namespaces = set(json.loads(namespaces_path.read_text()))
+        if self.namespace not in namespaces:
+            return None, set()
+        if shared_signature_path.stat().st_mtime < Path(self.signature_path).stat().st_mtime:
+            logging.warning(f'[{self.NAME}] Shared signature file is outdated. Did you run "compile_yara_signatures.py"?')
+            return None, set()
+        try:
+            return yara.load(str(shared_signature_path)), namespaces
+        except yara.Error as error:
+            logging.warning(f'[{self.NAME}] Could not load shared signature file {shared_signature_path}: {error}')
+            return None, set()
+
+    def _load_hex_strings(self, namespace: str) -> Dict[str, List[str]]:
+        hex_strings_path = Path(self.signature_path).parent / f'{namespace}{HEX_STRINGS_FILE_SUFFIX}'
+        if hex_strings_path.is_file():
+            return json.loads(hex_strings_path.read_text())
+        if namespace == self.namespace and not _is_compiled(self.signature_path):
+            return get_hex_strings(Path(self.signature_path).read_text(errors='replace'))
+        return {}
 
     def process_object(self, file_object):
-        if self.signature_path is not None:
-            compiled_flag = '-C' if Path(self.signature_path).read_bytes().startswith(b'YARA') else ''
-            command = f'yara {compiled_flag} --print-meta --print-strings {self.signature_path} {file_object.file_path}'
-            with subprocess.Popen(command, shell=True, stdout=subprocess.PIPE) as process:
-                output = process.stdout.read().decode()
+        if self.rules is not None:
             try:
-                result = self._parse_yara_output(output)
+                result = self._get_matches(file_object)
                 file_object.processed_analysis[self.NAME] = result
                 file_object.processed_analysis[self.NAME]['summary'] = list(result.keys())
-            except (ValueError, TypeError):
+            except yara.Error as error:
+                logging.warning(f'[{self.NAME}] YARA scan of {file_object.uid} failed: {error}')
                 file_object.processed_analysis[self.NAME] = {'failed': 'Processing corrupted. Likely bad call to yara.'}
         else:
             file_object.processed_analysis[self.NAME] = {'failed': 'Signature path not set'}
         return file_object
 
+    def _get_matches(self, file_object) -> Dict[str, dict]:
+        shared_matches = file_object.temporary_data.get(SHARED_MATCHES_KEY, {})
+        if self.namespace in shared_matches:
+            # each plugin takes its matches, so that they are not passed on to the following plugins
+            return shared_matches.pop(self.namespace)
+        # the scheduled analyses of a file object only contain the plugins that did not analyze it yet
+        namespaces = self.shared_namespaces.intersection({self.namespace, *(file_object.scheduled_analysis or [])})
+        if self.shared_rules is None or namespaces == {self.namespace}:
+            return self._convert_matches(_match(self.rules, file_object), self.hex_strings.get(self.namespace, {}))
+        matches = _match(self.shared_rules, file_object)
+        shared_matches = {
+            namespace: self._convert_matches(
+                [match for match in matches if match.namespace == namespace], self.hex_strings.get(namespace, {})
+            )
+            for namespace in namespaces
+        }
+        file_object.temporary_data[SHARED_MATCHES_KEY] = shared_matches
+        return shared_matches.pop(self.namespace)
+
     @staticmethod
     def _get_signature_file_name(plugin_path):
         return plugin_path.split('/')[-3] + '.yc'
@@ -61,55 +129,58 @@ class YaraBasePlugin(AnalysisBasePlugin):
         return str(Path(get_src_dir()) / 'analysis/signatures' / sig_file_name)
 
     @staticmethod
-    def _parse_yara_output(output):
-        resulting_matches = dict()
-
-        match_blocks, rules = _split_output_in_rules_and_matches(output)
-
-        matches_regex = re.compile(r'((0x[a-f0-9]*):(\$[a-zA-Z0-9_]+):\s(.+))+')
-        for index, rule in enumerate(rules):
-            for match in matches_regex.findall(match_blocks[index]):
-                _append_match_to_result(match, resulting_matches, rule)
-
-        return resulting_matches
-
-
-def _split_output_in_rules_and_matches(output):
-    split_regex = re.compile(r'\n*.*\[.*\]\s/.+\n*')
-    match_blocks = split_regex.split(output)
-    while '' in match_blocks:
-        match_blocks.remove('')
-
-    rule_regex = re.compile(r'(\w*)\s\[(.*)\]\s([.]{0,2}/)(.+)')
-    rules = rule_regex.findall(output)
-
-    if not len(match_blocks) == len(rules):
-        raise ValueError()
-    return match_blocks, rules
-
-
-def _append_match_to_result(match, resulting_matches, rule):
-    rule_name, meta_string, _, _ = rule
-    _, offset, matched_tag, matched_string = match
+    def _convert_matches(matches: List[yara.Match], hex_strings: Optional[Dict[str, List[str]]] = None) -> Dict[str, dict]:
+        '''
+        Convert the matches to the result format of the plugins:
+        ``{rule: {'rule': rule, 'matches': True, 'strings': [(offset, identifier, matched data), ...], 'meta': meta}}``
 
-    meta_dict = _parse_meta_data(meta_string)
+        The matched data is shown like the YARA command line tool does: as hex bytes (e.g. ``00 FF 62``) for hex strings
+        (given by rule in ``hex_strings``) and as escaped text otherwise.
+        '''
+        hex_strings = hex_strings or {}
+        return {
+            match.rule: {
+                'rule': match.rule,
+                'matches': True,
+                'strings': [
+                    (offset, identifier, _format_matched_data(data, identifier in hex_strings.get(match.rule, [])))
+                    for offset, identifier, data in _get_strings(match)
+                ],
+                'meta': match.meta,
+            }
+            for match in matches
+        }
+
+
+def _is_compiled(signature_path: str) -> bool:
+    with open(signature_path, 'rb') as signature_file:
+        return signature_file.read(4) == b'YARA'
+
+
+def _match(rules: yara.Rules, file_object) -> List[yara.Match]:
+    # files are memory mapped by YARA (if the binary was not loaded already)
+    if file_object.binary is not None:
+        return rules.match(data=file_object.binary)
+    return rules.match(filepath=file_object.file_path)
+
+
+def _get_strings(match: yara.Match) -> Iterator[Tuple[int, str, bytes]]:
+    for string in match.strings:
+        if isinstance(string, tuple):  # yara-python < 4.3
+            yield string
+        else:
+            for instance in string.instances:
+                yield instance.offset, string.identifier, instance.matched_data
 
-    this_match = resulting_matches[rule_name] if rule_name in resulting_matches else dict(rule=rule_name, matches=True, strings=list(), meta=meta_dict)
 
-    this_match['strings'].append((int(offset, 16), matched_tag, matched_string.encode()))
-    resulting_matches[rule_name] = this_match
+def _format_matched_data(data: bytes, is_hex_string: bool) -> bytes:
+    if is_hex_string:
+        return ' '.join(f'{byte:02X}' for byte in data).encode()
+    return _escape_matched_data(data)
 
 
-def _parse_meta_data(meta_data_string):
+def _escape_matched_data(data: bytes) -> bytes:
     '''
-    Will be of form 'item0=lowercaseboolean0,item1="value1",item2=value2,..'
+    Escape non printable characters like the YARA command line tool does (e.g. `\\x00`).
     '''
-    meta_data = dict()
-    for item in meta_data_string.split(','):
-        if '=' in item:
-            key, value = item.split('=', maxsplit=1)
-            value = json.loads(value) if value in ['true', 'false'] else value.strip('"')
-            meta_data[key] = value
-        else:
-            logging.warning(f'Malformed meta string \'{meta_data_string}\'')
-    return meta_data
+    return b''.join(bytes([byte]) if 0x20 <= byte < 0x7f else f'\\x{byte:02X}'.encode() for byte in data)
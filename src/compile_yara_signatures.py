@@ -17,40 +17,80 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 '''
 
+import json
 import os
-import subprocess
 import sys
-from subprocess import PIPE, STDOUT, CalledProcessError
-from tempfile import NamedTemporaryFile
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, Union
 
+import yara
 from common_helper_files import get_dirs_in_dir, get_files_in_dir
 
 from helperFunctions.fileSystem import get_src_dir
+from helperFunctions.yara_literals import get_hex_strings
 
 SIGNATURE_DIR = os.path.join(get_src_dir(), 'analysis/signatures')
+# the signatures of all plugins with one namespace per plugin (see analysis.YaraPluginBase)
+SHARED_SIGNATURE_FILE = 'shared_signatures.yc'
+SHARED_NAMESPACES_FILE = 'shared_signatures.json'
+# the identifiers of the hex strings of each rule of a plugin (they are not contained in the compiled signatures)
+HEX_STRINGS_FILE_SUFFIX = '.hex_strings.json'
 
 
-def _create_joint_signature_file(directory, tmp_file):
+def _create_joint_signature_file(directory, joint_file):
     all_signatures = list()
     for signature_file in sorted(get_files_in_dir(directory)):
         with open(signature_file, 'rb') as fd:
             all_signatures.append(fd.read())
 
-    with open(tmp_file.name, 'wb') as fd:
+    with open(joint_file, 'wb') as fd:
         fd.write(b'\x0a'.join(all_signatures))
 
 
+def _create_hex_strings_file(joint_file, plugin_name):
+    hex_strings = get_hex_strings(Path(joint_file).read_text(errors='replace'))
+    (Path(SIGNATURE_DIR) / f'{plugin_name}{HEX_STRINGS_FILE_SUFFIX}').write_text(json.dumps(hex_strings))
+
+
 def _get_plugin_name(plugin_path):
     return plugin_path.split('/')[-2]
 
 
-def _create_compiled_signature_file(directory, tmp_file):
-    target_path = os.path.join(SIGNATURE_DIR, '{}.yc'.format(_get_plugin_name(directory)))
+def compile_signature_file(source_files: Union[str, Dict[str, str]], target_path) -> bool:
+    '''
+    Compile the signatures with yara-python (and not with the yarac CLI): the compiled signatures can only be loaded by
+    the same version of libyara that created them.
+
+    :param source_files: The path of the signature file or the paths of the signature files by namespace.
+    :param target_path: The path of the compiled signature file.
+    :return: True if the signatures were compiled successfully.
+    '''
     try:
-        command = 'yarac -d test_flag=false {} {}'.format(tmp_file.name, target_path)
-        subprocess.run(command, stdout=PIPE, stderr=STDOUT, shell=True, check=True)
-    except CalledProcessError:
-        print('[ERROR] Creation of {} failed !!'.format(os.path.split(target_path)[0]))
+        if isinstance(source_files, dict):
+            rules = yara.compile(filepaths=source_files, externals={'test_flag': False})
+        else:
+            rules = yara.compile(filepath=source_files, externals={'test_flag': False})
+        rules.save(str(target_path))
+        return True
+    except yara.Error as error:
+        print('[ERROR] Creation of {} failed !!\n{}'.format(target_path, error))
+        return False
+
+
+def _create_shared_signature_file(joint_files):
+    '''
+    Compile the signatures of all plugins into one file with a namespace for each plugin, so that the YARA plugins can
+    scan each file only once (see :class:`analysis.YaraPluginBase.YaraBasePlugin`).
+    '''
+    target_path = Path(SIGNATURE_DIR) / SHARED_SIGNATURE_FILE
+    namespaces_path = Path(SIGNATURE_DIR) / SHARED_NAMESPACES_FILE
+    print('Compile shared signature file {}'.format(target_path))
+    namespaces_path.unlink(missing_ok=True)
+    if joint_files and compile_signature_file(joint_files, target_path):
+        namespaces_path.write_text(json.dumps(sorted(joint_files)))
+    else:
+        target_path.unlink(missing_ok=True)
 
 
 def _create_signature_dir():
@@ -60,13 +100,19 @@ def _create_signature_dir():
 
 def main():
     _create_signature_dir()
-    for plugin_dir in get_dirs_in_dir(os.path.join(get_src_dir(), 'plugins/analysis')):
-        signature_dir = os.path.join(plugin_dir, 'signatures')
-        if os.path.isdir(signature_dir):
-            print('Compile signatures in {}'.format(signature_dir))
-            with NamedTemporaryFile(mode='w') as tmp_file:
-                _create_joint_signature_file(signature_dir, tmp_file)
-                _create_compiled_signature_file(signature_dir, tmp_file)
+    joint_files = {}
+    with TemporaryDirectory() as tmp_dir:
+        for plugin_dir in get_dirs_in_dir(os.path.join(get_src_dir(), 'plugins/analysis')):
+            signature_dir = os.path.join(plugin_dir, 'signatures')
+            if os.path.isdir(signature_dir):
+                print('Compile signatures in {}'.format(signature_dir))
+                plugin_name = _get_plugin_name(signature_dir)
+                joint_file = os.path.join(tmp_dir, '{}.yara'.format(plugin_name))
+                _create_joint_signature_file(signature_dir, joint_file)
+                if compile_signature_file(joint_file, os.path.join(SIGNATURE_DIR, '{}.yc'.format(plugin_name))):
+                    _create_hex_strings_file(joint_file, plugin_name)
+                    joint_files[plugin_name] = joint_file
+        _create_shared_signature_file(joint_files)
 
     return 0
 
@@ -7,6 +7,7 @@ import psutil
 
 from helperFunctions.program_setup import program_setup
 from statistic.work_load import WorkLoadStatistic
+from storage.mongo_interface import close_mongo_clients
 
 
 class FactBase:
@@ -37,6 +38,7 @@ class FactBase:
     def shutdown(self):
         logging.info(f'Shutting down components of {self.PROGRAM_NAME}')
         self.work_load_stat.shutdown()
+        close_mongo_clients()
 
     def main(self):
         logging.info(f'Successfully started {self.PROGRAM_NAME}')
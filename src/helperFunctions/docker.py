@@ -1,11 +1,38 @@
 import logging
+import shlex
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
+from os import getpid
+from queue import Empty, Queue
 from subprocess import CompletedProcess
+from typing import Dict, List, Optional, Tuple, Union
 
 import docker
 from docker.errors import APIError, DockerException, ImageNotFound
+from docker.models.containers import Container
 from requests.exceptions import ReadTimeout
 
+MAX_POOL_SIZE = 32
+# the warm containers of a ContainerExecutor stop themselves after this time (e.g. if they are not shut down properly)
+MAX_CONTAINER_LIFETIME = 24 * 60 * 60
+
+_CLIENTS: Dict[Tuple[int, Optional[int]], docker.DockerClient] = {}
+
+
+def get_docker_client(timeout: Optional[int] = 60) -> docker.DockerClient:
+    '''
+    Get the docker client of this process. The clients (and their connection pools) are reused instead of creating a new
+    client for each container. Clients are not shared with forked processes.
+
+    :param timeout: The timeout of API calls in seconds (``None``: no timeout).
+    :return: The docker client.
+    '''
+    key = (getpid(), timeout)
+    if key not in _CLIENTS:
+        _CLIENTS[key] = docker.client.from_env(timeout=timeout, max_pool_size=MAX_POOL_SIZE)
+    return _CLIENTS[key]
+
 
 def run_docker_container(image: str, logging_label: str = 'Docker', timeout: int = 300,  combine_stderr_stdout: bool = False, **kwargs) -> CompletedProcess:
     '''
@@ -28,7 +55,7 @@ def run_docker_container(image: str, logging_label: str = 'Docker', timeout: int
     # TODO verify that bind mounts in kwargs["mounts"] only contain files in docker-mount-base-dir
     # If they don't just copy them to docker-mount-base-dir and change the mounts
 
-    client = docker.client.from_env()
+    client = get_docker_client()
     kwargs.setdefault('detach', True)
 
     try:
@@ -63,3 +90,163 @@ def run_docker_container(image: str, logging_label: str = 'Docker', timeout: int
         args = ['entrypoint']
 
     return CompletedProcess(args=args, returncode=exit_code, stdout=stdout, stderr=stderr)
+
+
+class ContainerExecutor:
+    '''
+    Executes tasks (commands) in warm containers of a docker image. Starting a container for each task takes much longer
+    than executing a command in a running container, so plugins that run many tasks with the same image (e.g. for all
+    files of a firmware or for a batch of files) can opt into this executor instead of calling
+    :func:`run_docker_container` for each task::
+
+        with ContainerExecutor('image', containers=4, mounts=[Mount('/work', work_dir, type='bind')]) as executor:
+            results = executor.execute_batch([['tool', f'/work/{name}'] for name in file_names])
+
+    The containers are started on first use (with the entrypoint replaced by an idle command) and run until
+    :meth:`shutdown`. Only the mounts of the containers are visible to the tasks: the input files of a batch should be
+    placed in a mounted directory (e.g. in the docker-mount-base-dir). Each container executes one task at a time. If a
+    task times out, its container is killed and replaced by a new container for the next task. With
+    ``use_image_entrypoint``, the commands are the arguments of the entrypoint of the image (like the ``command`` of
+    :func:`run_docker_container`).
+
+    :param image: The name of the docker image.
+    :param containers: The maximum number of warm containers (i.e. the number of tasks that are executed in parallel).
+    :param timeout: The default timeout of a task in seconds.
+    :param lifetime: The maximum lifetime of a container in seconds.
+    :param logging_label: Label used for logging.
+    :param use_image_entrypoint: Whether the commands are passed to the entrypoint of the image or executed directly.
+    :param run_kwargs: Passed to ``docker.containers.run`` when the containers are started (e.g. ``mounts``).
+    '''
+
+    def __init__(self, image: str, containers: int = 1, timeout: int = 300, lifetime: int = MAX_CONTAINER_LIFETIME,  # pylint: disable=too-many-arguments
+                 logging_label: str = 'Docker', use_image_entrypoint: bool = False, **run_kwargs):
+        self.image = image
+        self.max_containers = containers
+        self.timeout = timeout
+        self.lifetime = lifetime
+        self.logging_label = logging_label
+        self.use_image_entrypoint = use_image_entrypoint
+        self.run_kwargs = run_kwargs
+        self._entrypoint = None
+        self._slots = threading.Semaphore(containers)
+        self._idle_containers = Queue()
+        self._containers = []
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'ContainerExecutor':
+        return self
+
+    def __exit__(self, *_):
+        self.shutdown()
+
+    def execute(self, command: Union[str, List[str]], timeout: Optional[int] = None,
+                combine_stderr_stdout: bool = False) -> CompletedProcess:
+        '''
+        Execute a task in one of the containers. Blocks until a container is available. This method is thread safe.
+
+        :param command: The command that is executed in the container.
+        :param timeout: The timeout of the task (default: the timeout of the executor).
+        :param combine_stderr_stdout: Whether to combine stderr and stdout or not.
+        :return: A subprocess.CompletedProcess instance for the task.
+
+        :raises docker.errors.ImageNotFound: If the docker image was not found
+        :raises requests.exceptions.ReadTimeout: If the timeout was reached
+        :raises docker.errors.APIError: If the communication with docker fails
+        '''
+        full_command = self._get_entrypoint() + _split_command(command) if self.use_image_entrypoint else command
+        with self._slots:
+            container = self._get_container()
+            timed_out = threading.Event()
+            timer = threading.Timer(timeout or self.timeout, self._kill_container, args=(container, timed_out))
+            timer.start()
+            try:
+                exit_code, output = container.exec_run(full_command, demux=not combine_stderr_stdout)
+            except (DockerException, IOError):
+                if not timed_out.is_set():
+                    logging.warning(f'[{self.logging_label}]: encountered docker error while processing')
+                    self._kill_container(container)
+                    raise
+            finally:
+                timer.cancel()
+            if timed_out.is_set():
+                logging.warning(f'[{self.logging_label}]: timeout while processing')
+                raise ReadTimeout(f'task did not finish within {timeout or self.timeout} seconds')
+            self._idle_containers.put(container)
+
+        stdout, stderr = (output, None) if combine_stderr_stdout else output
+        return CompletedProcess(
+            args=command, returncode=exit_code, stdout=_decode(stdout), stderr=None if combine_stderr_stdout else _decode(stderr)
+        )
+
+    def execute_batch(self, commands: List[Union[str, List[str]]], timeout: Optional[int] = None,
+                      combine_stderr_stdout: bool = False) -> List[Union[CompletedProcess, Exception]]:
+        '''
+        Execute a batch of tasks in parallel (distributed over the containers).
+
+        :param commands: The commands of the tasks.
+        :param timeout: The timeout of each task (default: the timeout of the executor).
+        :param combine_stderr_stdout: Whether to combine stderr and stdout or not.
+        :return: The result of each task (in the order of the commands) or the exception that was raised by the task
+            (see :meth:`execute`).
+        '''
+        def execute_task(command):
+            try:
+                return self.execute(command, timeout=timeout, combine_stderr_stdout=combine_stderr_stdout)
+            except (DockerException, IOError) as error:  # ReadTimeout is an IOError
+                return error
+
+        with ThreadPoolExecutor(max_workers=self.max_containers) as pool:
+            return list(pool.map(execute_task, commands))
+
+    def shutdown(self):
+        '''
+        Stop all containers (they are removed automatically).
+        '''
+        with self._lock:
+            containers, self._containers = self._containers, []
+            self._idle_containers = Queue()
+        for container in containers:
+            self._kill_container(container)
+
+    def _get_entrypoint(self) -> List[str]:
+        if self._entrypoint is None:
+            entrypoint = get_docker_client().images.get(self.image).attrs['Config']['Entrypoint']
+            self._entrypoint = _split_command(entrypoint or [])
+        return self._entrypoint
+
+    def _get_container(self) -> Container:
+        # there is an idle container or less containers than slots (the caller holds one of the slots)
+        with suppress(Empty):
+            return self._idle_containers.get_nowait()
+        try:
+            container = self._start_container()
+        except (DockerException, IOError):
+            logging.warning(f'[{self.logging_label}]: encountered docker error while starting container')
+            raise
+        with self._lock:
+            self._containers.append(container)
+        return container
+
+    def _start_container(self) -> Container:
+        # the client of the containers must not time out because of long running tasks (the timeout is enforced by
+        # killing the container)
+        return get_docker_client(timeout=None).containers.run(
+            self.image, entrypoint=['sleep', str(self.lifetime)], detach=True, auto_remove=True, **self.run_kwargs
+        )
+
+    def _kill_container(self, container: Container, timed_out: Optional[threading.Event] = None):
+        if timed_out is not None:
+            timed_out.set()
+        with self._lock:
+            if container in self._containers:
+                self._containers.remove(container)
+        with suppress(DockerException, IOError):
+            container.kill()
+
+
+def _split_command(command: Union[str, List[str]]) -> List[str]:
+    return shlex.split(command) if isinstance(command, str) else list(command)
+
+
+def _decode(output: Optional[bytes]) -> str:
+    return output.decode(errors='replace') if output else ''
@@ -0,0 +1,110 @@
+'''
+Parsing of ELF files with LIEF.
+
+Several plugins need the metadata of ELF files (e.g. ``file_hashes`` for the imphash, ``elf_analysis`` and
+``exploit_mitigations``). Parsing is expensive, so the file is parsed only once per analysis cycle: the metadata is
+stored in the temporary data of the file object, which is passed from plugin to plugin.
+'''
+import contextlib
+import json
+import logging
+import sys
+from typing import List, NamedTuple, Optional
+
+import lief
+
+ELF_METADATA_KEY = 'elf_metadata'
+# entries of the JSON representation of LIEF that are part of the metadata
+LIEF_JSON_ENTRIES = ('header', 'dynamic_entries', 'sections', 'segments', 'symbols_version')
+
+# pylint: disable=c-extension-no-member
+
+
+class ElfMetadata(NamedTuple):
+    #: entries of the JSON representation of LIEF (see ``LIEF_JSON_ENTRIES``)
+    lief_json: dict
+    imported_functions: List[str]
+    exported_functions: List[str]
+    libraries: List[str]
+    symbols_version: List[str]
+    #: names of all (static and dynamic) symbols
+    symbols: List[str]
+    #: entries of the ``.modinfo`` section (of kernel modules)
+    modinfo: Optional[List[str]]
+
+
+def get_elf_metadata(file_object) -> Optional[ElfMetadata]:
+    '''
+    Get the metadata of an ELF file. The file is parsed only if the metadata is not part of the temporary data of the
+    file object yet.
+
+    :param file_object: The file object of the ELF file.
+    :return: The metadata or ``None`` if the file could not be parsed.
+    '''
+    if ELF_METADATA_KEY not in file_object.temporary_data:
+        file_object.temporary_data[ELF_METADATA_KEY] = _parse_elf(file_object.file_path)
+    return file_object.temporary_data[ELF_METADATA_KEY]
+
+
+def _parse_elf(file_path: str) -> Optional[ElfMetadata]:
+    try:
+        with _suppress_stdout():
+            binary = lief.parse(file_path)
+            if binary is None:
+                logging.warning(f'lief could not parse {file_path}')
+                return None
+            return ElfMetadata(
+                lief_json=_get_lief_json(binary),
+                imported_functions=normalize_lief_items(binary.imported_functions),
+                exported_functions=normalize_lief_items(binary.exported_functions),
+                libraries=normalize_lief_items(binary.libraries),
+                symbols_version=normalize_lief_items(binary.symbols_version),
+                symbols=[symbol.name for symbol in binary.symbols],
+                modinfo=_get_modinfo(binary),
+            )
+    except Exception:  # pylint: disable=broad-except
+        logging.error(f'lief could not parse {file_path}', exc_info=True)
+        return None
+
+
+def _get_lief_json(binary) -> dict:
+    # only the required entries are converted: the JSON representation of the whole binary would contain e.g. all
+    # symbols and relocations (and the conversion crashes for some large binaries)
+    return {
+        'header': json.loads(lief.to_json(binary.header)),
+        **{key: [json.loads(lief.to_json(item)) for item in getattr(binary, key)] for key in LIEF_JSON_ENTRIES[1:]},
+    }
+
+
+def _get_modinfo(binary) -> Optional[List[str]]:
+    # getting the information from the *.ko files .modinfo section
+    for section in binary.sections:
+        if section.name == '.modinfo':
+            modinfo = bytes(section.content).decode()
+            return [entry for entry in modinfo.split('\x00') if entry]
+    return None
+
+
+def normalize_lief_items(functions):
+    '''
+    Shorthand to convert a list of objects to a list of strings
+    '''
+    return [str(function) for function in functions]
+
+
+class _StandardOutWriter:
+    def write(self, _):
+        pass
+
+
+@contextlib.contextmanager
+def _suppress_stdout():
+    ''' A context manager that suppresses any output to stdout and stderr. '''
+    writer = _StandardOutWriter()
+
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = writer, writer
+    try:
+        yield
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
@@ -1,6 +1,10 @@
 import logging
-from contextlib import suppress
+import mmap
+import shutil
+from contextlib import contextmanager, suppress
 from pathlib import Path
+from time import time
+from typing import Dict, Iterator, Union
 
 
 def get_src_dir() -> str:
@@ -52,3 +56,46 @@ def file_is_empty(file_path: Path) -> bool:
         return False
     except Exception as exception:
         logging.error('Unexpected Exception: {} {}'.format(type(exception), str(exception)))
+
+
+@contextmanager
+def get_binary_or_memory_map(file_object) -> Iterator[Union[bytes, mmap.mmap]]:
+    '''
+    Get the binary of a file object. If it was not loaded, the file is memory mapped instead (so that it does not have
+    to be read into memory as a whole).
+
+    :param file_object: The file object.
+    :return: The binary or the memory mapped (read only) file.
+    '''
+    if file_object.binary is not None:
+        yield file_object.binary
+    elif Path(file_object.file_path).stat().st_size == 0:  # empty files cannot be memory mapped
+        yield b''
+    else:
+        with open(file_object.file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def remove_least_recently_used(cache_dir: Path, cache_size: int, min_age: float):
+    '''
+    Limit the number of entries (directories) of a cache directory that is shared by several processes. The entries are
+    marked as used by updating their modification time (e.g. with ``os.utime``) and all but the ``cache_size`` most
+    recently used entries are removed. Entries that were used in the last ``min_age`` seconds are kept anyway, because
+    they may still be in use by another process.
+
+    :param cache_dir: The cache directory.
+    :param cache_size: The number of entries that are kept.
+    :param min_age: The time (in seconds) since the last use after which an entry may be removed.
+    '''
+    entries = sorted(_get_modification_times(cache_dir).items(), key=lambda item: item[1], reverse=True)
+    for path, modification_time in entries[cache_size:]:
+        if time() - modification_time > min_age:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _get_modification_times(directory: Path) -> Dict[Path, float]:
+    result = {}
+    for path in directory.iterdir():
+        with suppress(FileNotFoundError):  # may be removed by another process
+            result[path] = path.stat().st_mtime
+    return result
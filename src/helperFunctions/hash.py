@@ -1,15 +1,16 @@
-import contextlib
 import logging
-import sys
-from hashlib import md5, new
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import algorithms_available, md5, new
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
 
-import lief
 import ssdeep
 import tlsh
 
 from helperFunctions.data_conversion import make_bytes
+from helperFunctions.elf import get_elf_metadata
 
 ELF_MIME_TYPES = ['application/x-executable', 'application/x-object', 'application/x-sharedlib']
+HASH_CHUNK_SIZE = 1024 * 1024
 
 
 def get_hash(hash_function, binary):
@@ -27,6 +28,78 @@ def get_hash(hash_function, binary):
     return string_hash
 
 
+def get_hashes(data, hash_functions: Iterable[str], threads: int = 1, chunk_size: int = HASH_CHUNK_SIZE) -> Dict[str, str]:
+    '''
+    Compute several hashes in a single pass over the data: Each chunk is fed to all hash functions. Besides the
+    algorithms of hashlib, ``ssdeep`` and ``tlsh`` are supported. Unavailable algorithms are skipped.
+
+    :param data: The data to hash (e.g. bytes or a memory mapped file).
+    :param hash_functions: The names of the hash functions.
+    :param threads: The number of threads. With more than one thread, the hash functions are distributed over the
+        threads (hashlib releases the GIL for large chunks). Each thread iterates over the chunks on its own.
+    :param chunk_size: The size of the chunks in bytes.
+    :return: A dict with the hash functions as keys and the hashes as hex strings as values (``tlsh`` is missing if
+        the data has no TLSH hash, e.g. because it is too small).
+    '''
+    hashers = {}
+    for hash_function in hash_functions:
+        if hash_function in ['ssdeep', 'tlsh'] or hash_function in algorithms_available:
+            hashers[hash_function] = _create_hasher(hash_function)
+        else:
+            logging.debug(f'algorithm {hash_function} not available')
+    view = memoryview(data)
+    if threads > 1 and len(hashers) > 1:
+        with ThreadPoolExecutor(max_workers=min(threads, len(hashers))) as executor:
+            list(executor.map(lambda hasher: _update_hasher(hasher, view, chunk_size), hashers.values()))
+    else:
+        for offset in range(0, len(view), chunk_size):
+            chunk = view[offset:offset + chunk_size]
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    result = {hash_function: hasher.hexdigest() for hash_function, hasher in hashers.items()}
+    return {hash_function: digest for hash_function, digest in result.items() if digest is not None}
+
+
+class _SsdeepHasher:
+    # ssdeep and TLSH only accept bytes (no memory views)
+    def __init__(self):
+        self._hash = ssdeep.Hash()
+
+    def update(self, chunk: memoryview):
+        self._hash.update(chunk.tobytes())
+
+    def hexdigest(self) -> str:
+        return self._hash.digest()
+
+
+class _TlshHasher:
+    def __init__(self):
+        self._hash = tlsh.Tlsh()  # pylint: disable=c-extension-no-member
+
+    def update(self, chunk: memoryview):
+        self._hash.update(chunk.tobytes())
+
+    def hexdigest(self) -> Optional[str]:
+        try:
+            self._hash.final()
+            return self._hash.hexdigest()
+        except ValueError:  # TLSH needs at least 50 bytes with enough variation
+            return None
+
+
+def _create_hasher(hash_function: str):
+    if hash_function == 'ssdeep':
+        return _SsdeepHasher()
+    if hash_function == 'tlsh':
+        return _TlshHasher()
+    return new(hash_function)
+
+
+def _update_hasher(hasher, view: memoryview, chunk_size: int):
+    for offset in range(0, len(view), chunk_size):
+        hasher.update(view[offset:offset + chunk_size])
+
+
 def get_sha256(code):
     return get_hash('sha256', code)
 
@@ -55,50 +128,118 @@ def get_tlsh_comparison(first, second):
     return tlsh.diff(first, second)  # pylint: disable=c-extension-no-member
 
 
-def get_imphash(file_object):
+def get_tlsh_header_key(tlsh_hash: str) -> Optional[int]:
     '''
-    Generates and returns the md5 hash of the imported functions of an ELF file
-    represented by `file_object`.
-    The imports are sorted before the hex is generated so the order of imports
-    does not matter.
+    Get the length value and the quartile ratios from the header of a TLSH hash combined into a single integer
+    (``lvalue << 8 | q1ratio << 4 | q2ratio``). Hashes with similar keys belong to files of similar size and byte
+    distribution (see :func:`get_tlsh_header_keys_in_range`).
 
-    :param file_object: The FileObject of which the imphash shall be computed
+    :param tlsh_hash: The TLSH hash as hex string.
+    :return: The header key or `None` if the hash is empty or invalid.
     '''
-    if _is_elf_file(file_object):
-        try:
-            with _suppress_stdout():
-                # pylint: disable=c-extension-no-member
-                functions = normalize_lief_items(lief.parse(file_object.file_path).imported_functions)
-            return md5(','.join(sorted(functions)).encode()).hexdigest()
-        except Exception:
-            logging.error('Could not compute imphash for {}'.format(file_object.file_path), exc_info=True)
-    return None
+    header = _parse_tlsh_header(tlsh_hash)
+    if header is None:
+        return None
+    lvalue, q1ratio, q2ratio = header
+    return lvalue << 8 | q1ratio << 4 | q2ratio
 
 
-def _is_elf_file(file_object):
-    return file_object.processed_analysis['file_type']['mime'] in ELF_MIME_TYPES
-
+def get_tlsh_header_keys_in_range(tlsh_hash: str, max_distance: int) -> List[int]:
+    '''
+    Get the header keys of all TLSH hashes that may have a distance (as in :func:`get_tlsh_comparison`) of at most
+    `max_distance` to `tlsh_hash`. The distance of the header fields is a lower bound for the total distance so all
+    hashes with other header keys are further away.
 
-def normalize_lief_items(functions):
+    :param tlsh_hash: The TLSH hash as hex string.
+    :param max_distance: The maximum distance.
+    :return: A list of header keys (see :func:`get_tlsh_header_key`). Empty if the hash is empty or invalid.
     '''
-    Shorthand to convert a list of objects to a list of strings
+    header = _parse_tlsh_header(tlsh_hash)
+    if header is None:
+        return []
+    lvalue, q1ratio, q2ratio = header
+    lvalues = _get_values_in_range(lvalue, 256, max_distance, _get_tlsh_length_distance)
+    q1ratios = _get_values_in_range(q1ratio, 16, max_distance, _get_tlsh_ratio_distance)
+    q2ratios = _get_values_in_range(q2ratio, 16, max_distance, _get_tlsh_ratio_distance)
+    return [
+        other_lvalue << 8 | other_q1ratio << 4 | other_q2ratio
+        for other_lvalue, lvalue_distance in lvalues
+        for other_q1ratio, q1_distance in q1ratios
+        if lvalue_distance + q1_distance <= max_distance
+        for other_q2ratio, q2_distance in q2ratios
+        if lvalue_distance + q1_distance + q2_distance <= max_distance
+    ]
+
+
+def _parse_tlsh_header(tlsh_hash: str) -> Optional[Tuple[int, int, int]]:
+    if tlsh_hash.startswith('T1'):  # version prefix of newer TLSH versions
+        tlsh_hash = tlsh_hash[2:]
+    if len(tlsh_hash) != 70:
+        return None
+    try:
+        # the nibbles of the header bytes are swapped in the hex representation (checksum: 0-1, lvalue: 2-3, q ratios: 4-5)
+        return int(tlsh_hash[3] + tlsh_hash[2], 16), int(tlsh_hash[4], 16), int(tlsh_hash[5], 16)
+    except ValueError:
+        return None
+
+
+def _get_values_in_range(value: int, modulus: int, max_distance: int, get_distance) -> List[Tuple[int, int]]:
+    result = []
+    for other_value in range(modulus):
+        difference = abs(value - other_value)
+        distance = get_distance(min(difference, modulus - difference))
+        if distance <= max_distance:
+            result.append((other_value, distance))
+    return result
+
+
+def _get_tlsh_length_distance(difference: int) -> int:
+    return difference if difference <= 1 else difference * 12
+
+
+def _get_tlsh_ratio_distance(difference: int) -> int:
+    return difference if difference <= 1 else (difference - 1) * 12
+
+
+class HashingReader:
+    '''
+    Wraps a binary file object and computes the SHA256 hash and the size of all data that is read through it
+    (e.g. while the data is copied somewhere else).
+
+    :param file_object: The file object that should be read.
     '''
-    return [str(function) for function in functions]
 
+    def __init__(self, file_object: BinaryIO):
+        self._file_object = file_object
+        self._hash = new('sha256')
+        self.size = 0
 
-class _StandardOutWriter:
-    def write(self, _):
-        pass
+    def read(self, size: int = -1) -> bytes:
+        data = self._file_object.read(size)
+        self._hash.update(data)
+        self.size += len(data)
+        return data
 
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
 
-@contextlib.contextmanager
-def _suppress_stdout():
-    ''' A context manager that suppresses any output to stdout and stderr. '''
-    writer = _StandardOutWriter()
 
-    stdout, stderr = sys.stdout, sys.stderr
-    sys.stdout, sys.stderr = writer, writer
+def get_imphash(file_object):
+    '''
+    Generates and returns the md5 hash of the imported functions of an ELF file
+    represented by `file_object`.
+    The imports are sorted before the hex is generated so the order of imports
+    does not matter.
+
+    :param file_object: The FileObject of which the imphash shall be computed
+    '''
+    if _is_elf_file(file_object):
+        metadata = get_elf_metadata(file_object)  # parse errors are logged by get_elf_metadata
+        if metadata is not None:
+            return md5(','.join(sorted(metadata.imported_functions)).encode()).hexdigest()
+    return None
 
-    yield
 
-    sys.stdout, sys.stderr = stdout, stderr
+def _is_elf_file(file_object):
+    return file_object.processed_analysis['file_type']['mime'] in ELF_MIME_TYPES
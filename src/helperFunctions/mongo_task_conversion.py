@@ -9,31 +9,43 @@ from markupsafe import escape
 from werkzeug.datastructures import FileStorage
 
 from helperFunctions.config import get_temp_dir_path
-from helperFunctions.uid import create_uid
 from objects.firmware import Firmware
 
 OPTIONAL_FIELDS = ['tags', 'device_part']
 DROPDOWN_FIELDS = ['device_class', 'vendor', 'device_name', 'device_part']
 
 
-def create_analysis_task(request: Request, config: ConfigParser) -> Dict[str, Any]:
+def create_analysis_task(request: Request) -> Dict[str, Any]:
     '''
-    Create an analysis task from the data stored in the flask request object.
+    Create an analysis task from the data stored in the flask request object. The uploaded binary is not included:
+    It must be staged separately (see :meth:`~intercom.front_end_binding.InterComFrontEndBinding.stage_binary`)
+    and the resulting UID must be set as `uid` of the task.
 
     :param request: The flask request object.
-    :param config: The FACT configuration.
     :return: A dict containing the analysis task data.
     '''
     task = _get_meta_from_request(request)
-    if request.files['file']:
-        task['file_name'], task['binary'] = get_file_name_and_binary_from_request(request, config)
-    task['uid'] = _get_uid_of_analysis_task(task)
+    task['file_name'] = get_file_name_from_request(request) if request.files['file'] else None
+    task['uid'] = None
     if task['release_date'] == '':
         # set default value if date field is empty
         task['release_date'] = '1970-01-01'
     return task
 
 
+def get_file_name_from_request(request: Request) -> str:
+    '''
+    Retrieves the (escaped) name of the uploaded file from the flask request object.
+
+    :param request: The flask request object.
+    :return: The file name.
+    '''
+    try:
+        return escape(request.files['file'].filename)
+    except AttributeError:
+        return 'no name'
+
+
 def get_file_name_and_binary_from_request(request: Request, config: ConfigParser) -> Tuple[str, bytes]:  # pylint: disable=invalid-name
     '''
     Retrieves the file name and content from the flask request object.
@@ -42,10 +54,7 @@ def get_file_name_and_binary_from_request(request: Request, config: ConfigParser
     :param config: The FACT configuration.
     :return: A Tuple containing the file name and the file content.
     '''
-    try:
-        file_name = escape(request.files['file'].filename)
-    except AttributeError:
-        file_name = 'no name'
+    file_name = get_file_name_from_request(request)
     file_binary = _get_uploaded_file_binary(request.files['file'], config)
     return file_name, file_binary
 
@@ -125,20 +134,6 @@ def convert_analysis_task_to_fw_obj(analysis_task: dict, base_fw: Optional[Firmw
     return fw
 
 
-def _get_uid_of_analysis_task(analysis_task: dict) -> Optional[str]:
-    '''
-    Creates a UID (unique identifier) for an analysis task. The UID is generated based on the binary stored in the
-    analysis task dict. The return value may be `None` if no binary is contained in the analysis task dict.
-
-    :param analysis_task: The analysis task data.
-    :return: A UID based on the binary contained in the analysis task or `None` if there is no binary.
-    '''
-    if analysis_task['binary']:
-        uid = create_uid(analysis_task['binary'])
-        return uid
-    return None
-
-
 def _get_uploaded_file_binary(request_file: FileStorage, config: ConfigParser) -> Optional[bytes]:
     '''
     Retrieves the binary from the request file storage and returns it as byte string. May return `None` if no
@@ -0,0 +1,84 @@
+'''
+Versioned BSON codec for :class:`~objects.file.FileObject` and :class:`~objects.firmware.Firmware` instances.
+
+It replaces pickling of complete objects for the transport of analysis tasks through the intercom: Only the meta
+data is encoded and the binary is referenced by its path in the file storage (it is only embedded if explicitly
+requested, e.g. for files that have not been stored yet).
+'''
+import pickle
+from typing import Union
+
+import bson
+from bson.errors import InvalidDocument
+
+from objects.file import FileObject
+from objects.firmware import Firmware
+
+CODEC_VERSION = 1
+
+FILE_OBJECT_FIELDS = [
+    'file_name', 'file_path', 'size', 'sha256', 'virtual_file_path', 'parents', 'root_uid', 'depth',
+    'scheduled_analysis', 'comments', 'analysis_tags',
+]
+SET_FIELDS = ['files_included', 'parent_firmware_uids']
+FIRMWARE_FIELDS = ['device_name', 'version', 'device_class', 'vendor', 'part', 'release_date', 'tags', 'md5']
+
+
+class ObjectCodecError(Exception):
+    pass
+
+
+def encode_file_object(file_object: Union[FileObject, Firmware], include_binary: bool = False) -> bytes:
+    '''
+    Encode a file object or firmware as BSON document.
+
+    :param file_object: The object that should be encoded.
+    :param include_binary: Embed the binary of the object. Per default, only the file path is encoded as reference.
+    :return: The encoded object.
+    '''
+    document = {
+        'codec_version': CODEC_VERSION,
+        'type': 'firmware' if isinstance(file_object, Firmware) else 'file_object',
+        'uid': file_object.uid,
+        **{field: getattr(file_object, field) for field in FILE_OBJECT_FIELDS},
+        **{field: sorted(getattr(file_object, field)) for field in SET_FIELDS},
+    }
+    if isinstance(file_object, Firmware):
+        document.update({field: getattr(file_object, field, None) for field in FIRMWARE_FIELDS})
+    if include_binary and file_object.binary is not None:
+        document['binary'] = bson.Binary(file_object.binary)
+    try:
+        return bson.encode({**document, 'processed_analysis': file_object.processed_analysis})
+    except (InvalidDocument, OverflowError):  # results may contain types unknown to BSON (e.g. sets)
+        return bson.encode({**document, 'pickled_analysis': bson.Binary(pickle.dumps(file_object.processed_analysis))})
+
+
+def decode_file_object(data: bytes) -> Union[FileObject, Firmware]:
+    '''
+    Decode a file object or firmware encoded with :func:`encode_file_object`.
+    The binary is not loaded from the file storage, use :meth:`~objects.file.FileObject.create_binary_from_path`
+    if it is needed.
+
+    :param data: The encoded object.
+    :return: The decoded file object or firmware.
+    '''
+    document = bson.decode(data)
+    if document.get('codec_version') != CODEC_VERSION:
+        raise ObjectCodecError(f'unsupported codec version: {document.get("codec_version")}')
+    file_object = Firmware() if document['type'] == 'firmware' else FileObject()
+    if 'binary' in document:
+        file_object.set_binary(document['binary'])
+    if file_object.uid is None:
+        file_object.uid = document['uid']
+    for field in FILE_OBJECT_FIELDS:
+        setattr(file_object, field, document[field])
+    for field in SET_FIELDS:
+        setattr(file_object, field, set(document[field]))
+    if isinstance(file_object, Firmware):
+        for field in FIRMWARE_FIELDS:
+            setattr(file_object, field, document[field])
+    if 'pickled_analysis' in document:
+        file_object.processed_analysis = pickle.loads(document['pickled_analysis'])
+    else:
+        file_object.processed_analysis = document['processed_analysis']
+    return file_object
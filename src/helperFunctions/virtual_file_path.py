@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Set
 
 
 def split_virtual_path(virtual_path: str) -> List[str]:
@@ -17,6 +17,26 @@ def get_top_of_virtual_path(virtual_path: str) -> str:
     return split_virtual_path(virtual_path)[-1] if virtual_path else ''
 
 
+def get_uids_of_virtual_path(virtual_path: str) -> List[str]:
+    '''
+    for virtual file path (VFP) 'root_uid|child_1_uid|/dir/file' the result would be ['root_uid', 'child_1_uid']
+    '''
+    return split_virtual_path(virtual_path)[:-1]
+
+
+def get_ancestor_uids(virtual_file_path: Dict[str, List[str]]) -> Set[str]:
+    '''
+    Get the UIDs of all objects that (recursively) include a file, i.e. its "closure" in the firmware tree.
+    These are the UIDs of all roots and of all intermediate containers appearing in any of its virtual file paths.
+    '''
+    return {
+        uid
+        for vfp_list in virtual_file_path.values()
+        for vfp in vfp_list
+        for uid in get_uids_of_virtual_path(vfp)
+    }
+
+
 def merge_vfp_lists(old_vfp_list: List[str], new_vfp_list: List[str]) -> List[str]:
     '''
     virtual file paths (VFPs) with the same base are updated and should be replaced
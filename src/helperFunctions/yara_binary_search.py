@@ -1,17 +1,21 @@
-import subprocess
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 from os.path import basename
-from pathlib import Path
-from subprocess import PIPE, STDOUT, CalledProcessError
-from tempfile import NamedTemporaryFile
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 import yara
 
 from helperFunctions.database import ConnectTo
+from helperFunctions.yara_literals import get_required_literals
+from storage.binary_search_index import BinarySearchIndex
 from storage.db_interface_common import MongoInterfaceCommon
 from storage.fsorganizer import FSOrganizer
 
+MAX_YARA_THREADS = 32  # the maximum number of concurrent scans of libyara (YR_MAX_THREADS)
+SCAN_BATCH_SIZE = 1000
+
 
 class YaraBinarySearchScanner:
     '''
@@ -19,84 +23,115 @@ class YaraBinarySearchScanner:
     either match a given set of patterns on all files in the database or focus only on files included in a single
     firmware.
 
+    If a binary search index is configured, only files that may contain the literal strings of the rules are scanned.
+    The files are scanned in parallel threads (yara-python releases the GIL during a scan).
+
     :param config: The FACT configuration.
     '''
 
     def __init__(self, config: ConfigParser):
-        self.matches = []
         self.config = config
         self.db_path = self.config['data_storage']['firmware_file_storage_directory']
+        index_path = self.config['data_storage'].get('binary_search_index')
+        self.index = BinarySearchIndex(index_path) if index_path else None
+        self.max_workers = min(os.cpu_count() or 1, MAX_YARA_THREADS)
+
+    def _get_file_paths(self, firmware_uid: Optional[str]) -> List[str]:
+        if firmware_uid is not None:
+            with ConnectTo(YaraBinarySearchScannerDbInterface, self.config) as connection:
+                return connection.get_file_paths_of_files_included_in_fo(firmware_uid)
+        return [
+            os.path.join(directory, file_name)
+            for directory, _, file_names in os.walk(self.db_path)
+            for file_name in file_names
+        ]
 
-    def _execute_yara_search(self, rule_file_path: str, target_path: Optional[str] = None) -> str:
+    def _filter_candidates(self, file_paths: List[str], yara_rules: str) -> List[str]:
+        alternatives = get_required_literals(yara_rules) if self.index is not None else None
+        if alternatives is None:
+            return file_paths
+        candidates = set(self.index.filter_candidates((basename(path) for path in file_paths), alternatives))
+        logging.debug(f'binary search: {len(candidates)} of {len(file_paths)} files are candidates')
+        return [path for path in file_paths if basename(path) in candidates]
+
+    def scan_files(
+        self, rules: yara.Rules, file_paths: List[str], progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Iterator[Tuple[str, List[yara.Match]]]:
         '''
-        Scans the (whole) db directory with the provided rule file and returns the (raw) results.
-        Yara-python cannot be used, because it (currently) supports single-file scanning only.
+        Scan the files in parallel.
 
-        :param rule_file_path: The file path to the yara rule file.
-        :return: The output from the yara scan.
+        :param rules: The compiled yara rules.
+        :param file_paths: The paths of the files that should be scanned.
+        :param progress_callback: Optional function that is called with the number of scanned files and the total
+            number of files after each batch.
+        :return: An iterator of tuples of file path and matches (in the order of ``file_paths``).
         '''
-        compiled_flag = '-C' if Path(rule_file_path).read_bytes().startswith(b'YARA') else ''
-        command = f'yara -r {compiled_flag} {rule_file_path} {target_path or self.db_path}'
-        yara_process = subprocess.run(command, shell=True, stdout=PIPE, stderr=STDOUT, universal_newlines=True)
-        return yara_process.stdout
-
-    def _execute_yara_search_for_single_firmware(self, rule_file_path: str, firmware_uid: str) -> str:
-        with ConnectTo(YaraBinarySearchScannerDbInterface, self.config) as connection:
-            file_paths = connection.get_file_paths_of_files_included_in_fo(firmware_uid)
-        result = (self._execute_yara_search(rule_file_path, path) for path in file_paths)
-        return '\n'.join(result)
-
-    @staticmethod
-    def _parse_raw_result(raw_result: str) -> Dict[str, List[str]]:
-        '''
-        :param raw_result: raw yara scan result
-        :return: dict of matching rules with lists of matched UIDs as values
-        '''
-        results = {}
-        for line in raw_result.split('\n'):
-            if line and 'warning' not in line:
-                rule, match = line.split(' ')
-                results.setdefault(rule, []).append(basename(match))
-        return results
+        if progress_callback is not None:
+            progress_callback(0, len(file_paths))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for offset in range(0, len(file_paths), SCAN_BATCH_SIZE):
+                batch = file_paths[offset:offset + SCAN_BATCH_SIZE]
+                yield from zip(batch, executor.map(lambda path: _match_file(rules, path), batch))
+                if progress_callback is not None:
+                    progress_callback(offset + len(batch), len(file_paths))
 
     @staticmethod
     def _eliminate_duplicates(result_dict: Dict[str, List[str]]):
         for key in result_dict:
             result_dict[key] = sorted(set(result_dict[key]))
 
-    def get_binary_search_result(self, task: Tuple[bytes, Optional[str]]) -> Union[Dict[str, List[str]], str]:
+    def get_binary_search_result(
+        self, task: Tuple[bytes, Optional[str]], progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Union[Dict[str, List[str]], str]:
         '''
         Perform a yara search on the files in the database.
 
         :param task: A tuple containing the yara_rules (byte string with the contents of the yara rule file) and
             optionally a firmware uid if only the contents of a single firmware are to be scanned.
+        :param progress_callback: Optional function that is called with the number of scanned files and the total
+            number of files.
         :return: dict of matching rules with lists of (unique) matched UIDs as values or an error message.
         '''
-        with NamedTemporaryFile() as temp_rule_file:
-            yara_rules, firmware_uid = task
-            try:
-                self._prepare_temp_rule_file(temp_rule_file, yara_rules)
-                raw_result = self._get_raw_result(firmware_uid, temp_rule_file)
-                results = self._parse_raw_result(raw_result)
-                self._eliminate_duplicates(results)
-                return results
-            except yara.SyntaxError as yara_error:
-                return f'There seems to be an error in the rule file:\n{yara_error}'
-            except CalledProcessError as process_error:
-                return f'Error when calling YARA:\n{process_error.output.decode()}'
-
-    def _get_raw_result(self, firmware_uid: Optional[str], temp_rule_file: NamedTemporaryFile) -> str:
-        if firmware_uid is None:
-            raw_result = self._execute_yara_search(temp_rule_file.name)
-        else:
-            raw_result = self._execute_yara_search_for_single_firmware(temp_rule_file.name, firmware_uid)
-        return raw_result
+        results = {}
+        try:
+            for rule, uid in self.get_binary_search_matches(task, progress_callback):
+                results.setdefault(rule, []).append(uid)
+        except yara.SyntaxError as yara_error:
+            return get_yara_error_message(yara_error)
+        self._eliminate_duplicates(results)
+        return results
 
-    @staticmethod
-    def _prepare_temp_rule_file(temp_rule_file: NamedTemporaryFile, yara_rules: bytes):
-        compiled_rules = yara.compile(source=yara_rules.decode())
-        compiled_rules.save(file=temp_rule_file)
-        temp_rule_file.flush()
+    def get_binary_search_matches(
+        self, task: Tuple[bytes, Optional[str]], progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Iterator[Tuple[str, str]]:
+        '''
+        Perform a yara search on the files in the database and yield the matches as soon as they are found.
+
+        :param task: A tuple containing the yara_rules and optionally a firmware uid (see
+            :meth:`get_binary_search_result`).
+        :param progress_callback: Optional function that is called with the number of scanned files and the total
+            number of files.
+        :return: An iterator of tuples of matching rule and UID.
+        :raises yara.SyntaxError: If the rules are invalid.
+        '''
+        yara_rules, firmware_uid = task
+        rules = yara.compile(source=yara_rules.decode())
+        file_paths = self._filter_candidates(self._get_file_paths(firmware_uid), yara_rules.decode())
+        for file_path, matches in self.scan_files(rules, file_paths, progress_callback):
+            for match in matches:
+                yield match.rule, basename(file_path)
+
+
+def _match_file(rules: yara.Rules, file_path: str) -> List[yara.Match]:
+    try:
+        return rules.match(filepath=file_path)
+    except yara.Error as error:
+        logging.warning(f'binary search: could not scan {file_path}: {error}')
+        return []
+
+
+def get_yara_error_message(yara_error: yara.SyntaxError) -> str:
+    return f'There seems to be an error in the rule file:\n{yara_error}'
 
 
 def is_valid_yara_rule_file(yara_rules: Union[str, bytes]) -> bool:
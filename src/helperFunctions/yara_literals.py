@@ -0,0 +1,160 @@
+'''
+Extraction of the literal byte sequences that a file must contain to be matched by a set of YARA rules. They are used
+to preselect candidate files with the trigram index of the binary search (see :mod:`storage.binary_search_index`).
+
+The extraction is conservative: If it is not certain that a rule can only match files that contain one of its strings
+(e.g. because of regular expressions, ``nocase`` strings, modules or conditions like ``not $a`` or ``filesize < 100``),
+no literals are returned and all files have to be scanned.
+'''
+import re
+from typing import Dict, List, Optional, Set
+
+MIN_LITERAL_LENGTH = 3
+
+TEXT_STRING_REGEX = re.compile(r'"(?:[^"\\\n]|\\.)*"')
+COMMENT_REGEX = re.compile(rf'/\*.*?\*/|//[^\n]*|({TEXT_STRING_REGEX.pattern})', flags=re.DOTALL)
+RULE_REGEX = re.compile(r'\b(?:(?:private|global)\s+)*rule\s+(\w+)')
+SECTION_REGEX = re.compile(r'\b(meta|strings|condition)\s*:')
+STRING_REGEX = re.compile(
+    r'(\$\w*)\s*=\s*(?:"((?:[^"\\\n]|\\.)*)"|\{([^}]*)\}|/((?:[^/\\\n]|\\.)*)/[is]*)([^\n$]*)'
+)
+CONDITION_TOKEN_REGEX = re.compile(r'\$\w*\*?|\w+|[(),]|\S')
+HEX_TOKEN_REGEX = re.compile(r'\[[^\]]*\]|\(|\)|\||~?[0-9a-fA-F?]{2}|\S')
+ESCAPE_REGEX = re.compile(r'\\(x[0-9a-fA-F]{2}|.)')
+ESCAPES = {'n': b'\n', 't': b'\t', 'r': b'\r', '"': b'"', '\\': b'\\'}
+SUPPORTED_MODIFIERS = {'ascii', 'wide', 'fullword', 'private'}
+CONDITION_KEYWORDS = {'and', 'or', 'any', 'all', 'of', 'them', '(', ')', ','}
+
+
+def get_required_literals(rule_source: str) -> Optional[List[List[bytes]]]:
+    '''
+    Get the literals that files must contain to match any of the rules.
+
+    :param rule_source: The source code of the YARA rules.
+    :return: A list of alternatives: A file can only match if it contains all literals of at least one alternative.
+        ``None`` if the rules could match files without containing specific literals.
+    '''
+    source = COMMENT_REGEX.sub(lambda match: match.group(1) or ' ', rule_source)
+    if re.search(r'^\s*(import|include)\b', source, flags=re.MULTILINE):
+        return None
+    rule_starts = [match.start() for match in RULE_REGEX.finditer(source)]
+    if not rule_starts:
+        return None
+    alternatives = []
+    for start, end in zip(rule_starts, rule_starts[1:] + [len(source)]):
+        rule_alternatives = _get_rule_alternatives(source[start:end])
+        if rule_alternatives is None:
+            return None
+        alternatives.extend(rule_alternatives)
+    return alternatives
+
+
+def _get_rule_alternatives(rule: str) -> Optional[List[List[bytes]]]:
+    sections = _get_sections(rule)
+    if rule.lstrip().startswith('global') or list(sections)[-1:] != ['condition'] or 'strings' not in sections:
+        return None
+    strings_section, condition = sections['strings'], sections['condition'].rsplit('}', maxsplit=1)[0]
+    if not _condition_requires_a_string(condition):
+        return None
+    alternatives = []
+    for _, text_string, hex_string, regex, modifiers in STRING_REGEX.findall(strings_section):
+        string_alternatives = _get_string_alternatives(text_string, hex_string, regex, modifiers)
+        if string_alternatives is None:
+            return None
+        alternatives.extend(string_alternatives)
+    return alternatives or None
+
+
+def _get_sections(rule: str) -> Dict[str, str]:
+    # section names inside of text strings (e.g. in the meta section) are ignored
+    masked_rule = TEXT_STRING_REGEX.sub(lambda match: '"' + ' ' * (len(match.group()) - 2) + '"', rule)
+    matches = list(SECTION_REGEX.finditer(masked_rule))
+    ends = [match.start() for match in matches[1:]] + [len(rule)]
+    return {match.group(1): rule[match.end():end] for match, end in zip(matches, ends)}
+
+
+def _condition_requires_a_string(condition: str) -> bool:
+    '''
+    Only conditions consisting of string references combined with ``and``/``or`` and ``<n> of`` expressions (with n > 0)
+    are accepted: They can only be true if at least one string matches.
+    '''
+    for token in CONDITION_TOKEN_REGEX.findall(condition):
+        if token.startswith('$') or token in CONDITION_KEYWORDS or (token.isdigit() and int(token) > 0):
+            continue
+        return False
+    return True
+
+
+def _get_string_alternatives(text_string: str, hex_string: str, regex: str, modifiers: str) -> Optional[List[List[bytes]]]:
+    modifier_set = set(modifiers.split())
+    if regex or not modifier_set.issubset(SUPPORTED_MODIFIERS):
+        return None
+    if hex_string:
+        fragments = _get_hex_fragments(hex_string)
+        return [fragments] if fragments else None
+    literal = _unescape(text_string)
+    if len(literal) < MIN_LITERAL_LENGTH:
+        return None
+    alternatives = []
+    if 'ascii' in modifier_set or 'wide' not in modifier_set:
+        alternatives.append([literal])
+    if 'wide' in modifier_set:
+        alternatives.append([b''.join(bytes([byte, 0]) for byte in literal)])
+    return alternatives
+
+
+def _get_hex_fragments(hex_string: str) -> List[bytes]:
+    fragments, current, nesting_level = [], bytearray(), 0
+    for token in HEX_TOKEN_REGEX.findall(hex_string):
+        is_fixed_byte = nesting_level == 0 and len(token) == 2 and '?' not in token
+        if is_fixed_byte:
+            current.append(int(token, 16))
+            continue
+        if len(current) >= MIN_LITERAL_LENGTH:
+            fragments.append(bytes(current))
+        current = bytearray()
+        nesting_level += {'(': 1, ')': -1}.get(token, 0)
+    if len(current) >= MIN_LITERAL_LENGTH:
+        fragments.append(bytes(current))
+    return fragments
+
+
+def _unescape(text_string: str) -> bytes:
+    result, position = bytearray(), 0
+    for match in ESCAPE_REGEX.finditer(text_string):
+        result += text_string[position:match.start()].encode() + _unescape_sequence(match.group(1))
+        position = match.end()
+    return bytes(result + text_string[position:].encode())
+
+
+def _unescape_sequence(sequence: str) -> bytes:
+    if sequence.startswith('x') and len(sequence) == 3:
+        return bytes([int(sequence[1:], 16)])
+    return ESCAPES.get(sequence, sequence.encode())
+
+
+def get_hex_strings(rule_source: str) -> Dict[str, List[str]]:
+    '''
+    Get the identifiers of the hex strings (e.g. ``$a = { 00 FF }``) of each rule. The compiled rules do not contain this
+    information, but the matches of hex strings are shown as hex bytes (see :mod:`analysis.YaraPluginBase`).
+
+    :param rule_source: The source code of the YARA rules.
+    :return: The identifiers of the hex strings by rule name (rules without hex strings are omitted).
+    '''
+    source = COMMENT_REGEX.sub(lambda match: match.group(1) or ' ', rule_source)
+    rules = list(RULE_REGEX.finditer(source))
+    ends = [match.start() for match in rules[1:]] + [len(source)]
+    result = {}
+    for rule, end in zip(rules, ends):
+        strings_section = _get_sections(source[rule.start():end]).get('strings', '')
+        hex_strings = [identifier for identifier, _, hex_string, *_ in STRING_REGEX.findall(strings_section) if hex_string]
+        if hex_strings:
+            result[rule.group(1)] = hex_strings
+    return result
+
+
+def get_trigrams(literal: bytes) -> Set[int]:
+    '''
+    Get the trigrams (three consecutive bytes as integer) of a byte string.
+    '''
+    return {(literal[i] << 16) | (literal[i + 1] << 8) | literal[i + 2] for i in range(len(literal) - 2)}
@@ -7,13 +7,13 @@ from contextlib import suppress
 from pathlib import Path
 from subprocess import PIPE, STDOUT
 
-import requests
+import yara
 
-from compile_yara_signatures import main as compile_signatures
+from compile_yara_signatures import compile_signature_file
 from helperFunctions.fileSystem import get_src_dir
 from helperFunctions.install import (
-    InstallationError, OperateInDirectory, apt_install_packages, dnf_install_packages, install_pip_packages,
-    load_main_config, read_package_list_from_file
+    InstallationError, OperateInDirectory, apt_install_packages, dnf_install_packages, install_github_project,
+    install_pip_packages, is_virtualenv, load_main_config, read_package_list_from_file, run_cmd_with_logging
 )
 
 BIN_DIR = Path(__file__).parent.parent / 'bin'
@@ -52,15 +52,9 @@ def main(skip_docker, distribution):
     _create_firmware_directory()
 
     # compiling yara signatures
-    compile_signatures()
-    yarac_process = subprocess.run(
-        'yarac -d test_flag=false ../test/unit/analysis/test.yara ../analysis/signatures/Yara_Base_Plugin.yc',
-        shell=True,
-        stdout=PIPE,
-        stderr=PIPE,
-        universal_newlines=True,
-    )
-    if yarac_process.returncode != 0:
+    # in a new process, so that the yara-python with the magic module is used (see _install_yara)
+    run_cmd_with_logging(f'python3 {get_src_dir()}/compile_yara_signatures.py')
+    if not compile_signature_file('../test/unit/analysis/test.yara', '../analysis/signatures/Yara_Base_Plugin.yc'):
         raise InstallationError('Failed to compile yara test signatures')
 
     with OperateInDirectory('../../'):
@@ -123,23 +117,52 @@ def _install_plugins(distribution, skip_docker, only_docker=False):
         logging.info(f'Finished installing {plugin_name} plugin.\n')
 
 
+def _get_yara_version() -> str:
+    # the compiled signatures can only be loaded by the libyara version that created them (see compile_yara_signatures)
+    # -> yara is pinned to the version of the python binding
+    for package in read_package_list_from_file(INSTALL_DIR / 'requirements_common.txt'):
+        if package.startswith('yara-python=='):
+            return package.split('==')[1]
+    raise InstallationError('Could not find yara-python version')
+
+
 def _install_yara():  # pylint: disable=too-complex
 
     # CAUTION: Yara python binding is installed in install/common.py, because it is needed in the frontend as well.
+    # It is built again with the magic module here, because the signatures of software_components need it.
 
-    try:
-        latest_url = requests.get('https://github.com/VirusTotal/yara/releases/latest').url
-        latest_version = latest_url.split('/tag/')[1]
-    except (AttributeError, KeyError):
-        raise InstallationError('Could not find latest yara version') from None
-
+    version = _get_yara_version()
     yara_process = subprocess.run('yara --version', shell=True, stdout=PIPE, stderr=STDOUT, universal_newlines=True)
-    if yara_process.returncode == 0 and yara_process.stdout.strip() == latest_version.strip('v'):
+    if yara_process.returncode == 0 and yara_process.stdout.strip() == version:
         logging.info('Skipping yara installation: Already installed and up to date')
+    else:
+        _install_yara_cli(f'v{version}')
+
+    if _yara_python_has_magic_module():
+        logging.info('Skipping yara-python installation: Already installed with magic module')
         return
+    logging.info(f'Installing yara-python {version} with magic module')
+    sudo = '' if is_virtualenv() else 'sudo -EH '
+    install_github_project('VirusTotal/yara-python', [
+        f'git checkout v{version}',
+        'git submodule update --init',
+        'python3 setup.py build --enable-magic',
+        f'{sudo}pip3 uninstall -y yara-python',
+        f'{sudo}python3 setup.py install',
+    ])
+
+
+def _yara_python_has_magic_module() -> bool:
+    try:
+        yara.compile(source='import "magic" rule magic_test { condition: magic.mime_type() != "" }')
+        return True
+    except yara.Error:
+        return False
+
 
-    logging.info(f'Installing yara {latest_version}')
-    archive = f'{latest_version}.zip'
+def _install_yara_cli(version: str):
+    logging.info(f'Installing yara {version}')
+    archive = f'{version}.zip'
     download_url = f'https://github.com/VirusTotal/yara/archive/refs/tags/{archive}'
     wget_process = subprocess.run(f'wget {download_url}', shell=True, stdout=PIPE, stderr=STDOUT, universal_newlines=True)
     if wget_process.returncode != 0:
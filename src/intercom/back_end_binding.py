@@ -1,19 +1,31 @@
 import logging
 import pickle
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from multiprocessing import Process, Value
 from pathlib import Path
-from time import sleep
-from typing import Callable, Optional, Tuple, Type
+from threading import Event
+from time import time
+from typing import Callable, List, Optional, Tuple, Type
 
+import yara
 from common_helper_mongo.gridfs import overwrite_file
+from pymongo import ASCENDING
 
 from helperFunctions.database import ConnectTo
+from helperFunctions.object_serialization import decode_file_object
 from helperFunctions.program_setup import get_log_file_for_component
-from helperFunctions.yara_binary_search import YaraBinarySearchScanner
+from helperFunctions.yara_binary_search import YaraBinarySearchScanner, get_yara_error_message
 from intercom.common_mongo_binding import InterComListener, InterComListenerAndResponder, InterComMongoInterface
+from intercom.notification import get_notification_channel
 from storage.binary_service import BinaryService
 from storage.db_interface_common import MongoInterfaceCommon
 from storage.fsorganizer import FSOrganizer
+from storage.mongo_interface import get_mongo_client
+
+DEFERRED_CHECK_DELAY = 0.05
+MAX_BINARY_SEARCH_JOBS = 2
+BINARY_SEARCH_JOB_EXPIRATION = 24 * 60 * 60  # results of binary searches are kept for one day
 
 
 class InterComBackEndBinding:
@@ -36,17 +48,19 @@ class InterComBackEndBinding:
 
     def start_listeners(self):
         InterComBackEndAnalysisPlugInsPublisher(config=self.config, analysis_service=self.analysis_service)
-        self._start_listener(InterComBackEndAnalysisTask, self.unpacking_service.add_task)
-        self._start_listener(InterComBackEndReAnalyzeTask, self.unpacking_service.add_task)
-        self._start_listener(InterComBackEndCompareTask, self.compare_service.add_task)
-        self._start_listener(InterComBackEndRawDownloadTask)
-        self._start_listener(InterComBackEndTarRepackTask)
-        self._start_listener(InterComBackEndBinarySearchTask)
-        self._start_listener(InterComBackEndUpdateTask, self.analysis_service.update_analysis_of_object_and_children)
-        self._start_listener(InterComBackEndDeleteFile)
-        self._start_listener(InterComBackEndSingleFileTask, self.analysis_service.update_analysis_of_single_object)
-        self._start_listener(InterComBackEndPeekBinaryTask)
-        self._start_listener(InterComBackEndLogsTask)
+        self._start_dispatcher([
+            (InterComBackEndAnalysisTask, self.unpacking_service.add_task),
+            (InterComBackEndReAnalyzeTask, self.unpacking_service.add_task),
+            (InterComBackEndCompareTask, self.compare_service.add_task),
+            (InterComBackEndRawDownloadTask, None),
+            (InterComBackEndBinaryStreamTask, None),
+            (InterComBackEndBinarySearchTask, None),
+            (InterComBackEndUpdateTask, self.analysis_service.update_analysis_of_object_and_children),
+            (InterComBackEndDeleteFile, None),
+            (InterComBackEndSingleFileTask, self.analysis_service.update_analysis_of_single_object),
+            (InterComBackEndPeekBinaryTask, None),
+            (InterComBackEndLogsTask, None),
+        ])
 
     def shutdown(self):
         self.stop_condition.value = 1
@@ -54,22 +68,50 @@ class InterComBackEndBinding:
             item.join()
         logging.info('InterCom down')
 
-    def _start_listener(self, listener: Type[InterComListener], do_after_function: Optional[Callable] = None):
-        process = Process(target=self._backend_worker, args=(listener, do_after_function))
+    def _start_dispatcher(self, listeners: List[Tuple[Type[InterComListener], Optional[Callable]]]):
+        process = Process(target=self._backend_dispatcher, args=(listeners,))
         process.start()
         self.process_list.append(process)
 
-    def _backend_worker(self, listener: Type[InterComListener], do_after_function: Optional[Callable]):
-        interface = listener(config=self.config)
-        logging.debug(f'{listener.__name__} listener started')
-        while self.stop_condition.value == 0:
-            task = interface.get_next_task()
-            if task is None:
-                sleep(self.poll_delay)
-            elif do_after_function is not None:
-                do_after_function(task)
-        interface.shutdown()
-        logging.debug(f'{listener.__name__} listener stopped')
+    def _backend_dispatcher(self, listeners: List[Tuple[Type[InterComListener], Optional[Callable]]]):
+        '''
+        Serves all listeners from a single process: The dispatcher waits for notifications about new tasks and hands
+        the notified connections to a thread pool. As notifications may be lost, all connections are checked after
+        `intercom_poll_delay` seconds without notification.
+        '''
+        handlers = {
+            listener.CONNECTION_TYPE: (listener(config=self.config), do_after_function)
+            for listener, do_after_function in listeners
+        }
+        notification_channel = get_notification_channel(self.config, get_mongo_client(self.config))
+        logging.debug(f'InterCom dispatcher started ({", ".join(handlers)})')
+        running, deferred = {}, set()
+        pending = set(handlers)
+        with ThreadPoolExecutor(max_workers=len(handlers)) as executor:
+            while self.stop_condition.value == 0:
+                for connection_type in pending:
+                    if connection_type in running and not running[connection_type].done():
+                        deferred.add(connection_type)  # the notification may have arrived after the last check
+                        continue
+                    deferred.discard(connection_type)
+                    running[connection_type] = executor.submit(self._process_tasks, *handlers[connection_type])
+                timeout = DEFERRED_CHECK_DELAY if deferred else self.poll_delay
+                pending = notification_channel.wait_for_notification(handlers, timeout=timeout) or set(handlers)
+        notification_channel.close()
+        for interface, _ in handlers.values():
+            interface.shutdown()
+        logging.debug('InterCom dispatcher stopped')
+
+    def _process_tasks(self, interface: InterComListener, do_after_function: Optional[Callable]):
+        try:
+            while self.stop_condition.value == 0:
+                task = interface.get_next_task()
+                if task is None:
+                    break
+                if do_after_function is not None:
+                    do_after_function(task)
+        except Exception as exception:  # pylint: disable=broad-except
+            logging.error(f'{interface.CONNECTION_TYPE}: processing of task failed: {exception}', exc_info=True)
 
 
 class InterComBackEndAnalysisPlugInsPublisher(InterComMongoInterface):
@@ -77,7 +119,7 @@ class InterComBackEndAnalysisPlugInsPublisher(InterComMongoInterface):
     def __init__(self, config=None, analysis_service=None):
         super().__init__(config=config)
         self.publish_available_analysis_plugins(analysis_service)
-        self.client.close()
+        self.shutdown()
 
     def publish_available_analysis_plugins(self, analysis_service):
         available_plugin_dictionary = analysis_service.get_plugin_dict()
@@ -92,8 +134,21 @@ class InterComBackEndAnalysisTask(InterComListener):
         super().__init__(config)
         self.fs_organizer = FSOrganizer(config=config)
 
+    def deserialize_task(self, serialized_task):
+        return decode_file_object(serialized_task)
+
     def post_processing(self, task, task_id):
-        self.fs_organizer.store_file(task)
+        staged_file = self.connections['binary_upload']['fs'].find_one({'filename': task.uid})
+        if staged_file is not None:
+            self.fs_organizer.store_file_from_stream(task, staged_file)
+            self.connections['binary_upload']['fs'].delete(staged_file._id)  # pylint: disable=protected-access
+        elif task.binary is not None:
+            self.fs_organizer.store_file(task)
+        else:  # e.g. the same binary was uploaded twice and the first task already moved it
+            task.file_path = self.fs_organizer.generate_path(task)
+            if not Path(task.file_path).is_file():
+                logging.error(f'analysis task {task.uid}: staged binary not found')
+            task.create_binary_from_path()
         return task
 
 
@@ -105,6 +160,9 @@ class InterComBackEndReAnalyzeTask(InterComListener):
         super().__init__(config)
         self.fs_organizer = FSOrganizer(config=config)
 
+    def deserialize_task(self, serialized_task):
+        return decode_file_object(serialized_task)
+
     def post_processing(self, task, task_id):
         task.file_path = self.fs_organizer.generate_path(task)
         task.create_binary_from_path()
@@ -152,28 +210,94 @@ class InterComBackEndPeekBinaryTask(InterComListenerAndResponder):
         return self.binary_service.read_partial_binary(*task)
 
 
-class InterComBackEndTarRepackTask(InterComListenerAndResponder):
+class InterComBackEndBinaryStreamTask(InterComListener):
+    '''
+    Stores the (optionally repacked) binary chunk by chunk as GridFS response file so that neither back end nor front
+    end must hold it in memory as a whole. The original file name is stored as attribute `file_name` of the response
+    (`None` if the file was not found).
+    '''
 
-    CONNECTION_TYPE = 'tar_repack_task'
-    OUTGOING_CONNECTION_TYPE = 'tar_repack_task_resp'
+    CONNECTION_TYPE = 'binary_stream_task'
+    OUTGOING_CONNECTION_TYPE = 'binary_stream_task_resp'
 
     def __init__(self, config=None):
         super().__init__(config)
         self.binary_service = BinaryService(config=self.config)
 
-    def get_response(self, task):
-        return self.binary_service.get_repacked_binary_and_file_name(task)
+    def post_processing(self, task: Tuple[str, bool], task_id):
+        uid, packed = task
+        with self.binary_service.open_binary(uid, packed=packed) as (file_handle, file_name):
+            self._add_task(self.OUTGOING_CONNECTION_TYPE, file_handle or b'', filename=task_id, file_name=file_name)
+        logging.debug(f'response send: {self.OUTGOING_CONNECTION_TYPE} -> {task_id}')
+        return task
+
 
+class BinarySearchCancelled(Exception):
+    pass
 
-class InterComBackEndBinarySearchTask(InterComListenerAndResponder):
+
+class InterComBackEndBinarySearchTask(InterComListener):
+    '''
+    Runs the binary searches as jobs in a thread pool (so that long searches do not block the listener). The progress
+    and the matches are written to the intercom database while the search is running (see
+    :attr:`~intercom.common_mongo_binding.InterComMongoInterface.binary_search_jobs`).
+    '''
 
     CONNECTION_TYPE = 'binary_search_task'
-    OUTGOING_CONNECTION_TYPE = 'binary_search_task_resp'
 
-    def get_response(self, task):
-        yara_binary_searcher = YaraBinarySearchScanner(config=self.config)
-        uid_list = yara_binary_searcher.get_binary_search_result(task)
-        return uid_list, task
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.binary_search_matches.create_index([('job_id', ASCENDING), ('index', ASCENDING)])
+        self.executor = ThreadPoolExecutor(max_workers=MAX_BINARY_SEARCH_JOBS)
+        self.stopped = Event()
+
+    def shutdown(self):
+        self.stopped.set()
+        self.executor.shutdown(wait=True)
+        super().shutdown()
+
+    def post_processing(self, task, task_id):
+        self._remove_expired_jobs()
+        self.executor.submit(self._run_job, task, task_id)
+        return task
+
+    def _run_job(self, task: Tuple[bytes, Optional[str]], job_id: str):
+        scanner = YaraBinarySearchScanner(config=self.config)
+        try:
+            if self.stopped.is_set() or self._update_job(job_id, {'status': 'running'}, cancel_requested=False) == 0:
+                raise BinarySearchCancelled()
+            matches = scanner.get_binary_search_matches(task, partial(self._update_progress, job_id))
+            for index, (rule, uid) in enumerate(matches):
+                self.binary_search_matches.insert_one({'job_id': job_id, 'index': index, 'rule': rule, 'uid': uid})
+            self._update_job(job_id, {'status': 'finished'})
+        except BinarySearchCancelled:
+            error = 'The backend was stopped' if self.stopped.is_set() else None
+            self._update_job(job_id, {'status': 'cancelled', 'error': error})
+        except yara.SyntaxError as yara_error:
+            self._update_job(job_id, {'status': 'failed', 'error': get_yara_error_message(yara_error)})
+        except Exception as exception:  # pylint: disable=broad-except
+            logging.error(f'binary search {job_id} failed: {exception}', exc_info=True)
+            self._update_job(job_id, {'status': 'failed', 'error': f'Binary search failed: {exception}'})
+
+    def _update_progress(self, job_id: str, scanned: int, total: int):
+        if self.stopped.is_set():
+            raise BinarySearchCancelled()
+        if self._update_job(job_id, {'scanned': scanned, 'total': total}, cancel_requested=False) == 0:
+            raise BinarySearchCancelled()
+
+    def _update_job(self, job_id: str, update: dict, **conditions) -> int:
+        update_result = self.binary_search_jobs.update_one(
+            {'_id': job_id, **conditions}, {'$set': {**update, 'time': time()}}
+        )
+        return update_result.matched_count
+
+    def _remove_expired_jobs(self):
+        expired_jobs = self.binary_search_jobs.find(
+            {'time': {'$lt': time() - BINARY_SEARCH_JOB_EXPIRATION}, 'status': {'$nin': ['queued', 'running']}}, {'_id': 1}
+        )
+        for job in expired_jobs:
+            self.binary_search_matches.delete_many({'job_id': job['_id']})
+            self.binary_search_jobs.delete_one({'_id': job['_id']})
 
 
 class InterComBackEndDeleteFile(InterComListener):
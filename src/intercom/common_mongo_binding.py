@@ -1,11 +1,13 @@
 import logging
 import pickle
 from time import time
-from typing import Any
+from typing import Any, BinaryIO, Optional, Union
 
 import gridfs
+from pymongo.collection import Collection
 
 from helperFunctions.hash import get_sha256
+from intercom.notification import NotificationChannel, get_notification_channel
 from storage.mongo_interface import MongoInterface
 
 
@@ -24,18 +26,19 @@ class InterComMongoInterface(MongoInterface):
         'test',
         'analysis_task',
         'analysis_plugins',
+        'binary_upload',
         're_analyze_task',
         'update_task',
         'compare_task',
         'file_delete_task',
         'raw_download_task',
         'raw_download_task_resp',
-        'tar_repack_task',
-        'tar_repack_task_resp',
         'binary_peek_task',
         'binary_peek_task_resp',
+        'binary_stream_task',
+        'binary_stream_task_resp',
         'binary_search_task',
-        'binary_search_task_resp',
+        'binary_search_jobs',
         'single_file_task',
         'logs_task',
         'logs_task_resp'
@@ -48,6 +51,39 @@ class InterComMongoInterface(MongoInterface):
             self.connections[item] = {'name': f'{prefix}_{item}'}
             self.connections[item]['collection'] = self.client[self.connections[item]['name']]
             self.connections[item]['fs'] = gridfs.GridFS(self.connections[item]['collection'])
+        self._notification_channel = None
+
+    @property
+    def notification_channel(self) -> NotificationChannel:
+        if self._notification_channel is None:
+            self._notification_channel = get_notification_channel(self.config, self.client)
+        return self._notification_channel
+
+    @property
+    def binary_search_jobs(self) -> Collection:
+        '''
+        State of the binary searches: ``{'_id': search ID, 'status': queued|running|finished|failed|cancelled,
+        'task': (yara rules, firmware UID), 'scanned': number of scanned files, 'total': number of files,
+        'error': error message, 'cancel_requested': bool, 'time': last update}``
+        '''
+        return self.connections['binary_search_jobs']['collection']['jobs']
+
+    @property
+    def binary_search_matches(self) -> Collection:
+        '''
+        Matches of the binary searches in the order they were found: ``{'job_id', 'index', 'rule', 'uid'}``
+        '''
+        return self.connections['binary_search_jobs']['collection']['matches']
+
+    def shutdown(self):
+        if self._notification_channel is not None:
+            self._notification_channel.close()
+        super().shutdown()
+
+    def _add_task(self, connection_type: str, serialized_task: Union[bytes, BinaryIO], filename: Optional[str] = None, **metadata):
+        # file objects are stored chunk by chunk by GridFS (i.e. they are not loaded into memory as a whole)
+        self.connections[connection_type]['fs'].put(serialized_task, filename=filename, **metadata)
+        self.notification_channel.notify(connection_type)
 
 
 class InterComListener(InterComMongoInterface):
@@ -64,7 +100,7 @@ class InterComListener(InterComMongoInterface):
             logging.error(f'Could not get next task: {str(exc)}', exc_info=True)
             return None
         if task_obj is not None:
-            task = pickle.loads(task_obj.read())
+            task = self.deserialize_task(task_obj.read())
             task_id = task_obj.filename
             self.connections[self.CONNECTION_TYPE]['fs'].delete(task_obj._id)  # pylint: disable=protected-access
             task = self.post_processing(task, task_id)
@@ -72,6 +108,12 @@ class InterComListener(InterComMongoInterface):
             return task
         return None
 
+    def deserialize_task(self, serialized_task: bytes):  # pylint: disable=no-self-use
+        '''
+        optional custom deserialization of a task (default: pickle)
+        '''
+        return pickle.loads(serialized_task)
+
     def post_processing(self, task, task_id):  # pylint: disable=no-self-use,unused-argument
         '''
         optional post processing of a task
@@ -90,7 +132,7 @@ class InterComListenerAndResponder(InterComListener):
     def post_processing(self, task, task_id):
         logging.debug(f'request received: {self.CONNECTION_TYPE} -> {task_id}')
         response = self.get_response(task)
-        self.connections[self.OUTGOING_CONNECTION_TYPE]['fs'].put(pickle.dumps(response), filename='{}'.format(task_id))
+        self._add_task(self.OUTGOING_CONNECTION_TYPE, pickle.dumps(response), filename=f'{task_id}')
         logging.debug(f'response send: {self.OUTGOING_CONNECTION_TYPE} -> {task_id}')
         return task
 
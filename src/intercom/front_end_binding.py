@@ -1,8 +1,14 @@
 import logging
 import pickle
-from time import sleep, time
-from typing import Optional
+from io import BytesIO
+from time import time
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 
+from gridfs import GridOut
+from pymongo import ASCENDING
+
+from helperFunctions.hash import HashingReader
+from helperFunctions.object_serialization import encode_file_object
 from intercom.common_mongo_binding import InterComMongoInterface, generate_task_id
 
 
@@ -12,22 +18,47 @@ class InterComFrontEndBinding(InterComMongoInterface):
     '''
 
     def add_analysis_task(self, fw):
-        self.connections['analysis_task']['fs'].put(pickle.dumps(fw), filename=fw.uid)
+        '''
+        Schedule the analysis of a new firmware. If the firmware has a binary, it is staged with :meth:`stage_binary`
+        first (otherwise it must already be staged).
+        '''
+        if fw.binary is not None:
+            self.stage_binary(BytesIO(fw.binary))
+        self._add_task('analysis_task', encode_file_object(fw), filename=fw.uid)
+
+    def stage_binary(self, file_handle: BinaryIO) -> str:
+        '''
+        Store an uploaded binary chunk by chunk in the staging area of the intercom from where the back end moves it
+        to the file storage once the analysis task arrives. The UID is computed on the fly.
+
+        :param file_handle: The (uploaded) binary.
+        :return: The UID of the binary.
+        '''
+        reader = HashingReader(file_handle)
+        file_id = self.connections['binary_upload']['fs'].put(reader)
+        uid = f'{reader.sha256}_{reader.size}'  # same format as `helperFunctions.uid.create_uid`
+        self.connections['binary_upload']['collection'].fs.files.update_one({'_id': file_id}, {'$set': {'filename': uid}})
+        return uid
+
+    def discard_staged_binary(self, uid: str):
+        staged_file = self.connections['binary_upload']['fs'].find_one({'filename': uid})
+        if staged_file is not None:
+            self.connections['binary_upload']['fs'].delete(staged_file._id)  # pylint: disable=protected-access
 
     def add_re_analyze_task(self, fw, unpack=True):
         if unpack:
-            self.connections['re_analyze_task']['fs'].put(pickle.dumps(fw), filename=fw.uid)
+            self._add_task('re_analyze_task', encode_file_object(fw), filename=fw.uid)
         else:
-            self.connections['update_task']['fs'].put(pickle.dumps(fw), filename=fw.uid)
+            self._add_task('update_task', encode_file_object(fw), filename=fw.uid)
 
     def add_single_file_task(self, fw):
-        self.connections['single_file_task']['fs'].put(pickle.dumps(fw), filename=fw.uid)
+        self._add_task('single_file_task', encode_file_object(fw), filename=fw.uid)
 
     def add_compare_task(self, compare_id, force=False):
-        self.connections['compare_task']['fs'].put(pickle.dumps((compare_id, force)), filename=compare_id)
+        self._add_task('compare_task', pickle.dumps((compare_id, force)), filename=compare_id)
 
     def delete_file(self, fw):
-        self.connections['file_delete_task']['fs'].put(pickle.dumps(fw))
+        self._add_task('file_delete_task', pickle.dumps(fw))
 
     def get_available_analysis_plugins(self):
         plugin_file = self.connections['analysis_plugins']['fs'].find_one({'filename': 'plugin_dictionary'})
@@ -42,42 +73,130 @@ class InterComFrontEndBinding(InterComMongoInterface):
     def peek_in_binary(self, uid: str, offset: int, length: int) -> bytes:
         return self._request_response_listener((uid, offset, length), 'binary_peek_task', 'binary_peek_task_resp')
 
-    def get_repacked_binary_and_file_name(self, uid):
-        return self._request_response_listener(uid, 'tar_repack_task', 'tar_repack_task_resp')
-
-    def add_binary_search_request(self, yara_rule_binary: bytes, firmware_uid: Optional[str] = None):
-        serialized_request = pickle.dumps((yara_rule_binary, firmware_uid))
+    def get_binary_stream(self, uid: str, packed: bool = False) -> Optional[GridOut]:
+        '''
+        Request the binary (or its contents as tar.gz archive if `packed` is set) as GridFS file that can be read in
+        chunks. The original file name is available as attribute `file_name` of the returned file. The file must be
+        removed with :meth:`delete_binary_stream` after use.
+
+        :param uid: The UID of the file.
+        :param packed: Get the repacked contents instead of the binary.
+        :return: The binary as (seekable) GridFS file or `None` if the file was not found or the request timed out.
+        '''
+        request_id = generate_task_id((uid, packed))
+        self._add_task('binary_stream_task', pickle.dumps((uid, packed)), filename=request_id)
+        stream = self._wait_for_response_file('binary_stream_task_resp', request_id)
+        if stream is not None and stream.file_name is None:
+            self.delete_binary_stream(stream)
+            return None
+        return stream
+
+    def delete_binary_stream(self, stream: GridOut):
+        self.connections['binary_stream_task_resp']['fs'].delete(stream._id)  # pylint: disable=protected-access
+
+    def add_binary_search_request(self, yara_rule_binary: bytes, firmware_uid: Optional[str] = None) -> str:
+        '''
+        Start a binary search job. Its state can be queried with :meth:`get_binary_search_job` and the matches can be
+        fetched page by page with :meth:`get_binary_search_matches` while the search is still running.
+
+        :return: The ID of the search.
+        '''
+        task = (yara_rule_binary, firmware_uid)
         request_id = generate_task_id(yara_rule_binary)
-        self.connections['binary_search_task']['fs'].put(serialized_request, filename=request_id)
+        self.binary_search_jobs.insert_one({
+            '_id': request_id, 'status': 'queued', 'task': task, 'scanned': 0, 'total': None, 'error': None,
+            'cancel_requested': False, 'time': time(),
+        })
+        self._add_task('binary_search_task', pickle.dumps(task), filename=request_id)
         return request_id
 
-    def get_binary_search_result(self, request_id):
-        result = self._response_listener('binary_search_task_resp', request_id, timeout=time() + 10, delete=False)
-        return result if result is not None else (None, None)
+    def get_binary_search_job(self, request_id: str) -> Optional[dict]:
+        '''
+        Get the state of a binary search (see :attr:`binary_search_jobs`) with the number of matches found so far as
+        additional key ``match_count`` or ``None`` if the ID is unknown.
+        '''
+        job = self.binary_search_jobs.find_one({'_id': request_id})
+        if job is not None:
+            job['match_count'] = self.binary_search_matches.count_documents({'job_id': request_id})
+        return job
+
+    def get_binary_search_matches(self, request_id: str, offset: int = 0, limit: int = 0) -> Dict[str, List[str]]:
+        '''
+        Get (a page of) the matches of a binary search found so far. The matches are paged in the order they were
+        found, so pages that were already fetched do not change while the search is running.
+
+        :param request_id: The ID of the search.
+        :param offset: The number of matches to skip.
+        :param limit: The maximum number of matches (0 = no limit).
+        :return: dict of matching rules with lists of matched UIDs as values.
+        '''
+        matches = self.binary_search_matches.find(
+            {'job_id': request_id}, {'rule': 1, 'uid': 1}, sort=[('index', ASCENDING)], skip=offset, limit=limit
+        )
+        result = {}
+        for match in matches:
+            result.setdefault(match['rule'], []).append(match['uid'])
+        return result
+
+    def cancel_binary_search(self, request_id: str) -> bool:
+        '''
+        Request the cancellation of a queued or running binary search.
+
+        :return: ``True`` if the search was found and is not done yet.
+        '''
+        update_result = self.binary_search_jobs.update_one(
+            {'_id': request_id, 'status': {'$in': ['queued', 'running']}}, {'$set': {'cancel_requested': True}}
+        )
+        return update_result.matched_count > 0
+
+    def get_binary_search_result(self, request_id: str) -> Tuple[Union[Dict[str, List[str]], str, None], Optional[tuple]]:
+        '''
+        Get the complete result of a binary search.
+
+        :return: A tuple of result (dict of matching rules with lists of unique matched UIDs as values or an error
+            message) and task (yara rules and firmware UID) or ``(None, None)`` if the search is not done yet.
+        '''
+        job = self.binary_search_jobs.find_one({'_id': request_id})
+        if job is None or job['status'] in ['queued', 'running']:
+            return None, None
+        if job['status'] != 'finished':
+            return job['error'] or f'Binary search {job["status"]}', tuple(job['task'])
+        result = self.get_binary_search_matches(request_id)
+        return {rule: sorted(set(uids)) for rule, uids in result.items()}, tuple(job['task'])
 
     def _request_response_listener(self, input_data, request_connection, response_connection):
         serialized_request = pickle.dumps(input_data)
         request_id = generate_task_id(input_data)
-        self.connections[request_connection]['fs'].put(serialized_request, filename=request_id)
+        self._add_task(request_connection, serialized_request, filename=request_id)
         logging.debug(f'Request sent: {request_connection} -> {request_id}')
-        sleep(1)
         return self._response_listener(response_connection, request_id)
 
     def _response_listener(self, response_connection, request_id, timeout=None, delete=True):
-        output_data = None
+        resp = self._wait_for_response_file(response_connection, request_id, timeout)
+        if resp is None:
+            return None
+        output_data = pickle.loads(resp.read())
+        if delete:
+            self.connections[response_connection]['fs'].delete(resp._id)  # pylint: disable=protected-access
+        return output_data
+
+    def _wait_for_response_file(self, response_connection, request_id, timeout=None) -> Optional[GridOut]:
         if timeout is None:
             timeout = time() + int(self.config['ExpertSettings'].get('communication_timeout', '60'))
         while timeout > time():
             resp = self.connections[response_connection]['fs'].find_one({'filename': request_id})
             if resp:
-                output_data = pickle.loads(resp.read())
-                if delete:
-                    self.connections[response_connection]['fs'].delete(resp._id)  # pylint: disable=protected-access
                 logging.debug(f'Response received: {response_connection} -> {request_id}')
-                break
+                return resp
             logging.debug(f'No response yet: {response_connection} -> {request_id}')
-            sleep(1)
-        return output_data
+            self.notification_channel.wait_for_notification(
+                [response_connection], timeout=max(0.0, min(self._get_poll_delay(), timeout - time()))
+            )
+        return None
+
+    def _get_poll_delay(self) -> float:
+        # notifications may get lost -> check for the response again after at most `intercom_poll_delay` seconds
+        return self.config['ExpertSettings'].getfloat('intercom_poll_delay', 1.0)
 
     def get_backend_logs(self):
         return self._request_response_listener(None, 'logs_task', 'logs_task_resp')
@@ -0,0 +1,209 @@
+'''
+Notification channels for the intercom.
+
+Tasks and responses are still transported through GridFS, but instead of polling each connection, the receiver waits
+on a notification channel that is triggered by the sender after a task was stored. As notifications may be lost
+(e.g. if the receiver was not running), receivers still check their connections after each wait timeout.
+'''
+import logging
+from collections import deque
+from threading import Condition
+from time import sleep, time
+from typing import Iterable, Optional, Set
+
+from bson import ObjectId
+from pymongo import DESCENDING, CursorType, MongoClient
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure, PyMongoError
+
+NOTIFICATION_COLLECTION = 'notifications'
+MAX_NOTIFICATIONS = 1024
+MAX_AWAIT_TIME_MS = 250
+NAMESPACE_EXISTS = 48  # MongoDB error code
+
+
+class NotificationChannel:
+    '''
+    Base class of notification channels
+    '''
+
+    def notify(self, connection_type: str):
+        '''
+        Signal that there is a new task on the connection.
+
+        :param connection_type: The intercom connection (e.g. `analysis_task`).
+        '''
+        raise NotImplementedError
+
+    def wait_for_notification(self, connection_types: Iterable[str], timeout: float) -> Set[str]:
+        '''
+        Wait until one of the connections is notified.
+
+        :param connection_types: The intercom connections of interest.
+        :param timeout: Maximum waiting time in seconds.
+        :return: The set of notified connections (empty if the timeout was reached).
+        '''
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PollingChannel(NotificationChannel):
+    '''
+    No notifications at all: Waiting always runs into the timeout (i.e. plain polling).
+    '''
+
+    def notify(self, connection_type: str):
+        pass
+
+    def wait_for_notification(self, connection_types: Iterable[str], timeout: float) -> Set[str]:
+        sleep(timeout)
+        return set()
+
+
+class _InProcessNotifications:
+    def __init__(self):
+        self.condition = Condition()
+        self.counter = 0
+        self.log = deque(maxlen=MAX_NOTIFICATIONS)
+
+
+_IN_PROCESS_NOTIFICATIONS = _InProcessNotifications()
+
+
+class InProcessNotificationChannel(NotificationChannel):
+    '''
+    Notifications between threads of the same process (e.g. for testing).
+    '''
+
+    def __init__(self):
+        self._state = _IN_PROCESS_NOTIFICATIONS
+        self._position = self._state.counter
+
+    def notify(self, connection_type: str):
+        with self._state.condition:
+            self._state.counter += 1
+            self._state.log.append((self._state.counter, connection_type))
+            self._state.condition.notify_all()
+
+    def wait_for_notification(self, connection_types: Iterable[str], timeout: float) -> Set[str]:
+        wanted, deadline = set(connection_types), time() + timeout
+        with self._state.condition:
+            while True:
+                notified = {
+                    connection for position, connection in self._state.log if position > self._position
+                }.intersection(wanted)
+                self._position = self._state.counter
+                remaining = deadline - time()
+                if notified or remaining <= 0:
+                    return notified
+                self._state.condition.wait(timeout=remaining)
+
+
+class MongoNotificationChannel(NotificationChannel):
+    '''
+    Notifications through a capped MongoDB collection that is read with a tailable cursor. The server keeps the
+    cursor open and returns new notifications immediately so that no polling is needed.
+
+    The receivers track their position by the ``_id`` of the last read notification (and not by the time): the ``_id``
+    is created by the server, so that the order does not depend on the clocks of the hosts of the senders. A channel
+    only receives the notifications that are sent after it was first used.
+    '''
+
+    def __init__(self, client: MongoClient, database_name: str):
+        self._database = client[database_name]
+        self._collection = None
+        self._cursor = None
+        self._last_id = None
+
+    def notify(self, connection_type: str):
+        try:
+            _insert_notification(self._get_collection(), connection_type)
+        except PyMongoError as error:
+            logging.warning(f'Could not send intercom notification for {connection_type}: {error}')
+
+    def wait_for_notification(self, connection_types: Iterable[str], timeout: float) -> Set[str]:
+        wanted, deadline = set(connection_types), time() + timeout
+        while time() < deadline:
+            try:
+                notified = self._read_notifications(wanted)
+            except PyMongoError as error:
+                logging.warning(f'Could not read intercom notifications: {error}')
+                self._cursor = None
+                sleep(max(0.0, min(deadline - time(), MAX_AWAIT_TIME_MS / 1000)))
+                continue
+            if notified:
+                return notified
+        return set()
+
+    def _read_notifications(self, wanted: Set[str]) -> Set[str]:
+        cursor = self._get_cursor()
+        notified = set()
+        for notification in cursor:  # stops if there are no new notifications after `MAX_AWAIT_TIME_MS`
+            if notification['_id'] == self._last_id:
+                continue  # the cursor starts at the last read notification (see `_get_cursor`)
+            self._last_id = notification['_id']
+            if notification['connection'] in wanted:
+                notified.add(notification['connection'])
+                break
+        if not cursor.alive:
+            self._cursor = None
+        return notified
+
+    def _get_cursor(self):
+        if self._cursor is None:
+            collection = self._get_collection()
+            if self._last_id is None or collection.find_one({'_id': self._last_id}, projection=['_id']) is None:
+                # the last read notification was removed from the capped collection: the missed notifications are
+                # found by the receivers when they check their connections after the timeout
+                self._last_id = _get_newest_id(collection)
+            # the cursor includes the last read notification, because tailable cursors without results are dead
+            query = {'_id': {'$gte': self._last_id}} if self._last_id is not None else {}
+            self._cursor = collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT).max_await_time_ms(MAX_AWAIT_TIME_MS)
+        return self._cursor
+
+    def _get_collection(self) -> Collection:
+        if self._collection is None:
+            try:
+                self._database.command(
+                    'create', NOTIFICATION_COLLECTION, capped=True, size=MAX_NOTIFICATIONS * 256, max=MAX_NOTIFICATIONS
+                )
+                # tailable cursors on empty collections are dead immediately
+                _insert_notification(self._database[NOTIFICATION_COLLECTION], None)
+            except OperationFailure as error:
+                if error.code != NAMESPACE_EXISTS:
+                    raise
+            self._collection = self._database[NOTIFICATION_COLLECTION]
+            self._last_id = _get_newest_id(self._collection)
+        return self._collection
+
+    def close(self):
+        if self._cursor is not None:
+            self._cursor.close()
+            self._cursor = None
+
+
+def _insert_notification(collection: Collection, connection_type: Optional[str]):
+    # an upsert that matches no document: the _id of the new document is created by the server (see
+    # MongoNotificationChannel)
+    collection.update_one({'_id': {'$in': []}}, {'$set': {'connection': connection_type}}, upsert=True)
+
+
+def _get_newest_id(collection: Collection) -> Optional[ObjectId]:
+    newest = collection.find_one(sort=[('$natural', DESCENDING)], projection=['_id'])
+    return newest['_id'] if newest is not None else None
+
+
+def get_notification_channel(config, client: Optional[MongoClient] = None) -> NotificationChannel:
+    '''
+    Get the notification channel configured in `ExpertSettings.intercom_notification_channel`
+    (one of `mongo` [default], `in_process` or `none`).
+    '''
+    channel_type = config['ExpertSettings'].get('intercom_notification_channel', 'mongo')
+    if channel_type == 'mongo' and client is not None:
+        prefix = config['data_storage']['intercom_database_prefix']
+        return MongoNotificationChannel(client, f'{prefix}_{NOTIFICATION_COLLECTION}')
+    if channel_type == 'in_process':
+        return InProcessNotificationChannel()
+    return PollingChannel()
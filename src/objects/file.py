@@ -184,12 +184,15 @@ class FileObject:  # pylint: disable=too-many-instance-attributes
         * `depth`: The child inherits the unpacking depth from this file, incremented by one.
         * `scheduled_analysis`: The child inherits this file's scheduled analysis.
         * `virtual_file_path`: Sets a new virtual_file_path for the child, being <this_files_current_vfp|child_path>.
+        * `parent_firmware_uids`: Adds the root uid of this file to the parent firmware uids of the child.
 
         :param file_object: File that was extracted from the current file
         '''
         file_object.parents.append(self.uid)
         file_object.root_uid = self.root_uid
         file_object.add_virtual_file_path_if_none_exists(self.get_virtual_paths_for_one_uid(root_uid=self.root_uid), self.uid)
+        if self.root_uid is not None:
+            file_object.parent_firmware_uids.add(self.root_uid)
         file_object.depth = self.depth + 1
         file_object.scheduled_analysis = self.scheduled_analysis
         self.files_included.add(file_object.uid)
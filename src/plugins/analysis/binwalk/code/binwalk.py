@@ -1,48 +1,61 @@
 import logging
 import string
-import subprocess
-from pathlib import Path
-from subprocess import PIPE, STDOUT
-from tempfile import TemporaryDirectory
-from typing import List
+from typing import Iterator, List, Tuple
+
+import binwalk
+import numpy as np
 
 from analysis.PluginBase import AnalysisBasePlugin
-from helperFunctions.config import get_temp_dir_path
+from helperFunctions.fileSystem import get_binary_or_memory_map
 
+# the block size is chosen like binwalk does: at most ~2048 blocks (data points) with a multiple of 1024 bytes each
+DATA_POINTS = 2048
+MIN_BLOCK_SIZE = 1024
+# thresholds of binwalk for rising and falling entropy edges
+TRIGGER_HIGH = 0.95
+TRIGGER_LOW = 0.85
+
+TABLE_HEADER = '\n{:<12}  {:<12}    {}\n' + '-' * 80 + '\n'
+TABLE_ROW = '{:<12d}  0x{:<12X}  {}\n'
 
-class AnalysisPlugin(AnalysisBasePlugin):
 
+class AnalysisPlugin(AnalysisBasePlugin):
+    '''
+    Signature scan with binwalk and entropy analysis (both are performed in-process)
+    '''
     NAME = 'binwalk'
     DESCRIPTION = 'binwalk signature and entropy analysis'
     DEPENDENCIES = []
     MIME_BLACKLIST = ['audio', 'image', 'video']
-    VERSION = '0.5.5'
+    VERSION = '0.6.0'
 
     def __init__(self, plugin_administrator, config=None, recursive=True):
         self.config = config
         super().__init__(plugin_administrator, config=config, recursive=recursive, plugin_path=__file__)
 
     def process_object(self, file_object):
-        result = {}
-        with TemporaryDirectory(prefix='fact_analysis_binwalk_', dir=get_temp_dir_path(self.config)) as tmp_dir:
-            cmd_process = subprocess.run(
-                f'(cd {tmp_dir} && xvfb-run -a binwalk -BEJ {file_object.file_path})',
-                shell=True,
-                stdout=PIPE,
-                stderr=STDOUT,
-                universal_newlines=True,
-            )
-            signature_analysis_result = cmd_process.stdout
-            try:
-                pic_path = Path(tmp_dir) / f'{Path(file_object.file_path).name}.png'
-                result['entropy_analysis_graph'] = pic_path.read_bytes()
-                result['signature_analysis'] = signature_analysis_result
-                result['summary'] = list(set(self._extract_summary(signature_analysis_result)))
-            except FileNotFoundError:
-                result = {'failed': 'Binwalk analysis failed'}
-                logging.error(f'Binwalk analysis on {file_object.uid} failed:\n{signature_analysis_result}')
-
-        file_object.processed_analysis[self.NAME] = result
+        with get_binary_or_memory_map(file_object) as data:
+            block_size = get_block_size(len(data))
+            entropy = get_block_entropy(data, block_size)
+        # the entropy graph is drawn by the frontend: the data points are much smaller than an image of the plot
+        entropy_analysis = {'block_size': block_size, 'entropy': [round(value, 4) for value in entropy.tolist()]}
+        try:
+            signatures = _scan_signatures(file_object.file_path)
+        except (binwalk.ModuleException, OSError) as error:
+            logging.error(f'Binwalk analysis on {file_object.uid} failed: {error}')
+            file_object.processed_analysis[self.NAME] = {'failed': 'Binwalk analysis failed', 'entropy_analysis': entropy_analysis}
+            return file_object
+
+        signature_analysis = _format_table('DESCRIPTION', signatures)
+        edges = [(index * block_size, description) for index, description in get_entropy_edges(entropy)]
+        if edges:
+            signature_analysis += _format_table('ENTROPY', edges)
+
+        file_object.processed_analysis[self.NAME] = {
+            'signature_analysis': signature_analysis,
+            'entropy_analysis': entropy_analysis,
+            'summary': list(set(self._extract_summary(signature_analysis))),
+        }
         return file_object
 
     def _extract_summary(self, binwalk_output: str) -> List[str]:
@@ -65,3 +78,64 @@ class AnalysisPlugin(AnalysisBasePlugin):
     @staticmethod
     def _iterate_valid_signature_lines(output_lines):
         return (line for line in output_lines if line and line[0] in string.digits)
+
+
+def get_block_size(file_size: int) -> int:
+    blocks_per_data_point = -(-file_size // (DATA_POINTS * MIN_BLOCK_SIZE))  # ceiling division
+    return max(blocks_per_data_point, 1) * MIN_BLOCK_SIZE
+
+
+def get_block_entropy(data, block_size: int) -> np.ndarray:
+    '''
+    Compute the Shannon entropy (normalized to [0, 1]) of each block of the data (the last block may be shorter). The
+    byte histograms of the blocks are counted with NumPy and the entropy of all blocks is computed at once.
+
+    :param data: The data (e.g. bytes or a memory mapped file).
+    :param block_size: The size of the blocks in bytes.
+    :return: The entropy of each block.
+    '''
+    if len(data) == 0:
+        return np.empty(0, dtype=np.float64)
+    array = np.frombuffer(data, dtype=np.uint8)
+    histograms = np.array([
+        np.bincount(array[offset:offset + block_size], minlength=256) for offset in range(0, len(array), block_size)
+    ])
+    probabilities = histograms / histograms.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        summands = np.where(probabilities > 0, -probabilities * np.log2(probabilities), 0)
+    return summands.sum(axis=1) / 8
+
+
+def get_entropy_edges(entropy: np.ndarray) -> Iterator[Tuple[int, str]]:
+    '''
+    Find rising and falling edges of the entropy like binwalk does: after an edge, the entropy must fall below the
+    upper (rise above the lower) threshold before the next edge is reported.
+
+    :param entropy: The entropy of each block.
+    :return: The indices of the blocks and the descriptions of the edges.
+    '''
+    last_edge, trigger_reset = None, False
+    for index, value in enumerate(entropy.tolist()):
+        if (last_edge in [None, 0] and value > TRIGGER_LOW) or (last_edge in [None, 1] and value < TRIGGER_HIGH):
+            trigger_reset = True
+        if trigger_reset and value >= TRIGGER_HIGH:
+            last_edge, trigger_reset = 1, False
+            yield index, f'Rising entropy edge ({value:f})'
+        elif trigger_reset and value <= TRIGGER_LOW:
+            last_edge, trigger_reset = 0, False
+            yield index, f'Falling entropy edge ({value:f})'
+
+
+def _scan_signatures(file_path: str) -> List[Tuple[int, str]]:
+    return [
+        (result.offset, result.description)
+        for module in binwalk.scan(file_path, signature=True, quiet=True)
+        for result in module.results
+    ]
+
+
+def _format_table(column_name: str, rows: List[Tuple[int, str]]) -> str:
+    # the format of the binwalk CLI output
+    return TABLE_HEADER.format('DECIMAL', 'HEXADECIMAL', column_name) + ''.join(
+        TABLE_ROW.format(offset, offset, description) for offset, description in rows
+    )
@@ -1,12 +1,17 @@
 # pylint: disable=protected-access
 
 import string
+from unittest import mock
+
+import binwalk
+import numpy as np
+import pytest
 
 from objects.file import FileObject
 from test.common_helper import get_test_data_dir
 from test.unit.analysis.analysis_plugin_test_class import AnalysisPluginTest
 
-from ..code.binwalk import AnalysisPlugin
+from ..code.binwalk import AnalysisPlugin, _format_table, get_block_entropy, get_block_size, get_entropy_edges
 
 TEST_OUTPUT = '''
 DECIMAL       HEXADECIMAL     DESCRIPTION
@@ -35,11 +40,24 @@ class TestAnalysisPluginBinwalk(AnalysisPluginTest):
         self.assertGreater(len(results['signature_analysis']), 0, 'no binwalk signature analysis found')
         self.assertTrue('DECIMAL' in results['signature_analysis'], 'no valid binwalk signature analysis')
 
-    def test_entropy_graph(self):
+    def test_entropy_analysis(self):
         test_file = FileObject(file_path='{}/container/test.zip'.format(get_test_data_dir()))
         processed_file = self.analysis_plugin.process_object(test_file)
         results = processed_file.processed_analysis[self.PLUGIN_NAME]
-        self.assertGreater(len(results['entropy_analysis_graph']), 0, 'no binwalk entropy graph found')
+        self.assertGreater(len(results['entropy_analysis']['entropy']), 0, 'no binwalk entropy analysis found')
+        assert results['entropy_analysis']['block_size'] == 1024
+        assert all(0 <= value <= 1 for value in results['entropy_analysis']['entropy'])
+
+    def test_signature_analysis_failed(self):
+        def scan_with_error(*_, **__):
+            raise binwalk.ModuleException('error')
+
+        test_file = FileObject(file_path='{}/container/test.zip'.format(get_test_data_dir()))
+        with mock.patch.object(binwalk, 'scan', scan_with_error):
+            processed_file = self.analysis_plugin.process_object(test_file)
+        results = processed_file.processed_analysis[self.PLUGIN_NAME]
+        assert results['failed'] == 'Binwalk analysis failed'
+        assert len(results['entropy_analysis']['entropy']) > 0, 'the entropy analysis should still be stored'
 
     def test_summary(self):
         summary = self.analysis_plugin._extract_summary(TEST_OUTPUT)
@@ -50,3 +68,32 @@ class TestAnalysisPluginBinwalk(AnalysisPluginTest):
         assert len(result) == 5
         assert all(line[0] in string.digits for line in result)
         assert result[0] == '0             0x0             Microsoft executable, portable (PE)'
+
+
+@pytest.mark.parametrize('file_size, expected_block_size', [
+    (0, 1024), (1, 1024), (2048 * 1024, 1024), (2048 * 1024 + 1, 2048), (5 * 2048 * 1024, 5120),
+])
+def test_get_block_size(file_size, expected_block_size):
+    assert get_block_size(file_size) == expected_block_size
+
+
+def test_get_block_entropy():
+    data = bytes(1024) + bytes(range(256)) * 4 + b'ab' * 10
+    assert np.allclose(get_block_entropy(data, 1024), [0, 1, 1 / 8])
+    assert len(get_block_entropy(b'', 1024)) == 0
+
+
+def test_get_entropy_edges():
+    entropy = np.array([0.1, 0.97, 0.98, 0.9, 0.99, 0.5, 0.2, 0.96])
+    assert list(get_entropy_edges(entropy)) == [
+        (0, 'Falling entropy edge (0.100000)'),
+        (1, 'Rising entropy edge (0.970000)'),
+        (4, 'Rising entropy edge (0.990000)'),
+        (5, 'Falling entropy edge (0.500000)'),
+        (7, 'Rising entropy edge (0.960000)'),
+    ]
+
+
+def test_format_table():
+    table = _format_table('DESCRIPTION', [(0, 'Microsoft executable, portable (PE)'), (106008, 'XML document, version: "1.0"')])
+    assert table == '\n'.join(TEST_OUTPUT.splitlines()[:5]) + '\n'
@@ -1,14 +1,15 @@
-import json
 import logging
 import re
-import subprocess
-from pathlib import Path
-from subprocess import PIPE, STDOUT
+from typing import Dict
 
 from analysis.PluginBase import AnalysisBasePlugin
-from helperFunctions.fileSystem import get_src_dir
+from helperFunctions.elf import ElfMetadata, get_elf_metadata
 
-SHELL_SCRIPT = Path(get_src_dir()) / 'bin' / 'checksec'
+# the names of some LIEF enum values differ between versions (e.g. 0.12: DYNAMIC, DEBUG / 0.13+: DYN, DEBUG_TAG)
+FILE_TYPES = {'EXEC': 'EXEC', 'EXECUTABLE': 'EXEC', 'DYN': 'DYN', 'DYNAMIC': 'DYN', 'REL': 'REL', 'RELOCATABLE': 'REL'}
+DEBUG_TAGS = {'DEBUG', 'DEBUG_TAG'}
+SEGMENT_FLAGS_RWE = 0b111
+CANARY_SYMBOLS = ['__stack_chk_fail', '__stack_chk_guard', '__intel_security_cookie']
 
 
 class AnalysisPlugin(AnalysisBasePlugin):
@@ -16,41 +17,92 @@ class AnalysisPlugin(AnalysisBasePlugin):
     DESCRIPTION = 'analyses ELF binaries within a firmware for present exploit mitigation techniques'
     DEPENDENCIES = ['file_type']
     MIME_WHITELIST = ['application/x-executable', 'application/x-object', 'application/x-sharedlib']
-    VERSION = '0.1.6'
+    VERSION = '0.1.7'
 
     def __init__(self, plugin_administrator, config=None, recursive=True):
         self.config = config
-
-        if not SHELL_SCRIPT.is_file():
-            raise RuntimeError(f'checksec not found at path {SHELL_SCRIPT}. Please re-run the backend installation.')
-
         super().__init__(plugin_administrator, config=config, recursive=recursive, plugin_path=__file__)
 
     def process_object(self, file_object):
         try:
             if re.search(r'.*elf.*', file_object.processed_analysis['file_type']['full'].lower()) is not None:
-
-                mitigation_dict, mitigation_dict_summary = check_mitigations(file_object.file_path)
+                elf_metadata = get_elf_metadata(file_object)  # the file is parsed only once per analysis cycle
+                if elf_metadata is None:
+                    raise ValueError('lief could not parse the file')
+                mitigation_dict, mitigation_dict_summary = check_mitigations(file_object.file_path, elf_metadata)
                 file_object.processed_analysis[self.NAME] = mitigation_dict
                 file_object.processed_analysis[self.NAME]['summary'] = list(mitigation_dict_summary.keys())
             else:
                 file_object.processed_analysis[self.NAME]['summary'] = []
-        except (IndexError, json.JSONDecodeError, ValueError) as error:
+        except (IndexError, KeyError, ValueError) as error:
             logging.warning('Error occurred during exploit_mitigations analysis:', exc_info=True)
             file_object.processed_analysis[self.NAME]['failed'] = f'Error during analysis: {error}'
         return file_object
 
 
-def execute_checksec_script(file_path):
-    checksec_process = subprocess.run(f'{SHELL_SCRIPT} --file={file_path} --format=json --extended', shell=True, stdout=PIPE, stderr=STDOUT, universal_newlines=True)
-    if checksec_process.returncode != 0:
-        raise ValueError(f'Checksec script exited with non-zero return code {checksec_process.returncode}')
-    return json.loads(checksec_process.stdout)[str(file_path)]
+def get_checksec_result(elf_metadata: ElfMetadata) -> Dict[str, str]:
+    '''
+    Check the exploit mitigations of an ELF file like the checks of the checksec script (``checksec --file=<file>
+    --extended``) that search the output of ``readelf``, but based on the parsed ELF file.
+
+    :param elf_metadata: The metadata of the ELF file (see :func:`helperFunctions.elf.get_elf_metadata`).
+    :return: The results in the format of the JSON output of checksec (e.g. ``{'relro': 'full', 'nx': 'yes', ...}``).
+    '''
+    lief_json = elf_metadata.lief_json
+    segment_flags = {segment['type']: segment['flags'] for segment in lief_json.get('segments', [])}
+    dynamic_tags = {entry['tag'] for entry in lief_json.get('dynamic_entries', [])}
+    section_names = {section['name'] for section in lief_json.get('sections', [])}
+    return {
+        'relro': _get_relro(segment_flags, lief_json.get('dynamic_entries', []), section_names),
+        'canary': _yes_or_no(any(name in symbol for symbol in elf_metadata.symbols for name in CANARY_SYMBOLS)),
+        'clangcfi': _yes_or_no(any('.cfi' in symbol for symbol in elf_metadata.symbols)),
+        'safestack': _yes_or_no(any('__safestack_init' in symbol for symbol in elf_metadata.symbols)),
+        'nx': _yes_or_no('GNU_STACK' in segment_flags and segment_flags['GNU_STACK'] & SEGMENT_FLAGS_RWE != SEGMENT_FLAGS_RWE),
+        'pie': _get_pie(FILE_TYPES.get(lief_json['header']['file_type']), dynamic_tags),
+        'rpath': _yes_or_no(_has_path(lief_json.get('dynamic_entries', []), 'RPATH')),
+        'runpath': _yes_or_no(_has_path(lief_json.get('dynamic_entries', []), 'RUNPATH')),
+        'symbols': _yes_or_no('.symtab' in section_names),
+        'fortify_source': _yes_or_no(any(_is_fortified_function(symbol) for symbol in elf_metadata.symbols)),
+    }
+
+
+def _yes_or_no(condition: bool) -> str:
+    return 'yes' if condition else 'no'
+
+
+def _get_relro(segment_flags: dict, dynamic_entries: list, section_names: set) -> str:
+    if 'GNU_RELRO' not in segment_flags:
+        return 'no'
+    bind_now = any(
+        entry['tag'] == 'BIND_NOW' or (entry['tag'] == 'FLAGS' and 'BIND_NOW' in entry.get('flags', []))
+        for entry in dynamic_entries
+    )
+    # without a .got.plt section there are no lazily bound functions
+    return 'full' if bind_now or '.got.plt' not in section_names else 'partial'
+
+
+def _get_pie(file_type: str, dynamic_tags: set) -> str:
+    if file_type == 'EXEC':
+        return 'no'
+    if file_type == 'DYN':
+        return 'yes' if DEBUG_TAGS.intersection(dynamic_tags) else 'dso'
+    if file_type == 'REL':
+        return 'rel'
+    return 'invalid'
+
+
+def _has_path(dynamic_entries: list, tag: str) -> bool:
+    return any(entry['tag'] == tag and entry.get(tag.lower()) for entry in dynamic_entries)
+
+
+def _is_fortified_function(symbol: str) -> bool:
+    # fortified functions of the libc like __printf_chk (but not __stack_chk_fail)
+    return symbol.startswith('__') and symbol.endswith('_chk')
 
 
-def check_mitigations(file_path):
+def check_mitigations(file_path, elf_metadata: ElfMetadata):
     mitigations, summary = {}, {}
-    checksec_result = execute_checksec_script(file_path)
+    checksec_result = get_checksec_result(elf_metadata)
 
     check_relro(file_path, mitigations, summary, checksec_result)
     check_nx(file_path, mitigations, summary, checksec_result)
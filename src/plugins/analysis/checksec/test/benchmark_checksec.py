@@ -0,0 +1,53 @@
+'''
+Compare the per binary latency of the native checks of :func:`plugins.analysis.checksec.code.checksec.get_checksec_result`
+(including parsing the file) with the checksec script (if it is installed) for the test ELF files.
+
+usage (from the src directory): python3 -m plugins.analysis.checksec.test.benchmark_checksec [<ELF file> ...]
+'''
+import json
+import subprocess
+import sys
+from pathlib import Path
+from subprocess import PIPE, STDOUT
+from timeit import timeit
+
+from helperFunctions.elf import get_elf_metadata
+from helperFunctions.fileSystem import get_src_dir
+from objects.file import FileObject
+from plugins.analysis.checksec.code.checksec import get_checksec_result
+
+SHELL_SCRIPT = Path(get_src_dir()) / 'bin' / 'checksec'
+TEST_FILES = sorted((Path(__file__).parent / 'data').iterdir())
+REPETITIONS = 10
+
+
+def check_natively(file_path: Path) -> dict:
+    return get_checksec_result(get_elf_metadata(FileObject(file_path=str(file_path))))
+
+
+def execute_checksec_script(file_path: Path) -> dict:
+    checksec_process = subprocess.run(
+        f'{SHELL_SCRIPT} --file={file_path} --format=json --extended', shell=True, stdout=PIPE, stderr=STDOUT,
+        universal_newlines=True
+    )
+    return json.loads(checksec_process.stdout)[str(file_path)]
+
+
+def main():
+    files = [Path(path) for path in sys.argv[1:]] or TEST_FILES
+    if not SHELL_SCRIPT.is_file():
+        print(f'checksec not found at path {SHELL_SCRIPT}: the script is skipped')
+    print(f'{"file":<24} {"native":>12} {"script":>12}  differences')
+    for file_path in files:
+        native_time = timeit(lambda: check_natively(file_path), number=REPETITIONS) / REPETITIONS  # pylint: disable=cell-var-from-loop
+        if not SHELL_SCRIPT.is_file():
+            print(f'{file_path.name:<24} {native_time * 1000:>9.3f} ms {"-":>12}')
+            continue
+        script_time = timeit(lambda: execute_checksec_script(file_path), number=REPETITIONS) / REPETITIONS  # pylint: disable=cell-var-from-loop
+        native_result, script_result = check_natively(file_path), execute_checksec_script(file_path)
+        differences = {key: (value, script_result.get(key)) for key, value in native_result.items() if script_result.get(key) != value}
+        print(f'{file_path.name:<24} {native_time * 1000:>9.3f} ms {script_time * 1000:>9.3f} ms  {differences or "-"}')
+
+
+if __name__ == '__main__':
+    main()
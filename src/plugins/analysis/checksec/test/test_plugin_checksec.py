@@ -2,12 +2,13 @@ from pathlib import Path
 
 import pytest
 
+from helperFunctions.elf import get_elf_metadata
 from objects.file import FileObject
 from test.unit.analysis.analysis_plugin_test_class import AnalysisPluginTest  # pylint: disable=wrong-import-order
 
 from ..code.checksec import (
     AnalysisPlugin, check_canary, check_clang_cfi, check_clang_safestack, check_fortify_source, check_nx, check_pie,
-    check_relro, check_rpath, check_runpath, check_stripped_symbols, execute_checksec_script
+    check_relro, check_rpath, check_runpath, check_stripped_symbols, get_checksec_result
 )
 
 PLUGIN_DIR = Path(__file__).parent.parent
@@ -42,6 +43,13 @@ class TestAnalysisPluginChecksec(AnalysisPluginTest):
         assert 'summary' in result
         assert 'NX enabled' in result['summary']
 
+    def test_check_mitigations_bad_file(self):
+        test_file = FileObject(file_path=str(PLUGIN_DIR / 'test/test_plugin_checksec.py'))
+        test_file.processed_analysis['file_type'] = {'full': 'ELF 64-bit LSB shared object, x86-64, dynamically linked'}
+        test_file.processed_analysis[self.PLUGIN_NAME] = {}
+        self.analysis_plugin.process_object(test_file)
+        assert 'failed' in test_file.processed_analysis[self.PLUGIN_NAME]
+
 
 @pytest.mark.parametrize('file_path, check, expected_result, expected_summary', [
     (FILE_PATH_EXE, check_pie, {'PIE': 'enabled'}, 'PIE enabled'),
@@ -71,7 +79,7 @@ class TestAnalysisPluginChecksec(AnalysisPluginTest):
 ])
 def test_all_checks(file_path, check, expected_result, expected_summary):
     result, dict_summary = {}, {}
-    dict_file_info = execute_checksec_script(file_path)
+    dict_file_info = get_checksec_result(get_elf_metadata(FileObject(file_path=str(file_path))))
     check(file_path, result, dict_summary, dict_file_info)
     assert result == expected_result
     assert dict_summary == {expected_summary: file_path}
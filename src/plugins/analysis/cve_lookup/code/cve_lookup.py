@@ -1,12 +1,16 @@
+import json
 import logging
 import operator
 import sys
-from collections import namedtuple
+from collections import defaultdict, namedtuple
+from copy import deepcopy
 from distutils.version import LooseVersion, StrictVersion
+from functools import lru_cache
 from itertools import combinations
+from os import getpid
 from pathlib import Path
 from re import match
-from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 
 from packaging.version import LegacyVersion, parse
 from pyxdameraulevenshtein import damerau_levenshtein_distance as distance  # pylint: disable=no-name-in-module
@@ -17,11 +21,11 @@ from objects.file import FileObject
 from plugins.mime_blacklists import MIME_BLACKLIST_NON_EXECUTABLE
 
 try:
-    from ..internal.database_interface import QUERIES, DatabaseInterface
+    from ..internal.database_interface import DB_PATH, QUERIES, DatabaseInterface
     from ..internal.helper_functions import replace_characters_and_wildcards, unescape
 except ImportError:
     sys.path.append(str(Path(__file__).parent.parent / 'internal'))
-    from database_interface import QUERIES, DatabaseInterface
+    from database_interface import DB_PATH, QUERIES, DatabaseInterface
     from helper_functions import replace_characters_and_wildcards, unescape
 
 MAX_TERM_SPREAD = 3  # a range in which the product term is allowed to come after the vendor term for it not to be a false positive
@@ -34,6 +38,9 @@ CveDbEntry = NamedTuple(
     ]
 )
 MATCH_FOUND = 2
+VERSION_CACHE_SIZE = 4096
+LOOKUP_CACHE_SIZE = 1024  # lookup results per process
+MAX_PERSISTENTLY_CACHED_LOOKUPS = 100000
 
 
 class AnalysisPlugin(AnalysisBasePlugin):
@@ -48,6 +55,8 @@ class AnalysisPlugin(AnalysisBasePlugin):
 
     def __init__(self, plugin_administrator, config=None, recursive=True, offline_testing=False):
         super().__init__(plugin_administrator, config=config, recursive=recursive, plugin_path=__file__, offline_testing=offline_testing)
+        if not offline_testing and Path(DB_PATH).is_file():
+            get_summary_index(get_database())  # build the index once so that the worker processes inherit it
 
     def process_object(self, file_object):
         cves = {'cve_results': {}}
@@ -57,6 +66,7 @@ class AnalysisPlugin(AnalysisBasePlugin):
                 vulnerabilities = look_up_vulnerabilities(product_name=product, requested_version=version)
                 if vulnerabilities:
                     cves['cve_results'][component] = vulnerabilities
+        write_lookup_cache()
 
         cves['summary'] = self._create_summary(cves['cve_results'])
         file_object.processed_analysis[self.NAME] = cves
@@ -96,21 +106,80 @@ class AnalysisPlugin(AnalysisBasePlugin):
         return ' '.join(component_parts[:-1]), component_parts[-1]
 
 
-def look_up_vulnerabilities(product_name: str, requested_version: str) -> Optional[dict]:
-    with DatabaseInterface() as db:
-        product_terms, version = replace_characters_and_wildcards(generate_search_terms(product_name)), replace_characters_and_wildcards([requested_version])[0]
+_DATABASES: Dict[Tuple[int, str], DatabaseInterface] = {}
+# lookup results that are not in the persistent cache yet: (generation, product, version, result)
+_PENDING_CACHE_ENTRIES: List[Tuple[int, str, str, str]] = []
 
-        matched_cpe = match_cpe(db, product_terms)
-        if len(matched_cpe) == 0:
-            logging.debug(f'No CPEs were found for product {product_name}')
-            return None
-        try:
-            matched_product = find_matching_cpe_product(matched_cpe, version)
-        except IndexError:
+
+def get_database() -> Optional[DatabaseInterface]:
+    '''
+    Get the database connection of the current process. The connection stays open and is reused by all lookups of
+    the process (SQLite connections must not be shared with forked processes).
+
+    :return: The connection or ``None`` if the database was not created (by ``setup_repository.py``) yet.
+    '''
+    key = (getpid(), DB_PATH)
+    if key not in _DATABASES:
+        if not Path(DB_PATH).is_file():  # connecting would create an empty database
+            logging.error(f'[cve_lookup]: CVE database not found at {DB_PATH}')
             return None
+        _DATABASES[key] = DatabaseInterface(DB_PATH)
+        _DATABASES[key].execute_query(QUERIES['create_lookup_cache_table'])  # databases of older versions lack it
+    return _DATABASES[key]
+
+
+def look_up_vulnerabilities(product_name: str, requested_version: str) -> Optional[dict]:
+    '''
+    Look up the vulnerabilities of a software component. The results are cached per process and persistently in the
+    database, keyed by the database generation, so that they are invalidated by updates of the CVE database.
+    '''
+    db = get_database()
+    if db is None:
+        return None
+    return deepcopy(_look_up_vulnerabilities_cached(product_name, requested_version, db.get_generation()))
+
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def _look_up_vulnerabilities_cached(product_name: str, requested_version: str, generation: int) -> Optional[dict]:
+    db = get_database()
+    cached_result = db.fetch_one(QUERIES['get_cached_lookup'], (generation, product_name, requested_version))
+    if cached_result is not None:
+        return json.loads(cached_result[0])
+    result = _look_up_vulnerabilities_in_database(db, product_name, requested_version)
+    _PENDING_CACHE_ENTRIES.append((generation, product_name, requested_version, json.dumps(result)))
+    return result
 
-        cve_candidates = search_cve(db, matched_product)
-        cve_candidates.update(search_cve_summary(db, matched_product))
+
+def write_lookup_cache():
+    '''
+    Write the new lookup results to the persistent cache. All results (e.g. of all components of a file) are written in
+    one transaction instead of locking the database shared by all analysis workers for each lookup. The oldest results
+    are removed only if the cache has grown larger than `MAX_PERSISTENTLY_CACHED_LOOKUPS`.
+    '''
+    db = get_database()
+    if db is None or not _PENDING_CACHE_ENTRIES:
+        return
+    db.execute_many(QUERIES['cache_lookup'], _PENDING_CACHE_ENTRIES)
+    _PENDING_CACHE_ENTRIES.clear()
+    cache_span = db.fetch_one(QUERIES['get_lookup_cache_span'])  # rowids increase -> upper bound of the cache size
+    if cache_span and (cache_span[0] or 0) > MAX_PERSISTENTLY_CACHED_LOOKUPS:
+        db.execute_query(QUERIES['prune_lookup_cache'], (MAX_PERSISTENTLY_CACHED_LOOKUPS,))
+
+
+def _look_up_vulnerabilities_in_database(db: DatabaseInterface, product_name: str, requested_version: str) -> Optional[dict]:
+    product_terms, version = replace_characters_and_wildcards(generate_search_terms(product_name)), replace_characters_and_wildcards([requested_version])[0]
+
+    matched_cpe = match_cpe(db, product_terms)
+    if len(matched_cpe) == 0:
+        logging.debug(f'No CPEs were found for product {product_name}')
+        return None
+    try:
+        matched_product = find_matching_cpe_product(matched_cpe, version)
+    except IndexError:
+        return None
+
+    cve_candidates = search_cve(db, matched_product)
+    cve_candidates.update(search_cve_summary(db, matched_product))
     return cve_candidates
 
 
@@ -167,8 +236,12 @@ def build_version_string(cve_entry: CveDbEntry) -> str:
 
 
 def search_cve(db: DatabaseInterface, product: Product) -> dict:
+    if MAX_LEVENSHTEIN_DISTANCE > 0:  # fuzzy matching can't use the index
+        cve_entries = db.fetch_multiple(QUERIES['cve_lookup'])
+    else:
+        cve_entries = db.fetch_multiple(QUERIES['cve_lookup_by_product'], (product.vendor_name, product.product_name))
     result = {}
-    for query_result in db.fetch_multiple(QUERIES['cve_lookup']):
+    for query_result in cve_entries:
         cve_entry = CveDbEntry(*query_result)
         if _product_matches_cve(product, cve_entry):
             result[cve_entry.cve_id] = {
@@ -203,13 +276,27 @@ def versions_match(cpe_version: str, cve_entry: CveDbEntry) -> bool:
 
 
 def compare_version(version1: str, version2: str, comp_operator: Callable) -> bool:
+    strict_version1, strict_version2 = _parse_strict_version(version1), _parse_strict_version(version2)
+    if strict_version1 is not None and strict_version2 is not None:
+        return comp_operator(strict_version1, strict_version2)
+    try:
+        return comp_operator(_parse_loose_version(version1), _parse_loose_version(version2))
+    except TypeError:
+        return False
+
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def _parse_strict_version(version: str) -> Optional[StrictVersion]:
+    # version boundaries of the CVE entries repeat a lot -> parse each one only once
     try:
-        return comp_operator(StrictVersion(version1), StrictVersion(version2))
+        return StrictVersion(version)
     except ValueError:
-        try:
-            return comp_operator(LooseVersion(version1), LooseVersion(version2))
-        except TypeError:
-            return False
+        return None
+
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def _parse_loose_version(version: str) -> LooseVersion:
+    return LooseVersion(version)
 
 
 def get_version_index(version: str, index: int) -> str:
@@ -217,13 +304,49 @@ def get_version_index(version: str, index: int) -> str:
 
 
 def search_cve_summary(db: DatabaseInterface, product: namedtuple) -> dict:
+    if MAX_LEVENSHTEIN_DISTANCE > 0:  # fuzzy matching can't use the index
+        summary_entries = db.fetch_multiple(QUERIES['summary_lookup'])
+    else:
+        summary_entries = get_summary_index(db).get_candidates(product)
     return {
         cve_id: {'score2': cvss_v2_score, 'score3': cvss_v3_score}
-        for cve_id, summary, cvss_v2_score, cvss_v3_score in db.fetch_multiple(QUERIES['summary_lookup'])
+        for cve_id, summary, cvss_v2_score, cvss_v3_score in summary_entries
         if product_is_mentioned_in_summary(product, summary)
     }
 
 
+class SummaryIndex:
+    '''
+    Inverted index of the (lower case) words in the CVE summaries. It is used to preselect the summaries that contain
+    all terms of a product before they are checked with `product_is_mentioned_in_summary`.
+    '''
+
+    def __init__(self, summary_entries: Iterable[Tuple[str, str, str, str]]):
+        self.entries = list(summary_entries)
+        self.index: Dict[str, Set[int]] = defaultdict(set)
+        for entry_index, (_, summary, _, _) in enumerate(self.entries):
+            for word in set(summary.lower().split(' ')):
+                self.index[word].add(entry_index)
+
+    def get_candidates(self, product: Product) -> List[Tuple[str, str, str, str]]:
+        terms = [product.vendor_name.split('_')[0], *product.product_name.split('_')]
+        matching_entries = set.intersection(*(self.index.get(term.lower(), set()) for term in terms))
+        return [self.entries[entry_index] for entry_index in sorted(matching_entries)]
+
+
+_SUMMARY_INDEXES: Dict[str, Tuple[int, SummaryIndex]] = {}
+
+
+def get_summary_index(db: DatabaseInterface) -> SummaryIndex:
+    '''
+    Get the summary index of the database. It is built on first use and rebuilt if the database generation changed.
+    '''
+    generation = db.get_generation()
+    if db.db_path not in _SUMMARY_INDEXES or _SUMMARY_INDEXES[db.db_path][0] != generation:
+        _SUMMARY_INDEXES[db.db_path] = (generation, SummaryIndex(db.fetch_multiple(QUERIES['summary_lookup'])))
+    return _SUMMARY_INDEXES[db.db_path][1]
+
+
 def product_is_mentioned_in_summary(product: Product, summary: str) -> bool:
     word_list = summary.split(' ')
     vendor = product.vendor_name.split('_')[0]
@@ -253,9 +376,14 @@ def remaining_words_present(word_list: List[str], words: List[str]) -> bool:
 
 
 def match_cpe(db: DatabaseInterface, product_search_terms: list) -> List[Product]:
+    if MAX_LEVENSHTEIN_DISTANCE > 0:  # fuzzy matching can't use the index
+        cpe_entries = db.fetch_multiple(QUERIES['cpe_lookup'])
+    else:
+        placeholders = ', '.join('?' for _ in product_search_terms)
+        cpe_entries = db.fetch_multiple(QUERIES['cpe_lookup_by_product'].format(placeholders), product_search_terms)
     return list({
         Product(vendor, product, version)
-        for vendor, product, version in db.fetch_multiple(QUERIES['cpe_lookup'])
+        for vendor, product, version in cpe_entries
         for product_term in product_search_terms
         if terms_match(product_term, product)
     })
@@ -4,6 +4,7 @@ from contextlib import contextmanager, suppress
 from pathlib import Path
 from sqlite3 import Error as SqliteException
 from sqlite3 import connect
+from typing import Iterable, Sequence
 
 try:
     from ..internal.helper_functions import get_field_names, get_field_string
@@ -12,6 +13,7 @@ except (ImportError, SystemError):
     from helper_functions import get_field_names, get_field_string
 
 DB_PATH = str(Path(__file__).parent / 'cve_cpe.db')
+BUSY_TIMEOUT = 30  # seconds to wait for the locks of other connections (e.g. of other analysis workers)
 
 CPE_DB_FIELDS = [
     ('cpe_id', 'TEXT'), ('part', 'TEXT'), ('vendor', 'TEXT'), ('product', 'TEXT'), ('version', 'TEXT'),
@@ -29,26 +31,59 @@ CVE_SUMMARY_DB_FIELDS = [
     ('cve_id', 'TEXT'), ('year', 'INTEGER'), ('summary', 'TEXT'), ('cvss_v2_score', 'TEXT'), ('cvss_v3_score', 'TEXT')
 ]
 
+INDEXES = {  # index name: (table name, columns)
+    'cpe_id_index': ('cpe_table', 'cpe_id'),
+    'cpe_product_index': ('cpe_table', 'product'),
+    'cve_id_index': ('cve_table', 'cve_id'),
+    'cve_vendor_product_index': ('cve_table', 'vendor, product'),
+    'summary_id_index': ('summary_table', 'cve_id'),
+}
+
 TABLE_CREATION_COMMAND = 'CREATE TABLE IF NOT EXISTS {{}} ({})'
 TABLE_INSERT_COMMAND = 'INSERT INTO {{}} ({}) VALUES ({})'
 
 QUERIES = {
+    'begin': 'BEGIN',
+    'cache_lookup': 'INSERT OR REPLACE INTO lookup_cache (generation, product, version, result) VALUES (?, ?, ?, ?)',
+    'clear_lookup_cache': 'DELETE FROM lookup_cache',
+    'commit': 'COMMIT',
     'cpe_lookup': 'SELECT DISTINCT vendor, product, version FROM cpe_table',
+    'cpe_lookup_by_product': 'SELECT DISTINCT vendor, product, version FROM cpe_table WHERE product IN ({})',
     'create_cpe_table': TABLE_CREATION_COMMAND.format(get_field_string(CPE_DB_FIELDS)),
     'create_cve_table': TABLE_CREATION_COMMAND.format(get_field_string(CVE_DB_FIELDS)),
     'create_summary_table': TABLE_CREATION_COMMAND.format(get_field_string(CVE_SUMMARY_DB_FIELDS)),
     'cve_lookup': 'SELECT cve_id, vendor, product, version, cvss_v2_score, cvss_v3_score, version_start_including, '
                   'version_start_excluding, version_end_including, version_end_excluding FROM cve_table',
+    'cve_lookup_by_product': 'SELECT cve_id, vendor, product, version, cvss_v2_score, cvss_v3_score, '
+                             'version_start_including, version_start_excluding, version_end_including, '
+                             'version_end_excluding FROM cve_table WHERE vendor = ? AND product = ?',
+    'create_lookup_cache_table': 'CREATE TABLE IF NOT EXISTS lookup_cache (generation INTEGER NOT NULL, '
+                                 'product TEXT NOT NULL, version TEXT NOT NULL, result TEXT NOT NULL, '
+                                 'PRIMARY KEY (generation, product, version))',
+    'create_index': 'CREATE INDEX IF NOT EXISTS {} ON {} ({})',
+    'delete_cpe': 'DELETE FROM cpe_table WHERE cpe_id = ?',
+    'delete_cve': 'DELETE FROM {} WHERE cve_id = ?',
     'delete_outdated': 'DELETE FROM {} WHERE cve_id IN (SELECT cve_id FROM {})',
     'drop': 'DROP TABLE IF EXISTS {}',
+    'drop_index': 'DROP INDEX IF EXISTS {}',
     'exist': 'SELECT name FROM sqlite_master WHERE type=\'table\' AND name=\'{}\'',
     'extract_relevant': 'SELECT * FROM {} AS new WHERE new.year IN (SELECT distinct(year) FROM {})',
+    'get_cached_lookup': 'SELECT result FROM lookup_cache WHERE generation = ? AND product = ? AND version = ?',
+    'get_cpe_ids': 'SELECT cpe_id FROM cpe_table',
+    'get_generation': 'PRAGMA user_version',
+    'get_lookup_cache_span': 'SELECT MAX(rowid) - MIN(rowid) + 1 FROM lookup_cache',
     'get_years_from_cve': 'SELECT DISTINCT year FROM cve_table',
     'insert_cpe': TABLE_INSERT_COMMAND.format(get_field_names(CPE_DB_FIELDS), ', '.join(['?'] * len(CPE_DB_FIELDS))),
     'insert_cve': TABLE_INSERT_COMMAND.format(get_field_names(CVE_DB_FIELDS), ', '.join(['?'] * len(CVE_DB_FIELDS))),
     'insert_summary': TABLE_INSERT_COMMAND.format(
         get_field_names(CVE_SUMMARY_DB_FIELDS), ', '.join(['?'] * len(CVE_SUMMARY_DB_FIELDS))),
+    'prune_lookup_cache': 'DELETE FROM lookup_cache WHERE rowid <= (SELECT MAX(rowid) FROM lookup_cache) - ?',
+    'rollback': 'ROLLBACK',
     'select_all': 'SELECT * FROM {}',
+    'select_matching': 'SELECT * FROM {} WHERE cve_id IN (SELECT cve_id FROM {})',
+    'set_generation': 'PRAGMA user_version = {:d}',
+    'set_journal_mode': 'PRAGMA journal_mode = {}',
+    'set_synchronous': 'PRAGMA synchronous = {}',
     'summary_lookup': 'SELECT cve_id, summary, cvss_v2_score, cvss_v3_score FROM summary_table',
 }
 
@@ -58,21 +93,24 @@ class DatabaseInterface:
     class to provide connections to a sqlite database and allows to operate on it
     '''
 
-    def __init__(self, db_path: str = DB_PATH):
+    def __init__(self, db_path: str = DB_PATH, timeout: float = BUSY_TIMEOUT):
+        self.db_path = db_path
         self.connection = None
+        self._bulk_import = False
         try:
-            self.connection = connect(db_path)
+            self.connection = connect(db_path, timeout=timeout)
         except SqliteException:
             logging.error('Could not connect to CPE database.')
             raise
 
-    def execute_query(self, query: str):
+    def execute_query(self, query: str, parameters: Sequence = ()):
         with self.get_cursor() as cursor:
-            cursor.execute(query)
+            cursor.execute(query, parameters)
+            self._commit()
 
-    def fetch_multiple(self, query: str):
+    def fetch_multiple(self, query: str, parameters: Sequence = ()):
         with self.get_cursor() as cursor:
-            cursor.execute(query)
+            cursor.execute(query, parameters)
             while True:
                 result_batch = cursor.fetchmany(1000)
                 if not result_batch:
@@ -80,19 +118,62 @@ class DatabaseInterface:
                 for query_result in result_batch:
                     yield query_result
 
-    def fetch_one(self, query: str):
+    def fetch_one(self, query: str, parameters: Sequence = ()):
         with self.get_cursor() as cursor:
-            cursor.execute(query)
+            cursor.execute(query, parameters)
             return cursor.fetchone()
 
+    def get_generation(self) -> int:
+        '''
+        The generation of the database is increased by `setup_repository.py` after each import or update. It is
+        used to invalidate cached lookup results.
+        '''
+        result = self.fetch_one(QUERIES['get_generation'])
+        return result[0] if result else 0
+
     def insert_rows(self, query: str, input_data: list):
         with self.get_cursor() as cursor:
             wrong_entries = {e for e in input_data if len(e) != query.count('?')}
             if wrong_entries:
                 logging.warning(f'Ignoring possibly wrong entries: {[e[2] for e in wrong_entries]}')
             cursor.executemany(query, list(set(input_data) - wrong_entries))
+            self._commit()
+
+    def execute_many(self, query: str, parameters: Iterable[Sequence]):
+        with self.get_cursor() as cursor:
+            cursor.executemany(query, parameters)
+            self._commit()
+
+    def _commit(self):
+        if not self._bulk_import:
             self.connection.commit()
 
+    @contextmanager
+    def bulk_import(self):
+        '''
+        Context manager for large imports: All changes (including schema changes like dropped indexes) are committed
+        in a single transaction at the end or rolled back on errors. Errors of the database are raised during the
+        import. The write-ahead log is used and data is not synced to disk during the import.
+        '''
+        self.execute_query(QUERIES['set_journal_mode'].format('WAL'))
+        self.execute_query(QUERIES['set_synchronous'].format('OFF'))
+        # the transaction is opened explicitly: sqlite3 only opens it implicitly before DML statements, so that
+        # DDL statements (e.g. DROP INDEX) would be committed immediately
+        isolation_level, self.connection.isolation_level = self.connection.isolation_level, None
+        self._bulk_import = True
+        try:
+            self.connection.execute(QUERIES['begin'])
+            yield self
+            self.connection.execute(QUERIES['commit'])
+        except BaseException:
+            if self.connection.in_transaction:
+                self.connection.execute(QUERIES['rollback'])
+            raise
+        finally:
+            self._bulk_import = False
+            self.connection.isolation_level = isolation_level
+            self.execute_query(QUERIES['set_synchronous'].format('FULL'))
+
     @contextmanager
     def get_cursor(self):
         cursor = None
@@ -101,6 +182,8 @@ class DatabaseInterface:
             yield cursor
         except SqliteException as error:
             logging.error(f'[cve_lookup]: Encountered error while accessing DB: {error}', exc_info=True)
+            if self._bulk_import:  # the import must be rolled back
+                raise
         finally:
             with suppress(AttributeError, SqliteException):
                 cursor.close()
@@ -8,22 +8,22 @@ from enum import Enum
 from glob import glob
 from pathlib import Path
 from shutil import rmtree
-from typing import List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 try:
     from ..internal import data_parsing as dp
-    from ..internal.database_interface import DB_PATH, QUERIES, DatabaseInterface
+    from ..internal.database_interface import DB_PATH, INDEXES, QUERIES, DatabaseInterface
     from ..internal.helper_functions import (
         CveEntry, CveLookupException, CveSummaryEntry, replace_characters_and_wildcards
     )
 except (ImportError, ValueError, SystemError):
     sys.path.append(str(Path(__file__).parent.parent / 'internal'))
     import data_parsing as dp
-    from database_interface import DB_PATH, QUERIES, DatabaseInterface
+    from database_interface import DB_PATH, INDEXES, QUERIES, DatabaseInterface
     from helper_functions import CveEntry, CveLookupException, CveSummaryEntry, replace_characters_and_wildcards
 
 CURRENT_YEAR = datetime.now().year
-DATABASE = DatabaseInterface()
+DATABASE: Optional[DatabaseInterface] = None  # connected in main(), so that importing does not create the database
 CPE_SPLIT_REGEX = r'(?<![\\:]):(?!:)|(?<=\\:):'  # don't split on '::' or '\:' but split on '\::'
 
 Years = namedtuple('Years', 'start_year end_year')
@@ -58,12 +58,41 @@ def create(query: str, table_name: str):
     DATABASE.execute_query(QUERIES[query].format(table_name))
 
 
+def delete_entries(query: str, table_name: str, ids: Iterable[str]):
+    DATABASE.execute_many(QUERIES[query].format(table_name), [(id_,) for id_ in ids])
+
+
+def get_changed_entries(new_entries: Iterable[tuple], old_entries: Iterable[tuple]) -> Tuple[Set[str], List[tuple]]:
+    '''
+    Compare the entries (grouped by their ID in the first column) and find the ones that were added, removed or
+    changed.
+
+    :param new_entries: The entries from the feed.
+    :param old_entries: The entries currently in the database.
+    :return: The IDs of all changed entries and the new entries with these IDs.
+    '''
+    new_by_id, old_by_id = _group_by_id(new_entries), _group_by_id(old_entries)
+    changed_ids = {id_ for id_ in new_by_id.keys() | old_by_id.keys() if new_by_id.get(id_) != old_by_id.get(id_)}
+    return changed_ids, [entry for id_ in changed_ids for entry in new_by_id.get(id_, set())]
+
+
+def _group_by_id(entries: Iterable[tuple]) -> Dict[str, Set[tuple]]:
+    result = {}
+    for entry in entries:
+        result.setdefault(entry[0], set()).add(tuple(entry))
+    return result
+
+
 def update_cpe(cpe_extract_path: str):
     if not table_exists(table_name='cpe_table'):
         raise CveLookupException('CPE table does not exist! Did you mean import CPE?')
-    drop_table(table_name='cpe_table')
-    create(query='create_cpe_table', table_name='cpe_table')
-    insert_into(query='insert_cpe', table_name='cpe_table', input_data=setup_cpe_table(get_cpe_content(path=cpe_extract_path)))
+    # CPE entries are fully determined by their ID -> only add new and remove deleted ones
+    new_entries = {entry[0]: entry for entry in setup_cpe_table(get_cpe_content(path=cpe_extract_path))}
+    old_ids = {cpe_id for (cpe_id,) in DATABASE.fetch_multiple(QUERIES['get_cpe_ids'])}
+    delete_entries(query='delete_cpe', table_name='cpe_table', ids=old_ids - new_entries.keys())
+    insert_into(query='insert_cpe', table_name='cpe_table', input_data=[
+        entry for cpe_id, entry in new_entries.items() if cpe_id not in old_ids
+    ])
 
 
 def import_cpe(cpe_extract_path: str):
@@ -90,15 +119,13 @@ def init_cve_summaries_table(summary_list: list, table_name: str):
     insert_into(query='insert_summary', table_name=table_name, input_data=setup_cve_summary_table(summary_list=summary_list))
 
 
-def get_cve_import_content(cve_extraction_path: str, year_selection: list) -> Tuple[list, list]:
-    cve_list, summary_list = list(), list()
+def get_cve_import_content(cve_extraction_path: str, year_selection: list) -> Iterator[Tuple[list, list]]:
+    '''
+    Download the CVE feeds and yield the CVE entries and summaries of one feed file at a time.
+    '''
     dp.download_cve(cve_extraction_path, years=year_selection)
     for file in get_cve_json_files(cve_extraction_path):
-        cve_data, summary_data = dp.extract_cve(file)
-        cve_list.extend(cve_data)
-        summary_list.extend(summary_data)
-
-    return cve_list, summary_list
+        yield dp.extract_cve(file)
 
 
 def get_cve_update_content(cve_extraction_path: str) -> Tuple[list, list]:
@@ -120,7 +147,6 @@ def cve_summaries_can_be_imported(extracted_summaries: list) -> bool:
 def update_cve_repository(cve_extract_path: str):
     if not table_exists(table_name='cve_table'):
         raise CveLookupException('CVE tables do not exist! Did you mean import CVE?')
-    dp.download_cve(cve_extract_path, update=True)
     cve_list, summary_list = get_cve_update_content(cve_extraction_path=cve_extract_path)
 
     init_cve_feeds_table(cve_list=cve_list, table_name='temp_feeds')
@@ -135,17 +161,25 @@ def update_cve_repository(cve_extract_path: str):
 
 
 def update_cve_feeds():
-    feeds_to_be_updated = extract_relevant_feeds(from_table='temp_feeds', where_table='cve_table')
-    delete_outdated_feeds(delete_outdated_from='cve_table', use_for_selection='temp_feeds')
-    insert_into(query='insert_cve', table_name='cve_table', input_data=feeds_to_be_updated)
+    # the feed of modified CVEs also contains many unchanged entries -> only replace the changed ones
+    changed_ids, changed_feeds = get_changed_entries(
+        new_entries=extract_relevant_feeds(from_table='temp_feeds', where_table='cve_table'),
+        old_entries=DATABASE.fetch_multiple(QUERIES['select_matching'].format('cve_table', 'temp_feeds')),
+    )
+    delete_entries(query='delete_cve', table_name='cve_table', ids=changed_ids)
+    insert_into(query='insert_cve', table_name='cve_table', input_data=changed_feeds)
 
 
 def update_cve_summaries():
     summaries_to_be_updated = extract_relevant_feeds(from_table='temp_sum', where_table='cve_table')
 
     if table_exists(table_name='summary_table'):
-        delete_outdated_feeds(delete_outdated_from='summary_table', use_for_selection='temp_sum')
         delete_outdated_feeds(delete_outdated_from='summary_table', use_for_selection='temp_feeds')
+        changed_ids, summaries_to_be_updated = get_changed_entries(
+            new_entries=summaries_to_be_updated,
+            old_entries=DATABASE.fetch_multiple(QUERIES['select_matching'].format('summary_table', 'temp_sum')),
+        )
+        delete_entries(query='delete_cve', table_name='summary_table', ids=changed_ids)
     else:
         create(query='create_summary_table', table_name='summary_table')
 
@@ -161,10 +195,11 @@ def import_cve(cve_extract_path: str, years: namedtuple):
     filtered_years = overlap(years, get_years_from_database()) if table_exists(table_name='cve_table') else None
     year_selection = filtered_years or list(range(years.start_year, years.end_year + 1))
 
-    cve_list, summary_list = get_cve_import_content(cve_extract_path, year_selection)
-    init_cve_feeds_table(cve_list=cve_list, table_name='cve_table')
-    if summary_list:
-        init_cve_summaries_table(summary_list=summary_list, table_name='summary_table')
+    create(query='create_cve_table', table_name='cve_table')
+    create(query='create_summary_table', table_name='summary_table')
+    for cve_list, summary_list in get_cve_import_content(cve_extract_path, year_selection):
+        insert_into(query='insert_cve', table_name='cve_table', input_data=setup_cve_feeds_table(cve_list=cve_list))
+        insert_into(query='insert_summary', table_name='summary_table', input_data=setup_cve_summary_table(summary_list=summary_list))
 
 
 def setup_cve_summary_table(summary_list: List[CveSummaryEntry]) -> List[Tuple[str, ...]]:
@@ -217,18 +252,42 @@ class Choice(Enum):
         return str(self.value)
 
 
+def create_indexes():
+    for index_name, (table_name, columns) in INDEXES.items():
+        if table_exists(table_name=table_name):
+            DATABASE.execute_query(QUERIES['create_index'].format(index_name, table_name, columns))
+
+
+def drop_indexes():
+    for index_name in INDEXES:
+        DATABASE.execute_query(QUERIES['drop_index'].format(index_name))
+
+
+def increase_generation():
+    DATABASE.execute_query(QUERIES['create_lookup_cache_table'])
+    DATABASE.execute_query(QUERIES['clear_lookup_cache'])
+    DATABASE.execute_query(QUERIES['set_generation'].format(DATABASE.get_generation() + 1))
+
+
 def update_repository(extraction_path: str, choice: Choice):
-    if choice.cpe_was_chosen():
-        update_cpe(extraction_path)
-    if choice.cve_was_chosen():
-        update_cve_repository(extraction_path)
+    with DATABASE.bulk_import():
+        create_indexes()  # the indexes are needed to find changed entries
+        if choice.cpe_was_chosen():
+            update_cpe(extraction_path)
+        if choice.cve_was_chosen():
+            update_cve_repository(extraction_path)
+        increase_generation()
 
 
 def init_repository(extraction_path: str, choice: Choice, years: namedtuple):
-    if choice.cpe_was_chosen():
-        import_cpe(cpe_extract_path=extraction_path)
-    if choice.cve_was_chosen():
-        import_cve(cve_extract_path=extraction_path, years=years)
+    with DATABASE.bulk_import():
+        drop_indexes()  # inserting is a lot faster without indexes -> create them afterwards
+        if choice.cpe_was_chosen():
+            import_cpe(cpe_extract_path=extraction_path)
+        if choice.cve_was_chosen():
+            import_cve(cve_extract_path=extraction_path, years=years)
+        create_indexes()
+        increase_generation()
 
 
 def setup_argparser():
@@ -272,6 +331,7 @@ def check_validity_of_arguments(years: namedtuple):
 
 
 def main():
+    global DATABASE  # pylint: disable=global-statement
     args = setup_argparser()
     years = Years(start_year=args.years[0], end_year=args.years[1])
 
@@ -280,6 +340,7 @@ def main():
     if not extraction_path.endswith('/'):
         extraction_path = '{}/'.format(extraction_path)
 
+    DATABASE = DatabaseInterface()
     try:
         if args.update:
             update_repository(extraction_path, args.target)
@@ -8,13 +8,15 @@ from test.common_helper import TEST_FW, get_config_for_testing
 
 try:
     from ..code import cve_lookup as lookup
-    from ..internal.database_interface import DatabaseInterface
+    from ..internal.database_interface import (
+        CPE_DB_FIELDS, CVE_DB_FIELDS, CVE_SUMMARY_DB_FIELDS, INDEXES, QUERIES, DatabaseInterface
+    )
     from ..internal.helper_functions import replace_characters_and_wildcards
 except ImportError:
     ROOT = Path(__file__).parent.parent
     sys.path.extend([str(ROOT / 'code'), str(ROOT / 'internal')])
     import vuln_lookup_plugin as lookup
-    from database_interface import DatabaseInterface
+    from database_interface import CPE_DB_FIELDS, CVE_DB_FIELDS, CVE_SUMMARY_DB_FIELDS, INDEXES, QUERIES, DatabaseInterface
     from helper_functions import replace_characters_and_wildcards
 
 
@@ -98,6 +100,15 @@ def setup() -> None:
         pass
 
 
+@pytest.fixture(autouse=True)
+def test_db_path(tmp_path, monkeypatch):
+    # the tests must neither use nor create the database of the plugin
+    monkeypatch.setattr(lookup, 'DB_PATH', str(tmp_path / 'cve_cpe.db'))
+    lookup._look_up_vulnerabilities_cached.cache_clear()  # pylint: disable=protected-access
+    monkeypatch.setattr(lookup, '_PENDING_CACHE_ENTRIES', [])
+    return tmp_path / 'cve_cpe.db'
+
+
 @pytest.mark.parametrize('software_name, expected_output', [
     ('windows 7', ['windows', 'windows_7']),
     ('Linux Kernel', ['linux', 'linux_kernel', 'kernel']),
@@ -203,6 +214,99 @@ def test_search_cve_summary(monkeypatch):
         assert MATCHED_SUMMARY == actual_match
 
 
+@pytest.fixture(scope='function')
+def indexed_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(lookup, 'MAX_LEVENSHTEIN_DISTANCE', 0)
+    with DatabaseInterface(str(tmp_path / 'cve_cpe.db')) as db:
+        for table in ['cpe', 'cve', 'summary']:
+            db.execute_query(QUERIES[f'create_{table}_table'].format(f'{table}_table'))
+        for index_name, (table_name, columns) in INDEXES.items():
+            db.execute_query(QUERIES['create_index'].format(index_name, table_name, columns))
+        _insert_rows(db, 'cpe_table', CPE_DB_FIELDS, ['vendor', 'product', 'version'], CPE_DATABASE_OUTPUT)
+        _insert_rows(db, 'cve_table', CVE_DB_FIELDS, [
+            'cve_id', 'vendor', 'product', 'version', 'cvss_v2_score', 'cvss_v3_score', 'version_start_including',
+            'version_start_excluding', 'version_end_including', 'version_end_excluding'
+        ], CPE_CVE_OUTPUT)
+        _insert_rows(db, 'summary_table', CVE_SUMMARY_DB_FIELDS, ['cve_id', 'summary', 'cvss_v2_score', 'cvss_v3_score'], SUMMARY_OUTPUT)
+        yield db
+
+
+def _insert_rows(db, table_name, db_fields, fields, rows):
+    table_fields = [name for name, _ in db_fields]
+    full_rows = [tuple(dict(zip(fields, row)).get(name, '') for name in table_fields) for row in rows]
+    db.insert_rows(QUERIES[f'insert_{table_name.split("_")[0]}'].format(table_name), full_rows)
+
+
+def test_match_cpe_indexed(indexed_db):
+    assert sorted(lookup.match_cpe(indexed_db, PRODUCT_SEARCH_TERMS)) == [
+        ('microsoft', 'windows_7', '1\\.3\\.1'), ('mircosof', 'windows_7', '0\\.7')
+    ]
+
+
+def test_search_cve_indexed(indexed_db):
+    assert sorted(lookup.search_cve(indexed_db, SORT_CPE_MATCHES_OUTPUT)) == ['CVE-1234-0010', 'CVE-1234-0011']
+
+
+def test_search_cve_summary_indexed(indexed_db):
+    assert list(lookup.search_cve_summary(indexed_db, SORT_CPE_MATCHES_OUTPUT)) == ['CVE-1234-0005']
+    product = lookup.Product('microsoft', 'windows_7', 'ANY')
+    assert sorted(lookup.search_cve_summary(indexed_db, product)) == ['CVE-1234-0006', 'CVE-1234-0007']
+
+
+def test_summary_index_candidates():
+    index = lookup.SummaryIndex(SUMMARY_OUTPUT)
+    candidates = index.get_candidates(lookup.Product('microsoft', 'windows_2018', 'ANY'))
+    assert [cve_id for cve_id, *_ in candidates] == ['CVE-1234-0004']
+    assert index.get_candidates(lookup.Product('linux', 'linux_kernel', 'ANY')) == []
+
+
+def test_look_up_vulnerabilities_cached(indexed_db, monkeypatch):
+    lookup_calls = []
+    look_up_in_database = lookup._look_up_vulnerabilities_in_database  # pylint: disable=protected-access
+    monkeypatch.setattr(
+        lookup, '_look_up_vulnerabilities_in_database', lambda *args: lookup_calls.append(args) or look_up_in_database(*args)
+    )
+
+    result = lookup.look_up_vulnerabilities('Windows 8', '1.2.5')
+    assert sorted(result) == ['CVE-1234-0005', 'CVE-1234-0010', 'CVE-1234-0011']
+    assert lookup.look_up_vulnerabilities('Windows 8', '1.2.5') == result
+    assert len(lookup_calls) == 1
+
+    lookup.write_lookup_cache()
+    lookup._look_up_vulnerabilities_cached.cache_clear()  # pylint: disable=protected-access
+    assert lookup.look_up_vulnerabilities('Windows 8', '1.2.5') == result, 'should be cached in the database'
+    assert len(lookup_calls) == 1
+
+    indexed_db.execute_query(QUERIES['set_generation'].format(indexed_db.get_generation() + 1))
+    assert lookup.look_up_vulnerabilities('Windows 8', '1.2.5') == result
+    assert len(lookup_calls) == 2, 'cached results should be invalidated by a new database generation'
+
+
+def test_write_lookup_cache(indexed_db, monkeypatch):
+    monkeypatch.setattr(lookup, 'MAX_PERSISTENTLY_CACHED_LOOKUPS', 3)
+    queries = []
+    execute_query = DatabaseInterface.execute_query
+    monkeypatch.setattr(DatabaseInterface, 'execute_query', lambda db, query, *args: queries.append(query) or execute_query(db, query, *args))
+    for version in ['1.2.5', '1.3.1']:
+        lookup.look_up_vulnerabilities('Windows 8', version)
+    assert list(indexed_db.fetch_multiple('SELECT version FROM lookup_cache')) == [], 'results should be written in batches'
+
+    lookup.write_lookup_cache()
+    assert sorted(indexed_db.fetch_multiple('SELECT version FROM lookup_cache')) == [('1.2.5',), ('1.3.1',)]
+    assert QUERIES['prune_lookup_cache'] not in queries, 'the cache should only be pruned if it is too large'
+
+    for version in ['2.0', '3.0']:
+        lookup.look_up_vulnerabilities('Windows 8', version)
+    lookup.write_lookup_cache()
+    assert QUERIES['prune_lookup_cache'] in queries
+    assert sorted(indexed_db.fetch_multiple('SELECT version FROM lookup_cache')) == [('1.3.1',), ('2.0',), ('3.0',)]
+
+
+def test_look_up_vulnerabilities_without_database(test_db_path):
+    assert lookup.look_up_vulnerabilities('Windows 8', '1.2.5') is None
+    assert not test_db_path.exists(), 'the database should not be created by a lookup'
+
+
 class MockAdmin:
     def register_plugin(self, name, administrator):
         pass
@@ -219,16 +323,16 @@ def stub_plugin(test_config, monkeypatch):
     return lookup.AnalysisPlugin(MockAdmin(), test_config, offline_testing=True)
 
 
-def test_process_object(stub_plugin):
+def test_process_object(stub_plugin, indexed_db):
+    _insert_rows(indexed_db, 'cpe_table', CPE_DB_FIELDS, ['vendor', 'product', 'version'], [('thekelleys', 'dnsmasq', '2\\.40')])
+    _insert_rows(indexed_db, 'cve_table', CVE_DB_FIELDS, ['cve_id', 'vendor', 'product', 'version', 'cvss_v2_score', 'cvss_v3_score'], [
+        ('CVE-2013-0198', 'thekelleys', 'dnsmasq', '2\\.40', '10.0', 'N/A')
+    ])
     TEST_FW.processed_analysis['software_components'] = SOFTWARE_COMPONENTS_ANALYSIS_RESULT
-    lookup.MAX_LEVENSHTEIN_DISTANCE = 0
-    try:
-        result = stub_plugin.process_object(TEST_FW).processed_analysis['cve_lookup']
-        assert 'Dnsmasq 2.40 (CRITICAL)' in result['summary']
-        assert 'Dnsmasq 2.40' in result['cve_results']
-        assert 'CVE-2013-0198' in result['cve_results']['Dnsmasq 2.40']
-    finally:
-        lookup.MAX_LEVENSHTEIN_DISTANCE = 3
+    result = stub_plugin.process_object(TEST_FW).processed_analysis['cve_lookup']
+    assert 'Dnsmasq 2.40 (CRITICAL)' in result['summary']
+    assert 'Dnsmasq 2.40' in result['cve_results']
+    assert 'CVE-2013-0198' in result['cve_results']['Dnsmasq 2.40']
 
 
 @pytest.mark.parametrize('cve_score, should_be_tagged', [('9.9', True), ('5.5', False)])
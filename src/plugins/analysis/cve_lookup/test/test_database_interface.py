@@ -61,3 +61,10 @@ def test_execute_query():
         assert list(db.fetch_multiple(query=QUERIES['exist'].format('test_table_2'))) == [('test_table_2',)]
         db.execute_query(query=QUERIES['drop'].format('test_table_2'))
         assert list(db.fetch_multiple(query=QUERIES['exist'].format('test_table_2'))) == []
+
+
+def test_generation():
+    with DatabaseInterface(TEST_DB_PATH) as db:
+        assert db.get_generation() == 0
+        db.execute_query(QUERIES['set_generation'].format(2))
+        assert db.get_generation() == 2
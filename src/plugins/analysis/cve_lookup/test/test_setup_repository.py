@@ -1,3 +1,4 @@
+import sqlite3
 import sys
 from collections import namedtuple
 from contextlib import suppress
@@ -286,6 +287,7 @@ def test_overlap():
 
 
 def test_exists(monkeypatch):
+    monkeypatch.setattr(sr, 'DATABASE', sr.DatabaseInterface(PATH_TO_TEST + 'test_update.db'))
     with monkeypatch.context() as monkey:
         monkey.setattr(sr.DATABASE, 'fetch_multiple', lambda *_, **__: EXISTS_INPUT[0])
         assert EXISTS_OUTPUT[0] == sr.table_exists(table_name='')
@@ -393,7 +395,7 @@ def test_init_summaries_table():
 def test_get_cve_import_content(monkeypatch):
     with monkeypatch.context() as monkey:
         monkey.setattr(sr, 'glob', lambda *_, **__: [PATH_TO_TEST + EXTRACT_CVE_JSON])
-        feeds, summary = sr.get_cve_import_content('', [2003])
+        [(feeds, summary)] = list(sr.get_cve_import_content('', [2003]))
         assert len(feeds) == len(EXPECTED_GET_CVE_FEEDS_UPDATE_CONTENT)
         for item, expected in zip(feeds, EXPECTED_GET_CVE_FEEDS_UPDATE_CONTENT):
             assert item.cve_id == expected.cve_id
@@ -469,6 +471,9 @@ def test_set_repository(monkeypatch, path, choice, years, expected):
     with monkeypatch.context() as monkey:
         monkey.setattr(sr, 'import_cpe', lambda *_, **__: output.append('cpe'))
         monkey.setattr(sr, 'import_cve', lambda *_, **__: output.append('cve'))
+        monkey.setattr(sr, 'drop_indexes', lambda: None)
+        monkey.setattr(sr, 'create_indexes', lambda: None)
+        monkey.setattr(sr, 'increase_generation', lambda: None)
         sr.init_repository(path, choice, years)
         assert output == expected
 
@@ -483,10 +488,78 @@ def test_update_repository(monkeypatch, path, choice, expected):
     with monkeypatch.context() as monkey:
         monkey.setattr(sr, 'update_cpe', lambda *_, **__: output.append('cpe'))
         monkey.setattr(sr, 'update_cve_repository', lambda *_, **__: output.append('cve'))
+        monkey.setattr(sr, 'create_indexes', lambda: None)
+        monkey.setattr(sr, 'increase_generation', lambda: None)
         sr.update_repository(path, choice)
         assert output == expected
 
 
+def test_update_cpe_keeps_unchanged_entries(monkeypatch, tmp_path):
+    monkeypatch.setattr(sr, 'DATABASE', sr.DatabaseInterface(str(tmp_path / 'test.db')))
+    monkeypatch.setattr(sr, 'glob', lambda *_, **__: [PATH_TO_TEST + EXTRACT_CPE_XML])
+    sr.import_cpe('')
+    rowids_before = dict(sr.DATABASE.fetch_multiple('SELECT cpe_id, rowid FROM cpe_table'))
+
+    monkeypatch.setattr(sr, 'glob', lambda *_, **__: [PATH_TO_TEST + UPDATE_CPE_XML])
+    sr.update_cpe('')
+    assert sorted(sr.DATABASE.fetch_multiple(QUERIES['select_all'].format('cpe_table'))) == sorted(EXPECTED_UPDATED_CPE_TABLE)
+    rowids_after = dict(sr.DATABASE.fetch_multiple('SELECT cpe_id, rowid FROM cpe_table'))
+    unchanged = rowids_before.keys() & rowids_after.keys()
+    assert unchanged, 'test files should have common entries'
+    assert all(rowids_before[cpe_id] == rowids_after[cpe_id] for cpe_id in unchanged)
+
+
+def test_get_changed_entries():
+    old_entries = [('CVE-1', 'a'), ('CVE-1', 'b'), ('CVE-2', 'a'), ('CVE-3', 'a')]
+    new_entries = [('CVE-1', 'b'), ('CVE-1', 'a'), ('CVE-2', 'c'), ('CVE-4', 'a')]
+    changed_ids, changed_entries = sr.get_changed_entries(new_entries, old_entries)
+    assert changed_ids == {'CVE-2', 'CVE-3', 'CVE-4'}
+    assert sorted(changed_entries) == [('CVE-2', 'c'), ('CVE-4', 'a')]
+
+
+def test_bulk_import_rollback(tmp_path):
+    db = sr.DatabaseInterface(str(tmp_path / 'test.db'))
+    db.execute_query(TEST_QUERIES['test_create'].format('test'))
+    with db.bulk_import():
+        db.insert_rows(TEST_QUERIES['test_insert'].format('test'), [(1,)])
+    with pytest.raises(CveLookupException):
+        with db.bulk_import():
+            db.insert_rows(TEST_QUERIES['test_insert'].format('test'), [(2,)])
+            raise CveLookupException('import failed')
+    assert list(db.fetch_multiple(QUERIES['select_all'].format('test'))) == [(1,)]
+    assert db.fetch_one('PRAGMA journal_mode') == ('wal',)
+
+
+def test_init_repository_rollback(monkeypatch, tmp_path):
+    monkeypatch.setattr(sr, 'DATABASE', sr.DatabaseInterface(str(tmp_path / 'test.db')))
+    monkeypatch.setattr(sr, 'glob', lambda *_, **__: [PATH_TO_TEST + EXTRACT_CPE_XML])
+    sr.import_cpe('')
+    sr.create_indexes()
+    get_indexes = 'SELECT name FROM sqlite_master WHERE type = \'index\''
+    rows_before, indexes_before = sorted(sr.DATABASE.fetch_multiple(QUERIES['select_all'].format('cpe_table'))), sorted(sr.DATABASE.fetch_multiple(get_indexes))
+    assert indexes_before, 'there should be indexes that are dropped during the import'
+
+    def failing_import(**_):
+        sr.DATABASE.execute_query('DELETE FROM cpe_table')
+        sr.DATABASE.execute_query('INSERT INTO missing_table VALUES (1)')
+
+    monkeypatch.setattr(sr, 'import_cve', failing_import)
+    with pytest.raises(sqlite3.Error):
+        sr.init_repository('', sr.Choice('cve'), YEARS)
+    assert sorted(sr.DATABASE.fetch_multiple(QUERIES['select_all'].format('cpe_table'))) == rows_before
+    assert sorted(sr.DATABASE.fetch_multiple(get_indexes)) == indexes_before
+    assert sr.DATABASE.get_generation() == 0
+
+
+def test_increase_generation(monkeypatch, tmp_path):
+    monkeypatch.setattr(sr, 'DATABASE', sr.DatabaseInterface(str(tmp_path / 'test.db')))
+    sr.DATABASE.execute_query(QUERIES['create_lookup_cache_table'])
+    sr.DATABASE.execute_query(QUERIES['cache_lookup'], (0, 'product', 'version', 'null'))
+    sr.increase_generation()
+    assert sr.DATABASE.get_generation() == 1
+    assert list(sr.DATABASE.fetch_multiple(QUERIES['select_all'].format('lookup_cache'))) == []
+
+
 @pytest.mark.parametrize('years, raising', [
     (YEARTUPLE(2002, 2019), None),
     (YEARTUPLE(2001, 2019), ValueError),
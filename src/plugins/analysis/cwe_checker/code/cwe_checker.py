@@ -14,14 +14,19 @@ Currently the cwe_checker supports the following architectures:
 import json
 import logging
 from collections import defaultdict
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, Optional
 
 from docker.types import Mount
 
 from analysis.PluginBase import AnalysisBasePlugin
-from helperFunctions.docker import run_docker_container
+from helperFunctions.docker import ContainerExecutor, run_docker_container
+from objects.file import FileObject
 
 TIMEOUT_IN_SECONDS = 600  # 10 minutes
 DOCKER_IMAGE = 'fkiecad/cwe_checker:stable'
+CONTAINER_TARGET_PATH = '/input'
 
 
 class AnalysisPlugin(AnalysisBasePlugin):
@@ -61,18 +66,27 @@ class AnalysisPlugin(AnalysisBasePlugin):
         )
         return result.stdout
 
-    @staticmethod
-    def _run_cwe_checker_in_docker(file_object):
-        result = run_docker_container(
-            DOCKER_IMAGE,
-            combine_stderr_stdout=True,
-            timeout=TIMEOUT_IN_SECONDS,
-            command='/input --json --quiet',
-            mounts=[
-                Mount('/input', file_object.file_path, type='bind'),
-            ],
-        )
-        return result.stdout
+    def _run_cwe_checker_in_docker(self, file_objects: List[FileObject]) -> List[Optional[str]]:
+        # the binaries of a batch are analyzed in parallel (one container each)
+        with TemporaryDirectory(prefix=self.NAME, dir=self.config['data_storage']['docker-mount-base-dir']) as tmp_dir:
+            Path(tmp_dir).chmod(0o755)
+            for file_object in file_objects:
+                (Path(tmp_dir) / file_object.uid).write_bytes(file_object.binary)
+            with ContainerExecutor(
+                DOCKER_IMAGE,
+                containers=len(file_objects),
+                timeout=TIMEOUT_IN_SECONDS,
+                logging_label=self.NAME,
+                use_image_entrypoint=True,
+                mounts=[
+                    Mount(CONTAINER_TARGET_PATH, tmp_dir, type='bind'),
+                ],
+            ) as executor:
+                results = executor.execute_batch(
+                    [f'{CONTAINER_TARGET_PATH}/{file_object.uid} --json --quiet' for file_object in file_objects],
+                    combine_stderr_stdout=True,
+                )
+        return [None if isinstance(result, Exception) else result.stdout for result in results]
 
     @staticmethod
     def _parse_cwe_checker_output(output):
@@ -98,8 +112,7 @@ class AnalysisPlugin(AnalysisBasePlugin):
         arch_type = file_object.processed_analysis['file_type']['full'].lower()
         return any(supported_arch in arch_type for supported_arch in self.SUPPORTED_ARCHS)
 
-    def _do_full_analysis(self, file_object):
-        output = self._run_cwe_checker_in_docker(file_object)
+    def _add_analysis_result(self, file_object, output: Optional[str]):
         if output is not None:
             try:
                 cwe_messages = self._parse_cwe_checker_output(output)
@@ -112,19 +125,26 @@ class AnalysisPlugin(AnalysisBasePlugin):
             message = 'Timeout or error during cwe_checker execution.'
             logging.error(f'{message}\nUID: {file_object.uid}')
             file_object.processed_analysis[self.NAME] = {'summary': [], 'failed': message}
-        return file_object
 
     def process_object(self, file_object):
+        return self.process_objects([file_object])[0]
+
+    def process_objects(self, file_objects: List[FileObject]) -> List[FileObject]:
         '''
         This function handles only ELF executables. Otherwise it returns an empty dictionary.
         It calls the cwe_checker docker container.
         '''
-        if not self._is_supported_arch(file_object):
-            logging.debug('{}\'s arch is not supported ({})'.format(
-                file_object.file_path,
-                file_object.processed_analysis['cpu_architecture']['summary']))
-            file_object.processed_analysis[self.NAME] = {'summary': []}
-        else:
-            file_object = self._do_full_analysis(file_object)
-
-        return file_object
+        supported_file_objects = []
+        for file_object in file_objects:
+            if self._is_supported_arch(file_object):
+                supported_file_objects.append(file_object)
+            else:
+                logging.debug('{}\'s arch is not supported ({})'.format(
+                    file_object.file_path,
+                    file_object.processed_analysis['cpu_architecture']['summary']))
+                file_object.processed_analysis[self.NAME] = {'summary': []}
+
+        if supported_file_objects:
+            for file_object, output in zip(supported_file_objects, self._run_cwe_checker_in_docker(supported_file_objects)):
+                self._add_analysis_result(file_object, output)
+        return file_objects
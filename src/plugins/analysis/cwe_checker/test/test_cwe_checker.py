@@ -1,3 +1,7 @@
+from subprocess import CompletedProcess
+from unittest import mock
+
+from helperFunctions.docker import ContainerExecutor
 from objects.file import FileObject
 from test.unit.analysis.analysis_plugin_test_class import AnalysisPluginTest
 
@@ -48,3 +52,18 @@ class TestCweCheckerFunctions(AnalysisPluginTest):
         test_data = 'ELF 64-bit LSB shared object, x86-64, version 1 (SYSV), dynamically linked, interpreter /lib64/ld-linux-x86-64.so.2, for GNU/Linux 2.6.32, BuildID[sha1]=8e756708f62592be105b5e8b423080d38ddc8391, stripped'
         fo.processed_analysis = {'file_type': {'full': test_data}}
         assert self.analysis_plugin._is_supported_arch(fo)
+
+    def test_process_objects(self):
+        supported_fo, unsupported_fo = FileObject(binary=b'binary 1'), FileObject(binary=b'binary 2')
+        supported_fo.processed_analysis = {'file_type': {'full': 'ELF 64-bit LSB executable, x86-64'}}
+        unsupported_fo.processed_analysis = {'file_type': {'full': 'data'}, 'cpu_architecture': {'summary': []}}
+        output = '[{"name": "CWE676", "version": "0.1", "description": "strlen"}]'
+
+        def execute_batch(_, commands, **__):
+            assert commands == [f'/input/{supported_fo.uid} --json --quiet']
+            return [CompletedProcess(commands[0], 0, stdout=output)]
+
+        with mock.patch.object(ContainerExecutor, 'execute_batch', execute_batch):
+            self.analysis_plugin.process_objects([supported_fo, unsupported_fo])
+        assert supported_fo.processed_analysis[self.PLUGIN_NAME]['summary'] == ['CWE676']
+        assert unsupported_fo.processed_analysis[self.PLUGIN_NAME] == {'summary': []}
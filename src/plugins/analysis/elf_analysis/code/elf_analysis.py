@@ -1,14 +1,12 @@
 import json
 import logging
 import re
+from copy import deepcopy
 from difflib import SequenceMatcher
 from pathlib import Path
-from typing import List, Optional
-
-import lief
 
 from analysis.PluginBase import AnalysisBasePlugin
-from helperFunctions.hash import normalize_lief_items
+from helperFunctions.elf import get_elf_metadata, normalize_lief_items
 from helperFunctions.tag import TagColor
 
 LIEF_DATA_ENTRIES = (
@@ -18,8 +16,6 @@ LIEF_DATA_ENTRIES = (
 TEMPLATE_FILE_PATH = Path(__file__).parent.parent / 'internal/matching_template.json'
 BEHAVIOUR_CLASSES = json.loads(TEMPLATE_FILE_PATH.read_text())
 
-# pylint: disable=c-extension-no-member
-
 
 class AnalysisPlugin(AnalysisBasePlugin):
 
@@ -35,9 +31,9 @@ class AnalysisPlugin(AnalysisBasePlugin):
 
     def process_object(self, file_object):
         try:
-            elf_dict, parsed_binary = self._analyze_elf(file_object)
+            elf_dict, elf_metadata = self._analyze_elf(file_object)
             file_object.processed_analysis[self.NAME] = {'Output': elf_dict}
-            self.create_tags(parsed_binary, file_object)
+            self.create_tags(elf_metadata, file_object)
             file_object.processed_analysis[self.NAME]['summary'] = list(elf_dict.keys())
         except (RuntimeError, ValueError):
             logging.error(f'lief could not parse {file_object.uid}', exc_info=True)
@@ -113,27 +109,23 @@ class AnalysisPlugin(AnalysisBasePlugin):
 
     def _analyze_elf(self, file_object):
         elf_dict = {}
-        try:
-            parsed_binary = lief.parse(file_object.file_path)
-            binary_json_dict = json.loads(lief.to_json(parsed_binary))
-            if parsed_binary.exported_functions:
-                binary_json_dict['exported_functions'] = normalize_lief_items(parsed_binary.exported_functions)
-            if parsed_binary.imported_functions:
-                binary_json_dict['imported_functions'] = normalize_lief_items(parsed_binary.imported_functions)
-            if parsed_binary.libraries:
-                binary_json_dict['libraries'] = normalize_lief_items(parsed_binary.libraries)
-            modinfo_data = self.filter_modinfo(parsed_binary)
-            if modinfo_data:
-                elf_dict['modinfo'] = modinfo_data
-
-        except (AttributeError, TypeError, lief.bad_file):
-            logging.error(f'Bad file for lief/elf analysis {file_object.uid}.', exc_info=True)
+        elf_metadata = get_elf_metadata(file_object)  # the file is parsed only once per analysis cycle
+        if elf_metadata is None:
+            logging.error(f'Bad file for lief/elf analysis {file_object.uid}.')
             return elf_dict
 
+        # the metadata is shared with other plugins and must not be modified
+        binary_json_dict = deepcopy(elf_metadata.lief_json)
+        for key in ['exported_functions', 'imported_functions', 'libraries']:
+            if getattr(elf_metadata, key):
+                binary_json_dict[key] = getattr(elf_metadata, key)
+        if elf_metadata.modinfo:
+            elf_dict['modinfo'] = elf_metadata.modinfo
+
         self.get_final_analysis_dict(binary_json_dict, elf_dict)
         self._convert_address_values_to_hex(elf_dict)
 
-        return elf_dict, parsed_binary
+        return elf_dict, elf_metadata
 
     @staticmethod
     def _convert_address_values_to_hex(elf_dict):
@@ -141,14 +133,3 @@ class AnalysisPlugin(AnalysisBasePlugin):
             for entry in elf_dict[category]:
                 for key in {'virtual_address', 'offset'}.intersection(entry):
                     entry[key] = hex(entry[key])
-
-    @staticmethod
-    def filter_modinfo(binary) -> Optional[List[str]]:
-        # getting the information from the *.ko files .modinfo section
-        modinfo = None
-        for section in binary.sections:
-            if section.name == '.modinfo':
-                modinfo = bytes(section.content).decode()
-                modinfo = [entry for entry in modinfo.split('\x00') if entry]
-                break
-        return modinfo
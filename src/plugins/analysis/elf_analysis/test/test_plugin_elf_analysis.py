@@ -1,4 +1,5 @@
 # pylint: disable=redefined-outer-name,protected-access,wrong-import-order
+import json
 from collections import namedtuple
 from pathlib import Path
 
@@ -20,7 +21,7 @@ class MockAdmin:
         pass
 
 
-LiefResult = namedtuple('LiefResult', ['symbols_version', 'libraries', 'imported_functions', 'exported_functions', 'sections'])
+LiefResult = namedtuple('LiefResult', ['symbols_version', 'libraries', 'imported_functions', 'exported_functions', 'sections', 'symbols'])
 
 MOCK_DATA = (
     '{"header": {"entrypoint": 109724, "file_type": "DYNAMIC", "header_size": 52, "identity_class": "CLASS32", "identity_data": "LSB", "identity_os_abi": "SYSTEMV"},'
@@ -36,7 +37,8 @@ MOCK_LIEF_RESULT = LiefResult(
     imported_functions=['fdopen', 'calloc', 'strstr', 'raise', 'gmtime_r', 'strcmp'],
     symbols_version=[],
     exported_functions=['SHA256_Transform', 'GENERAL_NAMES_free', 'i2d_RSAPrivateKey', 'd2i_OCSP_REQUEST'],
-    sections=[])
+    sections=[],
+    symbols=[])
 
 
 @pytest.fixture(scope='function')
@@ -116,7 +118,7 @@ def test_get_symbols_version_entries(stub_plugin, symbol_versions, expected):
 
 def test_create_tags(stub_plugin, stub_object):
     stub_object.processed_analysis[stub_plugin.NAME] = {}
-    stub_result = LiefResult(libraries=['recvmsg', 'unknown'], imported_functions=[], symbols_version=[], exported_functions=[], sections=[])
+    stub_result = LiefResult(libraries=['recvmsg', 'unknown'], imported_functions=[], symbols_version=[], exported_functions=[], sections=[], symbols=[])
     stub_plugin.create_tags(stub_result, stub_object)
 
     assert 'network' in stub_object.processed_analysis[stub_plugin.NAME]['tags']
@@ -152,7 +154,7 @@ def test_pie(stub_plugin):
 
 def test_plugin(stub_plugin, stub_object, monkeypatch):
     monkeypatch.setattr('lief.parse', lambda _: MOCK_LIEF_RESULT)
-    monkeypatch.setattr('lief.to_json', lambda _: MOCK_DATA)
+    monkeypatch.setattr('helperFunctions.elf._get_lief_json', lambda _: json.loads(MOCK_DATA))
 
     stub_object.processed_analysis['file_type'] = {'mime': 'application/x-executable'}
     stub_plugin.process_object(stub_object)
@@ -167,6 +169,13 @@ def test_plugin(stub_plugin, stub_object, monkeypatch):
 
 def test_modinfo(stub_plugin):
     test_file = FileObject(file_path=str(TEST_DATA_DIR / 'test_data.ko'))
-    _, binary = stub_plugin._analyze_elf(test_file)
-    result = stub_plugin.filter_modinfo(binary)
-    assert result[0] == 'this are test data\n'
+    elf_dict, elf_metadata = stub_plugin._analyze_elf(test_file)
+    assert elf_metadata.modinfo[0] == 'this are test data\n'
+    assert elf_dict['modinfo'] == elf_metadata.modinfo
+
+
+def test_analyze_elf_does_not_modify_shared_metadata(stub_plugin):
+    test_file = FileObject(file_path=str(TEST_DATA_DIR / 'x-pie-executable'))
+    elf_dict, elf_metadata = stub_plugin._analyze_elf(test_file)
+    assert isinstance(elf_dict['sections'][1]['virtual_address'], str)
+    assert isinstance(elf_metadata.lief_json['sections'][1]['virtual_address'], int)
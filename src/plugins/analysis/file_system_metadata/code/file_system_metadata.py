@@ -6,19 +6,22 @@ import zlib
 from base64 import b64encode
 from contextlib import suppress
 from pathlib import Path
+from subprocess import CompletedProcess
 from tempfile import TemporaryDirectory
-from typing import List, NamedTuple, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from docker.types import Mount
 
 from analysis.PluginBase import AnalysisBasePlugin
 from helperFunctions.database import ConnectTo
-from helperFunctions.docker import run_docker_container
+from helperFunctions.docker import ContainerExecutor
 from helperFunctions.tag import TagColor
 from objects.file import FileObject
 from storage.db_interface_common import MongoInterfaceCommon
 
 DOCKER_IMAGE = 'fs_metadata_mounting'
+CONTAINER_TARGET_PATH = '/work'
+CONTAINER_SCRIPT = '/root/mount.py'
 StatResult = NamedTuple(
     'StatEntry',
     [('uid', int), ('gid', int), ('mode', int), ('a_time', float), ('c_time', float), ('m_time', float)]
@@ -57,13 +60,21 @@ class AnalysisPlugin(AnalysisBasePlugin):
 
     def __init__(self, plugin_administrator, config=None, recursive=True):
         self.result = {}
+        self.mount_results = {}
         super().__init__(plugin_administrator, config=config, recursive=recursive, plugin_path=__file__)
 
     def process_object(self, file_object: FileObject) -> FileObject:
-        self.result = {}
-        self._extract_metadata(file_object)
-        self._set_result_propagation_flag(file_object)
-        return file_object
+        return self.process_objects([file_object])[0]
+
+    def process_objects(self, file_objects: List[FileObject]) -> List[FileObject]:
+        # the file systems of the batch are mounted at once (see _mount_in_docker)
+        file_systems = [fo for fo in file_objects if fo.processed_analysis['file_type']['mime'] in self.FS_MIME_TYPES]
+        self.mount_results = self._mount_in_docker(file_systems) if file_systems else {}
+        for file_object in file_objects:
+            self.result = {}
+            self._extract_metadata(file_object)
+            self._set_result_propagation_flag(file_object)
+        return file_objects
 
     def _set_result_propagation_flag(self, file_object: FileObject):
         if 'file_system_metadata' not in file_object.processed_analysis:
@@ -88,31 +99,48 @@ class AnalysisPlugin(AnalysisBasePlugin):
             self._add_tag(file_object, self.result)
 
     def _extract_metadata_from_file_system(self, file_object: FileObject):
-        with TemporaryDirectory(dir=self.config['data_storage']['docker-mount-base-dir']) as tmp_dir:
-            input_file = Path(tmp_dir) / 'input.img'
-            input_file.write_bytes(file_object.binary or Path(file_object.file_path).read_bytes())
-            output = self._mount_in_docker(tmp_dir)
-            output_file = Path(tmp_dir) / 'output.pickle'
-            if output_file.is_file():
-                self._analyze_metadata_of_mounted_dir(json.loads(output_file.read_bytes()))
-            else:
-                message = f'mount failed:\n{output}'
-                logging.warning(f'[file_system_metadata] {message}')
-                file_object.processed_analysis[self.NAME]['failed'] = message
-
-    def _mount_in_docker(self, input_dir: str) -> str:
-        result = run_docker_container(
-            DOCKER_IMAGE,
-            combine_stderr_stdout=True,
-            logging_label=self.NAME,
-            mounts=[
-                Mount('/work', input_dir, type='bind'),
-            ],
-            timeout=int(self.timeout * .8),
-            privileged=True,
-        )
+        if file_object.uid not in self.mount_results:
+            self.mount_results.update(self._mount_in_docker([file_object]))
+        output, docker_results = self.mount_results[file_object.uid]
+        if docker_results is not None:
+            self._analyze_metadata_of_mounted_dir(docker_results)
+        else:
+            message = f'mount failed:\n{output}'
+            logging.warning(f'[file_system_metadata] {message}')
+            file_object.processed_analysis[self.NAME]['failed'] = message
+
+    def _mount_in_docker(self, file_objects: List[FileObject]) -> Dict[str, Tuple[str, Optional[list]]]:
+        '''
+        Mount the file systems one after another in the same (warm) container.
 
-        return result.stdout
+        :return: The output of the container and the metadata of the mounted files (``None`` if the file system could
+            not be mounted) by UID of the file system.
+        '''
+        results = {}
+        with TemporaryDirectory(dir=self.config['data_storage']['docker-mount-base-dir']) as tmp_dir:
+            for file_object in file_objects:
+                (Path(tmp_dir) / file_object.uid).mkdir(exist_ok=True)  # the same file may be queued twice
+                (Path(tmp_dir) / file_object.uid / 'input.img').write_bytes(file_object.binary or Path(file_object.file_path).read_bytes())
+            with ContainerExecutor(
+                DOCKER_IMAGE,
+                timeout=int(self.timeout * .8),
+                logging_label=self.NAME,
+                mounts=[
+                    Mount(CONTAINER_TARGET_PATH, tmp_dir, type='bind'),
+                ],
+                privileged=True,
+            ) as executor:
+                outputs = executor.execute_batch(
+                    [[CONTAINER_SCRIPT, f'{CONTAINER_TARGET_PATH}/{file_object.uid}'] for file_object in file_objects],
+                    combine_stderr_stdout=True,
+                )
+            for file_object, output in zip(file_objects, outputs):
+                output_file = Path(tmp_dir) / file_object.uid / 'output.pickle'
+                results[file_object.uid] = (
+                    output.stdout if isinstance(output, CompletedProcess) else str(output),
+                    json.loads(output_file.read_bytes()) if output_file.is_file() else None,
+                )
+        return results
 
     def _analyze_metadata_of_mounted_dir(self, docker_results: Tuple[str, str, dict]):
         for file_name, file_path, file_stats in docker_results:
@@ -3,15 +3,17 @@
 import json
 import logging
 import os
+import sys
 from contextlib import contextmanager
 from pathlib import Path
 from subprocess import CalledProcessError, check_call
 from typing import Dict, Union
 
+# the input and output files are in the input dir (default: /work, another dir can be passed as argument)
 INPUT_DIR = Path('/work')
-INPUT_FILE = INPUT_DIR / 'input.img'
+INPUT_FILE_NAME = 'input.img'
 MOUNT_DIR = Path('/root/mount_dir')
-OUTPUT_FILE = INPUT_DIR / 'output.pickle'
+OUTPUT_FILE_NAME = 'output.pickle'
 
 
 @contextmanager
@@ -23,12 +25,12 @@ def mount(input_file: Path):
         check_call(f'umount {MOUNT_DIR}', shell=True)
 
 
-def main():
+def main(input_dir: Path):
     try:
-        stats = INPUT_FILE.lstat()
-        with mount(INPUT_FILE):
+        stats = (input_dir / INPUT_FILE_NAME).lstat()
+        with mount(input_dir / INPUT_FILE_NAME):
             result = _get_mounted_file_stats()
-        _save_results(result, stats.st_uid, stats.st_gid)
+        _save_results(result, input_dir / OUTPUT_FILE_NAME, stats.st_uid, stats.st_gid)
     except FileNotFoundError:
         logging.error('Could not find the input file.')
     except CalledProcessError:
@@ -57,10 +59,10 @@ def _stat_to_dict(stat_result: os.stat_result) -> Dict[str, Union[int, float]]:
     }
 
 
-def _save_results(result, uid, gid):
-    OUTPUT_FILE.write_text(json.dumps(result))
-    os.chown(OUTPUT_FILE, uid, gid)
+def _save_results(result, output_file: Path, uid, gid):
+    output_file.write_text(json.dumps(result))
+    os.chown(output_file, uid, gid)
 
 
 if __name__ == '__main__':
-    main()
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else INPUT_DIR)
@@ -1,6 +1,8 @@
 # pylint: disable=no-self-use,protected-access,wrong-import-order
+import json
 from base64 import b64encode
 from pathlib import Path
+from subprocess import CompletedProcess
 from typing import Optional
 from unittest import mock
 
@@ -320,6 +322,25 @@ class TestFileSystemMetadata(AnalysisPluginTest):
         assert result.processed_analysis['file_system_metadata']['contained_in_file_system'] is False
         assert len(result.processed_analysis['file_system_metadata'].keys()) == 1
 
+    def test_process_objects(self):
+        fo_fs, fo_unmountable = FoMock(self.test_file_fs, 'filesystem/squashfs'), FoMock(self.test_file_fs, 'filesystem/ext4')
+        fo_unmountable.uid = 'unmountable'
+        fo_tar = FoMock(self.test_file_tar, 'application/x-tar')
+        stats = {'uid': 0, 'gid': 0, 'mode': 0o104755, 'a_time': 1.0, 'c_time': 1.0, 'm_time': 1.0}
+
+        def execute_batch(executor, commands, **_):
+            assert commands == [['/root/mount.py', '/work/deadbeef_123'], ['/root/mount.py', '/work/unmountable']]
+            work_dir = Path(executor.run_kwargs['mounts'][0]['Source'])
+            assert (work_dir / 'unmountable' / 'input.img').read_bytes() == self.test_file_fs.read_bytes()
+            (work_dir / 'deadbeef_123' / 'output.pickle').write_text(json.dumps([['su', 'bin/su', stats]]))
+            return [CompletedProcess(commands[0], 0, stdout=''), CompletedProcess(commands[1], 0, stdout='mount error')]
+
+        with mock.patch.object(plugin.ContainerExecutor, 'execute_batch', execute_batch):
+            self.analysis_plugin.process_objects([fo_fs, fo_unmountable, fo_tar])
+        assert fo_fs.processed_analysis[PLUGIN_NAME]['files'][_b64_encode('su')][FsKeys.SUID] is True
+        assert fo_unmountable.processed_analysis[PLUGIN_NAME]['failed'] == 'mount failed:\nmount error'
+        assert 'files' in fo_tar.processed_analysis[PLUGIN_NAME]
+
     def test_enter_results_for_tar_file__malformed_path(self):
         file_name = './foo/bar'
         self.analysis_plugin._enter_results_for_tar_file(TarMock(file_name))
@@ -1,9 +1,7 @@
-import logging
-from hashlib import algorithms_available
-
 from analysis.PluginBase import AnalysisBasePlugin
 from helperFunctions.config import read_list_from_config
-from helperFunctions.hash import get_hash, get_imphash, get_ssdeep, get_tlsh
+from helperFunctions.fileSystem import get_binary_or_memory_map
+from helperFunctions.hash import get_hashes, get_imphash
 
 
 class AnalysisPlugin(AnalysisBasePlugin):
@@ -22,32 +20,21 @@ class AnalysisPlugin(AnalysisBasePlugin):
         '''
         self.config = config
         self.hashes_to_create = self._get_hash_list_from_config()
-
-        # additional init stuff can go here
+        self.hash_threads = self.config.getint(self.NAME, 'hash_threads', fallback=1)
 
         super().__init__(plugin_administrator, config=config, recursive=recursive, plugin_path=__file__, timeout=600)
 
     def process_object(self, file_object):
         '''
-        This function must be implemented by the plugin.
-        Analysis result must be a dict stored in file_object.processed_analysis[self.NAME]
-        If you want to propagate results to parent objects store a list of strings 'summary' entry of your result dict
+        All hashes are computed in a single pass over the file (see :func:`helperFunctions.hash.get_hashes`).
         '''
-        file_object.processed_analysis[self.NAME] = {}
-        for hash_ in self.hashes_to_create:
-            if hash_ in algorithms_available:
-                file_object.processed_analysis[self.NAME][hash_] = get_hash(hash_, file_object.binary)
-            else:
-                logging.debug(f'algorithm {hash_} not available')
-        file_object.processed_analysis[self.NAME]['ssdeep'] = get_ssdeep(file_object.binary)
+        with get_binary_or_memory_map(file_object) as data:
+            hashes = get_hashes(data, [*self.hashes_to_create, 'ssdeep', 'tlsh'], threads=self.hash_threads)
+        file_object.processed_analysis[self.NAME] = hashes
         file_object.processed_analysis[self.NAME]['imphash'] = get_imphash(file_object)
-
-        tlsh_hash = get_tlsh(file_object.binary)
-        if tlsh_hash:
-            file_object.processed_analysis[self.NAME]['tlsh'] = get_tlsh(file_object.binary)
-
         return file_object
 
     def _get_hash_list_from_config(self):
         hash_list = read_list_from_config(self.config, self.NAME, 'hashes', default=['sha256'])
         return hash_list if hash_list else ['sha256']
+
@@ -0,0 +1,47 @@
+'''
+Compare the computation of the hashes one algorithm after another with the single pass of
+:func:`helperFunctions.hash.get_hashes` (with and without threads) for different file sizes.
+
+usage (from the src directory): python3 -m plugins.analysis.hash.test.benchmark_hashes
+'''
+import mmap
+import os
+from hashlib import algorithms_available
+from tempfile import NamedTemporaryFile
+from timeit import timeit
+
+from helperFunctions.hash import get_hash, get_hashes, get_ssdeep, get_tlsh
+
+HASHES = [hash_ for hash_ in ['md5', 'sha1', 'sha256', 'sha512', 'ripemd160', 'whirlpool'] if hash_ in algorithms_available]
+FILE_SIZES = [2 ** 10, 2 ** 16, 2 ** 20, 2 ** 24, 2 ** 27]
+THREADS = [1, 2, 4]
+
+
+def hash_separately(data: bytes):
+    result = {hash_: get_hash(hash_, data) for hash_ in HASHES}
+    result['ssdeep'] = get_ssdeep(data)
+    if get_tlsh(data):
+        result['tlsh'] = get_tlsh(data)
+    return result
+
+
+def main():
+    print(f'hashes: {", ".join(HASHES)}, ssdeep, tlsh')
+    print(f'{"size":>12} {"separately":>12}' + ''.join(f'{f"{threads} thread(s)":>14}' for threads in THREADS))
+    for size in FILE_SIZES:
+        with NamedTemporaryFile() as tmp_file:
+            tmp_file.write(os.urandom(size))
+            tmp_file.flush()
+            with mmap.mmap(tmp_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                repetitions = max(1, 2 ** 24 // size)
+                times = [timeit(lambda: hash_separately(data[:]), number=repetitions) / repetitions]
+                for threads in THREADS:
+                    times.append(timeit(
+                        lambda: get_hashes(data, [*HASHES, 'ssdeep', 'tlsh'], threads=threads),  # pylint: disable=cell-var-from-loop
+                        number=repetitions
+                    ) / repetitions)
+        print(f'{size:>12} ' + ''.join(f'{time * 1000:>11.3f} ms' for time in times))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,9 @@
 import os
+from pathlib import Path
 
 from common_helper_files import get_dir_of_file
 
+from helperFunctions.hash import get_md5
 from test.common_helper import MockFileObject
 from test.unit.analysis.analysis_plugin_test_class import AnalysisPluginTest
 
@@ -40,3 +42,12 @@ class TestAnalysisPluginHash(AnalysisPluginTest):
 
         assert isinstance(result['imphash'], str), 'imphash should be a string'
         assert len(result['imphash']) == 32, 'imphash does not look like an md5'
+
+    def test_file_is_memory_mapped(self):
+        file_path = os.path.join(TEST_DATA_DIR, 'ls')
+        result = self.analysis_plugin.process_object(MockFileObject(binary=None, file_path=file_path)).processed_analysis[self.PLUGIN_NAME]
+        expected_result = self.analysis_plugin.process_object(MockFileObject(file_path=file_path, binary=Path(file_path).read_bytes()))
+
+        assert result == expected_result.processed_analysis[self.PLUGIN_NAME]
+        assert result['md5'] == get_md5(Path(file_path).read_bytes())
+        assert 'tlsh' in result
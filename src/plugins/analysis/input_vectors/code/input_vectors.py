@@ -1,14 +1,16 @@
 import logging
 from json import JSONDecodeError, loads
 from pathlib import Path
+from subprocess import CompletedProcess
 from tempfile import TemporaryDirectory
+from typing import List, Union
 
 from docker.errors import DockerException
 from docker.types import Mount
 from requests.exceptions import ReadTimeout
 
 from analysis.PluginBase import AnalysisBasePlugin
-from helperFunctions.docker import run_docker_container
+from helperFunctions.docker import ContainerExecutor
 from objects.file import FileObject
 
 DOCKER_IMAGE = 'input-vectors:latest'
@@ -36,27 +38,39 @@ class AnalysisPlugin(AnalysisBasePlugin):
         logging.info('Up and running.')
 
     def process_object(self, file_object: FileObject):
+        return self.process_objects([file_object])[0]
+
+    def process_objects(self, file_objects: List[FileObject]) -> List[FileObject]:
+        '''
+        The files of a batch are analyzed one after another in the same (warm) container
+        '''
         with TemporaryDirectory(prefix=self.NAME, dir=self.config['data_storage']['docker-mount-base-dir']) as tmp_dir:
-            file_path = Path(tmp_dir) / file_object.file_name
-            file_path.write_bytes(file_object.binary)
+            Path(tmp_dir).chmod(0o755)  # the container does not run as root
+            for file_object in file_objects:
+                (Path(tmp_dir) / file_object.uid).write_bytes(file_object.binary)
+            with ContainerExecutor(
+                DOCKER_IMAGE,
+                timeout=TIMEOUT_IN_SECONDS,
+                logging_label=self.NAME,
+                use_image_entrypoint=True,
+                mounts=[
+                    Mount(CONTAINER_TARGET_PATH, tmp_dir, type='bind'),
+                ],
+            ) as executor:
+                # We explicitly don't want stderr to ignore "Cannot analyse at [...]"
+                results = executor.execute_batch([f'{CONTAINER_TARGET_PATH}/{file_object.uid}' for file_object in file_objects])
+
+        for file_object, result in zip(file_objects, results):
+            self._add_result(file_object, result)
+        return file_objects
+
+    def _add_result(self, file_object: FileObject, result: Union[CompletedProcess, Exception]):
+        if isinstance(result, ReadTimeout):
+            file_object.processed_analysis.setdefault(self.NAME, {})['failed'] = 'Analysis timed out. It might not be complete.'
+        elif isinstance(result, (DockerException, IOError)):
+            file_object.processed_analysis.setdefault(self.NAME, {})['failed'] = 'Analysis issues. It might not be complete.'
+        else:
             try:
-                result = run_docker_container(
-                    DOCKER_IMAGE,
-                    # We explicitly don't want stderr to ignore "Cannot analyse at [...]"
-                    combine_stderr_stdout=False,
-                    logging_label=self.NAME,
-                    timeout=TIMEOUT_IN_SECONDS,
-                    command=CONTAINER_TARGET_PATH,
-                    mounts=[
-                        Mount(CONTAINER_TARGET_PATH, str(file_path), type='bind'),
-                    ],
-                )
                 file_object.processed_analysis[self.NAME] = loads(result.stdout)
-            except ReadTimeout:
-                file_object.processed_analysis[self.NAME]['failed'] = 'Analysis timed out. It might not be complete.'
-            except (DockerException, IOError):
-                file_object.processed_analysis[self.NAME]['failed'] = 'Analysis issues. It might not be complete.'
             except JSONDecodeError:
                 logging.error('[input_vectors]: Could not decode JSON output:', exc_info=True)
-
-            return file_object
@@ -1,5 +1,10 @@
 from pathlib import Path
+from subprocess import CompletedProcess
+from unittest import mock
 
+from requests.exceptions import ReadTimeout
+
+from helperFunctions.docker import ContainerExecutor
 from objects.file import FileObject
 from test.unit.analysis.analysis_plugin_test_class import AnalysisPluginTest
 
@@ -26,6 +31,20 @@ class AnalysisPluginTestInputVectors(AnalysisPluginTest):
         result = self.assert_process_object('test_domain.elf')
         assert result['full']['domains'][0] == 'http://foo.bar'
 
+    def test_process_objects(self):
+        file_objects = [FileObject(binary=b'binary 1'), FileObject(binary=b'binary 2')]
+
+        def execute_batch(executor, commands):
+            input_dir = Path(executor.run_kwargs['mounts'][0]['Source'])
+            assert sorted(path.name for path in input_dir.iterdir()) == sorted(fo.uid for fo in file_objects)
+            assert commands == [f'/tmp/input/{fo.uid}' for fo in file_objects]
+            return [CompletedProcess(commands[0], 0, stdout='{"full": {"domains": []}}'), ReadTimeout()]
+
+        with mock.patch.object(ContainerExecutor, 'execute_batch', execute_batch):
+            results = self.analysis_plugin.process_objects(file_objects)
+        assert results[0].processed_analysis['input_vectors'] == {'full': {'domains': []}}
+        assert results[1].processed_analysis['input_vectors']['failed'] == 'Analysis timed out. It might not be complete.'
+
     def assert_process_object(self, test_file_name: str) -> dict:
         test_file = TEST_FILE_DIR / test_file_name
         assert test_file.is_file(), 'test file is missing'
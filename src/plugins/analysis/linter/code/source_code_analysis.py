@@ -1,12 +1,16 @@
 import json
 import logging
+import shutil
 import sys
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, Union
 
 from docker.types import Mount
 
 from analysis.PluginBase import AnalysisBasePlugin
-from helperFunctions.docker import run_docker_container
+from helperFunctions.docker import ContainerExecutor
+from objects.file import FileObject
 from storage.fsorganizer import FSOrganizer
 
 try:
@@ -48,21 +52,31 @@ class AnalysisPlugin(AnalysisBasePlugin):
         super().__init__(plugin_administrator, config=config, plugin_path=__file__, recursive=recursive, offline_testing=offline_testing)
 
     def process_object(self, file_object):
+        return self.process_objects([file_object])[0]
+
+    def process_objects(self, file_objects: List[FileObject]) -> List[FileObject]:
         '''
         After only receiving text files thanks to the whitelist, we try to detect the correct scripting language
         and then call a linter if a supported language is detected
         '''
-        script_type = self._get_script_type(file_object)
+        for file_object, script_type in zip(file_objects, self._get_script_types(file_objects)):
+            self._run_linter(file_object, script_type)
+        return file_objects
+
+    def _run_linter(self, file_object: FileObject, script_type: Union[str, Exception, None]):
+        if isinstance(script_type, Exception):
+            file_object.processed_analysis[self.NAME] = {'summary': [], 'failed': 'Language detection failed'}
+            return
         if script_type is None:
             file_object.processed_analysis[self.NAME] = {'summary': [], 'warning': 'Is not a script or language could not be detected'}
-            return file_object
+            return
 
         script_type = script_type.lower()
 
         if script_type not in self.linter_impls:
             logging.debug(f'[{self.NAME}] {file_object.file_name} ({script_type}) is not a supported script.')
             file_object.processed_analysis[self.NAME] = {'summary': [], 'warning': f'Unsupported script type: {script_type}'}
-            return file_object
+            return
 
         issues = self.linter_impls[script_type](file_object.file_path)
 
@@ -71,27 +85,44 @@ class AnalysisPlugin(AnalysisBasePlugin):
         else:
             file_object.processed_analysis[self.NAME] = {'full': sorted(issues, key=lambda k: k['symbol']),
                                                          'summary': [f'Warnings in {script_type} script']}
-        return file_object
-
-    def _get_script_type(self, file_object):
-        host_path = self._fs_organizer.generate_path_from_uid(file_object.uid)
-        container_path = f'/repo/{file_object.file_name}'
-        result = run_docker_container(
-            'crazymax/linguist',
-            combine_stderr_stdout=True,
-            timeout=60,
-            command=f'--json {container_path}',
-            mounts=[
-                Mount(container_path, host_path, type='bind'),
-            ],
-            logging_label=self.NAME,
-        )
-        output_json = json.loads(result.stdout)
+
+    def _get_script_types(self, file_objects: List[FileObject]) -> List[Union[str, Exception, None]]:
+        # the files of the batch are copied to one mounted directory and analyzed in the same (warm) container
+        with TemporaryDirectory(prefix=self.NAME, dir=self.config['data_storage']['docker-mount-base-dir']) as tmp_dir:
+            Path(tmp_dir).chmod(0o755)
+            container_paths = []
+            for index, file_object in enumerate(file_objects):
+                (Path(tmp_dir) / str(index)).mkdir()
+                shutil.copyfile(self._fs_organizer.generate_path_from_uid(file_object.uid), Path(tmp_dir) / str(index) / file_object.file_name)
+                container_paths.append(f'/repo/{index}/{file_object.file_name}')
+            with ContainerExecutor(
+                'crazymax/linguist',
+                timeout=60,
+                logging_label=self.NAME,
+                use_image_entrypoint=True,
+                mounts=[
+                    Mount('/repo', tmp_dir, type='bind'),
+                ],
+            ) as executor:
+                results = executor.execute_batch([['--json', path] for path in container_paths], combine_stderr_stdout=True)
+
+        return [
+            result if isinstance(result, Exception) else self._get_script_type(file_object, container_path, result.stdout)
+            for file_object, container_path, result in zip(file_objects, container_paths, results)
+        ]
+
+    @staticmethod
+    def _get_script_type(file_object: FileObject, container_path: str, linguist_output: str) -> Union[str, Exception, None]:
+        try:
+            output_json = json.loads(linguist_output)[container_path]
+        except (json.JSONDecodeError, KeyError) as error:
+            logging.warning(f'[source_code_analysis] unexpected output of linguist for {file_object.uid}: {linguist_output}')
+            return error
 
         # FIXME plugins should not set the output for other plugins
         # But due to performance reasons we don't want the filetype plugin to run linguist
-        file_object.processed_analysis['file_type']['linguist'] = ''.join([f'{k:<10} {str(v):<10}\n' for k, v in output_json[container_path].items()])
+        file_object.processed_analysis['file_type']['linguist'] = ''.join([f'{k:<10} {str(v):<10}\n' for k, v in output_json.items()])
 
-        script_type = output_json[container_path].get('language')
+        script_type = output_json.get('language')
 
         return script_type
@@ -1,9 +1,13 @@
 # pylint: disable=redefined-outer-name,unused-argument,protected-access,wrong-import-order
 
+import json
 from pathlib import Path
+from subprocess import CompletedProcess
 
 import pytest
+from docker.errors import APIError
 
+from helperFunctions.docker import ContainerExecutor
 from test.common_helper import create_test_file_object, get_config_for_testing
 
 from ..code.source_code_analysis import AnalysisPlugin
@@ -56,3 +60,20 @@ def test_process_object_no_issues(stub_plugin, test_object, monkeypatch):
     stub_plugin.process_object(test_object)
     result = test_object.processed_analysis[stub_plugin.NAME]
     assert 'full' not in result
+
+
+def test_process_objects(stub_plugin, monkeypatch):
+    python_file, other_file = create_test_file_object(bin_path=str(PYLINT_TEST_FILE)), create_test_file_object()
+    file_paths = {python_file.uid: python_file.file_path, other_file.uid: other_file.file_path}
+    monkeypatch.setattr('storage.fsorganizer.FSOrganizer.generate_path_from_uid', lambda _self, uid: file_paths[uid])
+    monkeypatch.setitem(AnalysisPlugin.linter_impls, 'python', lambda file_path: [{'symbol': 'unused-import'}])
+
+    def execute_batch(_, commands, **__):
+        assert commands == [['--json', f'/repo/0/{python_file.file_name}'], ['--json', f'/repo/1/{other_file.file_name}']]
+        return [CompletedProcess(commands[0], 0, stdout=json.dumps({commands[0][1]: {'language': 'Python'}})), APIError('error')]
+
+    monkeypatch.setattr(ContainerExecutor, 'execute_batch', execute_batch)
+    stub_plugin.process_objects([python_file, other_file])
+    assert python_file.processed_analysis[stub_plugin.NAME]['summary'] == ['Warnings in python script']
+    assert python_file.processed_analysis['file_type']['linguist'].startswith('language')
+    assert other_file.processed_analysis[stub_plugin.NAME]['failed'] == 'Language detection failed'
@@ -1,14 +1,15 @@
 import binascii
 import itertools
 import logging
+import os
+import shutil
 import zlib
 from base64 import b64decode
 from collections import OrderedDict
 from concurrent.futures import Future, ThreadPoolExecutor
 from json import JSONDecodeError, loads
-from multiprocessing import Manager
 from pathlib import Path
-from tempfile import TemporaryDirectory
+from tempfile import mkdtemp
 from typing import Dict, List, Optional, Tuple, Union
 
 from common_helper_files import get_binary_from_file, safe_rglob
@@ -18,7 +19,8 @@ from fact_helper_file import get_file_type_from_path
 from requests.exceptions import ReadTimeout
 
 from analysis.PluginBase import AnalysisBasePlugin
-from helperFunctions.docker import run_docker_container
+from helperFunctions.docker import ContainerExecutor
+from helperFunctions.fileSystem import remove_least_recently_used
 from helperFunctions.tag import TagColor
 from helperFunctions.uid import create_uid
 from objects.file import FileObject
@@ -26,31 +28,83 @@ from storage.fsorganizer import FSOrganizer
 from unpacker.unpack_base import UnpackBase
 
 TIMEOUT_IN_SECONDS = 15
+PLUGIN_TIMEOUT = 900
 EXECUTABLE = 'executable'
 EMPTY = '(no parameter)'
 DOCKER_IMAGE = 'fact/qemu-exec:alpine-3.14'
 QEMU_ERRORS = ['Unsupported syscall', 'Invalid ELF', 'uncaught target signal']
 CONTAINER_TARGET_PATH = '/opt/firmware_root'
+CONTAINER_SCRIPT_PATH = '/opt/start_binary.py'
+ROOT_CACHE_DIR_NAME = 'FACT_plugin_qemu_exec_roots'
 
 
 class Unpacker(UnpackBase):
+    '''
+    Extracts the file systems of firmware containers. The extracted files are cached (by UID of the container) in the
+    docker mount base dir, so that they are not extracted again when the same container is analyzed again (e.g. as part
+    of several firmware images or in an update of the analysis). Only the ``root_cache_size`` most recently used
+    extractions are kept.
+    '''
     def __init__(self, config=None, worker_id=None):
         super().__init__(config=config, worker_id=worker_id)
         self.fs_organizer = FSOrganizer(config)
+        self.docker_mount_base_dir = Path(self.config['data_storage']['docker-mount-base-dir'])
+        self.cache_dir = self.docker_mount_base_dir / ROOT_CACHE_DIR_NAME
+        self.cache_size = self.config.getint(AnalysisPlugin.NAME, 'root_cache_size', fallback=10)
+
+    def unpack_fo(self, file_object: FileObject) -> Optional[Path]:
+        '''
+        Extract the file object (or get the extraction from the cache).
+
+        :param file_object: The firmware container.
+        :return: The directory of the extraction or ``None`` if the file was not found.
+        '''
+        extraction_dir = self.cache_dir / file_object.uid
+        if extraction_dir.is_dir():
+            os.utime(extraction_dir)  # the modification time marks the last use
+            return extraction_dir
 
-    def unpack_fo(self, file_object: FileObject) -> Optional[TemporaryDirectory]:
         file_path = file_object.file_path if file_object.file_path else self._get_path_from_fo(file_object)
         if not file_path or not Path(file_path).is_file():
             logging.error(f'could not unpack {file_object.uid}: file path not found')
             return None
 
-        extraction_dir = TemporaryDirectory(prefix='FACT_plugin_qemu_exec', dir=self.config['data_storage']['docker-mount-base-dir'])
-        self.extract_files_from_file(file_path, extraction_dir.name)
+        tmp_dir = Path(mkdtemp(prefix='FACT_plugin_qemu_exec', dir=self.docker_mount_base_dir))
+        try:
+            self.extract_files_from_file(file_path, str(tmp_dir))
+            shutil.rmtree(tmp_dir / 'input')  # the copy of the container is not needed anymore
+            self.cache_dir.mkdir(exist_ok=True)
+            tmp_dir.rename(extraction_dir)
+        except OSError:  # the same container was extracted by another worker in the meantime
+            if not extraction_dir.is_dir():
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self._remove_old_extractions()
         return extraction_dir
 
     def _get_path_from_fo(self, file_object: FileObject) -> str:
         return self.fs_organizer.generate_path(file_object)
 
+    def _remove_old_extractions(self):
+        remove_least_recently_used(self.cache_dir, self.cache_size, min_age=PLUGIN_TIMEOUT)
+
+
+def create_executor(root_path: Path, containers: int = 1, lifetime: int = PLUGIN_TIMEOUT) -> ContainerExecutor:
+    '''
+    Create an executor with warm containers of the emulation image in which the binaries of the extracted file system
+    are executed. The file system is mounted read only, so that the cached extraction can not be changed by the executed
+    binaries.
+    '''
+    return ContainerExecutor(
+        DOCKER_IMAGE,
+        containers=containers,
+        timeout=TIMEOUT_IN_SECONDS,
+        lifetime=lifetime,
+        logging_label='qemu_exec',
+        mounts=[Mount(CONTAINER_TARGET_PATH, str(root_path), type='bind', read_only=True)],
+    )
+
 
 class AnalysisPlugin(AnalysisBasePlugin):
 
@@ -84,7 +138,8 @@ class AnalysisPlugin(AnalysisBasePlugin):
 
     def __init__(self, plugin_administrator, config=None, recursive=True, unpacker=None):
         self.unpacker = Unpacker(config) if unpacker is None else unpacker
-        super().__init__(plugin_administrator, config=config, recursive=recursive, plugin_path=__file__, timeout=900)
+        self.max_parallel_executions = config.getint(self.NAME, 'max_parallel_executions', fallback=8)
+        super().__init__(plugin_administrator, config=config, recursive=recursive, plugin_path=__file__, timeout=PLUGIN_TIMEOUT)
 
     def process_object(self, file_object: FileObject) -> FileObject:
         if self.NAME not in file_object.processed_analysis:
@@ -104,18 +159,17 @@ class AnalysisPlugin(AnalysisBasePlugin):
         if not file_object.files_included:
             return file_object
 
-        tmp_dir = self.unpacker.unpack_fo(file_object)
-        extracted_files_dir = self.unpacker.get_extracted_files_dir(tmp_dir.name)
+        extraction_dir = self.unpacker.unpack_fo(file_object)
+        if extraction_dir is None:
+            return file_object
+        extracted_files_dir = self.unpacker.get_extracted_files_dir(extraction_dir)
 
         if extracted_files_dir.is_dir():
-            try:
-                self.root_path = self._find_root_path(extracted_files_dir)
-                file_list = self._find_relevant_files(extracted_files_dir)
-                if file_list:
-                    file_object.processed_analysis[self.NAME]['files'] = {}
-                    self._process_included_files(file_list, file_object)
-            finally:
-                tmp_dir.cleanup()
+            self.root_path = self._find_root_path(extracted_files_dir)
+            file_list = self._find_relevant_files(extracted_files_dir)
+            if file_list:
+                file_object.processed_analysis[self.NAME]['files'] = {}
+                self._process_included_files(file_list, file_object)
 
         return file_object
 
@@ -141,27 +195,26 @@ class AnalysisPlugin(AnalysisBasePlugin):
         return False
 
     def _process_included_files(self, file_list, file_object):
-        manager = Manager()
-        executor = ThreadPoolExecutor(max_workers=8)
-        results_dict = manager.dict()
-
-        jobs = self._run_analysis_jobs(executor, file_list, file_object, results_dict)
-        for future in jobs:  # wait for jobs to finish
-            future.result()
-        executor.shutdown(wait=False)
-        self._enter_results(dict(results_dict), file_object)
+        results_dict = {}
+        with create_executor(self.root_path, self.max_parallel_executions, self.timeout) as container_executor:
+            with ThreadPoolExecutor(max_workers=self.max_parallel_executions) as executor:
+                jobs = self._run_analysis_jobs(executor, file_list, file_object, container_executor, results_dict)
+                for future in jobs:  # wait for jobs to finish
+                    future.result()
+        self._enter_results(results_dict, file_object)
         self._add_tag(file_object)
 
     def _run_analysis_jobs(self, executor: ThreadPoolExecutor, file_list: List[Tuple[str, str]],
-                           file_object: FileObject, results_dict: dict) -> List[Future]:
-        jobs = []
+                           file_object: FileObject, container_executor: ContainerExecutor, results_dict: dict) -> List[Future]:
+        jobs, uids = [], set()
         for file_path, full_type in file_list:
             uid = self._get_uid(file_path, self.root_path)
-            if self._analysis_not_already_completed(file_object, uid):
-                for arch_suffix in self._find_arch_suffixes(full_type):
-                    jobs.append(
-                        executor.submit(process_qemu_job, file_path, arch_suffix, self.root_path, results_dict, uid)
-                    )
+            if self._analysis_not_already_completed(file_object, uid) and uid not in uids:
+                uids.add(uid)
+                # the architectures of a file are tested one after another: only one job writes the results of a file
+                jobs.append(executor.submit(
+                    process_qemu_jobs, file_path, self._find_arch_suffixes(full_type), container_executor, results_dict, uid
+                ))
         return jobs
 
     def _analysis_not_already_completed(self, file_object, uid):
@@ -202,8 +255,13 @@ class AnalysisPlugin(AnalysisBasePlugin):
         return []
 
 
-def process_qemu_job(file_path: str, arch_suffix: str, root_path: Path, results_dict: dict, uid: str):
-    result = check_qemu_executability(file_path, arch_suffix, root_path)
+def process_qemu_jobs(file_path: str, arch_suffixes: List[str], container_executor: ContainerExecutor, results_dict: dict, uid: str):
+    for arch_suffix in arch_suffixes:
+        process_qemu_job(file_path, arch_suffix, container_executor, results_dict, uid)
+
+
+def process_qemu_job(file_path: str, arch_suffix: str, container_executor: ContainerExecutor, results_dict: dict, uid: str):
+    result = check_qemu_executability(file_path, arch_suffix, container_executor)
     if result:
         if uid in results_dict:
             tmp_dict = dict(results_dict[uid]['results'])
@@ -236,8 +294,8 @@ def _output_without_error_exists(docker_output: Dict[str, str]) -> bool:
         return False
 
 
-def check_qemu_executability(file_path: str, arch_suffix: str, root_path: Path) -> dict:
-    result = get_docker_output(arch_suffix, file_path, root_path)
+def check_qemu_executability(file_path: str, arch_suffix: str, container_executor: ContainerExecutor) -> dict:
+    result = get_docker_output(arch_suffix, file_path, container_executor)
     if result and 'error' not in result:
         result = decode_output_values(result)
         if result_contains_qemu_errors(result):
@@ -246,7 +304,7 @@ def check_qemu_executability(file_path: str, arch_suffix: str, root_path: Path)
     return result
 
 
-def get_docker_output(arch_suffix: str, file_path: str, root_path: Path) -> dict:
+def get_docker_output(arch_suffix: str, file_path: str, container_executor: ContainerExecutor) -> dict:
     '''
     :return: in the case of no error, the output will have the form
     {
@@ -257,18 +315,8 @@ def get_docker_output(arch_suffix: str, file_path: str, root_path: Path) -> dict
     }
     in case of an error, there will be an entry 'error' instead of the entries stdout/stderr/return_code
     '''
-    command = '{arch_suffix} {target}'.format(arch_suffix=arch_suffix, target=file_path)
     try:
-        result = run_docker_container(
-            DOCKER_IMAGE,
-            combine_stderr_stdout=True,
-            timeout=TIMEOUT_IN_SECONDS,
-            command=command,
-            mounts=[
-                Mount(CONTAINER_TARGET_PATH, str(root_path), type='bind'),
-            ],
-            logging_label='qemu_exec'
-        )
+        result = container_executor.execute([CONTAINER_SCRIPT_PATH, arch_suffix, file_path], combine_stderr_stdout=True)
         return loads(result.stdout)
     except ReadTimeout:
         return {'error': 'timeout'}
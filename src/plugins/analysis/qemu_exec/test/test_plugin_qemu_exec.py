@@ -1,8 +1,11 @@
 # pylint: disable=protected-access, no-self-use,wrong-import-order,invalid-name,unused-argument,redefined-outer-name
 import os
 from base64 import b64decode, b64encode
+from contextlib import contextmanager
 from pathlib import Path
 from subprocess import CompletedProcess
+from tempfile import TemporaryDirectory
+from time import time
 from unittest import TestCase
 
 import pytest
@@ -23,14 +26,6 @@ TEST_DATA_DIR_3 = Path(get_dir_of_file(__file__)) / 'data/other_architectures'
 CLI_PARAMETERS = ['-h', '--help', '-help', '--version', ' ']
 
 
-class MockTmpDir:
-    def __init__(self, name):
-        self.name = name
-
-    def cleanup(self):
-        pass
-
-
 class MockUnpacker:
     tmp_dir = None
 
@@ -64,24 +59,34 @@ class ContainerMock:
         pass
 
     @staticmethod
-    def logs(**_):
-        return b'not json decodable'
+    def kill():
+        pass
+
+    @staticmethod
+    def exec_run(command, **_):
+        if 'file-with-error' in command[-1]:
+            raise RequestConnectionError()
+        if 'json-error' in command[-1]:
+            return 0, b'not json decodable'
+        raise ReadTimeout()
 
 
 class DockerClientMock:
     class containers:
         @staticmethod
-        def run(_, command, **___):
-            if 'file-with-error' in command:
-                raise RequestConnectionError()
-            if 'json-error' in command:
-                return ContainerMock()
-            raise ReadTimeout()
+        def run(*_, **__):
+            return ContainerMock()
 
 
 @pytest.fixture
 def execute_docker_error(monkeypatch):
-    monkeypatch.setattr('docker.client.from_env', lambda: DockerClientMock())
+    monkeypatch.setattr('helperFunctions.docker.get_docker_client', lambda **_: DockerClientMock())
+
+
+@contextmanager
+def emulation_container(root_path: Path):
+    with qemu_exec.create_executor(root_path, lifetime=60) as container_executor:
+        yield container_executor
 
 
 class TestPluginQemuExec(AnalysisPluginTest):
@@ -100,11 +105,9 @@ class TestPluginQemuExec(AnalysisPluginTest):
         assert self.analysis_plugin._has_relevant_type({'mime': 'application/x-executable'}) is True
 
     def test_find_relevant_files(self):
-        tmp_dir = MockTmpDir(str(TEST_DATA_DIR))
-
-        self.analysis_plugin.root_path = tmp_dir.name
-        self.analysis_plugin.unpacker.set_tmp_dir(tmp_dir)
-        result = sorted(self.analysis_plugin._find_relevant_files(Path(tmp_dir.name)))
+        self.analysis_plugin.root_path = TEST_DATA_DIR
+        self.analysis_plugin.unpacker.set_tmp_dir(TEST_DATA_DIR)
+        result = sorted(self.analysis_plugin._find_relevant_files(TEST_DATA_DIR))
         assert len(result) == 4
 
         path_list, mime_types = list(zip(*result))
@@ -115,15 +118,16 @@ class TestPluginQemuExec(AnalysisPluginTest):
     def test_check_qemu_executability(self):
         self.analysis_plugin.OPTIONS = ['-h']
 
-        result = qemu_exec.check_qemu_executability('/test_mips_static', 'mips', TEST_DATA_DIR)
-        assert any('--help' in option for option in result)
-        option = [option for option in result if '--help' in option][0]
-        assert result[option]['stdout'] == 'Hello World\n'
-        assert result[option]['stderr'] == ''
-        assert result[option]['return_code'] == '0'
+        with emulation_container(TEST_DATA_DIR) as container_executor:
+            result = qemu_exec.check_qemu_executability('/test_mips_static', 'mips', container_executor)
+            assert any('--help' in option for option in result)
+            option = [option for option in result if '--help' in option][0]
+            assert result[option]['stdout'] == 'Hello World\n'
+            assert result[option]['stderr'] == ''
+            assert result[option]['return_code'] == '0'
 
-        result = qemu_exec.check_qemu_executability('/test_mips_static', 'i386', TEST_DATA_DIR)
-        assert result == {}
+            result = qemu_exec.check_qemu_executability('/test_mips_static', 'i386', container_executor)
+            assert result == {}
 
     def test_find_arch_suffixes(self):
         mime_str = 'ELF 32-bit MSB executable, MIPS, MIPS32 rel2 version 1 (SYSV), statically linked'
@@ -230,33 +234,61 @@ class TestPluginQemuExec(AnalysisPluginTest):
         assert 'parent_flag' in test_fw.processed_analysis[self.analysis_plugin.NAME]
         assert test_fw.processed_analysis[self.analysis_plugin.NAME]['parent_flag'] is True
 
+    @pytest.mark.timeout(10)
+    def test_process_object__unpacking_failed(self):
+        test_fw = self._set_up_fw_for_process_object(path=None)
+
+        self.analysis_plugin.process_object(test_fw)
+        assert test_fw.processed_analysis[self.analysis_plugin.NAME] == {'summary': []}
+
+    def test_max_parallel_executions(self):
+        assert self.analysis_plugin.max_parallel_executions == 8
+        config = self.init_basic_config()
+        config.set(self.PLUGIN_NAME, 'max_parallel_executions', '2')
+        plugin = qemu_exec.AnalysisPlugin(self, config=config, unpacker=self.mock_unpacker)
+        try:
+            assert plugin.max_parallel_executions == 2
+        finally:
+            plugin.shutdown()
+
     def _set_up_fw_for_process_object(self, path: Path = TEST_DATA_DIR):
         test_fw = create_test_firmware()
         test_fw.files_included = ['foo', 'bar']
-        self.analysis_plugin.unpacker.set_tmp_dir(MockTmpDir(str(path)))
+        self.analysis_plugin.unpacker.set_tmp_dir(path)
         return test_fw
 
 
 def test_get_docker_output__static():
-    result = qemu_exec.get_docker_output('mips', '/test_mips_static', TEST_DATA_DIR)
+    with emulation_container(TEST_DATA_DIR) as container_executor:
+        result = qemu_exec.get_docker_output('mips', '/test_mips_static', container_executor)
     _check_result(result)
 
 
 def test_get_docker_output__dynamic():
-    result = qemu_exec.get_docker_output('mips', '/usr/bin/test_mips', TEST_DATA_DIR)
+    with emulation_container(TEST_DATA_DIR) as container_executor:
+        result = qemu_exec.get_docker_output('mips', '/usr/bin/test_mips', container_executor)
     _check_result(result)
 
 
 def test_get_docker_output__arm():
-    result = qemu_exec.get_docker_output('arm', '/test_arm_static', TEST_DATA_DIR_3)
+    with emulation_container(TEST_DATA_DIR_3) as container_executor:
+        result = qemu_exec.get_docker_output('arm', '/test_arm_static', container_executor)
     _check_result(result)
 
 
 def test_get_docker_output__ppc():
-    result = qemu_exec.get_docker_output('ppc', '/test_ppc_static', TEST_DATA_DIR_3)
+    with emulation_container(TEST_DATA_DIR_3) as container_executor:
+        result = qemu_exec.get_docker_output('ppc', '/test_ppc_static', container_executor)
     _check_result(result)
 
 
+def test_get_docker_output__several_binaries_in_one_container():
+    with emulation_container(TEST_DATA_DIR_3) as container_executor:
+        results = [qemu_exec.get_docker_output(arch, path, container_executor) for arch, path in [('arm', '/test_arm_static'), ('ppc', '/test_ppc_static')]]
+    for result in results:
+        _check_result(result)
+
+
 def _check_result(result):
     for parameter in CLI_PARAMETERS:
         assert parameter in result
@@ -266,7 +298,8 @@ def _check_result(result):
 
 
 def test_get_docker_output__wrong_arch():
-    result = qemu_exec.get_docker_output('i386', '/test_mips_static', TEST_DATA_DIR)
+    with emulation_container(TEST_DATA_DIR) as container_executor:
+        result = qemu_exec.get_docker_output('i386', '/test_mips_static', container_executor)
     assert all(
         b'Invalid ELF image' in b64decode(result_dict['stderr'])
         for result_dict in result.values()
@@ -274,19 +307,22 @@ def test_get_docker_output__wrong_arch():
 
 
 def test_get_docker_output__timeout(execute_docker_error):
-    result = qemu_exec.get_docker_output('mips', '/test_mips_static', TEST_DATA_DIR)
+    with emulation_container(TEST_DATA_DIR) as container_executor:
+        result = qemu_exec.get_docker_output('mips', '/test_mips_static', container_executor)
     assert 'error' in result
     assert result['error'] == 'timeout'
 
 
 def test_get_docker_output__error(execute_docker_error):
-    result = qemu_exec.get_docker_output('mips', '/file-with-error', TEST_DATA_DIR)
+    with emulation_container(TEST_DATA_DIR) as container_executor:
+        result = qemu_exec.get_docker_output('mips', '/file-with-error', container_executor)
     assert 'error' in result
     assert result['error'] == 'process error'
 
 
 def test_get_docker_output__json_error(execute_docker_error):
-    result = qemu_exec.get_docker_output('mips', '/json-error', TEST_DATA_DIR)
+    with emulation_container(TEST_DATA_DIR) as container_executor:
+        result = qemu_exec.get_docker_output('mips', '/json-error', container_executor)
     assert 'error' in result
     assert result['error'] == 'could not decode result'
 
@@ -297,13 +333,22 @@ def test_process_qemu_job():
     results = {}
 
     with mock_patch(qemu_exec, 'check_qemu_executability', lambda *_: test_results):
-        qemu_exec.process_qemu_job('test_path', 'test_arch', Path('test_root'), results, uid)
+        qemu_exec.process_qemu_job('test_path', 'test_arch', 'test_container', results, uid)
         assert results == {uid: {'path': 'test_path', 'results': {'test_arch': test_results}}}
 
-        qemu_exec.process_qemu_job('test_path', 'test_arch_2', Path('test_root'), results, uid)
+        qemu_exec.process_qemu_job('test_path', 'test_arch_2', 'test_container', results, uid)
         assert results == {uid: {'path': 'test_path', 'results': {'test_arch': test_results, 'test_arch_2': test_results}}}
 
 
+def test_process_qemu_jobs():
+    test_results = {'--option': {'stdout': 'test', 'stderr': '', 'return_code': '0'}}
+    results = {}
+
+    with mock_patch(qemu_exec, 'check_qemu_executability', lambda *_: test_results):
+        qemu_exec.process_qemu_jobs('test_path', ['test_arch', 'test_arch_2'], 'test_container', results, 'test_uid')
+    assert results == {'test_uid': {'path': 'test_path', 'results': {'test_arch': test_results, 'test_arch_2': test_results}}}
+
+
 @pytest.mark.parametrize('input_data, expected_output', [
     ({}, []),
     ({'foo': {EXECUTABLE: False}}, []),
@@ -417,36 +462,65 @@ class TestQemuExecUnpacker(TestCase):
 
     def setUp(self):
         self.name_prefix = 'FACT_plugin_qemu'
+        self.docker_mount_base_dir = TemporaryDirectory()
         self.config = get_config_for_testing()
+        self.config.set('data_storage', 'docker-mount-base-dir', self.docker_mount_base_dir.name)
         self.unpacker = qemu_exec.Unpacker(config=self.config)
         qemu_exec.BinaryServiceDbInterface = MockBinaryService
 
+    def tearDown(self):
+        self.docker_mount_base_dir.cleanup()
+
     def test_unpack_fo(self):
         test_fw = create_test_firmware()
-        tmp_dir = self.unpacker.unpack_fo(test_fw)
+        extraction_dir = self.unpacker.unpack_fo(test_fw)
 
-        try:
-            assert self.name_prefix in tmp_dir.name
-            content = os.listdir(str(Path(tmp_dir.name, 'files')))
-            assert content != []
-            assert 'get_files_test' in content
-        finally:
-            tmp_dir.cleanup()
+        assert self.name_prefix in str(extraction_dir)
+        content = os.listdir(str(extraction_dir / 'files'))
+        assert content != []
+        assert 'get_files_test' in content
 
     def test_unpack_fo__no_file_path(self):
         test_fw = create_test_firmware()
         test_fw.file_path = None
 
         with mock_patch(self.unpacker.fs_organizer, 'generate_path', lambda _: TEST_FW.file_path):
-            tmp_dir = self.unpacker.unpack_fo(test_fw)
+            extraction_dir = self.unpacker.unpack_fo(test_fw)
 
-        try:
-            assert self.name_prefix in tmp_dir.name
-            content = os.listdir(str(Path(tmp_dir.name, 'files')))
-            assert content != []
-            assert 'get_files_test' in content
-        finally:
-            tmp_dir.cleanup()
+        assert self.name_prefix in str(extraction_dir)
+        content = os.listdir(str(extraction_dir / 'files'))
+        assert content != []
+        assert 'get_files_test' in content
+
+    def test_unpack_fo__cached(self):
+        extracted_files = []
+
+        def extract_files_from_file(file_path, tmp_dir):
+            extracted_files.append(file_path)
+            for subdir in ['files', 'input']:
+                Path(tmp_dir, subdir).mkdir()
+
+        test_fw = create_test_firmware()
+        with mock_patch(self.unpacker, 'extract_files_from_file', extract_files_from_file):
+            extraction_dir = self.unpacker.unpack_fo(test_fw)
+            assert self.unpacker.unpack_fo(test_fw) == extraction_dir
+
+        assert extracted_files == [test_fw.file_path]
+        assert extraction_dir.parent == self.unpacker.cache_dir
+        assert (extraction_dir / 'files').is_dir()
+        assert not (extraction_dir / 'input').exists()
+
+    def test_remove_old_extractions(self):
+        self.unpacker.cache_size = 1
+        old = time() - qemu_exec.PLUGIN_TIMEOUT - 10
+        for uid, modification_time in [('old_1', old), ('old_2', old + 1), ('recent', time() - 1), ('newest', time())]:
+            path = self.unpacker.cache_dir / uid
+            path.mkdir(parents=True)
+            os.utime(path, (modification_time, modification_time))
+
+        self.unpacker._remove_old_extractions()
+        # extractions that may still be in use are not removed even if the cache is full
+        assert sorted(path.name for path in self.unpacker.cache_dir.iterdir()) == ['newest', 'recent']
 
     def test_unpack_fo__path_not_found(self):
         test_fw = create_test_firmware()
@@ -2,7 +2,7 @@ import os
 import re
 import sys
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 from common_helper_files import get_dir_of_file
 
@@ -14,10 +14,10 @@ from plugins.analysis.software_components.bin import OS_LIST
 from plugins.mime_blacklists import MIME_BLACKLIST_NON_EXECUTABLE
 
 try:
-    from ..internal.resolve_version_format_string import extract_data_from_ghidra
+    from ..internal.resolve_version_format_string import DEFAULT_CACHE_SIZE, filter_implausible_results, resolve_format_strings
 except ImportError:
     sys.path.append(str(Path(__file__).parent.parent / 'internal'))
-    from resolve_version_format_string import extract_data_from_ghidra
+    from resolve_version_format_string import DEFAULT_CACHE_SIZE, filter_implausible_results, resolve_format_strings
 
 SIGNATURE_DIR = os.path.join(get_dir_of_file(__file__), '../signatures')
 
@@ -33,20 +33,27 @@ class AnalysisPlugin(YaraBasePlugin):
     NAME = 'software_components'
     DESCRIPTION = 'identify software components'
     MIME_BLACKLIST = MIME_BLACKLIST_NON_EXECUTABLE
-    VERSION = '0.4.1'
+    VERSION = '0.4.2'
 
     def __init__(self, plugin_administrator, config=None, recursive=True):
         super().__init__(plugin_administrator, config=config, recursive=recursive, plugin_path=__file__)
 
     def process_object(self, file_object):
-        file_object = super().process_object(file_object)
-        analysis = file_object.processed_analysis[self.NAME]
-        if len(analysis) > 1:
-            analysis = self.add_version_information(analysis, file_object)
+        return self.process_objects([file_object])[0]
+
+    def process_objects(self, file_objects: List[FileObject]) -> List[FileObject]:
+        for file_object in file_objects:
+            super().process_object(file_object)
+        matched_objects = [file_object for file_object in file_objects if len(file_object.processed_analysis[self.NAME]) > 1]
+        # the format strings of all files are resolved at once (in the same warm Ghidra containers)
+        format_string_versions = self._resolve_format_strings(matched_objects)
+        for file_object in matched_objects:
+            analysis = file_object.processed_analysis[self.NAME]
+            analysis = self.add_version_information(analysis, format_string_versions.get(file_object.uid, {}))
             analysis['summary'] = self._get_summary(analysis)
 
             self.add_os_key(file_object)
-        return file_object
+        return file_objects
 
     @staticmethod
     def get_version(input_string: str, meta_dict: dict) -> str:
@@ -69,22 +76,41 @@ class AnalysisPlugin(YaraBasePlugin):
                     summary.add(f'{results[item]["meta"]["software_name"]} {version}')
         return sorted(summary)
 
-    def add_version_information(self, results, file_object: FileObject):
+    def add_version_information(self, results, format_string_versions: Dict[str, List[str]]):
         for item in results:
             if item != 'summary':
-                results[item] = self.get_version_for_component(results[item], file_object)
+                results[item] = self.get_version_for_component(results[item], format_string_versions)
         return results
 
-    def get_version_for_component(self, result, file_object: FileObject):
+    def _resolve_format_strings(self, file_objects: List[FileObject]) -> Dict[str, Dict[str, List[str]]]:
+        jobs = {}
+        for file_object in file_objects:
+            # the key strings of all rules are resolved at once (in one Ghidra session)
+            key_strings = sorted({
+                key_string
+                for item, result in file_object.processed_analysis[self.NAME].items() if item != 'summary' and result['meta'].get('format_string')
+                for key_string in _get_key_strings(result)
+            })
+            if key_strings:
+                jobs[file_object.uid] = (file_object.binary, key_strings)
+        if not jobs:
+            return {}
+        return resolve_format_strings(
+            jobs,
+            self.config['data_storage']['docker-mount-base-dir'],
+            cache_size=self.config.getint(self.NAME, 'ghidra_cache_size', fallback=DEFAULT_CACHE_SIZE),
+        )
+
+    def get_version_for_component(self, result, format_string_versions: Dict[str, List[str]]):
         versions = set()
         for matched_string in result['strings']:
             match = matched_string[2]
             match = make_unicode_string(match)
             versions.add(self.get_version(match, result['meta']))
         if result['meta'].get('format_string'):
-            key_strings = [s.decode() for _, _, s in result['strings'] if b'%s' in s]
-            if key_strings:
-                versions.update(extract_data_from_ghidra(file_object.binary, key_strings, self.config['data_storage']['docker-mount-base-dir']))
+            versions.update(filter_implausible_results([
+                version for key_string in _get_key_strings(result) for version in format_string_versions.get(key_string, [])
+            ]))
         if '' in versions and len(versions) > 1:  # if there are actual version results, remove the "empty" result
             versions.remove('')
         result['meta']['version'] = list(versions)
@@ -103,3 +129,7 @@ class AnalysisPlugin(YaraBasePlugin):
     @staticmethod
     def _entry_has_no_trailing_version(entry, os_string):
         return os_string.strip() == entry.strip()
+
+
+def _get_key_strings(result: dict) -> List[str]:
+    return [s.decode() for _, _, s in result['strings'] if b'%s' in s]
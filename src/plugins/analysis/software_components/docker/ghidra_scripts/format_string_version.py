@@ -15,13 +15,13 @@ KEY_FILE = 'key_file'
 
 if 'ghidra' not in globals():
     logging.error('this script should only run in ghidra')
-    ghidra, getCurrentProgram, getMonitor = [None] * 3
+    ghidra, getCurrentProgram, getMonitor, getScriptArgs = [None] * 4
     sys.exit(2)
 
 
-def get_key_strings():
+def get_key_strings(key_file):
     try:
-        with open(KEY_FILE, 'r') as fp:
+        with open(key_file, 'r') as fp:
             key_strings = json.loads(fp.read())
     except IOError:
         logging.error('key string file not found')
@@ -44,20 +44,21 @@ class ReferencedStringFinder:
 
     MAX_LEN = 32
 
-    def __init__(self):
+    def __init__(self, key_file=KEY_FILE, output_file=GHIDRA_OUTPUT_FILE):
+        self.output_file = output_file
         self.flat_api = ghidra.program.flatapi.FlatProgramAPI(getCurrentProgram(), getMonitor())
         decompiler_api = ghidra.app.decompiler.flatapi.FlatDecompilerAPI(self.flat_api)
         decompiler_api.initialize()
         self.decompiler = decompiler_api.getDecompiler()
-        self.key_string_list = get_key_strings()
+        self.key_string_list = get_key_strings(key_file)
 
     def main(self):
-        result = []
-        for key_string in self.key_string_list:
-            result.extend(self.find_other_strings_relating_to(key_string))
-
-        result = sorted(set(result))
-        save_results(GHIDRA_OUTPUT_FILE, result)
+        # the results are stored by key string, so that several key strings can be resolved in one Ghidra session
+        result = {
+            key_string: sorted(set(self.find_other_strings_relating_to(key_string)))
+            for key_string in self.key_string_list
+        }
+        save_results(self.output_file, result)
 
     def find_other_strings_relating_to(self, key_string):
         result = []
@@ -142,5 +143,6 @@ class ReferencedStringFinder:
 
 
 if __name__ == '__main__':
-    ReferencedStringFinder().main()
+    # optional script arguments: <key file> <output file>
+    ReferencedStringFinder(*getScriptArgs()).main()
     sys.exit(0)
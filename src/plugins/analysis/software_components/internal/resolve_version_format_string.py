@@ -1,45 +1,167 @@
 import json
 import logging
+import os
 import re
 from contextlib import suppress
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
-from docker.errors import DockerException
 from docker.types import Mount
 
-from helperFunctions.docker import run_docker_container
+from helperFunctions.docker import ContainerExecutor
+from helperFunctions.fileSystem import remove_least_recently_used
+from helperFunctions.uid import create_uid
 
 CONTAINER_TARGET_PATH = '/work'
+CONTAINER_CACHE_PATH = '/projects'
 DOCKER_IMAGE = 'fact/format_string_resolver'
 DOCKER_OUTPUT_FILE = 'ghidra_output.json'
 TIMEOUT = 300
 KEY_FILE = 'key_file'
+GHIDRA_INPUT_FILE = 'ghidra_input'
+GHIDRA_PROJECT_NAME = 'ghidra_project'
+GHIDRA_SCRIPT = '/ghidra_scripts/format_string_version.py'
+CACHE_DIR_NAME = 'FACT_plugin_software_components_ghidra'
+CACHED_RESULTS_FILE = 'results.json'
+DEFAULT_CACHE_SIZE = 100
+
+# binaries (by UID) and the key strings that are searched in them
+GhidraJobs = Dict[str, Tuple[bytes, List[str]]]
 
 
 def extract_data_from_ghidra(input_file_data: bytes, key_strings: List[str], path: str) -> List[str]:
+    uid = create_uid(input_file_data)
+    result = resolve_format_strings({uid: (input_file_data, key_strings)}, path)[uid]
+    return filter_implausible_results(sorted({string for strings in result.values() for string in strings}))
+
+
+def resolve_format_strings(jobs: GhidraJobs, path: str, cache_size: int = DEFAULT_CACHE_SIZE,
+                           parallel: int = 1) -> Dict[str, Dict[str, List[str]]]:
+    '''
+    Find the strings that are referenced together with the key strings (e.g. the format string of a version) in the
+    binaries with Ghidra. Importing and analyzing a binary takes most of the time, so the Ghidra projects are cached (by
+    UID of the binary) in the docker-mount-base-dir: if the same binary is found again (e.g. the same library in several
+    firmware images), the analysis is reused. The results of each key string are cached as well. All key strings of a
+    binary are resolved in one Ghidra session and all binaries of a batch are processed in the same warm containers.
+
+    :param jobs: The binaries (by UID) and the key strings that are searched in them.
+    :param path: The docker-mount-base-dir.
+    :param cache_size: The maximum number of cached Ghidra projects.
+    :param parallel: The number of binaries that are analyzed in parallel.
+    :return: The referenced strings of each key string (by UID of the binary). Key strings that could not be resolved
+        (e.g. because Ghidra timed out) are missing.
+    '''
+    cache = GhidraProjectCache(Path(path) / CACHE_DIR_NAME, cache_size)
+    results, pending_jobs = {}, {}
+    for uid, (binary, key_strings) in jobs.items():
+        cached_results = cache.get_results(uid)
+        results[uid] = {key_string: cached_results[key_string] for key_string in key_strings if key_string in cached_results}
+        missing_key_strings = [key_string for key_string in key_strings if key_string not in cached_results]
+        if missing_key_strings:
+            pending_jobs[uid] = (binary, missing_key_strings)
+    if pending_jobs:
+        for uid, ghidra_results in _run_ghidra(pending_jobs, path, cache, parallel).items():
+            results[uid].update(ghidra_results)
+    return results
+
+
+def _run_ghidra(jobs: GhidraJobs, path: str, cache: 'GhidraProjectCache', parallel: int) -> Dict[str, Dict[str, List[str]]]:
+    cache.cache_dir.mkdir(parents=True, exist_ok=True)
+    results = {}
     with TemporaryDirectory(prefix='FSR_', dir=path) as tmp_dir:
-        tmp_dir_path = Path(tmp_dir)
-        ghidra_input_file = tmp_dir_path / 'ghidra_input'
-        (tmp_dir_path / KEY_FILE).write_text(json.dumps(key_strings))
-        ghidra_input_file.write_bytes(input_file_data)
-        with suppress(DockerException, TimeoutError):
-            run_docker_container(
-                DOCKER_IMAGE,
-                logging_label='FSR',
-                timeout=TIMEOUT,
-                mounts=[
-                    Mount(CONTAINER_TARGET_PATH, tmp_dir, type='bind'),
-                ],
-            )
-
-        try:
-            output_file = (tmp_dir_path / DOCKER_OUTPUT_FILE).read_text()
-            return filter_implausible_results(json.loads(output_file))
-        except (json.JSONDecodeError, FileNotFoundError):
-            logging.debug('[FSR]: output file could not be read')
-            return []
+        commands = [_prepare_job(Path(tmp_dir) / uid, binary, key_strings, cache.get_project(uid)) for uid, (binary, key_strings) in jobs.items()]
+        with _create_executor(tmp_dir, cache.cache_dir, parallel, lifetime=TIMEOUT * len(commands)) as executor:
+            outputs = executor.execute_batch(commands)
+
+        for uid, output in zip(jobs, outputs):
+            if isinstance(output, Exception):
+                logging.debug(f'[FSR]: Ghidra failed for {uid}: {output}')
+                continue
+            job_dir = Path(tmp_dir) / uid
+            try:
+                results[uid] = json.loads((job_dir / DOCKER_OUTPUT_FILE).read_text())
+            except (json.JSONDecodeError, FileNotFoundError):
+                logging.debug(f'[FSR]: output file of {uid} could not be read')
+                continue
+            if (job_dir / GHIDRA_PROJECT_NAME).is_dir():
+                cache.add_project(uid, job_dir / GHIDRA_PROJECT_NAME)
+            cache.add_results(uid, results[uid])
+    cache.remove_old_projects()
+    return results
+
+
+def _prepare_job(job_dir: Path, binary: bytes, key_strings: List[str], cached_project: Optional[Path]) -> List[str]:
+    job_dir.mkdir()
+    (job_dir / KEY_FILE).write_text(json.dumps(key_strings))
+    work_dir = f'{CONTAINER_TARGET_PATH}/{job_dir.name}'
+    script_args = ['-postScript', GHIDRA_SCRIPT, f'{work_dir}/{KEY_FILE}', f'{work_dir}/{DOCKER_OUTPUT_FILE}']
+    if cached_project is not None:
+        # the analysis of the cached project is reused: the binary is only processed by the script
+        project_dir = f'{CONTAINER_CACHE_PATH}/{cached_project.name}'
+        return ['analyzeHeadless', project_dir, GHIDRA_PROJECT_NAME, '-process', GHIDRA_INPUT_FILE, '-noanalysis', '-readOnly', *script_args]
+    (job_dir / GHIDRA_INPUT_FILE).write_bytes(binary)
+    (job_dir / GHIDRA_PROJECT_NAME).mkdir()
+    project_dir = f'{work_dir}/{GHIDRA_PROJECT_NAME}'
+    return ['analyzeHeadless', project_dir, GHIDRA_PROJECT_NAME, '-import', f'{work_dir}/{GHIDRA_INPUT_FILE}', *script_args]
+
+
+def _create_executor(work_dir: str, cache_dir: Path, parallel: int, lifetime: int) -> ContainerExecutor:
+    return ContainerExecutor(
+        DOCKER_IMAGE,
+        containers=parallel,
+        timeout=TIMEOUT,
+        lifetime=lifetime,
+        logging_label='FSR',
+        # the projects are created with the user of FACT, so that they can be removed from the cache again
+        user=f'{os.getuid()}:{os.getgid()}',
+        environment={'HOME': '/tmp'},
+        mounts=[
+            Mount(CONTAINER_TARGET_PATH, work_dir, type='bind'),
+            Mount(CONTAINER_CACHE_PATH, str(cache_dir), type='bind'),  # Ghidra locks the projects (even if read only)
+        ],
+    )
+
+
+class GhidraProjectCache:
+    '''
+    Cache of Ghidra projects (and the results of the key strings) by UID of the analyzed binary. Only the ``cache_size``
+    most recently used projects are kept.
+    '''
+    def __init__(self, cache_dir: Path, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+
+    def get_project(self, uid: str) -> Optional[Path]:
+        project_dir = self.cache_dir / uid
+        if not (project_dir / f'{GHIDRA_PROJECT_NAME}.gpr').is_file():
+            return None
+        with suppress(FileNotFoundError):  # may be removed by another worker
+            os.utime(project_dir)  # the modification time marks the last use
+            return project_dir
+        return None
+
+    def add_project(self, uid: str, project_dir: Path):
+        with suppress(OSError):  # the same binary was analyzed by another worker in the meantime
+            project_dir.rename(self.cache_dir / uid)
+
+    def get_results(self, uid: str) -> Dict[str, List[str]]:
+        with suppress(FileNotFoundError, json.JSONDecodeError):
+            results = json.loads((self.cache_dir / uid / CACHED_RESULTS_FILE).read_text())
+            os.utime(self.cache_dir / uid)  # the modification time marks the last use
+            return results
+        return {}
+
+    def add_results(self, uid: str, results: Dict[str, List[str]]):
+        project_dir = self.cache_dir / uid
+        if not project_dir.is_dir():
+            return
+        tmp_file = project_dir / f'{CACHED_RESULTS_FILE}.{os.getpid()}'
+        tmp_file.write_text(json.dumps({**self.get_results(uid), **results}))
+        tmp_file.replace(project_dir / CACHED_RESULTS_FILE)  # atomic, so that other workers never read partial results
+
+    def remove_old_projects(self):
+        remove_least_recently_used(self.cache_dir, self.cache_size, min_age=TIMEOUT)
 
 
 def filter_implausible_results(version_list: List[str]):
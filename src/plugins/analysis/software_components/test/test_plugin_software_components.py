@@ -1,10 +1,12 @@
 import os
+from unittest import mock
 
 from common_helper_files import get_dir_of_file
 
 from objects.file import FileObject
 from test.unit.analysis.analysis_plugin_test_class import AnalysisPluginTest
 
+from ..code import software_components
 from ..code.software_components import AnalysisPlugin
 
 TEST_DATA_DIR = os.path.join(get_dir_of_file(__file__), 'data')
@@ -35,6 +37,31 @@ class TestAnalysisPluginsSoftwareComponents(AnalysisPluginTest):
         self.assertEqual(len(results['summary']), 1, 'Number of summary results not correct')
         self.assertIn('Test Software 0.1.3', results['summary'])
 
+    def test_process_objects(self):
+        test_files = [FileObject(binary=b'binary 1'), FileObject(binary=b'binary 2'), FileObject(binary=b'no match')]
+
+        def yara_process_object(file_object):
+            file_object.processed_analysis[self.PLUGIN_NAME] = {'summary': []}
+            if file_object.binary != b'no match':
+                file_object.processed_analysis[self.PLUGIN_NAME]['Rule'] = {
+                    'meta': {'software_name': 'Software', 'format_string': True}, 'strings': [(0, '$a', b'Software %s')]
+                }
+            return file_object
+
+        def resolve_format_strings(jobs, *_, **__):
+            return {uid: {'Software %s': ['1.2.3']} for uid in jobs}
+
+        with mock.patch('analysis.YaraPluginBase.YaraBasePlugin.process_object', side_effect=yara_process_object), \
+                mock.patch.object(software_components, 'resolve_format_strings', side_effect=resolve_format_strings) as resolve_mock:
+            self.analysis_plugin.process_objects(test_files)
+
+        # the format strings of all files are resolved in one batch
+        assert resolve_mock.call_count == 1
+        assert list(resolve_mock.call_args[0][0]) == [test_files[0].uid, test_files[1].uid]
+        for test_file in test_files[:2]:
+            assert test_file.processed_analysis[self.PLUGIN_NAME]['summary'] == ['Software 1.2.3']
+        assert test_files[2].processed_analysis[self.PLUGIN_NAME] == {'summary': []}
+
     def check_version(self, input_string, version):
         self.assertEqual(self.analysis_plugin.get_version(input_string, {}), version, '{} not found correctly'.format(version))
 
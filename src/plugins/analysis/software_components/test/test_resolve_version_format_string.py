@@ -1,10 +1,58 @@
+import json
 from pathlib import Path
+from tempfile import TemporaryDirectory
 
 import pytest
+from requests.exceptions import ReadTimeout
 
 from test.common_helper import create_docker_mount_base_dir
 
-from ..internal.resolve_version_format_string import extract_data_from_ghidra, filter_implausible_results
+from ..internal import resolve_version_format_string
+from ..internal.resolve_version_format_string import (
+    CACHE_DIR_NAME, CONTAINER_CACHE_PATH, CONTAINER_TARGET_PATH, GHIDRA_PROJECT_NAME, extract_data_from_ghidra,
+    filter_implausible_results, resolve_format_strings
+)
+
+
+class MockExecutor:
+    '''
+    Simulates the Ghidra container: the key strings are "resolved" to their length (or the task times out)
+    '''
+    commands = []
+
+    def __init__(self, work_dir, cache_dir, *_, **__):
+        self.mount_dirs = {CONTAINER_TARGET_PATH: work_dir, CONTAINER_CACHE_PATH: str(cache_dir)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+    def execute_batch(self, commands):
+        self.commands.extend(commands)
+        return [self._execute(command) for command in commands]
+
+    def _execute(self, command):
+        project_dir, key_file, output_file = [self._get_host_path(command[index]) for index in (1, -2, -1)]
+        key_strings = json.loads(key_file.read_text())
+        if 'timeout' in key_strings:
+            return ReadTimeout()
+        if '-import' in command:
+            (project_dir / f'{GHIDRA_PROJECT_NAME}.gpr').write_text('project')
+        output_file.write_text(json.dumps({key_string: [f'1.{len(key_string)}'] for key_string in key_strings}))
+        return command
+
+    def _get_host_path(self, path: str) -> Path:
+        mount, _, relative_path = path[1:].partition('/')
+        return Path(self.mount_dirs[f'/{mount}']) / relative_path
+
+
+@pytest.fixture
+def mock_executor(monkeypatch):
+    monkeypatch.setattr(resolve_version_format_string, '_create_executor', MockExecutor)
+    MockExecutor.commands = []
+    yield MockExecutor
 
 
 def test_extract_data_from_ghidra():
@@ -23,3 +71,40 @@ def test_extract_data_from_ghidra():
 ])
 def test_filter_implausible_results(test_input, expected_output):
     assert filter_implausible_results(test_input) == expected_output
+
+
+def test_resolve_format_strings_cached(mock_executor):
+    with TemporaryDirectory() as tmp_dir:
+        result = resolve_format_strings({'uid_1': (b'binary 1', ['a%s', 'bb%s']), 'uid_2': (b'binary 2', ['a%s'])}, tmp_dir)
+        assert result == {'uid_1': {'a%s': ['1.3'], 'bb%s': ['1.4']}, 'uid_2': {'a%s': ['1.3']}}
+        assert len(mock_executor.commands) == 2, 'the key strings of a binary should be resolved in one session'
+        assert all('-import' in command for command in mock_executor.commands)
+        cache_dir = Path(tmp_dir) / CACHE_DIR_NAME
+        assert sorted(path.name for path in cache_dir.iterdir()) == ['uid_1', 'uid_2']
+
+        # the results are cached: Ghidra is not executed again
+        assert resolve_format_strings({'uid_1': (b'binary 1', ['bb%s'])}, tmp_dir) == {'uid_1': {'bb%s': ['1.4']}}
+        assert len(mock_executor.commands) == 2
+
+        # new key strings are resolved with the cached project (without importing the binary again)
+        assert resolve_format_strings({'uid_1': (b'binary 1', ['a%s', 'ccc%s'])}, tmp_dir) == {'uid_1': {'a%s': ['1.3'], 'ccc%s': ['1.5']}}
+        assert mock_executor.commands[-1][1] == f'{CONTAINER_CACHE_PATH}/uid_1'
+        assert '-noanalysis' in mock_executor.commands[-1]
+        assert json.loads((cache_dir / 'uid_1' / 'results.json').read_text()) == {
+            'a%s': ['1.3'], 'bb%s': ['1.4'], 'ccc%s': ['1.5']
+        }
+
+
+def test_resolve_format_strings_timeout(mock_executor):
+    with TemporaryDirectory() as tmp_dir:
+        result = resolve_format_strings({'uid_1': (b'binary 1', ['timeout']), 'uid_2': (b'binary 2', ['a%s'])}, tmp_dir)
+        assert result == {'uid_1': {}, 'uid_2': {'a%s': ['1.3']}}
+        assert [path.name for path in (Path(tmp_dir) / CACHE_DIR_NAME).iterdir()] == ['uid_2']
+
+
+def test_resolve_format_strings_cache_size(mock_executor, monkeypatch):
+    monkeypatch.setattr(resolve_version_format_string, 'TIMEOUT', -1)  # all projects are old enough to be removed
+    with TemporaryDirectory() as tmp_dir:
+        for index in range(3):
+            resolve_format_strings({f'uid_{index}': (b'binary', ['a%s'])}, tmp_dir, cache_size=2)
+        assert len(list((Path(tmp_dir) / CACHE_DIR_NAME).iterdir())) == 2
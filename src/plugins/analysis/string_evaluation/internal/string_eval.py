@@ -1,10 +1,125 @@
+'''
+Scoring of strings by their (presumed) usefulness.
+
+The score of a string is the sum of several criteria (see the ``_add_*_score`` functions). To sort large lists of
+strings quickly, :func:`eval_strings` extracts the features of each string in one pass with precompiled patterns (and
+cheap substring checks before expensive searches) and scores all strings at once with NumPy. The ``_add_*_score``
+functions and :func:`_score` remain the reference for a single string.
+'''
 import re
-
-
-def eval_strings(str_list):
-    scored_list = [_score(string) for string in str_list]
-    scored_list.sort(key=lambda element: element[1], reverse=True)
-    return [score_tupel[0] for score_tupel in scored_list]
+from typing import List, Tuple
+
+import numpy as np
+
+RARE_CHARACTERS = ['^', '°', '§', '´', '`', '{', '}']
+DICTIONARY = ['version', 'v.', 'http', 'ftp', 'usage', 'Usage', 'ssh', 'SSH', 'password', 'Version']
+
+NON_WORD_REGEX = re.compile(r'\W')
+WORD_REGEX = re.compile(r'[a-zA-Z]')
+LOWER_CASE_REGEX = re.compile(r'[a-z]')
+CAPITAL_REGEX = re.compile(r'[A-Z]')
+QUAD_CHARACTERS_REGEX = re.compile(r'(\S)\1\1\1')
+YEAR_REGEX = re.compile(r'([1][9]\d\d)|([2][0]\d\d)')
+PATH_REGEX = re.compile(r'(\/[\w-]+)+(.[a-zA-Z]+)')
+VERSION_NUMBER_REGEX = re.compile(r'\d+\.(\d+\.?)+')
+FORMAT_STRING_REGEX = re.compile(r'%s|%lu|%u|%lf|%f|%i|%d')
+MAIL_ADDRESS_REGEX = re.compile(
+    r"(([^<>()[\]\\.,;:\s@\"]+(\.[^<>()[\]\\.,;:\s@\"]+)*)|(\".+\"))@((\[[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\])|(([a-zA-Z\-0-9]+\.)+[a-zA-Z]{2,}))"
+)
+UNDERSCORE_OR_PERIOD_AT_BEGINNING_REGEX = re.compile(r'(^_+)|^\.')
+PARAMETER_REGEX = re.compile(r'^\s*-{1,2}')
+HTML_REGEX = re.compile(r'</?[^\\\(\)$\[\]\§\.\,\?<>;|!]+>')
+
+# patterns that only add a constant if they are found: (pattern, character that every match contains, score)
+# searching is skipped if the string does not contain the character (which is much faster than a failing search)
+SEARCH_SCORES = {
+    'year': (YEAR_REGEX, None, 20),
+    'path': (PATH_REGEX, '/', 100),
+    'version': (VERSION_NUMBER_REGEX, '.', 35),
+    'mail': (MAIL_ADDRESS_REGEX, '@', 150),
+    'underscore': (UNDERSCORE_OR_PERIOD_AT_BEGINNING_REGEX, None, -25),
+    'parameter': (PARAMETER_REGEX, '-', 35),
+    'html': (HTML_REGEX, '>', 15),
+}
+
+ASCII_LOWER_CASE = bytes(range(ord('a'), ord('z') + 1))
+ASCII_CAPITALS = bytes(range(ord('A'), ord('Z') + 1))
+ASCII_WORD_CHARACTERS = ASCII_LOWER_CASE + ASCII_CAPITALS + b'0123456789_'
+
+FEATURES = [
+    'length', 'rare_characters', 'non_word', 'word', 'lower_case', 'capitals', 'quad_characters', 'dictionary',
+    'format_strings', *SEARCH_SCORES,
+]
+
+
+def eval_strings(str_list: List[str]) -> List[str]:
+    '''
+    Sort strings by their score (in descending order). Strings with the same score keep their order.
+
+    :param str_list: The strings.
+    :return: The sorted strings.
+    '''
+    if not str_list:
+        return []
+    scores = _get_scores(np.array([_get_features(string) for string in str_list], dtype=np.float64))
+    order = np.argsort(-scores, kind='stable')
+    return [str_list[index] for index in order.tolist()]
+
+
+def _get_features(string: str) -> Tuple[int, ...]:
+    if string.isascii():
+        # counting by deleting characters is much faster than iterating over regex matches
+        encoded = string.encode()
+        lower_case = len(encoded) - len(encoded.translate(None, ASCII_LOWER_CASE))
+        capitals = len(encoded) - len(encoded.translate(None, ASCII_CAPITALS))
+        non_word = len(encoded.translate(None, ASCII_WORD_CHARACTERS))
+    else:
+        lower_case = len(LOWER_CASE_REGEX.findall(string))
+        capitals = len(CAPITAL_REGEX.findall(string))
+        non_word = len(NON_WORD_REGEX.findall(string))
+    return (
+        len(string),
+        sum(character in string for character in RARE_CHARACTERS),
+        non_word,
+        lower_case + capitals,
+        lower_case,
+        capitals,
+        len(QUAD_CHARACTERS_REGEX.findall(string)),
+        sum(word in string for word in DICTIONARY),
+        len(FORMAT_STRING_REGEX.findall(string)),
+        *(
+            (character is None or character in string) and pattern.search(string) is not None
+            for pattern, character, _ in SEARCH_SCORES.values()
+        ),
+    )
+
+
+def _get_scores(features: np.ndarray) -> np.ndarray:
+    '''
+    Compute the scores of all strings (the same as :func:`_score`) from their features (one row per string, one column
+    per entry of ``FEATURES``).
+    '''
+    feature = dict(zip(FEATURES, features.T))
+    scores = feature['length'] / 2 - 15 * feature['rare_characters']
+
+    word_ratio = np.where(
+        feature['non_word'] == 0, feature['word'], feature['word'] / np.maximum(feature['non_word'], 1)
+    )
+    scores += np.where(word_ratio >= 2, 15, -15)
+
+    case_ratio = np.where(
+        feature['capitals'] == 0, feature['lower_case'], feature['lower_case'] / np.maximum(feature['capitals'], 1)
+    )
+    all_caps = (feature['lower_case'] == 0) & (feature['capitals'] >= 6)
+    scores += np.where(all_caps, feature['capitals'] / 2, np.where(case_ratio > 1, 10, -10))
+
+    scores += -25 * feature['quad_characters'] + 30 * feature['dictionary'] - 15 * feature['format_strings']
+    for name, (_, _, value) in SEARCH_SCORES.items():
+        if name == 'parameter':
+            scores += np.where((feature[name] == 1) & (feature['length'] > 6), value, 0)
+        else:
+            scores += value * feature[name]
+    return scores
 
 
 def _score(string):
@@ -31,17 +146,12 @@ def _add_length_score(string, score):
 
 
 def _add_rare_special_character_score(string, score):
-    rare_characters = ['^', '°', '§', '´', '`', '{', '}']
-    return score - 15 * len([character for character in rare_characters if character in string])
+    return score - 15 * len([character for character in RARE_CHARACTERS if character in string])
 
 
 def _add_special_character_ratio_score(string, score):
-    regex_non_word = r'\W'
-    regex_word = r'[a-zA-Z]'
-    matches_non_word = re.finditer(regex_non_word, string)
-    matches_word = re.finditer(regex_word, string)
-    match_num_non_word = len(list(matches_non_word))
-    match_num_word = len(list(matches_word))
+    match_num_non_word = len(NON_WORD_REGEX.findall(string))
+    match_num_word = len(WORD_REGEX.findall(string))
     score += _ratio_word_non_word_helper(match_num_word, match_num_non_word)
     return score
 
@@ -52,12 +162,8 @@ def _ratio_word_non_word_helper(num_word, num_non_word):
 
 
 def _add_case_ratio_score(string, score):
-    regex_lower = r'[a-z]'
-    regex_capital = r'[A-Z]'
-    matches_lower_case = re.finditer(regex_lower, string)
-    matches_capital = re.finditer(regex_capital, string)
-    match_num_lower = len(list(matches_lower_case))
-    match_num_capital = len(list(matches_capital))
+    match_num_lower = len(LOWER_CASE_REGEX.findall(string))
+    match_num_capital = len(CAPITAL_REGEX.findall(string))
     score += _case_ratio_helper(match_num_lower, match_num_capital)
     return score
 
@@ -71,56 +177,47 @@ def _case_ratio_helper(num_lower, num_capital):
 
 
 def _add_quad_characters_score(string, score):
-    matches = re.finditer(r'(\S)\1\1\1', string)
-    return score - 25 * len(list(matches))
+    return score - 25 * len(QUAD_CHARACTERS_REGEX.findall(string))
 
 
 def _add_dictionary_score(string, score):
-    dictionary = ['version', 'v.', 'http', 'ftp', 'usage', 'Usage', 'ssh', 'SSH', 'password', 'Version']
-    return score + 30 * len([word for word in dictionary if word in string])
+    return score + 30 * len([word for word in DICTIONARY if word in string])
 
 
 def _add_possible_year_score(string, score):
-    regex = r'([1][9]\d\d)|([2][0]\d\d)'
-    matches = re.search(regex, string)
+    matches = YEAR_REGEX.search(string)
     return score + 20 if matches else score
 
 
 def _add_path_score(string, score):
-    regex = r'(\/[\w-]+)+(.[a-zA-Z]+)'
-    matches = re.search(regex, string)
+    matches = PATH_REGEX.search(string)
     return score + 100 if matches else score
 
 
 def _add_possible_version_number_score(string, score):
-    regex = r'\d+\.(\d+\.?)+'
-    matches = re.search(regex, string)
+    matches = VERSION_NUMBER_REGEX.search(string)
     return score + 35 if matches else score
 
 
 def _add_format_string_score(string, score):
-    regex = r'%s|%lu|%u|%lf|%f|%i|%d'
-    matches = re.finditer(regex, string)
-    return score - 15 * len(list(matches))
+    return score - 15 * len(FORMAT_STRING_REGEX.findall(string))
 
 
 def _add_mail_adress_score(string, score):
-    regex = r"(([^<>()[\]\\.,;:\s@\"]+(\.[^<>()[\]\\.,;:\s@\"]+)*)|(\".+\"))@((\[[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\])|(([a-zA-Z\-0-9]+\.)+[a-zA-Z]{2,}))"
-    match = re.search(regex, string)
+    match = MAIL_ADDRESS_REGEX.search(string)
     return score + 150 if match else score
 
 
 def _add_underscore_or_period_at_beginning_score(string, score):
-    match = re.search(r'(^_+)|^\.', string)
+    match = UNDERSCORE_OR_PERIOD_AT_BEGINNING_REGEX.search(string)
     return score - 25 if match else score
 
 
 def _add_parameter_score(string, score):
-    match = re.search(r'^\s*-{1,2}', string)
+    match = PARAMETER_REGEX.search(string)
     return score + 35 if match and len(string) > 6 else score
 
 
 def _add_html_score(string, score):
-    regex = r'</?[^\\\(\)$\[\]\§\.\,\?<>;|!]+>'
-    match = re.search(regex, string)
+    match = HTML_REGEX.search(string)
     return score + 15 if match else score
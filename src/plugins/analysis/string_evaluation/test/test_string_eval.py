@@ -1,12 +1,20 @@
+import json
 import unittest
+from pathlib import Path
+
+import numpy as np
 
 from ..internal.string_eval import (
     _add_case_ratio_score, _add_dictionary_score, _add_format_string_score, _add_html_score, _add_length_score,
     _add_mail_adress_score, _add_parameter_score, _add_path_score, _add_possible_version_number_score,
     _add_possible_year_score, _add_quad_characters_score, _add_rare_special_character_score,
-    _add_special_character_ratio_score, _add_underscore_or_period_at_beginning_score, _score, eval_strings
+    _add_special_character_ratio_score, _add_underscore_or_period_at_beginning_score, _get_features, _get_scores,
+    _score, eval_strings
 )
 
+# strings (from an ELF file, crafted edge cases and random strings) and their order according to the original scoring
+CORPUS_PATH = Path(__file__).parent / 'data' / 'string_corpus.json'
+
 
 class TestStringEval(unittest.TestCase):
     def test_eval_strings(self):
@@ -142,3 +150,20 @@ class TestStringEval(unittest.TestCase):
         input_data = 'score me pls'
         result = _score(input_data)
         self.assertEqual(result[1] > 0, True, 'score should be above 0!')
+
+    def test_eval_strings_empty(self):
+        self.assertEqual(eval_strings([]), [])
+
+
+class TestStringEvalRegression(unittest.TestCase):
+    def setUp(self):
+        self.corpus = json.loads(CORPUS_PATH.read_text())
+
+    def test_eval_strings_order(self):
+        self.assertEqual(eval_strings(self.corpus['strings']), self.corpus['expected_order'])
+
+    def test_batch_scores_equal_single_scores(self):
+        strings = self.corpus['strings']
+        batch_scores = _get_scores(np.array([_get_features(string) for string in strings], dtype=np.float64))
+        for string, batch_score in zip(strings, batch_scores.tolist()):
+            self.assertEqual(batch_score, _score(string)[1], f'score mismatch for {string!r}')
@@ -1,9 +1,20 @@
-import re
-from typing import List, Pattern, Tuple
+from typing import Iterator, List, Tuple
+
+import numpy as np
 
 from analysis.PluginBase import AnalysisBasePlugin
+from helperFunctions.fileSystem import get_binary_or_memory_map
 from plugins.mime_blacklists import MIME_BLACKLIST_COMPRESSED
 
+CHUNK_SIZE = 16 * 1024 * 1024
+
+PRINTABLE = np.zeros(256, dtype=bool)
+PRINTABLE[0x09:0x0e] = True
+PRINTABLE[0x20:0x7f] = True
+# neither ASCII nor UTF-16 strings can span these bytes (they are neither printable nor null bytes)
+SEPARATORS = ~PRINTABLE
+SEPARATORS[0] = False
+
 
 class AnalysisPlugin(AnalysisBasePlugin):
     '''
@@ -13,12 +24,8 @@ class AnalysisPlugin(AnalysisBasePlugin):
     DEPENDENCIES = []
     MIME_BLACKLIST = MIME_BLACKLIST_COMPRESSED
     DESCRIPTION = 'extracts strings and their offsets from the files consisting of printable characters'
-    VERSION = '0.3.4'
+    VERSION = '0.4.0'
 
-    STRING_REGEXES = [
-        (b'[\x09-\x0d\x20-\x7e]{$len,}', 'utf-8'),
-        (b'(?:[\x09-\x0d\x20-\x7e]\x00){$len,}', 'utf-16'),
-    ]
     FALLBACK_MIN_LENGTH = '8'
 
     def __init__(self, plugin_administrator, config=None, recursive=True, plugin_path=__file__):
@@ -27,16 +34,10 @@ class AnalysisPlugin(AnalysisBasePlugin):
         default flags should be edited above. Otherwise the scheduler cannot overwrite them.
         '''
         self.config = config
-        self.regexes = self._compile_regexes()
+        self.min_length = int(self._get_min_length_from_config())
+        self.max_strings = self.config.getint(self.NAME, 'max_strings', fallback=0)
         super().__init__(plugin_administrator, config=config, recursive=recursive, plugin_path=plugin_path)
 
-    def _compile_regexes(self) -> List[Tuple[Pattern[bytes], str]]:
-        min_length = self._get_min_length_from_config()
-        return [
-            (re.compile(regex.replace(b'$len', min_length.encode())), encoding)
-            for regex, encoding in self.STRING_REGEXES
-        ]
-
     def _get_min_length_from_config(self):
         try:
             min_length = self.config[self.NAME]['min_length']
@@ -45,26 +46,94 @@ class AnalysisPlugin(AnalysisBasePlugin):
         return min_length
 
     def process_object(self, file_object):
-        strings, offsets = self._find_all_strings_and_offsets(file_object.binary)
-        file_object.processed_analysis[self.NAME] = {
-            'strings': strings,
-            'offsets': offsets
-        }
+        with get_binary_or_memory_map(file_object) as data:
+            offsets, ends, encodings = find_strings(data, self.min_length)
+            result = {}
+            if self.max_strings and len(offsets) > self.max_strings:
+                # sample strings evenly distributed over the file
+                result['truncated'] = True
+                result['total_number_of_strings'] = len(offsets)
+                selected = np.linspace(0, len(offsets) - 1, self.max_strings).astype(np.int64)
+                offsets, ends, encodings = offsets[selected], ends[selected], encodings[selected]
+            strings_with_offset = _decode_strings(data, offsets, ends, encodings)
+        result['strings'] = sorted({string for _, string in strings_with_offset})
+        result['offsets'] = strings_with_offset
+        file_object.processed_analysis[self.NAME] = result
         return file_object
 
-    def _find_all_strings_and_offsets(self, source: bytes) -> Tuple[List[str], List[Tuple[int, str]]]:
-        strings_with_offset = []
-        for regex, encoding in self.regexes:
-            strings_with_offset.extend(self._match_with_offset(regex, source, encoding))
-        return self._get_list_of_unique_strings(strings_with_offset), strings_with_offset
-
-    @staticmethod
-    def _match_with_offset(regex: Pattern[bytes], source: bytes, encoding: str = 'utf-8') -> List[Tuple[int, str]]:
-        return [
-            (match.start(), match.group().decode(encoding))
-            for match in regex.finditer(source)
-        ]
-
-    @staticmethod
-    def _get_list_of_unique_strings(strings_with_offset: List[Tuple[int, str]]) -> List[str]:
-        return sorted(list(set(tuple(zip(*strings_with_offset))[1]))) if strings_with_offset else []
+
+def find_strings(data, min_length: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Find all ASCII strings and UTF-16 (little endian) strings of printable characters with at least `min_length`
+    characters. The data is processed in chunks as NumPy arrays.
+
+    :param data: The data (e.g. bytes or a memory mapped file).
+    :param min_length: The minimum number of characters.
+    :return: Arrays of start offsets, end offsets and encodings (0: ASCII, 1: UTF-16) of the strings (sorted by offset).
+    '''
+    starts, ends, encodings = [], [], []
+    array = np.frombuffer(data, dtype=np.uint8) if len(data) else np.empty(0, dtype=np.uint8)
+    for chunk_offset, chunk in _get_chunks(array):
+        mask = PRINTABLE[chunk]
+        for encoding, (chunk_starts, chunk_ends) in enumerate([
+            _find_runs(mask, min_length), _find_utf16_runs(chunk, mask, min_length)
+        ]):
+            starts.append(chunk_starts + chunk_offset)
+            ends.append(chunk_ends + chunk_offset)
+            encodings.append(np.full(len(chunk_starts), encoding, dtype=np.uint8))
+    if not starts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint8)
+    starts, ends, encodings = np.concatenate(starts), np.concatenate(ends), np.concatenate(encodings)
+    order = np.argsort(starts, kind='stable')
+    return starts[order], ends[order], encodings[order]
+
+
+def _get_chunks(array: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+    # chunks end at separator bytes, so that no string spans two chunks
+    start = 0
+    while start < len(array):
+        end = start + CHUNK_SIZE
+        while end < len(array):
+            separators = np.flatnonzero(SEPARATORS[array[end:end + CHUNK_SIZE]])
+            if len(separators):
+                end += int(separators[0])
+                break
+            end += CHUNK_SIZE
+        end = min(end, len(array))
+        yield start, array[start:end]
+        start = end
+
+
+def _find_runs(mask: np.ndarray, min_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    Get the start and end indices of all runs of ``True`` values with at least `min_length` elements.
+    '''
+    if len(mask) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    boundaries = np.concatenate(([0], np.flatnonzero(mask[1:] != mask[:-1]) + 1, [len(mask)]))
+    first_run = 0 if mask[0] else 1  # runs of True and False values alternate
+    starts, ends = boundaries[first_run:-1:2], boundaries[first_run + 1::2]
+    long_enough = ends - starts >= min_length
+    return starts[long_enough], ends[long_enough]
+
+
+def _find_utf16_runs(chunk: np.ndarray, mask: np.ndarray, min_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    UTF-16 strings are runs of (printable byte, null byte) pairs with a stride of two bytes. Runs with even and odd
+    offsets can not overlap.
+    '''
+    is_pair = mask[:-1] & (chunk[1:] == 0)
+    starts, ends = [], []
+    for alignment in (0, 1):
+        pair_starts, pair_ends = _find_runs(is_pair[alignment::2], min_length)
+        starts.append(pair_starts * 2 + alignment)
+        ends.append(pair_ends * 2 + alignment)
+    return np.concatenate(starts), np.concatenate(ends)
+
+
+def _decode_strings(data, offsets: np.ndarray, ends: np.ndarray, encodings: np.ndarray) -> List[Tuple[int, str]]:
+    codecs = ['ascii', 'utf-16-le']
+    return [
+        (offset, data[offset:end].decode(codecs[encoding]))
+        for offset, end, encoding in zip(offsets.tolist(), ends.tolist(), encodings.tolist())
+    ]
@@ -1,11 +1,12 @@
 import os
+from unittest import mock
 
 from common_helper_files import get_dir_of_file
 
 from objects.file import FileObject
 from test.unit.analysis.analysis_plugin_test_class import AnalysisPluginTest
 
-from ..code.strings import AnalysisPlugin
+from ..code.strings import AnalysisPlugin, _decode_strings, find_strings
 
 TEST_DATA_DIR = os.path.join(get_dir_of_file(__file__), 'data')
 
@@ -43,22 +44,35 @@ class TestAnalysisPlugInPrintableStrings(AnalysisPluginTest):
         self.assertEqual(len(results['strings']), 0, 'number of found strings not correct')
         self.assertEqual(len(results['offsets']), 0, 'number of offsets not correct')
 
-    def test_match_with_offset(self):
-        regex = self.analysis_plugin.regexes[0][0]
+    def test_find_strings(self):
         for test_input, expected_output in [
             (b'\xffabcdefghij\xff', [(1, 'abcdefghij')]),
             (b'!"$%&/()=?+*#-.,\t\n\r', [(0, '!"$%&/()=?+*#-.,\t\n\r')]),
             (b'\xff\xffabc\xff\xff', []),
             (b'abcdefghij\xff1234567890', [(0, 'abcdefghij'), (11, '1234567890')]),
+            (b'', []),
         ]:
-            result = AnalysisPlugin._match_with_offset(regex, test_input)
-            assert result == expected_output
+            assert _decode_strings(test_input, *find_strings(test_input, 4)) == expected_output
 
-    def test_match_with_offset__16bit(self):
-        regex, encoding = self.analysis_plugin.regexes[1]
+    def test_find_strings__16bit(self):
         test_input = b'01234a\0b\0c\0d\0e\0f\0g\0h\0i\0j\x0005678'
-        result = AnalysisPlugin._match_with_offset(regex, test_input, encoding)
-        assert result == [(5, 'abcdefghij')]
+        assert _decode_strings(test_input, *find_strings(test_input, 8)) == [(5, 'abcdefghij')]
+        assert _decode_strings(b'\0' + test_input, *find_strings(b'\0' + test_input, 8)) == [(6, 'abcdefghij')]
+
+    def test_find_strings__chunks(self):
+        test_input = b'\xff'.join([b'string_1', 'string_2'.encode('utf-16-le'), b'string_3'] * 3)
+        expected_output = _decode_strings(test_input, *find_strings(test_input, 4))
+        with mock.patch('plugins.analysis.strings.code.strings.CHUNK_SIZE', 5):
+            assert _decode_strings(test_input, *find_strings(test_input, 4)) == expected_output
+        assert [string for _, string in expected_output] == ['string_1', 'string_2', 'string_3'] * 3
+
+    def test_process_object__max_strings(self):
+        self.analysis_plugin.max_strings = 2
+        fo = FileObject(file_path=os.path.join(TEST_DATA_DIR, 'string_find_test_file2'))
+        results = self.analysis_plugin.process_object(fo).processed_analysis[self.PLUGIN_NAME]
+        assert results['offsets'] == [self.offsets[0], self.offsets[2]]
+        assert results['truncated'] is True
+        assert results['total_number_of_strings'] == 3
 
     def test_get_min_length_from_config(self):
         assert self.analysis_plugin._get_min_length_from_config() == '4'
@@ -2,9 +2,11 @@ from itertools import chain
 
 from analysis.PluginBase import AnalysisBasePlugin
 from helperFunctions.database import ConnectTo
-from helperFunctions.hash import get_tlsh_comparison
+from helperFunctions.hash import get_tlsh_comparison, get_tlsh_header_keys_in_range
 from storage.db_interface_common import MongoInterfaceCommon
 
+MAX_DISTANCE = 150
+
 
 class AnalysisPlugin(AnalysisBasePlugin):
     '''
@@ -13,7 +15,7 @@ class AnalysisPlugin(AnalysisBasePlugin):
     NAME = 'tlsh'
     DESCRIPTION = 'find files with similar tlsh and calculate similarity value'
     DEPENDENCIES = ['file_hashes']
-    VERSION = '0.2'
+    VERSION = '0.3'
 
     def __init__(self, plugin_administrator, config=None, recursive=True, offline_testing=False):
         super().__init__(plugin_administrator, config=config, recursive=recursive, plugin_path=__file__, offline_testing=offline_testing)
@@ -21,10 +23,11 @@ class AnalysisPlugin(AnalysisBasePlugin):
     def process_object(self, file_object):
         comparisons_dict = {}
         if 'tlsh' in file_object.processed_analysis['file_hashes'].keys():
+            tlsh_hash = file_object.processed_analysis['file_hashes']['tlsh']
             with ConnectTo(TLSHInterface, self.config) as interface:
-                for file in interface.tlsh_query_all_objects():
-                    value = get_tlsh_comparison(file_object.processed_analysis['file_hashes']['tlsh'], file['processed_analysis']['file_hashes']['tlsh'])
-                    if value <= 150 and not file['_id'] == file_object.uid:
+                for file in interface.tlsh_query_similar_objects(tlsh_hash, MAX_DISTANCE):
+                    value = get_tlsh_comparison(tlsh_hash, file['processed_analysis']['file_hashes']['tlsh'])
+                    if value <= MAX_DISTANCE and not file['_id'] == file_object.uid:
                         comparisons_dict[file['_id']] = value
 
         file_object.processed_analysis[self.NAME] = comparisons_dict
@@ -34,10 +37,15 @@ class AnalysisPlugin(AnalysisBasePlugin):
 class TLSHInterface(MongoInterfaceCommon):
     READ_ONLY = True
 
-    def tlsh_query_all_objects(self):
+    def tlsh_query_similar_objects(self, tlsh_hash: str, max_distance: int):
+        '''
+        Get all objects whose TLSH hash may have a distance of at most `max_distance` to `tlsh_hash`. The candidates are
+        preselected by the (indexed) header key of their hash so that the actual distance is only computed for them.
+        '''
+        query = {'tlsh_header': {'$in': get_tlsh_header_keys_in_range(tlsh_hash, max_distance)}}
         fields = {'processed_analysis.file_hashes.tlsh': 1}
 
         return chain(
-            self.file_objects.find({'processed_analysis.file_hashes.tlsh': {'$exists': True}}, fields),
-            self.firmwares.find({'processed_analysis.file_hashes.tlsh': {'$exists': True}}, fields)
+            self.file_objects.find(query, fields),
+            self.firmwares.find(query, fields)
         )
@@ -1,6 +1,7 @@
 import pytest
 
-from plugins.analysis.tlsh.code.tlsh import AnalysisPlugin
+from helperFunctions.hash import get_tlsh_comparison, get_tlsh_header_key, get_tlsh_header_keys_in_range
+from plugins.analysis.tlsh.code.tlsh import MAX_DISTANCE, AnalysisPlugin
 from test.common_helper import create_test_file_object, get_config_for_testing
 
 HASH_0 = '9A355C07B5A614FDC5A2847046EF92B7693174A642327DBF3C88D6303F42E746B1ABE1'
@@ -20,7 +21,7 @@ class MockContext:
 
     def __enter__(self):
         class ControlledInterface:
-            def tlsh_query_all_objects(self):  # pylint: disable=no-self-use
+            def tlsh_query_similar_objects(self, tlsh_hash, max_distance):  # pylint: disable=no-self-use,unused-argument
                 return [{'processed_analysis': {'file_hashes': {'tlsh': HASH_1}}, '_id': '5'}, ]
 
         return ControlledInterface()
@@ -32,7 +33,7 @@ class MockContext:
 class EmptyContext(MockContext):
     def __enter__(self):
         class EmptyInterface:
-            def tlsh_query_all_objects(self):  # pylint: disable=no-self-use
+            def tlsh_query_similar_objects(self, tlsh_hash, max_distance):  # pylint: disable=no-self-use,unused-argument
                 return []
 
         return EmptyInterface()
@@ -99,3 +100,9 @@ def test_file_hashes_not_run(test_object, stub_plugin):
     with pytest.raises(KeyError):
         test_object.processed_analysis.pop('file_hashes')
         stub_plugin.process_object(test_object)
+
+
+def test_header_key_preselection():
+    assert get_tlsh_header_key(HASH_1) in get_tlsh_header_keys_in_range(HASH_1, MAX_DISTANCE)
+    assert get_tlsh_header_key(HASH_0) not in get_tlsh_header_keys_in_range(HASH_1, MAX_DISTANCE)
+    assert get_tlsh_comparison(HASH_0, HASH_1) > MAX_DISTANCE
@@ -20,7 +20,9 @@
 import sys
 
 from fact_base import FactBase
+from helperFunctions.database import ConnectTo
 from helperFunctions.program_setup import program_setup
+from storage.db_interface_indexes import IndexDbInterface
 from storage.MongoMgr import MongoMgr
 
 
@@ -32,6 +34,9 @@ class FactDb(FactBase):
     def __init__(self):
         _, config = program_setup(self.PROGRAM_NAME, self.PROGRAM_DESCRIPTION, self.COMPONENT)
         self.mongo_server = MongoMgr(config=config)
+        with ConnectTo(IndexDbInterface, config) as db_interface:
+            db_interface.create_indexes()
+            db_interface.verify_indexes()
         super().__init__()
 
     def shutdown(self):
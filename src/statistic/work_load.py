@@ -10,6 +10,7 @@ import distro
 import psutil
 
 from storage.db_interface_statistic import StatisticDbUpdater
+from storage.mongo_interface import get_pool_metrics
 from version import __VERSION__
 
 
@@ -34,6 +35,7 @@ class WorkLoadStatistic:
             'last_update': time(),
             'system': self._get_system_information(),
             'platform': self.platform_information,
+            'database_connections': get_pool_metrics(),
         }
         if unpacking_workload:
             stats['unpacking'] = unpacking_workload
@@ -0,0 +1,125 @@
+'''
+Trigram index of the files in the file storage. It is used by the binary search to skip all files that do not contain
+the literal strings required by the YARA rules (see :mod:`helperFunctions.yara_literals`) without reading them.
+
+The index is an SQLite database with a posting list (trigram -> file) for each of the 2^24 possible trigrams. Files with
+more than ``MAX_TRIGRAMS`` distinct trigrams (e.g. compressed or encrypted files) would match almost any query and are
+therefore not indexed: They are always candidates of the binary search.
+'''
+import sqlite3
+from os import getpid
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+
+import numpy as np
+
+from helperFunctions.yara_literals import get_trigrams
+
+MAX_TRIGRAMS = 1 << 18
+MAX_QUERY_TRIGRAMS = 500
+CHUNK_SIZE = 16 * 1024 * 1024
+DB_TIMEOUT = 60
+
+CREATE_TABLES = '''
+CREATE TABLE IF NOT EXISTS files (file_id INTEGER PRIMARY KEY AUTOINCREMENT, uid TEXT UNIQUE, indexed INTEGER);
+CREATE TABLE IF NOT EXISTS trigrams (trigram INTEGER, file_id INTEGER, PRIMARY KEY (trigram, file_id)) WITHOUT ROWID;
+'''
+QUERIES = {
+    'add_file': 'INSERT OR IGNORE INTO files (uid, indexed) VALUES (?, ?)',
+    'add_trigrams': 'INSERT OR IGNORE INTO trigrams (trigram, file_id) VALUES (?, ?)',
+    'contains_file': 'SELECT 1 FROM files WHERE uid = ?',
+    'get_indexed_uids': 'SELECT uid FROM files WHERE indexed = 1',
+    'get_matching_uids': '''
+        SELECT uid FROM files WHERE indexed = 1 AND file_id IN (
+            SELECT file_id FROM trigrams WHERE trigram IN ({}) GROUP BY file_id HAVING COUNT(*) = ?
+        )
+    ''',
+    # postings of removed files are not deleted (this would require an additional index): they are never joined again
+    # because file IDs are not reused (AUTOINCREMENT)
+    'remove_file': 'DELETE FROM files WHERE uid = ?',
+}
+
+
+class BinarySearchIndex:
+    '''
+    Incrementally updated trigram index of the stored files.
+
+    :param index_path: The path of the SQLite database of the index.
+    '''
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # connections must not be shared with forked processes
+        if self._connection is None or self._pid != getpid():
+            Path(self.index_path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.index_path, timeout=DB_TIMEOUT)
+            self._connection.execute('PRAGMA journal_mode = WAL')
+            self._connection.executescript(CREATE_TABLES)
+            self._pid = getpid()
+        return self._connection
+
+    def contains(self, uid: str) -> bool:
+        return self.connection.execute(QUERIES['contains_file'], (uid,)).fetchone() is not None
+
+    def add_file(self, uid: str, file_path: str):
+        '''
+        Add the file to the index. Files that are already part of the index are skipped.
+
+        :param uid: The UID of the file.
+        :param file_path: The path of the file in the file storage.
+        '''
+        if self.contains(uid):
+            return
+        trigrams = get_file_trigrams(file_path, MAX_TRIGRAMS)
+        with self.connection as connection:  # one transaction per file
+            cursor = connection.execute(QUERIES['add_file'], (uid, int(trigrams is not None)))
+            if cursor.rowcount and trigrams is not None:
+                file_id = cursor.lastrowid
+                connection.executemany(QUERIES['add_trigrams'], ((int(trigram), file_id) for trigram in trigrams))
+
+    def remove_file(self, uid: str):
+        with self.connection as connection:
+            connection.execute(QUERIES['remove_file'], (uid,))
+
+    def filter_candidates(self, uids: Iterable[str], alternatives: List[List[bytes]]) -> List[str]:
+        '''
+        Remove all files that can not contain the literals of any alternative.
+
+        :param uids: The UIDs of the files that should be searched.
+        :param alternatives: Lists of literals (see :func:`helperFunctions.yara_literals.get_required_literals`).
+        :return: The UIDs of the files that may match (files that are not part of the index are always included).
+        '''
+        indexed_uids = {uid for uid, in self.connection.execute(QUERIES['get_indexed_uids'])}
+        matching_uids = set().union(*(self._get_matching_uids(literals) for literals in alternatives))
+        return [uid for uid in uids if uid not in indexed_uids or uid in matching_uids]
+
+    def _get_matching_uids(self, literals: List[bytes]) -> Set[str]:
+        trigrams = sorted(set().union(*(get_trigrams(literal) for literal in literals)))[:MAX_QUERY_TRIGRAMS]
+        query = QUERIES['get_matching_uids'].format(', '.join('?' * len(trigrams)))
+        return {uid for uid, in self.connection.execute(query, (*trigrams, len(trigrams)))}
+
+
+def get_file_trigrams(file_path: str, max_count: int = MAX_TRIGRAMS) -> Optional[np.ndarray]:
+    '''
+    Get the distinct trigrams of a file. The file is memory mapped and processed in chunks.
+
+    :param file_path: The path of the file.
+    :param max_count: The maximum number of distinct trigrams.
+    :return: The sorted trigrams or ``None`` if the file has more than ``max_count`` distinct trigrams.
+    '''
+    size = Path(file_path).stat().st_size
+    if size < 3:
+        return np.empty(0, dtype=np.int64)
+    seen = np.zeros(1 << 24, dtype=bool)
+    data = np.memmap(file_path, dtype=np.uint8, mode='r')
+    for offset in range(0, size - 2, CHUNK_SIZE):
+        chunk = data[offset:offset + CHUNK_SIZE + 2].astype(np.uint32)  # chunks overlap by two bytes
+        seen[(chunk[:-2] << 16) | (chunk[1:-1] << 8) | chunk[2:]] = True
+    del data
+    trigrams = np.flatnonzero(seen)
+    return trigrams if len(trigrams) <= max_count else None
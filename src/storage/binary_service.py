@@ -1,9 +1,12 @@
 import logging
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Tuple
+from tempfile import TemporaryDirectory
+from typing import BinaryIO, Iterator, Optional, Tuple
 
 from common_helper_files.fail_safe_file_operations import get_binary_from_file
 
+from helperFunctions.config import get_temp_dir_path
 from helperFunctions.database import ConnectTo
 from storage.db_interface_common import MongoInterfaceCommon
 from storage.fsorganizer import FSOrganizer
@@ -37,14 +40,24 @@ class BinaryService:
             fp.seek(offset)
             return fp.read(length)
 
-    def get_repacked_binary_and_file_name(self, uid: str) -> Tuple[Optional[bytes], Optional[str]]:
+    @contextmanager
+    def open_binary(self, uid: str, packed: bool = False) -> Iterator[Tuple[Optional[BinaryIO], Optional[str]]]:
+        '''
+        Open the binary (or its contents repacked as tar.gz archive if `packed` is set) for reading in chunks.
+        Yields `(None, None)` if the file does not exist.
+        '''
         file_name = self._get_file_name_from_db(uid)
         if file_name is None:
-            return None, None
-        repack_service = TarRepack(config=self.config)
-        tar = repack_service.tar_repack(self.fs_organizer.generate_path_from_uid(uid))
-        name = f'{file_name}.tar.gz'
-        return tar, name
+            yield None, None
+        elif not packed:
+            with open(self.fs_organizer.generate_path_from_uid(uid), 'rb') as fp:
+                yield fp, file_name
+        else:
+            with TemporaryDirectory(prefix='FACT_tar_repack', dir=get_temp_dir_path(self.config)) as archive_dir:
+                archive_path = Path(archive_dir, 'download.tar.gz')
+                TarRepack(config=self.config).tar_repack_to_file(self.fs_organizer.generate_path_from_uid(uid), str(archive_path))
+                with archive_path.open('rb') as fp:
+                    yield fp, f'{file_name}.tar.gz'
 
     def _get_file_name_from_db(self, uid: str) -> Optional[str]:
         with ConnectTo(BinaryServiceDbInterface, self.config) as db_service:
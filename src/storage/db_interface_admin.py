@@ -1,5 +1,7 @@
 import logging
+from typing import Tuple
 
+from helperFunctions.virtual_file_path import get_ancestor_uids
 from intercom.front_end_binding import InterComFrontEndBinding
 from storage.db_interface_common import MongoInterfaceCommon
 
@@ -34,8 +36,8 @@ class AdminDbInterface(MongoInterfaceCommon):
         removed_fp, deleted = 0, 1
         fw = self.firmwares.find_one(uid)
         if fw:
-            for included_file_uid in fw['files_included']:
-                child_removed_fp, child_deleted = self._remove_virtual_path_entries(uid, included_file_uid)
+            for fo_entry in self.file_objects.find({'ancestor_uids': uid}):
+                child_removed_fp, child_deleted = self._remove_virtual_path_entries(uid, fo_entry)
                 removed_fp += child_removed_fp
                 deleted += child_deleted
             if delete_root_file:
@@ -61,33 +63,29 @@ class AdminDbInterface(MongoInterfaceCommon):
                 for entry in self.sanitize_fs.find({'filename': sanitize_id}):  # could be multiple
                     self.sanitize_fs.delete(entry._id)  # pylint: disable=protected-access
 
-    def _remove_virtual_path_entries(self, root_uid, fo_uid):
+    def _remove_virtual_path_entries(self, root_uid: str, fo_entry: dict) -> Tuple[int, int]:
         '''
-        Recursively checks if the provided root uid is the only entry in the virtual path of the file object specified \
-        by fo uid. If this is the case, the file object is deleted from the database. Otherwise, only the entry from \
-        the virtual path is removed.
+        Checks if the provided root uid is the only entry in the virtual path of the file object. If this is the case, \
+        the file object is deleted from the database. Otherwise, only the entry from the virtual path is removed.
         :param root_uid: the uid of the root firmware
-        :param fo_uid: he uid of the current file object
-        :return: tuple with numbers of recursively removed virtual file path entries and deleted files
+        :param fo_entry: the database entry of a file object included in the root firmware
+        :return: tuple with numbers of removed virtual file path entries and deleted files
         '''
-        removed_fp, deleted = 0, 0
-        fo = self.file_objects.find_one(fo_uid)
-        if fo is not None:
-            for child_uid in fo['files_included']:
-                child_removed_fp, child_deleted = self._remove_virtual_path_entries(root_uid, child_uid)
-                removed_fp += child_removed_fp
-                deleted += child_deleted
-            if any([root != root_uid for root in fo['virtual_file_path'].keys()]):
-                # there are more roots in the virtual path, meaning this file is included in other firmwares
-                self.remove_object_field(fo_uid, 'virtual_file_path.{}'.format(root_uid))
-                if 'parent_firmware_uids' in fo:
-                    self.remove_from_object_array(fo_uid, 'parent_firmware_uids', root_uid)
-                removed_fp += 1
-            else:
-                self._delete_swapped_analysis_entries(fo)
-                self._delete_file_object(fo)
-                deleted += 1
-        return removed_fp, deleted
+        if any(root != root_uid for root in fo_entry['virtual_file_path']):
+            # there are more roots in the virtual path, meaning this file is included in other firmwares
+            remaining_vfp = {root: vfp_list for root, vfp_list in fo_entry['virtual_file_path'].items() if root != root_uid}
+            self.file_objects.update_one(
+                {'_id': fo_entry['_id']},
+                {
+                    '$unset': {f'virtual_file_path.{root_uid}': ''},
+                    '$pull': {'parent_firmware_uids': root_uid},
+                    '$set': {'ancestor_uids': list(get_ancestor_uids(remaining_vfp))},
+                }
+            )
+            return 1, 0
+        self._delete_swapped_analysis_entries(fo_entry)
+        self._delete_file_object(fo_entry)
+        return 0, 1
 
     def _delete_file_object(self, fo_entry):
         self.intercom.delete_file(fo_entry)
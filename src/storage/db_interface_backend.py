@@ -4,8 +4,9 @@ from time import time
 from pymongo.errors import PyMongoError
 
 from helperFunctions.data_conversion import convert_str_to_time
-from helperFunctions.merge_generators import merge_lists
-from helperFunctions.object_storage import update_included_files, update_virtual_file_path
+from helperFunctions.hash import get_tlsh_header_key
+from helperFunctions.object_storage import update_virtual_file_path
+from helperFunctions.virtual_file_path import get_ancestor_uids
 from objects.file import FileObject
 from objects.firmware import Firmware
 from storage.db_interface_common import MongoInterfaceCommon
@@ -13,6 +14,34 @@ from storage.db_interface_common import MongoInterfaceCommon
 
 class BackEndDbInterface(MongoInterfaceCommon):
 
+    def _setup_database_mapping(self):
+        super()._setup_database_mapping()
+        self._backfill_ancestor_uids()
+        self._backfill_tlsh_header_keys()
+
+    def _backfill_ancestor_uids(self):
+        '''
+        The field `ancestor_uids` holds the UIDs of all objects that (recursively) include a file object.
+        It is derived from the virtual file paths and allows fetching complete subtrees with a single indexed query.
+        Entries created before the field was introduced are backfilled here.
+        '''
+        for entry in self.file_objects.find({'ancestor_uids': {'$exists': False}}, {'virtual_file_path': 1}):
+            self.file_objects.update_one(
+                {'_id': entry['_id']},
+                {'$set': {'ancestor_uids': list(get_ancestor_uids(entry['virtual_file_path']))}}
+            )
+
+    def _backfill_tlsh_header_keys(self):
+        '''
+        The field `tlsh_header` holds the header key of the TLSH hash (see `helperFunctions.hash.get_tlsh_header_key`)
+        and is used to find similar files without comparing all hashes. Entries created before the field was introduced
+        are backfilled here.
+        '''
+        query = {'tlsh_header': {'$exists': False}, 'processed_analysis.file_hashes.tlsh': {'$exists': True}}
+        for collection in [self.file_objects, self.firmwares]:
+            for entry in collection.find(query, {'processed_analysis.file_hashes.tlsh': 1}):
+                collection.update_one({'_id': entry['_id']}, {'$set': _get_tlsh_header_field(entry['processed_analysis'])})
+
     def add_object(self, fo_fw):
         if isinstance(fo_fw, Firmware):
             self.add_firmware(fo_fw)
@@ -24,14 +53,24 @@ class BackEndDbInterface(MongoInterfaceCommon):
         self.release_unpacking_lock(fo_fw.uid)
 
     def update_object(self, new_object: FileObject, old_db_entry: dict):
-        update_dictionary = {
-            'processed_analysis': self._update_processed_analysis(new_object, old_db_entry),
-            'files_included': update_included_files(new_object, old_db_entry),
-            'virtual_file_path': update_virtual_file_path(new_object, old_db_entry),
+        '''
+        Update an existing DB entry with atomic field-level operations: Analysis results are set per plugin,
+        virtual file paths per root and new elements are added to the array fields.
+
+        :param new_object: The updated object.
+        :param old_db_entry: The DB entry of the object (only the field `virtual_file_path` is required).
+        '''
+        merged_vfp = update_virtual_file_path(new_object, old_db_entry)
+        sanitized_analysis = self.sanitize_analysis(analysis_dict=new_object.processed_analysis, uid=new_object.uid)
+        fields_to_set = {
+            **{f'processed_analysis.{plugin}': result for plugin, result in sanitized_analysis.items()},
+            **{f'virtual_file_path.{root_uid}': merged_vfp[root_uid] for root_uid in new_object.virtual_file_path},
+            **_get_tlsh_header_field(new_object.processed_analysis),
         }
+        elements_to_add = {'files_included': list(new_object.files_included)}
 
         if isinstance(new_object, Firmware):
-            update_dictionary.update({
+            fields_to_set.update({
                 'version': new_object.version,
                 'device_name': new_object.device_name,
                 'device_part': new_object.part,
@@ -42,22 +81,21 @@ class BackEndDbInterface(MongoInterfaceCommon):
             })
             collection = self.firmwares
         else:
-            update_dictionary.update({
-                'parent_firmware_uids': merge_lists(old_db_entry['parent_firmware_uids'], new_object.parent_firmware_uids),
-                'parents': merge_lists(old_db_entry['parents'], new_object.parents)
+            elements_to_add.update({
+                # paths with the same base are replaced when merging but they have the same ancestors anyway
+                'ancestor_uids': list(get_ancestor_uids(new_object.virtual_file_path)),
+                'parent_firmware_uids': list(new_object.parent_firmware_uids),
+                'parents': new_object.parents,
             })
             collection = self.file_objects
 
-        collection.update_one({'_id': new_object.uid}, {'$set': update_dictionary})
-
-    def _update_processed_analysis(self, new_object: FileObject, old_object: dict) -> dict:
-        old_pa = self.retrieve_analysis(old_object['processed_analysis'])
-        for key in new_object.processed_analysis.keys():
-            old_pa[key] = new_object.processed_analysis[key]
-        return self.sanitize_analysis(analysis_dict=old_pa, uid=new_object.uid)
+        update = {'$addToSet': {field: {'$each': elements} for field, elements in elements_to_add.items()}}
+        if fields_to_set:
+            update['$set'] = fields_to_set
+        collection.update_one({'_id': new_object.uid}, update)
 
     def add_firmware(self, firmware: Firmware):
-        old_db_entry = self.firmwares.find_one({'_id': firmware.uid})
+        old_db_entry = self.firmwares.find_one({'_id': firmware.uid}, {'virtual_file_path': 1})
         if old_db_entry:
             logging.debug('Update old firmware!')
             try:
@@ -93,14 +131,15 @@ class BackEndDbInterface(MongoInterfaceCommon):
             'release_date': convert_str_to_time(firmware.release_date),
             'submission_date': time(),
             'analysis_tags': firmware.analysis_tags,
-            'tags': firmware.tags
+            'tags': firmware.tags,
+            **_get_tlsh_header_field(firmware.processed_analysis),
         }
         if hasattr(firmware, 'comments'):  # for backwards compatibility
             entry['comments'] = firmware.comments
         return entry
 
     def add_file_object(self, file_object):
-        old_db_entry = self.file_objects.find_one({'_id': file_object.uid})
+        old_db_entry = self.file_objects.find_one({'_id': file_object.uid}, {'virtual_file_path': 1})
         if old_db_entry:
             logging.debug('Update old file_object!')
             try:
@@ -130,7 +169,9 @@ class BackEndDbInterface(MongoInterfaceCommon):
             'files_included': list(file_object.files_included),
             'size': file_object.size,
             'analysis_tags': file_object.analysis_tags,
-            'parent_firmware_uids': list(file_object.parent_firmware_uids)
+            'parent_firmware_uids': list(file_object.parent_firmware_uids),
+            'ancestor_uids': list(get_ancestor_uids(file_object.virtual_file_path)),
+            **_get_tlsh_header_field(file_object.processed_analysis),
         }
         for attribute in ['comments']:  # for backwards compatibility
             if hasattr(file_object, attribute):
@@ -164,9 +205,15 @@ class BackEndDbInterface(MongoInterfaceCommon):
             collection.update_one(
                 {'_id': file_object.uid},
                 {'$set': {
-                    'processed_analysis.{}'.format(analysis_system): result
+                    'processed_analysis.{}'.format(analysis_system): result,
+                    **_get_tlsh_header_field({analysis_system: result}),
                 }}
             )
         except Exception as exception:
             logging.error('Update of analysis failed badly ({})'.format(exception))
             raise exception
+
+
+def _get_tlsh_header_field(processed_analysis: dict) -> dict:
+    tlsh_hash = processed_analysis.get('file_hashes', {}).get('tlsh')
+    return {'tlsh_header': get_tlsh_header_key(tlsh_hash)} if tlsh_hash is not None else {}
@@ -230,8 +230,7 @@ class MongoInterfaceCommon(MongoInterface):  # pylint: disable=too-many-instance
 
     def get_list_of_all_included_files(self, fo):
         if isinstance(fo, Firmware):
-            fo.list_of_all_included_files = get_list_of_all_values(
-                self.file_objects, '$_id', match={f'virtual_file_path.{fo.uid}': {'$exists': 'true'}})
+            fo.list_of_all_included_files = list(self.get_uids_of_all_descendants(fo.uid))
         if fo.list_of_all_included_files is None:
             fo.list_of_all_included_files = list(self.get_set_of_all_included_files(fo))
         fo.list_of_all_included_files.sort()
@@ -243,13 +242,19 @@ class MongoInterfaceCommon(MongoInterface):  # pylint: disable=too-many-instance
         the set includes fo uid as well
         '''
         if fo is not None:
-            files = {fo.uid}
-            included_files = self.get_objects_by_uid_list(fo.files_included, analysis_filter=[])
-            for item in included_files:
-                files.update(self.get_set_of_all_included_files(item))
-            return files
+            return {fo.uid, *self.get_uids_of_all_descendants(fo.uid)}
         return set()
 
+    def get_uids_of_all_descendants(self, uid: str) -> Set[str]:
+        '''
+        get the uids of all files that are (recursively) included in the object with the given uid
+        (with a single query on the indexed field `ancestor_uids`)
+        '''
+        return {
+            match['_id']
+            for match in self.file_objects.find({'ancestor_uids': uid}, {'_id': 1})
+        }
+
     def get_uids_of_all_included_files(self, uid: str) -> Set[str]:
         return {
             match['_id']
@@ -266,7 +271,7 @@ class MongoInterfaceCommon(MongoInterface):  # pylint: disable=too-many-instance
             return self._collect_summary(fo.list_of_all_included_files, selected_analysis)
         summary = get_all_value_combinations_of_fields(
             self.file_objects, f'$processed_analysis.{selected_analysis}.summary', '$_id',
-            unwind=True, match={f'virtual_file_path.{fo.uid}': {'$exists': 'true'}})
+            unwind=True, match={'parent_firmware_uids': fo.uid})
         fo_summary = self._get_summary_of_one(fo, selected_analysis)
         self._update_summary(summary, fo_summary)
         return summary
@@ -347,7 +352,7 @@ class MongoInterfaceCommon(MongoInterface):  # pylint: disable=too-many-instance
                         self.file_objects,
                         '$_id',
                         match={
-                            f'virtual_file_path.{uid}': {'$exists': 'true'},
+                            'parent_firmware_uids': uid,
                             f'processed_analysis.{plugin}.tags': {'$exists': 'true'}
                         }
                     )
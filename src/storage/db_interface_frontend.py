@@ -321,7 +321,7 @@ class FrontEndDbInterface(MongoInterfaceCommon):
         for result in query_result:
             firmware_uid, analysis_list = result['_id'], result['analyses']
             query = {'$and': [
-                {'virtual_file_path.{}'.format(firmware_uid): {'$exists': True}},
+                {'parent_firmware_uids': firmware_uid},
                 {'$or': [{'processed_analysis.{}'.format(plugin): {'$exists': False}} for plugin in analysis_list]}
             ]}
             for entry in self.file_objects.find(query, {'_id': 1}):
@@ -0,0 +1,99 @@
+import logging
+from typing import Iterable, List, NamedTuple, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+from storage.db_interface_common import MongoInterfaceCommon
+
+# summaries that are queried directly (statistics, search, tag propagation)
+INDEXED_SUMMARY_PLUGINS = [
+    'cpu_architecture', 'crypto_material', 'exploit_mitigations', 'known_vulnerabilities', 'software_components',
+    'unpacker'
+]
+
+
+class IndexDefinition(NamedTuple):
+    collection: str
+    keys: List[Tuple[str, int]]
+
+    @property
+    def name(self) -> str:
+        # same naming scheme as MongoDB uses for indexes without explicit name
+        return '_'.join(f'{field}_{direction}' for field, direction in self.keys)
+
+
+def _single_field_index(collection: str, field: str, direction: int = ASCENDING) -> IndexDefinition:
+    return IndexDefinition(collection, [(field, direction)])
+
+
+MAIN_DATABASE_INDEXES = [
+    # virtual file paths use the root UID as key and can't be indexed -> "by root" queries use `parent_firmware_uids`
+    _single_field_index('file_objects', 'parent_firmware_uids'),
+    _single_field_index('file_objects', 'ancestor_uids'),
+    _single_field_index('file_objects', 'parents'),
+    _single_field_index('file_objects', 'file_name'),
+    _single_field_index('file_objects', 'processed_analysis.file_type.mime'),
+    _single_field_index('file_objects', 'tlsh_header'),
+    *(
+        _single_field_index('file_objects', f'processed_analysis.{plugin}.summary')
+        for plugin in INDEXED_SUMMARY_PLUGINS
+    ),
+    _single_field_index('firmwares', 'vendor'),
+    _single_field_index('firmwares', 'submission_date', DESCENDING),
+    _single_field_index('firmwares', 'tlsh_header'),
+    _single_field_index('locks', 'uid'),
+    _single_field_index('compare_results', 'submission_date', DESCENDING),
+    # `search_query_cache` is only queried by `_id` which is always indexed
+]
+
+
+class IndexDbInterface(MongoInterfaceCommon):
+    '''
+    Creates and verifies the indexes declared in `MAIN_DATABASE_INDEXES`
+    '''
+
+    READ_ONLY = False
+
+    def create_indexes(self, indexes: Iterable[IndexDefinition] = MAIN_DATABASE_INDEXES):
+        for index in self.get_missing_indexes(indexes):
+            logging.info(f'Creating index {index.name} on collection {index.collection}')
+            try:
+                self.main[index.collection].create_index(index.keys, name=index.name, background=True)
+            except PyMongoError as error:
+                logging.error(f'Could not create index {index.name} on {index.collection}: {error}')
+
+    def get_missing_indexes(self, indexes: Iterable[IndexDefinition] = MAIN_DATABASE_INDEXES) -> List[IndexDefinition]:
+        existing_indexes = {}
+        missing = []
+        for index in indexes:
+            if index.collection not in existing_indexes:
+                existing_indexes[index.collection] = set(self.main[index.collection].index_information())
+            if index.name not in existing_indexes[index.collection]:
+                missing.append(index)
+        return missing
+
+    def verify_indexes(self, indexes: Iterable[IndexDefinition] = MAIN_DATABASE_INDEXES) -> bool:
+        missing = self.get_missing_indexes(indexes)
+        for index in missing:
+            logging.warning(f'Index {index.name} on collection {index.collection} is missing')
+        return not missing
+
+    def query_uses_collection_scan(self, collection: str, query: dict) -> bool:
+        return plan_contains_collection_scan(self.main[collection].find(query).explain())
+
+
+def plan_contains_collection_scan(explain_output: dict) -> bool:
+    '''
+    Check the output of ``cursor.explain()`` for collection scans (i.e. queries that are not backed by any index).
+    '''
+    return _stage_contains_collection_scan(explain_output['queryPlanner']['winningPlan'])
+
+
+def _stage_contains_collection_scan(stage: dict) -> bool:
+    if stage.get('stage') == 'COLLSCAN':
+        return True
+    child_stages = stage.get('inputStages', [])
+    if 'inputStage' in stage:
+        child_stages = [stage['inputStage'], *child_stages]
+    return any(_stage_contains_collection_scan(child) for child in child_stages)
@@ -1,8 +1,16 @@
 import logging
+import sqlite3
 from pathlib import Path
+from shutil import copyfileobj
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO
 
 from common_helper_files import delete_file, write_binary_to_file
 
+from storage.binary_search_index import BinarySearchIndex
+
+CHUNK_SIZE = 1024 * 1024
+
 
 class FSOrganizer:
     '''
@@ -12,6 +20,8 @@ class FSOrganizer:
         self.config = config
         self.data_storage_path = Path(self.config['data_storage']['firmware_file_storage_directory']).absolute()
         self.data_storage_path.parent.mkdir(parents=True, exist_ok=True)
+        index_path = self.config['data_storage'].get('binary_search_index')
+        self.binary_search_index = BinarySearchIndex(index_path) if index_path else None
 
     def store_file(self, file_object):
         if file_object.binary is None:
@@ -21,13 +31,39 @@ class FSOrganizer:
             write_binary_to_file(file_object.binary, destination_path, overwrite=False)
             file_object.file_path = destination_path
             file_object.create_binary_from_path()
+            self._add_to_binary_search_index(file_object)
+
+    def store_file_from_stream(self, file_object, file_handle: BinaryIO):
+        '''
+        Store the binary of the file object chunk by chunk from `file_handle` (instead of `file_object.binary`).
+        Existing files are not overwritten.
+        '''
+        destination_path = Path(self.generate_path(file_object))
+        if not destination_path.exists():
+            destination_path.parent.mkdir(parents=True, exist_ok=True)
+            with NamedTemporaryFile(dir=destination_path.parent, delete=False) as tmp_file:
+                copyfileobj(file_handle, tmp_file, CHUNK_SIZE)
+            Path(tmp_file.name).rename(destination_path)  # the file is only visible after it was completely written
+        file_object.file_path = str(destination_path)
+        file_object.create_binary_from_path()
+        self._add_to_binary_search_index(file_object)
 
     def delete_file(self, uid):
         local_file_path = self.generate_path_from_uid(uid)
         delete_file(local_file_path)
+        if self.binary_search_index is not None:
+            self.binary_search_index.remove_file(uid)
 
     def generate_path(self, file_object):
         return self.generate_path_from_uid(file_object.uid)
 
     def generate_path_from_uid(self, uid):
         return str(self.data_storage_path / uid[0:2] / uid)
+
+    def _add_to_binary_search_index(self, file_object):
+        if self.binary_search_index is not None:
+            try:
+                self.binary_search_index.add_file(file_object.uid, file_object.file_path)
+            except (sqlite3.Error, OSError) as error:
+                # the file is still found by the binary search, it is just not preselected
+                logging.warning(f'Could not add {file_object.uid} to the binary search index: {error}')
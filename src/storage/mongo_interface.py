@@ -1,6 +1,10 @@
+import logging
+import os
 import warnings
+from threading import Lock
+from typing import Dict, List, NamedTuple, Tuple
 
-from pymongo import MongoClient, errors
+from pymongo import MongoClient, errors, monitoring
 
 from helperFunctions.process import complete_shutdown
 
@@ -12,30 +16,154 @@ class MongoInterface(object):
     This is the mongo interface base class handling:
     - load config
     - setup connection including authentication
+
+    The underlying (authenticated) `MongoClient` and its connection pool are shared by all interfaces of a process
+    using the same server and credentials (see :func:`get_mongo_client`).
     '''
 
     READ_ONLY = False
 
     def __init__(self, config=None):
         self.config = config
-        mongo_server = self.config['data_storage']['mongo_server']
-        mongo_port = self.config['data_storage']['mongo_port']
-        self.client = MongoClient('mongodb://{}:{}'.format(mongo_server, mongo_port), connect=False)
-        self._authenticate()
+        self.client = get_mongo_client(self.config, read_only=self.READ_ONLY)
         self._setup_database_mapping()
 
     def shutdown(self):
-        self.client.close()
+        pass  # the client is shared and stays open until the process exits (see `close_mongo_clients`)
 
     def _setup_database_mapping(self):
         pass
 
-    def _authenticate(self):
-        if self.READ_ONLY:
-            user, pw = self.config['data_storage']['db_readonly_user'], self.config['data_storage']['db_readonly_pw']
-        else:
-            user, pw = self.config['data_storage']['db_admin_user'], self.config['data_storage']['db_admin_pw']
-        try:
-            self.client.admin.authenticate(user, pw, mechanism='SCRAM-SHA-1')
-        except errors.OperationFailure as e:  # Authentication not successful
-            complete_shutdown('Error: Authentication not successful: {}'.format(e))
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    '''
+    Counts connection pool events of a `MongoClient`
+    '''
+
+    def __init__(self):
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checked_in = 0
+        self.check_out_failures = 0
+        self.pools_cleared = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'open_connections': self.created - self.closed,
+            'connections_in_use': self.checked_out - self.checked_in,
+            'connections_created': self.created,
+            'check_outs': self.checked_out,
+            'check_out_failures': self.check_out_failures,
+            'pools_cleared': self.pools_cleared,
+        }
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_closed(self, event):
+        self.closed += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_in += 1
+
+    def connection_check_out_failed(self, event):
+        self.check_out_failures += 1
+
+    def pool_cleared(self, event):
+        self.pools_cleared += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+class _ClientEntry(NamedTuple):
+    client: MongoClient
+    metrics: PoolMetrics
+
+
+class _MongoClientRegistry:
+    def __init__(self):
+        self.lock = Lock()
+        self.clients: Dict[Tuple[str, str, str, str], _ClientEntry] = {}
+
+    def reset(self):
+        # MongoClient instances must not be used across a fork -> forget (but do not close) clients of the parent
+        self.lock = Lock()
+        self.clients = {}
+
+
+_REGISTRY = _MongoClientRegistry()
+os.register_at_fork(after_in_child=_REGISTRY.reset)
+
+
+def _get_credentials(config, read_only: bool) -> Tuple[str, str]:
+    if read_only:
+        return config['data_storage']['db_readonly_user'], config['data_storage']['db_readonly_pw']
+    return config['data_storage']['db_admin_user'], config['data_storage']['db_admin_pw']
+
+
+def get_mongo_client(config, read_only: bool = False) -> MongoClient:
+    '''
+    Get the process-wide authenticated `MongoClient` for the server and credentials from the config.
+    The client is created (and authenticated) on first use and reused afterwards. Child processes
+    (e.g. from `multiprocessing`) create their own clients.
+
+    :param config: The FACT configuration.
+    :param read_only: Use the read-only user instead of the admin user.
+    :return: A shared `MongoClient` instance.
+    '''
+    mongo_server = config['data_storage']['mongo_server']
+    mongo_port = config['data_storage']['mongo_port']
+    user, pw = _get_credentials(config, read_only)
+    key = (mongo_server, str(mongo_port), user, pw)
+    with _REGISTRY.lock:
+        if key not in _REGISTRY.clients:
+            metrics = PoolMetrics()
+            client = MongoClient(f'mongodb://{mongo_server}:{mongo_port}', connect=False, event_listeners=[metrics])
+            _authenticate(client, user, pw)
+            logging.debug(f'created new MongoDB client for {user}@{mongo_server}:{mongo_port}')
+            _REGISTRY.clients[key] = _ClientEntry(client, metrics)
+        return _REGISTRY.clients[key].client
+
+
+def _authenticate(client: MongoClient, user: str, pw: str):
+    try:
+        client.admin.authenticate(user, pw, mechanism='SCRAM-SHA-1')
+    except errors.OperationFailure as e:  # Authentication not successful
+        complete_shutdown('Error: Authentication not successful: {}'.format(e))
+
+
+def get_pool_metrics() -> List[dict]:
+    '''
+    Get connection pool statistics of all MongoDB clients of the current process.
+
+    :return: A list with entries of the form ``{'server': <server:port>, 'user': <user>, <stat>: <value>, ...}``.
+    '''
+    with _REGISTRY.lock:
+        return [
+            {'server': f'{server}:{port}', 'user': user, **entry.metrics.get_stats()}
+            for (server, port, user, _), entry in _REGISTRY.clients.items()
+        ]
+
+
+def close_mongo_clients():
+    '''
+    Close all shared MongoDB clients of the current process.
+    '''
+    with _REGISTRY.lock:
+        for entry in _REGISTRY.clients.values():
+            entry.client.close()
+        _REGISTRY.clients = {}
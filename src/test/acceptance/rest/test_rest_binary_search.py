@@ -37,7 +37,12 @@ class TestRestBinarySearch(TestAcceptanceBase):
         return result['request']['search_id']
 
     def _get_binary_search_result(self, search_id):
-        rv = self.test_client.get(f'/rest/binary_search/{search_id}', follow_redirects=True)
-        results = json.loads(rv.data.decode())
+        for _ in range(20):  # the search runs asynchronously
+            rv = self.test_client.get(f'/rest/binary_search/{search_id}', follow_redirects=True)
+            results = json.loads(rv.data.decode())
+            if results['status'] not in ['queued', 'running']:
+                break
+            sleep(0.5)
+        assert results['status'] == 'finished'
         assert 'binary_search_results' in results
         assert 'rulename' in results['binary_search_results']
@@ -1,3 +1,5 @@
+from time import sleep
+
 from test.acceptance.base_full_start import TestAcceptanceBaseFullStart
 
 
@@ -12,22 +14,21 @@ class TestAcceptanceBinarySearch(TestAcceptanceBaseFullStart):
         rv = self.test_client.get('/database/binary_search')
         assert b'<h3 class="mb-3">Binary Pattern Search</h3>' in rv.data
 
+    def _post_query_and_wait_for_result(self, data):
+        result_url = self.test_client.post('/database/binary_search', content_type='multipart/form-data', data=data).location
+        for _ in range(20):  # the search runs asynchronously
+            rv = self.test_client.get(result_url, follow_redirects=True)
+            if b'Waiting for results' not in rv.data:
+                break
+            sleep(0.5)
+        return rv
+
     def _query_page_post_file_query(self):
-        rv = self.test_client.post(
-            '/database/binary_search',
-            content_type='multipart/form-data',
-            data=self.query,
-            follow_redirects=True
-        )
+        rv = self._post_query_and_wait_for_result(self.query)
         assert b'testfile2' in rv.data
 
     def _query_page_post_firmware_query(self):
-        rv = self.test_client.post(
-            '/database/binary_search',
-            content_type='multipart/form-data',
-            data={**self.query, 'only_firmware': 'True'},
-            follow_redirects=True
-        )
+        rv = self._post_query_and_wait_for_result({**self.query, 'only_firmware': 'True'})
         assert self.test_fw_a.name.encode() in rv.data
         assert b'testfile2' not in rv.data
 
@@ -5,6 +5,7 @@ import os
 from base64 import standard_b64encode
 from configparser import ConfigParser
 from copy import deepcopy
+from io import BytesIO
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Optional, Union
@@ -12,7 +13,9 @@ from typing import Optional, Union
 from helperFunctions.config import load_config
 from helperFunctions.data_conversion import get_value_of_first_key, normalize_compare_id
 from helperFunctions.fileSystem import get_src_dir
+from helperFunctions.uid import create_uid
 from intercom.common_mongo_binding import InterComMongoInterface
+from intercom.notification import NOTIFICATION_COLLECTION
 from objects.file import FileObject
 from objects.firmware import Firmware
 from storage.db_interface_common import MongoInterfaceCommon
@@ -141,6 +144,15 @@ class MockFileObject:
         self.binary = binary
         self.file_path = file_path
         self.processed_analysis = {'file_type': {'mime': 'application/x-executable'}}
+        self.temporary_data = {}
+
+
+class BinaryStreamMock(BytesIO):
+
+    def __init__(self, binary, file_name):
+        super().__init__(binary)
+        self.length = len(binary)
+        self.file_name = file_name
 
 
 class DatabaseMock:  # pylint: disable=too-many-public-methods
@@ -305,6 +317,12 @@ class DatabaseMock:  # pylint: disable=too-many-public-methods
     def add_analysis_task(self, task):
         self.tasks.append(task)
 
+    def stage_binary(self, file_handle):
+        return create_uid(file_handle.read())
+
+    def discard_staged_binary(self, uid):
+        pass
+
     def add_re_analyze_task(self, task, unpack=True):
         self.tasks.append(task)
 
@@ -331,11 +349,21 @@ class DatabaseMock:  # pylint: disable=too-many-public-methods
             return TEST_TEXT_FILE.binary, TEST_TEXT_FILE.file_name
         return None
 
-    def get_repacked_binary_and_file_name(self, uid):
+    @staticmethod
+    def _get_repacked_binary_and_file_name(uid):
         if uid == TEST_FW.uid:
             return TEST_FW.binary, '{}.tar.gz'.format(TEST_FW.file_name)
         return None, None
 
+    def get_binary_stream(self, uid, packed=False):
+        result = self._get_repacked_binary_and_file_name(uid) if packed else self.get_binary_and_filename(uid)
+        if result is None or result[0] is None:
+            return None
+        return BinaryStreamMock(*result)
+
+    def delete_binary_stream(self, stream):
+        pass
+
     def add_binary_search_request(self, yara_rule_binary, firmware_uid=None):
         if yara_rule_binary == b'invalid_rule':
             return 'error: invalid rule'
@@ -346,6 +374,20 @@ class DatabaseMock:  # pylint: disable=too-many-public-methods
             return {'test_rule': ['test_uid']}, b'some yara rule'
         return None, None
 
+    def get_binary_search_job(self, uid):
+        if uid in ['some_id', 'running_id']:
+            status = 'finished' if uid == 'some_id' else 'running'
+            return {'_id': uid, 'status': status, 'scanned': 10, 'total': 20, 'error': None, 'match_count': 1}
+        return None
+
+    def get_binary_search_matches(self, uid, offset=0, limit=0):
+        if uid in ['some_id', 'running_id']:
+            return {'test_rule': ['test_uid']} if offset == 0 else {}
+        return {}
+
+    def cancel_binary_search(self, uid):
+        return uid == 'running_id'
+
     def get_statistic(self, identifier):
         if identifier == 'general':
             return {
@@ -456,6 +498,7 @@ def fake_exit(self, *args):
 def get_database_names(config):
     prefix = config.get('data_storage', 'intercom_database_prefix')
     databases = [f'{prefix}_{intercom_db}' for intercom_db in InterComMongoInterface.INTERCOM_CONNECTION_TYPES]
+    databases.append(f'{prefix}_{NOTIFICATION_COLLECTION}')
     databases.extend([
         config.get('data_storage', 'main_database'),
         config.get('data_storage', 'view_storage'),
@@ -9,8 +9,8 @@ from intercom.back_end_binding import InterComBackEndBinding
 from storage.MongoMgr import MongoMgr
 from test.common_helper import get_config_for_testing  # pylint: disable=wrong-import-order
 
-# This number must be changed, whenever a listener is added or removed
-NUMBER_OF_LISTENERS = 11
+# all listeners are served by a single dispatcher process
+NUMBER_OF_PROCESSES = 1
 
 
 class ServiceMock:
@@ -27,6 +27,7 @@ class ServiceMock:
 
 class CommunicationBackendMock:
 
+    CONNECTION_TYPE = 'test'
     counter = Value('i', 0)
 
     def __init__(self, config=None):
@@ -78,7 +79,7 @@ def get_intercom_for_testing():
 def test_backend_worker(intercom):
     test_queue = Queue()
     service = ServiceMock(test_queue)
-    intercom._start_listener(CommunicationBackendMock, service.add_task)  # pylint: disable=protected-access
+    intercom._start_dispatcher([(CommunicationBackendMock, service.add_task)])  # pylint: disable=protected-access
     result = test_queue.get(timeout=5)
     assert result == 'test_task', 'task not received correctly'
 
@@ -86,4 +87,4 @@ def test_backend_worker(intercom):
 def test_all_listeners_started(intercom):
     intercom.start_listeners()
     sleep(2)
-    assert len(intercom.process_list) == NUMBER_OF_LISTENERS, 'Not all listeners started'
+    assert len(intercom.process_list) == NUMBER_OF_PROCESSES, 'Dispatcher not started'
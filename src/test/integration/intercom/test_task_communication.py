@@ -3,15 +3,18 @@
 import gc
 import os
 import unittest
+from contextlib import contextmanager
+from io import BytesIO
 from tempfile import TemporaryDirectory
 from unittest import mock
 
 from intercom.back_end_binding import (
-    InterComBackEndAnalysisPlugInsPublisher, InterComBackEndAnalysisTask, InterComBackEndCompareTask,
-    InterComBackEndPeekBinaryTask, InterComBackEndRawDownloadTask, InterComBackEndReAnalyzeTask,
-    InterComBackEndSingleFileTask, InterComBackEndTarRepackTask
+    InterComBackEndAnalysisPlugInsPublisher, InterComBackEndAnalysisTask, InterComBackEndBinarySearchTask,
+    InterComBackEndBinaryStreamTask, InterComBackEndCompareTask, InterComBackEndPeekBinaryTask, InterComBackEndRawDownloadTask, InterComBackEndReAnalyzeTask,
+    InterComBackEndSingleFileTask
 )
 from intercom.front_end_binding import InterComFrontEndBinding
+from objects.firmware import Firmware
 from storage.fsorganizer import FSOrganizer
 from storage.MongoMgr import MongoMgr
 from test.common_helper import create_test_firmware, get_config_for_testing
@@ -62,9 +65,25 @@ class TestInterComTaskCommunication(unittest.TestCase):
         self.assertIsNotNone(task.file_path, 'file_path not set')
         self.assertTrue(os.path.exists(task.file_path), 'file does not exist')
 
+    def test_analysis_task_with_staged_binary(self):
+        self.backend = InterComBackEndAnalysisTask(config=self.config)
+        test_fw = create_test_firmware()
+        uid = self.frontend.stage_binary(BytesIO(test_fw.binary))
+        assert uid == test_fw.uid
+
+        uploaded_fw = Firmware()
+        uploaded_fw.uid, uploaded_fw.file_name = uid, test_fw.file_name
+        self.frontend.add_analysis_task(uploaded_fw)
+        task = self.backend.get_next_task()
+        assert task.uid == uid
+        assert task.binary == test_fw.binary
+        assert os.path.exists(task.file_path)
+        assert self.frontend.connections['binary_upload']['fs'].find_one() is None, 'staged binary not removed'
+
     def test_single_file_task(self):
         self.backend = InterComBackEndSingleFileTask(config=self.config)
         test_fw = create_test_firmware()
+        FSOrganizer(config=self.config).store_file(test_fw)  # the binary is not sent but referenced
         test_fw.file_path = None
         test_fw.scheduled_analysis = ['binwalk']
         self.frontend.add_single_file_task(test_fw)
@@ -138,15 +157,67 @@ class TestInterComTaskCommunication(unittest.TestCase):
 
     @mock.patch('intercom.front_end_binding.generate_task_id')
     @mock.patch('intercom.back_end_binding.BinaryService')
-    def test_tar_repack_task(self, binary_service_mock, generate_task_id_mock):
-        binary_service_mock().get_repacked_binary_and_file_name.return_value = (b'test', 'test.tar')
+    def test_binary_stream_task(self, binary_service_mock, generate_task_id_mock):
+        @contextmanager
+        def open_binary(uid, packed=False):
+            yield BytesIO(b'binary_content' * 100_000), 'test.bin'
+        binary_service_mock().open_binary.side_effect = open_binary
         generate_task_id_mock.return_value = 'valid_uid_0.0'
 
-        result = self.frontend.get_repacked_binary_and_file_name('valid_uid')
-        self.assertIsNone(result, 'should be none because of timeout')
+        assert self.frontend.get_binary_stream('valid_uid') is None, 'should be none because of timeout'
 
-        self.backend = InterComBackEndTarRepackTask(config=self.config)
+        self.backend = InterComBackEndBinaryStreamTask(config=self.config)
         task = self.backend.get_next_task()
-        self.assertEqual(task, 'valid_uid', 'task not correct')
-        result = self.frontend.get_repacked_binary_and_file_name('valid_uid_0.0')
-        self.assertEqual(result, (b'test', 'test.tar'), 'retrieved binary not correct')
+        assert task == ('valid_uid', False), 'task not correct'
+        stream = self.frontend.get_binary_stream('valid_uid')
+        assert stream.file_name == 'test.bin'
+        assert stream.length == len(b'binary_content') * 100_000
+        stream.seek(14)
+        assert stream.read(14) == b'binary_content'
+        self.frontend.delete_binary_stream(stream)
+        assert self.frontend.connections['binary_stream_task_resp']['fs'].find_one() is None
+
+    @mock.patch('intercom.back_end_binding.YaraBinarySearchScanner')
+    def test_binary_search_task(self, scanner_mock):
+        def get_matches(_, progress_callback):
+            progress_callback(0, 2)
+            yield 'rule_1', 'uid_1'
+            yield 'rule_2', 'uid_1'
+            progress_callback(2, 2)
+            yield 'rule_1', 'uid_2'
+        scanner_mock().get_binary_search_matches.side_effect = get_matches
+
+        search_id = self.frontend.add_binary_search_request(b'some rules', 'fw_uid')
+        assert self.frontend.get_binary_search_job(search_id)['status'] == 'queued'
+        assert self.frontend.get_binary_search_result(search_id) == (None, None)
+
+        self.backend = InterComBackEndBinarySearchTask(config=self.config)
+        assert self.backend.get_next_task() == (b'some rules', 'fw_uid')
+        self.backend.executor.shutdown(wait=True)
+
+        job = self.frontend.get_binary_search_job(search_id)
+        assert (job['status'], job['scanned'], job['total'], job['match_count']) == ('finished', 2, 2, 3)
+        assert self.frontend.get_binary_search_matches(search_id, offset=1, limit=1) == {'rule_2': ['uid_1']}
+        assert self.frontend.get_binary_search_result(search_id) == (
+            {'rule_1': ['uid_1', 'uid_2'], 'rule_2': ['uid_1']}, (b'some rules', 'fw_uid')
+        )
+        assert not self.frontend.cancel_binary_search(search_id), 'finished searches cannot be cancelled'
+
+    @mock.patch('intercom.back_end_binding.YaraBinarySearchScanner')
+    def test_binary_search_task_cancelled(self, scanner_mock):
+        def get_matches(_, progress_callback):
+            progress_callback(0, 2)
+            yield 'rule_1', 'uid_1'
+            self.frontend.cancel_binary_search(search_id)
+            progress_callback(1, 2)
+            yield 'rule_1', 'uid_2'
+        scanner_mock().get_binary_search_matches.side_effect = get_matches
+
+        search_id = self.frontend.add_binary_search_request(b'some rules')
+        self.backend = InterComBackEndBinarySearchTask(config=self.config)
+        self.backend.get_next_task()
+        self.backend.executor.shutdown(wait=True)
+
+        assert self.frontend.get_binary_search_job(search_id)['status'] == 'cancelled'
+        assert self.frontend.get_binary_search_matches(search_id) == {'rule_1': ['uid_1']}
+        assert self.frontend.get_binary_search_result(search_id) == ('Binary search cancelled', (b'some rules', None))
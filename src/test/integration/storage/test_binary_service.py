@@ -45,18 +45,17 @@ def test_get_binary_and_file_name_invalid_uid(binary_service):
     assert file_name is None, 'should be none'
 
 
-def test_get_repacked_binary_and_file_name(binary_service):
-    tar, file_name = binary_service.get_repacked_binary_and_file_name(TEST_FW.uid)
-    assert file_name == f'{TEST_FW.file_name}.tar.gz', 'file_name not correct'
-
-    file_type = magic.from_buffer(tar, mime=False)
+def test_open_binary_packed(binary_service):
+    with binary_service.open_binary(TEST_FW.uid, packed=True) as (fp, file_name):
+        assert file_name == f'{TEST_FW.file_name}.tar.gz', 'file_name not correct'
+        file_type = magic.from_buffer(fp.read(), mime=False)
     assert 'gzip compressed data' in file_type, 'Result is not an tar.gz file'
 
 
-def test_get_repacked_binary_and_file_name_invalid_uid(binary_service):
-    binary, file_name = binary_service.get_repacked_binary_and_file_name('invalid_uid')
-    assert binary is None, 'should be none'
-    assert file_name is None, 'should be none'
+def test_open_binary_invalid_uid(binary_service):
+    with binary_service.open_binary('invalid_uid', packed=True) as (fp, file_name):
+        assert fp is None, 'should be none'
+        assert file_name is None, 'should be none'
 
 
 def test_read_partial_binary(binary_service):
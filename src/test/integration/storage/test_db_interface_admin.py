@@ -65,7 +65,8 @@ class TestStorageDbInterfaceAdmin(unittest.TestCase):
     def test_remove_virtual_path_entries_no_other_roots(self):
         self.db_backend_interface.add_file_object(self.child_fo)
         self.assertIn(self.uid, self.db_backend_interface.file_objects.find_one(self.child_uid, {'virtual_file_path': 1})['virtual_file_path'])
-        removed_vps, deleted_files = self.admin_interface._remove_virtual_path_entries(self.uid, self.child_fo.uid)
+        fo_entry = self.db_backend_interface.file_objects.find_one(self.child_uid)
+        removed_vps, deleted_files = self.admin_interface._remove_virtual_path_entries(self.uid, fo_entry)
         self.assertIsNone(self.db_backend_interface.file_objects.find_one(self.child_uid))
         self.assertEqual(removed_vps, 0)
         self.assertEqual(deleted_files, 1)
@@ -74,8 +75,11 @@ class TestStorageDbInterfaceAdmin(unittest.TestCase):
         self.child_fo.virtual_file_path.update({'someuid': ['|someuid|/some/virtual/path']})
         self.db_backend_interface.add_file_object(self.child_fo)
         self.assertIn(self.uid, self.db_backend_interface.file_objects.find_one(self.child_uid, {'virtual_file_path': 1})['virtual_file_path'])
-        removed_vps, deleted_files = self.admin_interface._remove_virtual_path_entries(self.uid, self.child_fo.uid)
-        self.assertNotIn(self.uid, self.db_backend_interface.file_objects.find_one(self.child_uid, {'virtual_file_path': 1})['virtual_file_path'])
+        fo_entry = self.db_backend_interface.file_objects.find_one(self.child_uid)
+        removed_vps, deleted_files = self.admin_interface._remove_virtual_path_entries(self.uid, fo_entry)
+        fo_entry = self.db_backend_interface.file_objects.find_one(self.child_uid)
+        self.assertNotIn(self.uid, fo_entry['virtual_file_path'])
+        self.assertEqual(fo_entry['ancestor_uids'], ['someuid'])
         self.assertEqual(removed_vps, 1)
         self.assertEqual(deleted_files, 0)
 
@@ -116,6 +120,19 @@ class TestStorageDbInterfaceAdmin(unittest.TestCase):
         self.assertIn(self.child_fo.uid, delete_tasks, 'child delete task not found')
         self.assertEqual(len(delete_tasks), 2, 'number of delete tasks not correct')
 
+    def test_delete_firmware_nested(self):
+        grandchild_fo = create_test_file_object(bin_path='get_files_test/testfile2')
+        grandchild_fo.virtual_file_path = {self.uid: [f'|{self.uid}|{self.child_uid}|/{grandchild_fo.file_name}']}
+        self.child_fo.files_included = [grandchild_fo.uid]
+        for file_object in [self.test_firmware, self.child_fo, grandchild_fo]:
+            self.db_backend_interface.add_object(file_object)
+        assert self.db_backend_interface.get_uids_of_all_descendants(self.uid) == {self.child_uid, grandchild_fo.uid}
+        assert self.db_backend_interface.get_uids_of_all_descendants(self.child_uid) == {grandchild_fo.uid}
+
+        removed_vps, deleted_files = self.admin_interface.delete_firmware(self.uid, delete_root_file=False)
+        assert (removed_vps, deleted_files) == (0, 3)
+        assert self.db_backend_interface.file_objects.count_documents({}) == 0
+
     def _get_delete_tasks(self):
         intercom = InterComListener(config=self.config)
         intercom.CONNECTION_TYPE = 'file_delete_task'
@@ -3,6 +3,7 @@ import unittest
 from tempfile import TemporaryDirectory
 from time import time
 
+from helperFunctions.hash import get_tlsh_header_key
 from storage.db_interface_backend import BackEndDbInterface
 from storage.db_interface_common import MongoInterfaceCommon
 from storage.MongoMgr import MongoMgr
@@ -114,6 +115,21 @@ class TestStorageDbInterfaceBackend(unittest.TestCase):
         assert len(received_object.files_included) == 3
         assert sorted(received_object.parents) == ['parent_1', 'parent_2']
 
+    def test_update_file_object_virtual_file_path(self):
+        self.test_fo.virtual_file_path = {'root_1': ['root_1|parent_1|/old/path'], 'root_2': ['root_2|/path']}
+        self.test_fo.parent_firmware_uids = {'root_1', 'root_2'}
+        self.db_interface_backend.add_file_object(self.test_fo)
+        self.test_fo.virtual_file_path = {'root_1': ['root_1|parent_1|/new/path'], 'root_3': ['root_3|parent_3|/path']}
+        self.test_fo.parent_firmware_uids = {'root_1', 'root_3'}
+        self.db_interface_backend.add_file_object(self.test_fo)
+
+        db_entry = self.db_interface.file_objects.find_one(self.test_fo.uid)
+        assert db_entry['virtual_file_path'] == {
+            'root_1': ['root_1|parent_1|/new/path'], 'root_2': ['root_2|/path'], 'root_3': ['root_3|parent_3|/path']
+        }
+        assert sorted(db_entry['parent_firmware_uids']) == ['root_1', 'root_2', 'root_3']
+        assert sorted(db_entry['ancestor_uids']) == ['parent_1', 'parent_3', 'root_1', 'root_2', 'root_3']
+
     def test_add_and_get_object_including_comment(self):
         comment, author, date, uid = 'this is a test comment!', 'author', '1473431685', self.test_fo.uid
         self.test_fo.comments.append(
@@ -149,6 +165,15 @@ class TestStorageDbInterfaceBackend(unittest.TestCase):
         assert 'foo' in analysis
         assert analysis['foo'] == {'bar': 5}
 
+    def test_add_analysis_sets_tlsh_header(self):
+        self.db_interface_backend.add_object(self.test_fo)
+        tlsh_hash = '0CC34B06B1B258BCC16689308A67D671AB747E5053223B3E3684F7342F56E6F1F0DAB1'
+        self.test_fo.processed_analysis['file_hashes'] = {'tlsh': tlsh_hash}
+        self.db_interface_backend.add_analysis(self.test_fo)
+
+        db_entry = self.db_interface_backend.file_objects.find_one({'_id': self.test_fo.uid}, {'tlsh_header': 1})
+        assert db_entry['tlsh_header'] == get_tlsh_header_key(tlsh_hash)
+
     def test_crash_add_analysis(self):
         with self.assertRaises(RuntimeError):
             self.db_interface_backend.add_analysis(dict())
@@ -0,0 +1,53 @@
+# pylint: disable=redefined-outer-name
+import pytest
+
+from storage.db_interface_backend import BackEndDbInterface
+from storage.db_interface_indexes import MAIN_DATABASE_INDEXES, IndexDbInterface
+from storage.MongoMgr import MongoMgr
+from test.common_helper import create_test_file_object, create_test_firmware, get_config_for_testing
+
+
+@pytest.fixture(scope='module')
+def config():
+    test_config = get_config_for_testing()
+    mongo_server = MongoMgr(config=test_config)
+    yield test_config
+    mongo_server.shutdown()
+
+
+@pytest.fixture
+def index_interface(config):
+    interface = IndexDbInterface(config=config)
+    yield interface
+    interface.client.drop_database(config.get('data_storage', 'main_database'))
+    interface.shutdown()
+
+
+def test_create_and_verify_indexes(index_interface):
+    assert index_interface.get_missing_indexes() == MAIN_DATABASE_INDEXES
+    assert index_interface.verify_indexes() is False
+
+    index_interface.create_indexes()
+    assert index_interface.get_missing_indexes() == []
+    assert index_interface.verify_indexes() is True
+
+
+@pytest.mark.parametrize('collection, query', [
+    ('file_objects', {'parent_firmware_uids': 'some_uid'}),
+    ('file_objects', {'ancestor_uids': 'some_uid'}),
+    ('file_objects', {'parents': 'some_uid', 'parent_firmware_uids': 'root_uid'}),
+    ('file_objects', {'processed_analysis.unpacker.summary': 'packed'}),
+    ('file_objects', {'parent_firmware_uids': 'some_uid', 'processed_analysis.crypto_material.tags': {'$exists': True}}),
+    ('locks', {'uid': 'some_uid'}),
+])
+def test_hot_queries_use_indexes(config, index_interface, collection, query):
+    backend = BackEndDbInterface(config=config)
+    firmware, file_object = create_test_firmware(), create_test_file_object()
+    firmware.add_included_file(file_object)
+    backend.add_object(firmware)
+    backend.add_object(file_object)
+    backend.set_unpacking_lock('some_uid')
+    backend.shutdown()
+
+    index_interface.create_indexes()
+    assert not index_interface.query_uses_collection_scan(collection, query)
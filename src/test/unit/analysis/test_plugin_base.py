@@ -142,6 +142,74 @@ class TestPluginNotRunning(TestPluginBase):
         self.p_base.shutdown()
 
 
+class BatchPlugin(AnalysisBasePlugin):
+
+    def process_object(self, file_object):
+        if file_object.binary == b'bad file':
+            raise ValueError('bad file')
+        file_object.processed_analysis[self.NAME] = {'batch': None}
+        return file_object
+
+    def process_objects(self, file_objects):
+        for file_object in file_objects:
+            self.process_object(file_object)
+            file_object.processed_analysis[self.NAME] = {'batch': [fo.uid for fo in file_objects]}
+        return file_objects
+
+
+class TestPluginBatch(TestPluginBase):
+
+    def setUp(self):
+        self.config = self.set_up_base_config()
+        self.config.set('base', 'batch_size', '3')
+        self.base_plugin = BatchPlugin(self, self.config)
+
+    def test_batch_size(self):
+        assert self.base_plugin.batch_size == 3
+        self.config.remove_option('base', 'batch_size')
+        plugin = BatchPlugin(self, self.config, no_multithread=True)
+        plugin.shutdown()
+        assert plugin.batch_size == 1, 'batches should only be used if they are configured'
+
+    def test_get_queued_tasks(self):
+        self.base_plugin.stop_condition.value = 1  # the workers should not take the tasks
+        for process in self.base_plugin.workers:
+            process.join()
+        for index in range(4):
+            self.base_plugin.in_queue.put(FileObject(binary=f'file {index}'.encode()))
+        sleep(0.1)
+        assert len(self.base_plugin._get_queued_tasks(3)) == 3
+        assert len(self.base_plugin._get_queued_tasks(3)) == 1
+        assert self.base_plugin._get_queued_tasks(3) == []
+
+    def test_batch_processing(self):
+        file_objects = [FileObject(binary=f'file {index}'.encode()) for index in range(3)]
+        for file_object in file_objects:
+            file_object.processed_analysis['base'] = {}
+        self.base_plugin.worker_processing_batch_with_timeout(0, file_objects)
+        results = [self.base_plugin.out_queue.get(timeout=5) for _ in file_objects]
+        assert {fo.uid for fo in results} == {fo.uid for fo in file_objects}
+        for result in results:
+            assert result.processed_analysis['base']['batch'] == [fo.uid for fo in file_objects]
+            assert result.processed_analysis['base']['plugin_version'] == 'not set'
+
+    def test_batch_processing_failed(self):
+        file_objects = [FileObject(binary=b'file 1'), FileObject(binary=b'bad file'), FileObject(binary=b'file 2')]
+        for file_object in file_objects:
+            file_object.processed_analysis['base'] = {}
+        self.base_plugin.worker_processing_batch_with_timeout(0, file_objects)
+        results = {fo.uid: fo for fo in (self.base_plugin.out_queue.get(timeout=5) for _ in file_objects)}
+        # the files are analyzed again one by one: only the bad file fails
+        assert results[file_objects[1].uid].analysis_exception == ('base', 'Exception occurred during analysis')
+        for file_object in [file_objects[0], file_objects[2]]:
+            assert results[file_object.uid].processed_analysis['base']['batch'] is None
+            assert results[file_object.uid].analysis_exception is None
+
+    def test_default_process_objects(self):
+        file_objects = [FileObject(binary=b'file 1'), FileObject(binary=b'file 2')]
+        assert AnalysisBasePlugin.process_objects(self.base_plugin, file_objects) == file_objects
+
+
 class TestPluginTimeout(TestPluginBase):
 
     def setUp(self):
@@ -1,18 +1,44 @@
 # pylint: disable=wrong-import-order
 
-import logging
+import json
 import os
+import re
 from pathlib import Path
+from unittest.mock import Mock
 
-import pytest
+import yara
 
-from analysis.YaraPluginBase import YaraBasePlugin, _parse_meta_data, _split_output_in_rules_and_matches
+from analysis.YaraPluginBase import (
+    SHARED_MATCHES_KEY, SHARED_NAMESPACES_FILE, SHARED_SIGNATURE_FILE, YaraBasePlugin, _escape_matched_data
+)
 from helperFunctions.fileSystem import get_src_dir
+from helperFunctions.yara_literals import get_hex_strings
 from objects.file import FileObject
 from test.common_helper import get_test_data_dir
 from test.unit.analysis.analysis_plugin_test_class import AnalysisPluginTest
 
-YARA_TEST_OUTPUT = Path(get_test_data_dir(), 'yara_matches').read_text()
+TEST_RULES = '''
+rule testRule {
+    meta:
+        description = "foo [bar]"
+        open_source = false
+        score = 3
+    strings:
+        $a = /test \\d+\\.\\d+\\.\\d+/
+    condition:
+        $a
+}
+rule binaryRule {
+    strings:
+        $b = { 00 FF 62 61 72 }
+    condition:
+        $b
+}
+'''
+# output of the YARA command line tool (``yara -s -m <rules> <file>``)
+YARA_CLI_OUTPUT = Path(get_test_data_dir(), 'yara_matches').read_text()
+CLI_MATCH_REGEX = re.compile(r'^0x[0-9a-f]+:(\$\w*): (.+)$', flags=re.MULTILINE)
+CLI_HEX_DATA_REGEX = re.compile(r'^[0-9A-F]{2}( [0-9A-F]{2})*$')
 
 
 class TestAnalysisYaraBasePlugin(AnalysisPluginTest):
@@ -46,28 +72,107 @@ class TestAnalysisYaraBasePlugin(AnalysisPluginTest):
         self.assertEqual(processed_file.processed_analysis[self.PLUGIN_NAME]['summary'], [], 'summary not empty')
 
 
-def test_parse_yara_output():
-    matches = YaraBasePlugin._parse_yara_output(YARA_TEST_OUTPUT)  # pylint: disable=protected-access
+def test_convert_matches():
+    rules = yara.compile(source=TEST_RULES)
+    matches = YaraBasePlugin._convert_matches(rules.match(data=b'foo test 1.2.3 \x00\xffbar'), get_hex_strings(TEST_RULES))  # pylint: disable=protected-access
 
-    assert isinstance(matches, dict), 'matches should be dict'
-    assert 'PgpPublicKeyBlock' in matches.keys(), 'Pgp block should have been matched'
-    assert matches['PgpPublicKeyBlock']['strings'][0][0] == 0, 'first block should start at 0x0'
-    assert 'r_libjpeg8_8d12b1_0' in matches
-    assert matches['r_libjpeg8_8d12b1_0']['meta']['description'] == 'foo [bar]'
-    assert len(matches) == 7, 'not all matches found'
+    assert sorted(matches) == ['binaryRule', 'testRule']
+    assert matches['testRule'] == {
+        'rule': 'testRule',
+        'matches': True,
+        'strings': [(4, '$a', b'test 1.2.3')],
+        'meta': {'description': 'foo [bar]', 'open_source': False, 'score': 3},
+    }
+    assert matches['binaryRule']['strings'] == [(15, '$b', b'00 FF 62 61 72')]
+
+
+def test_convert_matches_like_yara_cli():
+    # the matched data of the CLI output is valid YARA syntax: each match is turned into a rule that matches it again
+    cli_matches = CLI_MATCH_REGEX.findall(YARA_CLI_OUTPUT)
+    rules, data = zip(*(_get_rule_and_data(f'r{index}', identifier, cli_data) for index, (identifier, cli_data) in enumerate(cli_matches)))
+    rule_source = '\n'.join(rules)
+    matches = YaraBasePlugin._convert_matches(yara.compile(source=rule_source).match(data=b'\n'.join(data)), get_hex_strings(rule_source))  # pylint: disable=protected-access
+
+    assert any(CLI_HEX_DATA_REGEX.match(cli_data) for _, cli_data in cli_matches), 'the output should contain hex strings'
+    for index, (identifier, cli_data) in enumerate(cli_matches):
+        assert {(string_id, matched_data) for _, string_id, matched_data in matches[f'r{index}']['strings']} == {(identifier, cli_data.encode())}
+
+
+def _get_rule_and_data(rule_name, identifier, cli_data):
+    if CLI_HEX_DATA_REGEX.match(cli_data):
+        return f'rule {rule_name} {{ strings: {identifier} = {{ {cli_data} }} condition: all of them }}', bytes.fromhex(cli_data)
+    unescaped_data = cli_data.encode().decode('unicode_escape').encode('latin-1')
+    return f'rule {rule_name} {{ strings: {identifier} = "{cli_data}" condition: all of them }}', unescaped_data
+
+
+def test_escape_matched_data():
+    assert _escape_matched_data(b'foo\x00\x7f\n bar') == b'foo\\x00\\x7F\\x0A bar'
 
 
 def test_get_signature_file_name():
     assert YaraBasePlugin._get_signature_file_name('/foo/bar/plugin_name/code/test.py') == 'plugin_name.yc'  # pylint: disable=protected-access
 
 
-def test_parse_meta_data_error(caplog):
-    with caplog.at_level(logging.WARNING):
-        _parse_meta_data('illegal,meta,entry')
-        assert 'Malformed meta' in caplog.messages[0]
+SHARED_RULES = {
+    'plugin_a': 'rule ruleA { strings: $a = "foo" condition: $a }',
+    'plugin_b': 'rule ruleB { strings: $b = "bar" condition: $b } rule ruleC { strings: $c = "baz" condition: $c }',
+    'plugin_c': 'rule ruleD { strings: $d = "foo" condition: $d }',
+}
+
+
+def _get_plugin(namespace, shared_rules, shared_namespaces):
+    plugin = YaraBasePlugin.__new__(YaraBasePlugin)
+    plugin.NAME, plugin.namespace = namespace, namespace
+    plugin.shared_rules, plugin.shared_namespaces = shared_rules, shared_namespaces
+    plugin.rules = yara.compile(source=SHARED_RULES[namespace])
+    plugin.hex_strings = {}
+    return plugin
+
+
+def test_shared_matches_are_passed_on():
+    shared_rules = yara.compile(sources=SHARED_RULES)
+    plugin_a = _get_plugin('plugin_a', shared_rules, set(SHARED_RULES))
+    plugin_b = _get_plugin('plugin_b', Mock(), set(SHARED_RULES))
+    file_object = FileObject(binary=b'foo bar', scheduled_analysis=['plugin_b', 'other_plugin'])
+
+    assert list(plugin_a._get_matches(file_object)) == ['ruleA']  # pylint: disable=protected-access
+    assert list(file_object.temporary_data[SHARED_MATCHES_KEY]) == ['plugin_b'], 'plugin_c is not scheduled'
+
+    assert list(plugin_b._get_matches(file_object)) == ['ruleB']  # pylint: disable=protected-access
+    assert plugin_b.shared_rules.match.call_count == 0, 'file should not be scanned again'
+    assert file_object.temporary_data[SHARED_MATCHES_KEY] == {}
+
+
+def test_own_rules_are_used_without_other_yara_plugins():
+    plugin_a = _get_plugin('plugin_a', Mock(), set(SHARED_RULES))
+    file_object = FileObject(binary=b'foo', scheduled_analysis=['other_plugin'])
+    assert list(plugin_a._get_matches(file_object)) == ['ruleA']  # pylint: disable=protected-access
+    assert plugin_a.shared_rules.match.call_count == 0, 'the shared rules of the other plugins are not needed'
+    assert SHARED_MATCHES_KEY not in file_object.temporary_data
+
+
+def test_shared_scan_is_repeated_if_matches_were_used():
+    plugin_a = _get_plugin('plugin_a', yara.compile(sources=SHARED_RULES), set(SHARED_RULES))
+    file_object = FileObject(binary=b'foo', scheduled_analysis=['plugin_c'])
+    assert list(plugin_a._get_matches(file_object)) == ['ruleA']  # pylint: disable=protected-access
+    assert list(plugin_a._get_matches(file_object)) == ['ruleA']  # pylint: disable=protected-access
+
+
+def test_load_shared_rules(tmp_path):
+    plugin = _get_plugin('plugin_a', None, set())
+    plugin.signature_path = str(tmp_path / 'plugin_a.yc')
+    yara.compile(source=SHARED_RULES['plugin_a']).save(plugin.signature_path)
+    assert plugin._load_shared_rules() == (None, set()), 'there is no shared signature file'  # pylint: disable=protected-access
+
+    yara.compile(sources=SHARED_RULES).save(str(tmp_path / SHARED_SIGNATURE_FILE))
+    (tmp_path / SHARED_NAMESPACES_FILE).write_text(json.dumps(sorted(SHARED_RULES)))
+    shared_rules, namespaces = plugin._load_shared_rules()  # pylint: disable=protected-access
+    assert isinstance(shared_rules, yara.Rules)
+    assert namespaces == {'plugin_a', 'plugin_b', 'plugin_c'}
 
+    plugin.namespace = 'plugin_d'
+    assert plugin._load_shared_rules() == (None, set()), 'plugin_d is not part of the shared rules'  # pylint: disable=protected-access
 
-def test_split_output_uneven():
-    uneven_yara_output = 'rule1 [meta=0,data=1] /path\n0x0:$a1: AA BB \nrule2 [meta=0,data=1] /path\n'
-    with pytest.raises(ValueError):
-        _split_output_in_rules_and_matches(uneven_yara_output)
+    plugin.namespace = 'plugin_a'
+    os.utime(tmp_path / SHARED_SIGNATURE_FILE, (0, 0))
+    assert plugin._load_shared_rules() == (None, set()), 'shared signature file is outdated'  # pylint: disable=protected-access
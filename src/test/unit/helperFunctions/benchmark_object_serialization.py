@@ -0,0 +1,61 @@
+'''
+Compare the encoding and decoding time and the size of the intercom payloads of
+:func:`helperFunctions.object_serialization.encode_file_object` (with the binary referenced or embedded) with pickling
+the complete objects (as it was done before the codec was introduced). The payloads are firmware objects for the given
+files (default: the test files) with the results of the file_type, file_hashes and printable_strings analyses.
+
+usage (from the src directory): python3 -m test.unit.helperFunctions.benchmark_object_serialization [<file> ...]
+'''
+import pickle
+import re
+import sys
+from pathlib import Path
+from timeit import timeit
+
+from fact_helper_file import get_file_type_from_path
+
+from helperFunctions.hash import get_hashes
+from helperFunctions.object_serialization import decode_file_object, encode_file_object
+from objects.firmware import Firmware
+from test.common_helper import get_test_data_dir
+
+TEST_FILES = [
+    Path(get_test_data_dir()) / path for path in ['container/test.zip', 'container/with_key.7z', 'test_executable', 'binwalk.out']
+]
+HASHES = ['md5', 'sha1', 'sha256', 'sha512', 'ssdeep', 'tlsh']
+STRING_REGEX = re.compile(rb'[\x20-\x7e]{8,}')
+REPETITIONS = 1000
+
+
+def create_payload(file_path: Path) -> Firmware:
+    firmware = Firmware(file_path=str(file_path))
+    firmware.device_name, firmware.vendor, firmware.device_class = 'test device', 'test vendor', 'Router'
+    firmware.version, firmware.release_date = '1.0', '1970-01-01'
+    file_type = get_file_type_from_path(str(file_path))
+    firmware.processed_analysis = {
+        'file_type': {**file_type, 'summary': [file_type['mime']]},
+        'file_hashes': get_hashes(firmware.binary, HASHES),
+        'printable_strings': {'strings': [string.decode() for string in STRING_REGEX.findall(firmware.binary)]},
+    }
+    return firmware
+
+
+def main():
+    files = [Path(path) for path in sys.argv[1:]] or TEST_FILES
+    methods = {
+        'pickle': (pickle.dumps, pickle.loads),
+        'bson (reference)': (encode_file_object, decode_file_object),
+        'bson (embedded)': (lambda fo: encode_file_object(fo, include_binary=True), decode_file_object),
+    }
+    print(f'{"file":<20} {"method":<18} {"size":>10} {"encode":>12} {"decode":>12}')
+    for file_path in files:
+        payload = create_payload(file_path)
+        for name, (encode, decode) in methods.items():
+            encoded = encode(payload)
+            encode_time = timeit(lambda: encode(payload), number=REPETITIONS) / REPETITIONS  # pylint: disable=cell-var-from-loop
+            decode_time = timeit(lambda: decode(encoded), number=REPETITIONS) / REPETITIONS  # pylint: disable=cell-var-from-loop
+            print(f'{file_path.name:<20} {name:<18} {len(encoded):>10} {encode_time * 10 ** 6:>9.1f} µs {decode_time * 10 ** 6:>9.1f} µs')
+
+
+if __name__ == '__main__':
+    main()
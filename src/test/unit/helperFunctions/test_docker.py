@@ -0,0 +1,122 @@
+# pylint: disable=redefined-outer-name,protected-access
+import threading
+from time import sleep
+
+import pytest
+from docker.errors import APIError
+from requests.exceptions import ReadTimeout
+
+from helperFunctions import docker as docker_helper
+from helperFunctions.docker import ContainerExecutor, get_docker_client
+
+
+class MockContainer:
+    def __init__(self, **kwargs):
+        self.run_kwargs = kwargs
+        self.killed = threading.Event()
+        self.commands = []
+
+    def exec_run(self, command, demux=False):
+        self.commands.append(command)
+        if command == 'hang':
+            self.killed.wait(5)
+            raise APIError('container was killed')
+        if command == 'error':
+            raise APIError('error')
+        if command == 'slow':
+            sleep(0.1)
+        return (0, (b'out', b'err')) if demux else (0, b'outerr')
+
+    def kill(self):
+        self.killed.set()
+
+
+class MockImage:
+    attrs = {'Config': {'Entrypoint': ['tool', '--flag']}}
+
+
+class MockClient:
+    def __init__(self):
+        self.started = []
+        self.containers = self
+        self.images = self
+
+    @staticmethod
+    def get(_):
+        return MockImage()
+
+    def run(self, image, **kwargs):
+        container = MockContainer(image=image, **kwargs)
+        self.started.append(container)
+        return container
+
+
+@pytest.fixture
+def mock_client(monkeypatch):
+    client = MockClient()
+    monkeypatch.setattr(docker_helper, 'get_docker_client', lambda **_: client)
+    return client
+
+
+def test_get_docker_client(monkeypatch):
+    created = []
+    monkeypatch.setattr(docker_helper, '_CLIENTS', {})
+    monkeypatch.setattr('docker.client.from_env', lambda **kwargs: created.append(kwargs) or object())
+
+    client = get_docker_client()
+    assert get_docker_client() is client
+    assert get_docker_client(timeout=None) is not client
+    assert len(created) == 2
+
+
+def test_execute(mock_client):
+    with ContainerExecutor('image', mounts=['mount']) as executor:
+        result = executor.execute(['command', 'arg'])
+        assert (result.args, result.returncode, result.stdout, result.stderr) == (['command', 'arg'], 0, 'out', 'err')
+        result = executor.execute('command', combine_stderr_stdout=True)
+        assert (result.stdout, result.stderr) == ('outerr', None)
+
+    # the container is reused for all tasks
+    assert len(mock_client.started) == 1
+    container = mock_client.started[0]
+    assert container.run_kwargs['image'] == 'image'
+    assert container.run_kwargs['mounts'] == ['mount']
+    assert container.run_kwargs['entrypoint'][0] == 'sleep'
+    assert container.commands == [['command', 'arg'], 'command']
+    assert container.killed.is_set(), 'containers should be stopped on shutdown'
+
+
+def test_execute_with_image_entrypoint(mock_client):
+    with ContainerExecutor('image', use_image_entrypoint=True) as executor:
+        assert executor.execute('--arg "a b"').args == '--arg "a b"'
+        executor.execute(['input'])
+    assert mock_client.started[0].commands == [['tool', '--flag', '--arg', 'a b'], ['tool', '--flag', 'input']]
+
+
+def test_execute_timeout(mock_client):
+    with ContainerExecutor('image', timeout=0.1) as executor:
+        with pytest.raises(ReadTimeout):
+            executor.execute('hang')
+        assert mock_client.started[0].killed.is_set()
+        # the killed container is replaced
+        assert executor.execute('command').returncode == 0
+    assert len(mock_client.started) == 2
+
+
+def test_execute_error(mock_client):
+    with ContainerExecutor('image') as executor:
+        with pytest.raises(APIError):
+            executor.execute('error')
+        assert executor.execute('command').returncode == 0
+    assert len(mock_client.started) == 2
+
+
+def test_execute_batch(mock_client):
+    with ContainerExecutor('image', containers=3, timeout=1) as executor:
+        results = executor.execute_batch(['slow'] * 6 + ['error', 'command'])
+
+    assert [result.stdout for result in results[:6]] == ['out'] * 6
+    assert isinstance(results[6], APIError)
+    assert results[7].stdout == 'out'
+    assert 1 < len(mock_client.started) <= 4  # at most 3 containers at a time (one was replaced after the error)
+    assert sum(len(container.commands) for container in mock_client.started) == 8
@@ -0,0 +1,74 @@
+# pylint: disable=wrong-import-order
+from pathlib import Path
+
+from helperFunctions.elf import ELF_METADATA_KEY, ElfMetadata, _suppress_stdout, get_elf_metadata, normalize_lief_items
+from objects.file import FileObject
+from test.common_helper import get_test_data_dir
+
+TEST_EXECUTABLE = Path(get_test_data_dir(), 'test_executable')
+
+
+def test_get_elf_metadata():
+    fo = FileObject(file_path=str(TEST_EXECUTABLE))
+    metadata = get_elf_metadata(fo)
+    assert isinstance(metadata, ElfMetadata)
+    assert any('printf' in function for function in metadata.imported_functions)
+    assert 'libc.so.6' in metadata.libraries
+    assert 'main' in metadata.symbols
+    assert metadata.lief_json['header']['file_type'] in ['DYN', 'DYNAMIC']
+    assert any(entry['tag'] == 'NEEDED' for entry in metadata.lief_json['dynamic_entries'])
+    assert metadata.modinfo is None
+    assert fo.temporary_data[ELF_METADATA_KEY] is metadata
+
+
+def test_get_elf_metadata_is_cached(monkeypatch):
+    fo = FileObject(file_path=str(TEST_EXECUTABLE))
+    metadata = get_elf_metadata(fo)
+    monkeypatch.setattr('lief.parse', lambda _: 1 / 0)
+    assert get_elf_metadata(fo) is metadata, 'the file should not be parsed again'
+
+
+def test_get_elf_metadata_bad_file(tmp_path):
+    bad_file = tmp_path / 'bad_file'
+    bad_file.write_bytes(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+    fo = FileObject(file_path=str(bad_file))
+    assert get_elf_metadata(fo) is None
+    assert fo.temporary_data[ELF_METADATA_KEY] is None
+
+
+def test_normalize_items_from_strings():
+    functions = ['printf', '__libc_start_main']
+    assert normalize_lief_items(functions) == functions
+
+
+def test_normalize_items_from_objects():
+    class Function:
+        def __init__(self, name):
+            self.name = name
+
+        def __str__(self):
+            return self.name
+
+    functions = ['printf', '__libc_start_main']
+    assert normalize_lief_items([Function(name) for name in functions]) == functions
+
+
+def test_normalize_items_empty_list():
+    assert normalize_lief_items([]) == []
+
+
+def print_foo():
+    print('foo', end='')
+
+
+def test_suppress_stdout(capsys):
+    print_foo()
+
+    without_decorator = capsys.readouterr()
+    assert without_decorator.out == 'foo'
+
+    with _suppress_stdout():
+        print_foo()
+
+    with_decorator = capsys.readouterr()
+    assert not with_decorator.out
@@ -2,11 +2,15 @@
 
 import os
 from pathlib import Path
+from time import time
 
 import pytest
 
-from helperFunctions.fileSystem import file_is_empty, get_relative_object_path, get_src_dir, get_template_dir
-from test.common_helper import get_test_data_dir
+from helperFunctions.fileSystem import (
+    file_is_empty, get_binary_or_memory_map, get_relative_object_path, get_src_dir, get_template_dir,
+    remove_least_recently_used
+)
+from test.common_helper import MockFileObject, get_test_data_dir
 
 TEST_DATA_DIR = Path(get_test_data_dir())
 
@@ -50,3 +54,27 @@ def test_file_is_zero():
 
 def test_file_is_zero_broken_link():
     assert not file_is_empty(TEST_DATA_DIR / 'broken_link'), 'Broken link is not empty'
+
+
+@pytest.mark.parametrize('content', [b'', b'foobar'])
+def test_get_binary_or_memory_map(tmp_path, content):
+    test_file = tmp_path / 'test_file'
+    test_file.write_bytes(content)
+
+    with get_binary_or_memory_map(MockFileObject(binary=None, file_path=str(test_file))) as data:
+        assert data[:] == content
+    with get_binary_or_memory_map(MockFileObject(binary=b'loaded', file_path=str(test_file))) as data:
+        assert data == b'loaded'
+
+
+def test_remove_least_recently_used(tmp_path):
+    old = time() - 100
+    for name, modification_time in [('old_1', old), ('old_2', old + 1), ('old_3', old + 2), ('recent', time() - 1), ('newest', time())]:
+        (tmp_path / name).mkdir()
+        os.utime(tmp_path / name, (modification_time, modification_time))
+
+    remove_least_recently_used(tmp_path, cache_size=3, min_age=10)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['newest', 'old_3', 'recent']
+    # entries that were used recently are kept even if there are too many
+    remove_least_recently_used(tmp_path, cache_size=1, min_age=10)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['newest', 'recent']
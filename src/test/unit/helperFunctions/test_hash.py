@@ -1,11 +1,14 @@
 # pylint: disable=wrong-import-order
 
 import os
+from io import BytesIO
 from pathlib import Path
 
+import pytest
+
 from helperFunctions.hash import (
-    _suppress_stdout, get_imphash, get_md5, get_sha256, get_ssdeep, get_ssdeep_comparison, get_tlsh,
-    normalize_lief_items
+    HashingReader, get_hash, get_hashes, get_imphash, get_md5, get_sha256, get_ssdeep, get_ssdeep_comparison, get_tlsh,
+    get_tlsh_comparison, get_tlsh_header_key, get_tlsh_header_keys_in_range
 )
 from test.common_helper import create_test_file_object, get_test_data_dir
 
@@ -19,6 +22,13 @@ def test_get_sha256():
     assert get_sha256(TEST_STRING) == TEST_SHA256, 'not correct from string'
 
 
+def test_hashing_reader():
+    reader = HashingReader(BytesIO(TEST_STRING.encode()))
+    assert reader.read(4) + reader.read() == TEST_STRING.encode()
+    assert reader.sha256 == TEST_SHA256
+    assert reader.size == len(TEST_STRING)
+
+
 def test_get_md5():
     assert get_md5(TEST_STRING) == TEST_MD5, 'not correct from string'
 
@@ -46,44 +56,37 @@ def test_imphash_bad_file():
     assert not get_imphash(fo)
 
 
-def test_normalize_items_from_strings():
-    functions = ['printf', '__libc_start_main']
-    assert normalize_lief_items(functions) == functions
-
-
-def test_normalize_items_from_objects():
-    class Function:
-        def __init__(self, name):
-            self.name = name
-
-        def __str__(self):
-            return self.name
-
-    functions = ['printf', '__libc_start_main']
-    assert normalize_lief_items([Function(name) for name in functions]) == functions
-
-
-def test_normalize_items_empty_list():
-    assert normalize_lief_items([]) == []
-
+def test_get_tlsh():
+    assert get_tlsh(b'foobar') == ''  # make sure the result is not 'TNULL'
+    assert get_tlsh(os.urandom(2**7)) != ''  # the new tlsh version should work for smaller inputs
 
-def print_foo():
-    print('foo', end='')
 
+@pytest.mark.parametrize('threads', [1, 4])
+def test_get_hashes(threads):
+    data = os.urandom(10_000)
+    result = get_hashes(data, ['md5', 'sha256', 'foo', 'ssdeep', 'tlsh'], threads=threads, chunk_size=999)
+    assert result == {
+        'md5': get_hash('md5', data), 'sha256': get_hash('sha256', data), 'ssdeep': get_ssdeep(data), 'tlsh': get_tlsh(data)
+    }
 
-def test_suppress_stdout(capsys):
-    print_foo()
 
-    without_decorator = capsys.readouterr()
-    assert without_decorator.out == 'foo'
+def test_get_hashes_small_input():
+    assert get_hashes(b'', ['sha256', 'tlsh']) == {'sha256': get_sha256(b'')}
+    assert get_hashes(TEST_STRING.encode(), ['sha256', 'tlsh']) == {'sha256': TEST_SHA256}
 
-    with _suppress_stdout():
-        print_foo()
 
-    with_decorator = capsys.readouterr()
-    assert not with_decorator.out
+@pytest.mark.parametrize('tlsh_hash', ['', 'TNULL', 'T1ABC', 'X' * 70])
+def test_get_tlsh_header_key_invalid(tlsh_hash):
+    assert get_tlsh_header_key(tlsh_hash) is None
+    assert get_tlsh_header_keys_in_range(tlsh_hash, 150) == []
 
 
-def test_get_tlsh():
-    assert get_tlsh(b'foobar') == ''  # make sure the result is not 'TNULL'
-    assert get_tlsh(os.urandom(2**7)) != ''  # the new tlsh version should work for smaller inputs
+def test_tlsh_header_keys_in_range():
+    base = os.urandom(2**12)
+    hashes = [get_tlsh(base[:length] + os.urandom(extra)) for length in range(256, 2**12, 256) for extra in (0, 64, 1024)]
+    for tlsh_hash in hashes:
+        keys_in_range = get_tlsh_header_keys_in_range(tlsh_hash, 150)
+        assert get_tlsh_header_key(tlsh_hash) == get_tlsh_header_key(tlsh_hash[2:])  # with and without version prefix
+        for other_hash in hashes:
+            if get_tlsh_comparison(tlsh_hash, other_hash) <= 150:
+                assert get_tlsh_header_key(other_hash) in keys_in_range
@@ -3,8 +3,7 @@ import unittest
 import pytest
 
 from helperFunctions.mongo_task_conversion import (
-    _get_tag_list, _get_uid_of_analysis_task, _get_uploaded_file_binary, check_for_errors,
-    convert_analysis_task_to_fw_obj
+    _get_tag_list, _get_uploaded_file_binary, check_for_errors, convert_analysis_task_to_fw_obj
 )
 from objects.firmware import Firmware
 
@@ -44,10 +43,6 @@ class TestMongoTask(unittest.TestCase):
     def test_get_uploaded_file_binary_error(self):
         self.assertEqual(_get_uploaded_file_binary(None, None), None, 'missing upload file should lead to None')
 
-    def test_get_uid_of_analysis_task(self):
-        analysis_task = {'binary': b'this is a test'}
-        self.assertEqual(_get_uid_of_analysis_task(analysis_task), '2e99758548972a8e8822ad47fa1017ff72f06f3ff6a016851f45c398732bc50c_14', 'result is not a uid')
-
     def test_convert_analysis_task_to_firmware_object(self):
         fw_obj = convert_analysis_task_to_fw_obj(TEST_TASK)
         self.assertIsInstance(fw_obj, Firmware, 'return type not correct')
@@ -0,0 +1,67 @@
+import pickle
+
+import bson
+import pytest
+
+from helperFunctions.object_serialization import (
+    CODEC_VERSION, ObjectCodecError, decode_file_object, encode_file_object
+)
+from objects.firmware import Firmware
+from test.common_helper import create_test_file_object, create_test_firmware
+
+
+def test_encode_decode_firmware():
+    firmware = create_test_firmware()
+    firmware.set_tag('foo')
+    firmware.files_included = {'uid_1', 'uid_2'}
+    decoded = decode_file_object(encode_file_object(firmware))
+
+    assert isinstance(decoded, Firmware)
+    assert decoded.uid == firmware.uid
+    assert decoded.binary is None, 'binary should only be referenced'
+    assert decoded.file_path == firmware.file_path
+    for attribute in ['device_name', 'vendor', 'version', 'device_class', 'release_date', 'part', 'tags', 'md5',
+                      'files_included', 'processed_analysis', 'virtual_file_path']:
+        assert getattr(decoded, attribute) == getattr(firmware, attribute), f'{attribute} not decoded correctly'
+
+
+def test_encode_decode_file_object():
+    file_object = create_test_file_object()
+    file_object.parent_firmware_uids = {'parent_uid'}
+    file_object.scheduled_analysis = ['foo', 'bar']
+    decoded = decode_file_object(encode_file_object(file_object))
+
+    assert not isinstance(decoded, Firmware)
+    assert decoded.uid == file_object.uid
+    assert decoded.parent_firmware_uids == {'parent_uid'}
+    assert decoded.scheduled_analysis == ['foo', 'bar']
+    assert decoded.processed_analysis == file_object.processed_analysis
+
+
+def test_include_binary():
+    firmware = create_test_firmware()
+    decoded = decode_file_object(encode_file_object(firmware, include_binary=True))
+    assert decoded.binary == firmware.binary
+    assert decoded.uid == firmware.uid
+    assert decoded.sha256 == firmware.sha256
+
+
+def test_analysis_with_non_bson_types():
+    file_object = create_test_file_object()
+    file_object.processed_analysis['foo'] = {'set': {1, 2, 3}}
+    decoded = decode_file_object(encode_file_object(file_object))
+    assert decoded.processed_analysis['foo'] == {'set': {1, 2, 3}}
+
+
+def test_binary_not_included():
+    firmware = create_test_firmware()
+    encoded_firmware = encode_file_object(firmware)
+    assert firmware.binary not in encoded_firmware
+    assert len(encoded_firmware) < len(pickle.dumps(firmware))
+
+
+def test_unknown_codec_version():
+    document = bson.decode(encode_file_object(create_test_file_object()))
+    document['codec_version'] = CODEC_VERSION + 1
+    with pytest.raises(ObjectCodecError):
+        decode_file_object(bson.encode(document))
@@ -3,7 +3,7 @@ from copy import deepcopy
 
 import pytest
 
-from helperFunctions.object_storage import update_included_files, update_virtual_file_path
+from helperFunctions.object_storage import update_virtual_file_path
 from test.common_helper import TEST_TEXT_FILE
 
 
@@ -21,20 +21,6 @@ def mongo_entry():
     }
 
 
-def test_update_included_files_normal(mutable_test_file, mongo_entry):
-    mutable_test_file.files_included = ['i', 'like', 'files']
-    files_included = update_included_files(mutable_test_file, mongo_entry)
-    assert len(files_included) == 5
-    assert all(name in files_included for name in ['i', 'like', 'files', 'legacy_file', 'duplicated_entry'])
-
-
-def test_update_included_files_duplicate(mutable_test_file, mongo_entry):
-    mutable_test_file.files_included = ['beware', 'the', 'duplicated_entry']
-    files_included = update_included_files(mutable_test_file, mongo_entry)
-    assert len(files_included) == 4
-    assert all(name in files_included for name in ['legacy_file', 'beware', 'the', 'duplicated_entry'])
-
-
 def test_update_virtual_file_path_normal(mutable_test_file, mongo_entry):
     mutable_test_file.virtual_file_path = {'new': ['new|path|in|another|object']}
     virtual_file_path = update_virtual_file_path(mutable_test_file, mongo_entry)
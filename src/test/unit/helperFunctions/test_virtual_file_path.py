@@ -1,7 +1,8 @@
 import pytest
 
 from helperFunctions.virtual_file_path import (
-    get_base_of_virtual_path, get_top_of_virtual_path, join_virtual_path, merge_vfp_lists, split_virtual_path
+    get_ancestor_uids, get_base_of_virtual_path, get_top_of_virtual_path, get_uids_of_virtual_path, join_virtual_path,
+    merge_vfp_lists, split_virtual_path
 )
 
 
@@ -40,6 +41,27 @@ def test_get_top_of_virtual_path(virtual_path, expected_output):
     assert get_top_of_virtual_path(virtual_path) == expected_output
 
 
+@pytest.mark.parametrize('virtual_path, expected_output', [
+    ('', []),
+    ('root_uid', []),
+    ('|root_uid|', []),
+    ('root_uid|child_uid|/dir/file', ['root_uid', 'child_uid']),
+])
+def test_get_uids_of_virtual_path(virtual_path, expected_output):
+    assert get_uids_of_virtual_path(virtual_path) == expected_output
+
+
+@pytest.mark.parametrize('virtual_file_path, expected_output', [
+    ({}, set()),
+    ({'root_uid': ['root_uid']}, set()),
+    ({'root_uid': ['root_uid|/file']}, {'root_uid'}),
+    ({'root_uid': ['root_uid|fs_uid|/file', 'root_uid|/link']}, {'root_uid', 'fs_uid'}),
+    ({'fw_1': ['fw_1|fs_1|/file'], 'fw_2': ['fw_2|fs_2|/file']}, {'fw_1', 'fs_1', 'fw_2', 'fs_2'}),
+])
+def test_get_ancestor_uids(virtual_file_path, expected_output):
+    assert get_ancestor_uids(virtual_file_path) == expected_output
+
+
 @pytest.mark.parametrize('old_vfp_list, new_vfp_list, expected_output', [
     ([], [], []),
     (['foo|/bar'], ['different|/base'], ['different|/base', 'foo|/bar']),
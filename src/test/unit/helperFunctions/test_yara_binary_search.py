@@ -1,7 +1,8 @@
 import unittest
 from os import path
-from subprocess import CalledProcessError
-from unittest.mock import patch
+from tempfile import TemporaryDirectory
+
+import yara
 
 from helperFunctions import yara_binary_search
 from test.common_helper import get_config_for_testing, get_test_data_dir
@@ -30,10 +31,6 @@ def mock_connect_to_enter(_, config=None):
     return yara_binary_search.YaraBinarySearchScannerDbInterface(config)
 
 
-def mock_check_output(call, shell=True, stderr=None, *_, **__):
-    raise CalledProcessError(1, call, b'', stderr)
-
-
 class TestHelperFunctionsYaraBinarySearch(unittest.TestCase):
 
     def setUp(self):
@@ -62,35 +59,41 @@ class TestHelperFunctionsYaraBinarySearch(unittest.TestCase):
         assert isinstance(result, str)
         assert 'There seems to be an error in the rule file' in result
 
-    @patch('helperFunctions.yara_binary_search.subprocess.run', side_effect=mock_check_output)
-    def test_get_binary_search_yara_error(self, _):
-        result = self.yara_binary_scanner.get_binary_search_result((self.yara_rule, None))
-        assert isinstance(result, str)
-        assert 'Error when calling YARA' in result
+    def test_get_binary_search_result_with_index(self):
+        test_dir = path.join(get_test_data_dir(), TEST_FILE_1)
+        with TemporaryDirectory(prefix='fact_test_') as tmp_dir:
+            config = {'data_storage': {
+                'firmware_file_storage_directory': test_dir, 'binary_search_index': path.join(tmp_dir, 'index.db')
+            }}
+            scanner = yara_binary_search.YaraBinarySearchScanner(config)
+            scanner.index.add_file(TEST_FILE_1, path.join(test_dir, TEST_FILE_1))
+            scanner.index.add_file(TEST_FILE_2, path.join(test_dir, 'bi', TEST_FILE_2))
+
+            all_files = scanner._get_file_paths(None)
+            candidates = scanner._filter_candidates(all_files, self.yara_rule.decode())
+            assert sorted(path.basename(file_path) for file_path in candidates) == [TEST_FILE_1, TEST_FILE_3]  # 3 is not indexed
+            assert scanner._filter_candidates(all_files, 'rule r {strings: $a = /test/ condition: $a}') == all_files
+
+            assert scanner.get_binary_search_result((self.yara_rule, None)) == {'test_rule': [TEST_FILE_1]}
+
+    def test_scan_files(self):
+        rules = yara.compile(source=self.yara_rule.decode())
+        file_paths = self.yara_binary_scanner._get_file_paths(None)
+        progress = []
+        result = list(self.yara_binary_scanner.scan_files(rules, file_paths, lambda *args: progress.append(args)))
+        assert [file_path for file_path, _ in result] == file_paths
+        assert [path.basename(file_path) for file_path, matches in result if matches] == [TEST_FILE_1]
+        assert progress == [(0, 3), (3, 3)]
+
+    def test_scan_files_missing_file(self):
+        rules = yara.compile(source=self.yara_rule.decode())
+        assert list(self.yara_binary_scanner.scan_files(rules, ['/non/existing/file'])) == [('/non/existing/file', [])]
 
     def test_eliminate_duplicates(self):
         test_dict = {1: [1, 2, 3, 3], 2: [1, 1, 2, 3]}
         self.yara_binary_scanner._eliminate_duplicates(test_dict)
         self.assertEqual(test_dict, {1: [1, 2, 3], 2: [1, 2, 3]})
 
-    def test_parse_raw_result(self):
-        raw_result = 'rule_1 match_1\nrule_1 match_2\nrule_2 match_1'
-        result = self.yara_binary_scanner._parse_raw_result(raw_result)
-        self.assertEqual(result, {'rule_1': ['match_1', 'match_2'], 'rule_2': ['match_1']})
-
-    def test_execute_yara_search(self):
-        test_rule_path = path.join(get_test_data_dir(), 'yara_binary_search_test_rule')
-        result = self.yara_binary_scanner._execute_yara_search(test_rule_path)
-        self.assertTrue('test_rule' in result)
-
-    def test_execute_yara_search_for_single_file(self):
-        test_rule_path = path.join(get_test_data_dir(), 'yara_binary_search_test_rule')
-        result = self.yara_binary_scanner._execute_yara_search(
-            test_rule_path,
-            target_path=path.join(get_test_data_dir(), TEST_FILE_1, TEST_FILE_1)
-        )
-        self.assertTrue('test_rule' in result)
-
 
 class TestYaraBinarySearchScannerDbInterface(unittest.TestCase):
 
@@ -0,0 +1,48 @@
+import pytest
+
+from helperFunctions.yara_literals import get_hex_strings, get_required_literals, get_trigrams
+
+
+@pytest.mark.parametrize('rules, expected_result', [
+    ('rule r {strings: $a = "test1234" condition: $a}', [[b'test1234']]),
+    ('rule r {strings: $a = "foo\\x00\\n\\"" condition: $a}', [[b'foo\x00\n"']]),
+    ('rule r {strings: $a = "test" wide ascii condition: $a}', [[b'test'], [b't\x00e\x00s\x00t\x00']]),
+    ('rule r {strings: $a = { 41 42 43 ?? 44 45 [2-4] (01 02 03 | 04) 11 12 13 } condition: $a}', [[b'ABC', b'\x11\x12\x13']]),
+    ('rule r {strings: $a = "abc" $b = "def" condition: 2 of ($a, $b)}', [[b'abc'], [b'def']]),
+    ('rule r {meta: x = "strings:" strings: $a = "abc" condition: any of them} rule s {strings: $a = "def" condition: $a}', [[b'abc'], [b'def']]),
+    ('// rule comment\nrule r {strings: $a = "abc" /* $b = "x" */ condition: $a}', [[b'abc']]),
+])
+def test_get_required_literals(rules, expected_result):
+    assert get_required_literals(rules) == expected_result
+
+
+@pytest.mark.parametrize('rules', [
+    'import "pe"\nrule r {strings: $a = "abc" condition: $a}',
+    'rule r {condition: filesize < 100}',
+    'rule r {strings: $a = "abc" condition: not $a}',
+    'rule r {strings: $a = "abc" condition: $a or filesize < 100}',
+    'rule r {strings: $a = "abc" condition: $a at 0}',
+    'rule r {strings: $a = "ab" condition: $a}',
+    'rule r {strings: $a = "abc" nocase condition: $a}',
+    'rule r {strings: $a = /abc/ condition: $a}',
+    'rule r {strings: $a = { 41 ?? 42 } condition: $a}',
+    'global rule r {strings: $a = "abc" condition: $a}',
+    'rule r {strings: $a = "abc" condition: $a} rule s {strings: $a = /abc/ condition: $a}',
+    'no rule',
+])
+def test_get_required_literals_not_possible(rules):
+    assert get_required_literals(rules) is None
+
+
+def test_get_hex_strings():
+    rules = '''
+    rule r { meta: x = "$c = { 00 }" strings: $a = "abc" $b = { 41 ?? 42 } /* $d = { 00 } */ $e = /a{2}/ condition: any of them }
+    private rule s { strings: $a = { 00 FF } condition: $a }
+    rule t { condition: true }
+    '''
+    assert get_hex_strings(rules) == {'r': ['$b'], 's': ['$a']}
+
+
+def test_get_trigrams():
+    assert get_trigrams(b'abcd') == {0x616263, 0x626364}
+    assert get_trigrams(b'ab') == set()
@@ -0,0 +1,132 @@
+# pylint: disable=protected-access
+from configparser import ConfigParser
+from threading import Thread
+from time import sleep, time
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from intercom.notification import (
+    NAMESPACE_EXISTS, NOTIFICATION_COLLECTION, InProcessNotificationChannel, MongoNotificationChannel, PollingChannel,
+    get_notification_channel
+)
+
+
+def test_in_process_notification():
+    receiver, sender = InProcessNotificationChannel(), InProcessNotificationChannel()
+    sender.notify('analysis_task')
+    assert receiver.wait_for_notification(['analysis_task', 'compare_task'], timeout=1) == {'analysis_task'}
+    assert receiver.wait_for_notification(['analysis_task'], timeout=0.01) == set(), 'notification received twice'
+
+
+def test_in_process_notification_other_connection():
+    receiver, sender = InProcessNotificationChannel(), InProcessNotificationChannel()
+    sender.notify('compare_task')
+    assert receiver.wait_for_notification(['analysis_task'], timeout=0.01) == set()
+
+
+def test_in_process_notification_wakes_up_waiting_receiver():
+    receiver, sender = InProcessNotificationChannel(), InProcessNotificationChannel()
+    thread = Thread(target=lambda: (sleep(0.05), sender.notify('analysis_task')))
+    start = time()
+    thread.start()
+    assert receiver.wait_for_notification(['analysis_task'], timeout=5) == {'analysis_task'}
+    assert time() - start < 1
+    thread.join()
+
+
+def test_polling_channel():
+    channel = PollingChannel()
+    channel.notify('analysis_task')
+    assert channel.wait_for_notification(['analysis_task'], timeout=0.01) == set()
+
+
+class MockCursor:
+    def __init__(self, collection, min_id):
+        self.collection, self.min_id, self.alive = collection, min_id, True
+
+    def max_await_time_ms(self, _):
+        return self
+
+    def __iter__(self):
+        for document in list(self.collection.documents):
+            if document['_id'] >= self.min_id:
+                self.min_id = document['_id'] + 1
+                yield document
+
+
+class MockCollection:
+    def __init__(self):
+        self.documents = []
+        self.next_id = 0
+
+    def update_one(self, query, update, upsert=False):
+        assert query == {'_id': {'$in': []}} and upsert, 'the _id should be created by the server'
+        self.next_id += 1  # the server's order (independent of the clocks of the clients)
+        self.documents.append({'_id': self.next_id, **update['$set']})
+
+    def find_one(self, query=None, projection=None, sort=None):
+        documents = [doc for doc in self.documents if query is None or doc['_id'] == query['_id']]
+        if sort is not None:
+            documents.reverse()
+        return documents[0] if documents else None
+
+    def find(self, query, cursor_type=None):
+        return MockCursor(self, query['_id']['$gte'] if query else 0)
+
+
+class MockDatabase:
+    def __init__(self):
+        self.collection = None
+
+    def command(self, command, name, **_):
+        assert (command, name) == ('create', NOTIFICATION_COLLECTION)
+        if self.collection is not None:
+            raise OperationFailure('collection already exists', code=NAMESPACE_EXISTS)
+        self.collection = MockCollection()
+
+    def __getitem__(self, _):
+        return self.collection
+
+
+def test_mongo_notification():
+    client = {'notifications': MockDatabase()}
+    receiver, sender = MongoNotificationChannel(client, 'notifications'), MongoNotificationChannel(client, 'notifications')
+    assert receiver.wait_for_notification(['analysis_task'], timeout=0.01) == set()
+    sender.notify('compare_task')
+    sender.notify('analysis_task')
+    assert receiver.wait_for_notification(['analysis_task'], timeout=1) == {'analysis_task'}
+    assert receiver.wait_for_notification(['analysis_task'], timeout=0.01) == set(), 'notification received twice'
+    assert len(client['notifications'].collection.documents) == 3, 'the collection should only be initialized once'
+
+
+def test_mongo_notification_new_cursor():
+    client = {'notifications': MockDatabase()}
+    receiver, sender = MongoNotificationChannel(client, 'notifications'), MongoNotificationChannel(client, 'notifications')
+    assert receiver.wait_for_notification(['analysis_task'], timeout=0.01) == set()
+    receiver._cursor = None  # e.g. after a connection error
+    sender.notify('analysis_task')
+    assert receiver.wait_for_notification(['analysis_task'], timeout=1) == {'analysis_task'}
+
+    receiver._cursor = None
+    client['notifications'].collection.documents.clear()  # the last read notification was removed
+    sender.notify('compare_task')
+    sender.notify('analysis_task')
+    assert receiver.wait_for_notification(['analysis_task'], timeout=0.01) == set(), 'should start at the newest notification'
+    sender.notify('analysis_task')
+    assert receiver.wait_for_notification(['analysis_task'], timeout=1) == {'analysis_task'}
+
+
+@pytest.mark.parametrize('channel_type, client, expected_class', [
+    ('mongo', {'test_notifications': None}, MongoNotificationChannel),
+    ('mongo', None, PollingChannel),
+    ('in_process', None, InProcessNotificationChannel),
+    ('none', {'test_notifications': None}, PollingChannel),
+])
+def test_get_notification_channel(channel_type, client, expected_class):
+    config = ConfigParser()
+    config.read_dict({
+        'ExpertSettings': {'intercom_notification_channel': channel_type},
+        'data_storage': {'intercom_database_prefix': 'test'},
+    })
+    assert isinstance(get_notification_channel(config, client), expected_class)
@@ -1,6 +1,7 @@
 from common_helper_files import get_binary_from_file
 
 from objects.file import FileObject
+from objects.firmware import Firmware
 from test.common_helper import get_test_data_dir
 
 
@@ -36,6 +37,12 @@ class TestObjectsFile:  # pylint: disable=no-self-use
         assert child.depth == parent.depth + 1, 'child depth not updated'
         assert child.scheduled_analysis == ['test'], 'child did not get scheduled analysis list of parent'
 
+    def test_add_included_file_parent_firmware_uids(self):
+        firmware = Firmware(binary=b'firmware')
+        child = FileObject(binary=b'child')
+        firmware.add_included_file(child)
+        assert child.parent_firmware_uids == {firmware.uid}
+
     def test_get_included_files(self):
         test_parent = FileObject(binary=b'parent_file')
         test_child = FileObject(binary=b'1st child')
@@ -0,0 +1,55 @@
+import pytest
+
+from storage.binary_search_index import BinarySearchIndex, get_file_trigrams
+
+
+@pytest.fixture
+def index(tmp_path):
+    yield BinarySearchIndex(str(tmp_path / 'index.db'))
+
+
+@pytest.fixture
+def test_files(tmp_path):
+    files = {'uid_1': b'foo test1234 bar', 'uid_2': b'foo bar', 'uid_3': b'\x00\x01'}
+    for uid, content in files.items():
+        (tmp_path / uid).write_bytes(content)
+    yield {uid: str(tmp_path / uid) for uid in files}
+
+
+def test_get_file_trigrams(test_files):
+    assert sorted(get_file_trigrams(test_files['uid_2'])) == sorted([0x666f6f, 0x6f6f20, 0x6f2062, 0x206261, 0x626172])
+    assert len(get_file_trigrams(test_files['uid_3'])) == 0
+    assert get_file_trigrams(test_files['uid_1'], max_count=5) is None
+
+
+def test_add_and_remove_file(index, test_files):
+    index.add_file('uid_1', test_files['uid_1'])
+    index.add_file('uid_1', test_files['uid_1'])
+    assert index.contains('uid_1')
+    assert not index.contains('uid_2')
+
+    index.add_file('uid_2', test_files['uid_2'])
+    assert index.filter_candidates(['uid_1', 'uid_2'], [[b'test1234']]) == ['uid_1']
+
+    index.remove_file('uid_1')
+    assert not index.contains('uid_1')
+    assert index.filter_candidates(['uid_1'], [[b'foo']]) == ['uid_1'], 'removed files are always candidates'
+
+
+@pytest.mark.parametrize('alternatives, expected_result', [
+    ([[b'test1234']], ['uid_1', 'uid_4']),
+    ([[b'foo', b'bar']], ['uid_1', 'uid_2', 'uid_4']),
+    ([[b'foo', b'xyz']], ['uid_4']),
+    ([[b'xyz'], [b'1234']], ['uid_1', 'uid_4']),
+])
+def test_filter_candidates(index, test_files, alternatives, expected_result):
+    for uid, file_path in test_files.items():
+        index.add_file(uid, file_path)
+    assert index.filter_candidates(['uid_1', 'uid_2', 'uid_3', 'uid_4'], alternatives) == expected_result
+
+
+def test_filter_candidates_not_indexed(index, test_files, monkeypatch):
+    monkeypatch.setattr('storage.binary_search_index.MAX_TRIGRAMS', 5)
+    index.add_file('uid_1', test_files['uid_1'])
+    assert index.contains('uid_1')
+    assert index.filter_candidates(['uid_1'], [[b'xyz']]) == ['uid_1'], 'files with too many trigrams are not filtered'
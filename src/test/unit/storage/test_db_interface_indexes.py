@@ -0,0 +1,27 @@
+import pytest
+
+from storage.db_interface_indexes import MAIN_DATABASE_INDEXES, IndexDefinition, plan_contains_collection_scan
+
+
+def _explain_output(winning_plan: dict) -> dict:
+    return {'queryPlanner': {'winningPlan': winning_plan}}
+
+
+@pytest.mark.parametrize('winning_plan, expected_result', [
+    ({'stage': 'COLLSCAN'}, True),
+    ({'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN'}}, False),
+    ({'stage': 'SORT', 'inputStage': {'stage': 'FETCH', 'inputStage': {'stage': 'COLLSCAN'}}}, True),
+    ({'stage': 'OR', 'inputStages': [{'stage': 'IXSCAN'}, {'stage': 'IXSCAN'}]}, False),
+    ({'stage': 'OR', 'inputStages': [{'stage': 'IXSCAN'}, {'stage': 'COLLSCAN'}]}, True),
+])
+def test_plan_contains_collection_scan(winning_plan, expected_result):
+    assert plan_contains_collection_scan(_explain_output(winning_plan)) == expected_result
+
+
+def test_index_name():
+    assert IndexDefinition('foo', [('bar', 1)]).name == 'bar_1'
+    assert IndexDefinition('foo', [('bar', 1), ('baz.test', -1)]).name == 'bar_1_baz.test_-1'
+
+
+def test_index_definitions_unique():
+    assert len({(index.collection, index.name) for index in MAIN_DATABASE_INDEXES}) == len(MAIN_DATABASE_INDEXES)
@@ -1,6 +1,7 @@
 import gc
 import os
 import unittest
+from io import BytesIO
 from configparser import ConfigParser
 from tempfile import TemporaryDirectory
 
@@ -44,3 +45,24 @@ class TestFsOrganizer(unittest.TestCase):
 
         self.fs_organzier.delete_file(file_object.uid)
         self.assertFalse(os.path.exists(file_object.file_path), 'file not deleted')
+
+    def test_store_file_from_stream(self):
+        file_object = FileObject()
+        file_object.uid = '36bbe50ed96841d10443bcb670d6554f0a34b761be67ec9c4a8ad2c0c44ca42c_5'
+
+        self.fs_organzier.store_file_from_stream(file_object, BytesIO(b'abcde'))
+        self.check_file_presence_and_content(f'{self.ds_tmp_dir.name}/36/{file_object.uid}', b'abcde')
+        assert file_object.binary == b'abcde'
+        assert file_object.file_path == f'{self.ds_tmp_dir.name}/36/{file_object.uid}'
+        assert os.listdir(f'{self.ds_tmp_dir.name}/36') == [file_object.uid], 'temporary file not removed'
+
+    def test_binary_search_index(self):
+        self.fs_organzier.config.set('data_storage', 'binary_search_index', f'{self.ds_tmp_dir.name}/index.db')
+        fs_organizer = FSOrganizer(self.fs_organzier.config)
+        file_object = FileObject(b'abcde')
+
+        fs_organizer.store_file(file_object)
+        assert fs_organizer.binary_search_index.contains(file_object.uid)
+
+        fs_organizer.delete_file(file_object.uid)
+        assert not fs_organizer.binary_search_index.contains(file_object.uid)
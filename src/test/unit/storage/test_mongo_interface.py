@@ -0,0 +1,57 @@
+# pylint: disable=protected-access,redefined-outer-name,unused-argument
+import pytest
+
+from storage import mongo_interface
+from storage.mongo_interface import MongoInterface, PoolMetrics, close_mongo_clients, get_mongo_client, get_pool_metrics
+from test.common_helper import get_config_for_testing
+
+
+@pytest.fixture
+def no_authentication(monkeypatch):
+    monkeypatch.setattr(mongo_interface, '_authenticate', lambda *_: None)
+    yield
+    close_mongo_clients()
+
+
+@pytest.fixture(scope='module')
+def config():
+    return get_config_for_testing()
+
+
+def test_client_is_shared(config, no_authentication):
+    assert get_mongo_client(config) is get_mongo_client(config)
+    assert MongoInterface(config).client is MongoInterface(config).client
+
+
+def test_client_per_credentials(config, no_authentication):
+    admin_client = get_mongo_client(config, read_only=False)
+    read_only_client = get_mongo_client(config, read_only=True)
+    assert admin_client is not read_only_client
+    assert {entry['user'] for entry in get_pool_metrics()} == {
+        config['data_storage']['db_admin_user'], config['data_storage']['db_readonly_user']
+    }
+
+
+def test_new_client_after_fork(config, no_authentication):
+    client = get_mongo_client(config)
+    mongo_interface._REGISTRY.reset()  # called in the child process after a fork
+    assert get_mongo_client(config) is not client
+
+
+def test_close_clients(config, no_authentication):
+    get_mongo_client(config)
+    close_mongo_clients()
+    assert get_pool_metrics() == []
+
+
+def test_pool_metrics():
+    metrics = PoolMetrics()
+    for _ in range(3):
+        metrics.connection_created(None)
+        metrics.connection_checked_out(None)
+    metrics.connection_checked_in(None)
+    metrics.connection_closed(None)
+    stats = metrics.get_stats()
+    assert stats['open_connections'] == 2
+    assert stats['connections_in_use'] == 2
+    assert stats['connections_created'] == 3
@@ -35,3 +35,15 @@ def test_bad_tar_flag(test_app):
     result = decode_response(test_app.get('/rest/binary/{}?tar=True'.format(TEST_FW.uid)))
     assert result['status'] == 1
     assert 'tar must be true or false' in result['error_message']
+
+
+def test_raw_download(test_app):
+    result = test_app.get('/rest/binary/{}?raw=true'.format(TEST_FW.uid))
+    assert result.data == TEST_FW.binary
+    assert 'filename=test.zip' in result.headers['Content-Disposition']
+
+
+def test_raw_download_range(test_app):
+    result = test_app.get('/rest/binary/{}?raw=true'.format(TEST_FW.uid), headers={'Range': 'bytes=-4'})
+    assert result.status_code == 206
+    assert result.data == TEST_FW.binary[-4:]
@@ -44,4 +44,32 @@ def test_get_result_without_search_id(test_app):
 
 def test_get_result_non_existent_id(test_app):
     result = decode_response(test_app.get('/rest/binary_search/foobar'))
-    assert 'result is not ready yet' in result['error_message']
+    assert 'Unknown search ID' in result['error_message']
+
+
+def test_get_result(test_app):
+    result = decode_response(test_app.get('/rest/binary_search/some_id'))
+    assert result['binary_search_results'] == {'test_rule': ['test_uid']}
+    assert result['status'] == 'finished'
+    assert result['total_matches'] == 1
+
+
+def test_get_partial_result_page(test_app):
+    result = decode_response(test_app.get('/rest/binary_search/running_id?offset=1&limit=10'))
+    assert result['binary_search_results'] == {}
+    assert result['status'] == 'running'
+    assert result['progress'] == {'scanned': 10, 'total': 20}
+    assert result['request'] == {'search_id': 'running_id', 'offset': 1, 'limit': 10}
+
+
+def test_get_result_bad_paging(test_app):
+    result = decode_response(test_app.get('/rest/binary_search/some_id?offset=foo'))
+    assert 'Malformed offset parameter' in result['error_message']
+
+
+def test_cancel_search(test_app):
+    result = decode_response(test_app.delete('/rest/binary_search/running_id'))
+    assert 'is being cancelled' in result['message']
+
+    result = decode_response(test_app.delete('/rest/binary_search/some_id'))
+    assert 'the search is already done' in result['error_message']
@@ -91,6 +91,12 @@ def test_submit_invalid_binary(test_app):
     assert 'Could not parse binary (must be valid base64!)' in result['error_message']
 
 
+def test_submit_empty_binary(test_app):
+    request_data = {**TEST_FW_PAYLOAD, 'binary': ''}
+    result = decode_response(test_app.put('/rest/firmware', json=request_data))
+    assert 'Please specify the binary' in result['error_message']
+
+
 def test_submit_success(test_app):
     result = decode_response(test_app.put('/rest/firmware', json=TEST_FW_PAYLOAD))
     assert result['status'] == 0
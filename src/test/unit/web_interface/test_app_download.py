@@ -21,3 +21,20 @@ class TestAppDownload(WebInterfaceTest):
         rv = self.test_client.get('/tar-download/{}'.format(TEST_FW.uid))
         assert TEST_FW.binary in rv.data
         assert 'attachment; filename=test.zip' in rv.headers['Content-Disposition']
+
+    def test_app_download_range(self):
+        rv = self.test_client.get('/download/{}'.format(TEST_FW.uid), headers={'Range': 'bytes=2-5'})
+        assert rv.status_code == 206
+        assert rv.data == TEST_FW.binary[2:6]
+        assert rv.headers['Content-Range'] == 'bytes 2-5/{}'.format(len(TEST_FW.binary))
+
+    def test_app_tar_download_no_range(self):
+        # the archive is repacked for each request -> the parts of a resumed download would not fit together
+        rv = self.test_client.get('/tar-download/{}'.format(TEST_FW.uid), headers={'Range': 'bytes=2-5'})
+        assert rv.status_code == 200
+        assert rv.data == TEST_FW.binary
+        assert rv.headers['Accept-Ranges'] == 'none'
+
+    def test_app_download_invalid_range(self):
+        rv = self.test_client.get('/download/{}'.format(TEST_FW.uid), headers={'Range': 'bytes=1000000000-'})
+        assert rv.status_code == 416
@@ -26,6 +26,20 @@ class TestAppUpload(WebInterfaceTest):
         assert b'Please specify the version' in rv.data
         self.assertEqual(len(self.mocked_interface.tasks), 0, 'task added to intercom but should not')
 
+    def test_app_upload_empty_file(self):
+        rv = self.test_client.post('/upload', content_type='multipart/form-data', data={
+            'file': (BytesIO(b''), 'test_file.txt'),
+            'device_name': 'test_device',
+            'device_part': 'complete',
+            'device_class': 'test_class',
+            'version': '1.0',
+            'vendor': 'test_vendor',
+            'release_date': '01.01.1970',
+            'tags': '',
+            'analysis_systems': ['dummy']}, follow_redirects=True)
+        assert b'Please specify the binary' in rv.data
+        self.assertEqual(len(self.mocked_interface.tasks), 0, 'task added to intercom but should not')
+
     def test_app_upload_valid_firmware(self):
         rv = self.test_client.post('/upload', content_type='multipart/form-data', data={
             'file': (BytesIO(b'test_file_content'), 'test_file.txt'),
@@ -238,12 +238,16 @@ class DatabaseRoutes(ComponentBase):
     @roles_accepted(*PRIVILEGES['pattern_search'])
     @AppRoute('/database/binary_search_results', GET)
     def get_binary_search_results(self):
-        firmware_dict, error, yara_rules = None, None, None
+        firmware_dict, error, yara_rules, job = None, None, None, None
         if request.args.get('request_id'):
             request_id = request.args.get('request_id')
             with ConnectTo(InterComFrontEndBinding, self._config) as connection:
                 result, yara_rules = connection.get_binary_search_result(request_id)
-            if isinstance(result, str):
+                if result is None:
+                    job = connection.get_binary_search_job(request_id)
+            if result is None and job is None:
+                error = f'Unknown request ID {request_id}'
+            elif isinstance(result, str):
                 error = result
             elif result is not None:
                 yara_rules = make_unicode_string(yara_rules[0])
@@ -255,7 +259,7 @@ class DatabaseRoutes(ComponentBase):
             request_id = None
         return render_template(
             'database/database_binary_search_results.html',
-            result=firmware_dict, error=error, request_id=request_id, yara_rules=yara_rules
+            result=firmware_dict, error=error, request_id=request_id, yara_rules=yara_rules, job=job
         )
 
     def _store_binary_search_query(self, binary_search_results: list, yara_rules: str) -> str:
@@ -1,5 +1,6 @@
 import json
 from configparser import ConfigParser
+from functools import partial
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from time import sleep
@@ -18,6 +19,7 @@ from storage.db_interface_frontend import FrontEndDbInterface
 from web_interface.components.component_base import GET, POST, AppRoute, ComponentBase
 from web_interface.security.decorator import roles_accepted
 from web_interface.security.privileges import PRIVILEGES
+from web_interface.streaming import create_streaming_response
 
 
 class IORoutes(ComponentBase):
@@ -27,13 +29,18 @@ class IORoutes(ComponentBase):
     @roles_accepted(*PRIVILEGES['submit_analysis'])
     @AppRoute('/upload', POST)
     def post_upload(self):
-        analysis_task = create_analysis_task(request, self._config)
-        error = check_for_errors(analysis_task)
-        if error:
-            return self.get_upload(error=error)
-        fw = convert_analysis_task_to_fw_obj(analysis_task)
+        analysis_task = create_analysis_task(request)
         with ConnectTo(InterComFrontEndBinding, self._config) as sc:
-            sc.add_analysis_task(fw)
+            if request.files['file']:
+                analysis_task['uid'] = sc.stage_binary(request.files['file'].stream)
+            error = check_for_errors(analysis_task)
+            if analysis_task['uid'] is not None and analysis_task['uid'].endswith('_0'):  # the size is part of the UID
+                error['binary'] = 'Please specify the binary'
+            if error:
+                if analysis_task['uid'] is not None:
+                    sc.discard_staged_binary(analysis_task['uid'])
+                return self.get_upload(error=error)
+            sc.add_analysis_task(convert_analysis_task_to_fw_obj(analysis_task))
         return render_template('upload/upload_successful.html', uid=analysis_task['uid'])
 
     @roles_accepted(*PRIVILEGES['submit_analysis'])
@@ -71,16 +78,13 @@ class IORoutes(ComponentBase):
         if not object_exists:
             return render_template('uid_not_found.html', uid=uid)
         with ConnectTo(InterComFrontEndBinding, self._config) as sc:
-            if packed:
-                result = sc.get_repacked_binary_and_file_name(uid)
-            else:
-                result = sc.get_binary_and_filename(uid)
-        if result is None:
-            return render_template('error.html', message='timeout')
-        binary, file_name = result
-        response = make_response(binary)
-        response.headers['Content-Disposition'] = 'attachment; filename={}'.format(file_name)
-        return response
+            stream = sc.get_binary_stream(uid, packed=packed)
+            if stream is None:
+                return render_template('error.html', message='timeout')
+            return create_streaming_response(
+                stream, stream.length, stream.file_name, on_close=partial(sc.delete_binary_stream, stream),
+                accept_ranges=not packed,
+            )
 
     @roles_accepted(*PRIVILEGES['download'])
     @AppRoute('/ida-download/<compare_id>', GET)
@@ -1,4 +1,5 @@
 from base64 import standard_b64encode
+from functools import partial
 
 from flask import request
 from flask_restx import Namespace
@@ -11,6 +12,7 @@ from web_interface.rest.helper import error_message, get_boolean_from_request, s
 from web_interface.rest.rest_resource_base import RestResourceBase
 from web_interface.security.decorator import roles_accepted
 from web_interface.security.privileges import PRIVILEGES
+from web_interface.streaming import create_streaming_response
 
 api = Namespace('rest/binary', description='Request the binary of a given firmware or file object')
 
@@ -21,7 +23,11 @@ api = Namespace('rest/binary', description='Request the binary of a given firmwa
         'description': 'Request a binary by providing the uid of the corresponding object',
         'params': {
             'uid': 'Firmware UID',
-            'tar': {'description': 'Get tar.gz packed contents of target', 'in': 'query', 'type': 'boolean', 'default': 'false'}
+            'tar': {'description': 'Get tar.gz packed contents of target', 'in': 'query', 'type': 'boolean', 'default': 'false'},
+            'raw': {
+                'description': 'Get the binary as (streamed) file instead of base64 encoded in JSON. Supports range requests.',
+                'in': 'query', 'type': 'boolean', 'default': 'false'
+            }
         }
     }
 )
@@ -36,6 +42,7 @@ class RestBinary(RestResourceBase):
         The uid of the file_object in question has to be given in the url
         Alternatively the tar parameter can be used to get the target archive as its content repacked into a .tar.gz.
         The return format will be {"binary": b64_encoded_binary_or_tar_gz, "file_name": file_name}
+        If the raw parameter is set, the binary is sent as file (and HTTP range requests can be used to download parts)
         '''
         with ConnectTo(FrontEndDbInterface, self.config) as db_service:
             existence = db_service.exists(uid)
@@ -45,14 +52,24 @@ class RestBinary(RestResourceBase):
 
         try:
             tar_flag = get_boolean_from_request(request.args, 'tar')
+            raw_flag = get_boolean_from_request(request.args, 'raw')
         except ValueError as value_error:
-            return error_message(str(value_error), self.URL, request_data=dict(uid=uid, tar=request.args.get('tar')))
+            return error_message(
+                str(value_error), self.URL,
+                request_data=dict(uid=uid, tar=request.args.get('tar'), raw=request.args.get('raw'))
+            )
 
         with ConnectTo(InterComFrontEndBinding, self.config) as intercom:
-            if not tar_flag:
-                binary, file_name = intercom.get_binary_and_filename(uid)
-            else:
-                binary, file_name = intercom.get_repacked_binary_and_file_name(uid)
+            stream = intercom.get_binary_stream(uid, packed=tar_flag)
+            if stream is None:
+                return error_message('timeout', self.URL, request_data={'uid': uid, 'tar': tar_flag}, return_code=503)
+            if raw_flag:
+                return create_streaming_response(
+                    stream, stream.length, stream.file_name, on_close=partial(intercom.delete_binary_stream, stream),
+                    accept_ranges=not tar_flag,
+                )
+            binary, file_name = stream.read(), stream.file_name
+            intercom.delete_binary_stream(stream)
 
         response = {
             'binary': standard_b64encode(binary).decode(),
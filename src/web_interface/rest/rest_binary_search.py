@@ -5,7 +5,7 @@ from helperFunctions.database import ConnectTo
 from helperFunctions.yara_binary_search import is_valid_yara_rule_file
 from intercom.front_end_binding import InterComFrontEndBinding
 from storage.db_interface_frontend import FrontEndDbInterface
-from web_interface.rest.helper import error_message, success_message
+from web_interface.rest.helper import error_message, get_paging, success_message
 from web_interface.rest.rest_resource_base import RestResourceBase
 from web_interface.security.decorator import roles_accepted
 from web_interface.security.privileges import PRIVILEGES
@@ -43,7 +43,7 @@ class RestBinarySearchPost(RestResourceBase):
             search_id = intercom.add_binary_search_request(payload_data['rule_file'].encode(), payload_data['uid'])
 
         return success_message(
-            {'message': 'Started binary search. Please use GET and the search_id to get the results'},
+            {'message': 'Started binary search. Please use GET and the search_id to get the (partial) results'},
             self.URL,
             request_data={'search_id': search_id}
         )
@@ -66,18 +66,56 @@ class RestBinarySearchGet(RestResourceBase):
     URL = '/rest/binary_search'
 
     @roles_accepted(*PRIVILEGES['pattern_search'])
-    @api.doc(responses={200: 'Success', 400: 'Unknown search ID'})
+    @api.doc(
+        responses={200: 'Success', 400: 'Unknown search ID'},
+        params={
+            'offset': {'description': 'offset of results (paging)', 'in': 'query', 'type': 'int'},
+            'limit': {'description': 'number of results (paging)', 'in': 'query', 'type': 'int'},
+        }
+    )
     def get(self, search_id=None):
         '''
         Get the results of a previously initiated binary search
         The `search_id` is needed to fetch the corresponding search result
-        The result of the search request can only be fetched once
-        After this the search needs to be started again.
+        The matches can be fetched while the search is still running: `status` is one of `queued`, `running`,
+        `finished`, `failed` and `cancelled` and `progress` contains the number of scanned files and the total number
+        of files (if already known)
+        The matches are paged in the order they were found using `offset` and `limit` (`total_matches` is the number of
+        matches found so far)
         '''
+        try:
+            offset, limit = get_paging(request.args)
+        except ValueError as value_error:
+            return error_message(str(value_error), self.URL, request_data=dict(request.args))
+
         with ConnectTo(InterComFrontEndBinding, self.config) as intercom:
-            result, _ = intercom.get_binary_search_result(search_id)
+            job = intercom.get_binary_search_job(search_id)
+            if job is None:
+                return error_message(f'Unknown search ID {search_id}', self.URL)
+            result = intercom.get_binary_search_matches(search_id, offset=offset, limit=limit)
 
-        if result is None:
-            return error_message('The result is not ready yet or it has already been fetched', self.URL)
+        if job['status'] == 'failed':
+            return error_message(job['error'], self.URL, request_data={'search_id': search_id})
+        return success_message(
+            {
+                'binary_search_results': result,
+                'status': job['status'],
+                'progress': {'scanned': job['scanned'], 'total': job['total']},
+                'total_matches': job['match_count'],
+            },
+            self.URL,
+            request_data={'search_id': search_id, 'offset': offset, 'limit': limit}
+        )
 
-        return success_message({'binary_search_results': result}, self.URL)
+    @roles_accepted(*PRIVILEGES['pattern_search'])
+    @api.doc(responses={200: 'Success', 400: 'Unknown search ID or search already done'})
+    def delete(self, search_id=None):
+        '''
+        Cancel a queued or running binary search
+        The matches that were found until the search was stopped can still be fetched
+        '''
+        with ConnectTo(InterComFrontEndBinding, self.config) as intercom:
+            cancelled = intercom.cancel_binary_search(search_id)
+        if not cancelled:
+            return error_message(f'Unknown search ID {search_id} or the search is already done', self.URL)
+        return success_message({'message': 'Binary search is being cancelled'}, self.URL, {'search_id': search_id})
@@ -116,6 +116,8 @@ class RestFirmwareGetWithoutUid(RestResourceBase):
             data['binary'] = standard_b64decode(data['binary'])
         except binascii.Error:
             return dict(error_message='Could not parse binary (must be valid base64!)')
+        if not data['binary']:
+            return dict(error_message='Please specify the binary')
         firmware_object = convert_analysis_task_to_fw_obj(data)
         with ConnectTo(InterComFrontEndBinding, self.config) as intercom:
             intercom.add_analysis_task(firmware_object)
@@ -0,0 +1,61 @@
+'''
+Streaming of (large) files in HTTP responses with support for range requests.
+'''
+from typing import BinaryIO, Callable, Iterator, Optional
+
+from flask import Response, request
+from werkzeug.datastructures import ContentRange
+
+CHUNK_SIZE = 256 * 1024
+
+
+def create_streaming_response(
+        file_handle: BinaryIO, size: int, file_name: str, on_close: Optional[Callable[[], None]] = None,
+        accept_ranges: bool = True
+) -> Response:
+    '''
+    Create a response that sends the file in chunks. If the request contains a (single) byte range, only this range
+    is sent (status 206). Multiple ranges are not supported and result in the complete file being sent.
+
+    :param file_handle: The (seekable) file that should be sent.
+    :param size: The size of the file in bytes.
+    :param file_name: The file name used for the download.
+    :param on_close: Function that is called after the response was sent (e.g. to clean up the file).
+    :param accept_ranges: Support range requests. Must not be set for files that are generated for each request (e.g.
+        repacked archives), because the parts of a resumed download would belong to different files.
+    :return: The streaming response.
+    '''
+    start, end, status = 0, size, 200
+    if accept_ranges and request.range is not None and request.range.units == 'bytes' and len(request.range.ranges) == 1:
+        byte_range = request.range.range_for_length(size)
+        if byte_range is None:
+            response = Response(status=416)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            _call_on_close(response, on_close)
+            return response
+        (start, end), status = byte_range, 206
+
+    response = Response(_read_chunks(file_handle, start, end), status=status, mimetype='application/octet-stream')
+    response.headers['Content-Length'] = str(end - start)
+    response.headers['Content-Disposition'] = f'attachment; filename={file_name}'
+    response.headers['Accept-Ranges'] = 'bytes' if accept_ranges else 'none'
+    if status == 206:
+        response.headers['Content-Range'] = ContentRange('bytes', start, end, size).to_header()
+    _call_on_close(response, on_close)
+    return response
+
+
+def _read_chunks(file_handle: BinaryIO, start: int, end: int) -> Iterator[bytes]:
+    file_handle.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = file_handle.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def _call_on_close(response: Response, on_close: Optional[Callable[[], None]]):
+    if on_close is not None:
+        response.call_on_close(on_close)